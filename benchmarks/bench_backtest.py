@@ -0,0 +1,32 @@
+"""
+Benchmark of the vectorized Backtester on a year of 1-minute candles for one pair.
+
+Run from the repository root:
+    python -m benchmarks.bench_backtest [rows]
+"""
+import sys
+import timeit
+
+from benchmarks.bench_indicator_signals import SIGNAL_SETTING
+from src.modules.classes.backtesting import Backtester
+from test.fixtures import random_ohlcv
+
+YEAR_OF_MINUTES = 365 * 24 * 60
+
+
+def main(rows=YEAR_OF_MINUTES):
+    ohlcv = random_ohlcv(rows, price=0.1, volatility=0.001, freq='min')
+    backtester = Backtester()
+    print(f"{rows} candles")
+    print(f"{'strategy':>14} {'time (ms)':>10} {'trades':>7} {'roi (%)':>9}")
+    strategies = {'macd+rsi': lambda: backtester.run_macd_rsi(ohlcv)}
+    for name in ('rsi', 'stoch', 'bbands', 'sma_crossover'):
+        strategies[name] = lambda name=name: backtester.run_indicator(ohlcv, dict(SIGNAL_SETTING, signal=name))
+    for name, run in strategies.items():
+        results = run()
+        elapsed = min(timeit.repeat(run, number=1, repeat=3)) * 1000
+        print(f"{name:>14} {elapsed:>10.1f} {len(results['trades']):>7} {results['roi']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else YEAR_OF_MINUTES)
@@ -0,0 +1,66 @@
+"""
+Loading a year of 1-minute candles for one pair: the month-partitioned CandleArchive against the SQLite
+candles table and a pandas CSV, for the whole year and for a one-week slice.
+
+Run from the repository root:
+    python -m benchmarks.bench_candle_archive
+"""
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from src.modules.engine.candle_archive import CandleArchive
+from src.modules.engine.candle_store import CANDLE_COLUMNS
+from src.modules.engine.db_manager import DatabaseManager
+from test.fixtures import MINUTE, random_candles
+
+START = 1704067200000  # 2024-01-01 UTC
+CANDLES = 365 * 24 * 60
+WEEK = (START + 180 * 24 * 60 * MINUTE, START + 187 * 24 * 60 * MINUTE)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main():
+    timestamps, values = random_candles(CANDLES, START, price=0.1, volatility=0.001)
+    directory = tempfile.mkdtemp()
+
+    archive = CandleArchive(os.path.join(directory, "archive"))
+    write_ms, _ = timed(lambda: archive.write("XLM", "USDC", MINUTE, timestamps, values))
+
+    dbm = DatabaseManager(os.path.join(directory, "candles.db"))
+    dbm.upsert_candles("XLM", "USDC", MINUTE, timestamps, values)
+    dbm.flush()
+
+    csv_path = os.path.join(directory, "candles.csv")
+    frame = pd.DataFrame(values, columns=list(CANDLE_COLUMNS))
+    frame.insert(0, "timestamp", timestamps)
+    frame.to_csv(csv_path, index=False)
+
+    def csv_week():
+        df = pd.read_csv(csv_path)
+        return df[(df["timestamp"] >= WEEK[0]) & (df["timestamp"] < WEEK[1])]
+
+    rows = [
+        ("archive, year", lambda: archive.read("XLM", "USDC", MINUTE)),
+        ("sqlite,  year", lambda: dbm.get_candles("XLM", "USDC", MINUTE)),
+        ("csv,     year", lambda: pd.read_csv(csv_path)),
+        ("archive, week", lambda: archive.read("XLM", "USDC", MINUTE, *WEEK)),
+        ("sqlite,  week", lambda: dbm.get_candles("XLM", "USDC", MINUTE, *WEEK)),
+        ("csv,     week", csv_week),
+    ]
+    print(f"{CANDLES} candles, archive write {write_ms:.0f} ms")
+    for name, fn in rows:
+        ms, result = timed(fn)
+        print(f"{name}: {ms:10.1f} ms  ({len(result[0]) if isinstance(result, tuple) else len(result)} candles)")
+    dbm.close()
+
+
+if __name__ == "__main__":
+    main()
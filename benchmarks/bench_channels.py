@@ -0,0 +1,85 @@
+"""
+Order submission of a SmartBot cycle: the execution stage of ``TRANSACTIONS`` signals followed by the end of
+cycle flush, from the trading account alone and through pools of channel accounts, with and without
+batching. Transactions go to a LocalHorizonServer whose submissions take ``LATENCY`` seconds (the stand-in
+for waiting on a ledger close, about 5 seconds on the real network).
+
+Unbatched, each signal is one transaction: from the trading account they are submitted one after the
+other, through channels they are in flight together. Batched, the cycle's offers fit in one transaction
+(up to 100), so channels only help once a cycle has more orders than that.
+
+Run from the repository root:
+    python -m benchmarks.bench_channels
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from stellar_sdk import Asset, Keypair, Network, Server
+from stellar_sdk.client.requests_client import RequestsClient
+
+from src.modules.engine.channel_pool import ChannelPool
+from src.modules.engine.order_batcher import OrderBatcher
+from src.modules.engine.sequence_manager import SequenceManager
+from src.modules.engine.smart_bot import EventListener, SmartBot
+from src.modules.engine.trade_journal import TradeJournal
+from test.local_horizon import LocalHorizonServer
+
+LATENCY = 0.05
+TRANSACTIONS = 64
+USDC = Asset("USDC", "GA5ZSEJYB37JRC5AVCIA5MOP4RHTM335X2KGX3IHOJAPP5RE34K4KZVN")
+PASSPHRASE = Network.PUBLIC_NETWORK_PASSPHRASE  # What SmartBot signs for
+
+
+def cycle_bot(horizon, trader, channels: int, batch_orders: bool) -> SmartBot:
+    """A SmartBot with only what its execution stage needs, submitting through ``channels`` channel accounts."""
+    bot = SmartBot.__new__(SmartBot)
+    bot.logger = logging.getLogger(__name__)
+    bot.test_mode, bot.batch_orders = False, batch_orders
+    bot.server = Server(horizon.url, client=RequestsClient(pool_size=max(channels, 10)))
+    bot.keypair, bot.selling, bot.buying = trader, Asset.native(), USDC
+    bot.sequences = SequenceManager(bot.server)
+    bot.events, bot.trade_journal = EventListener(), TradeJournal(None)
+    bot.channels, bot._trade_pool, bot._pending_trades = None, None, []
+    if channels:
+        bot.channels = ChannelPool(bot.server, bot.sequences, trader, [Keypair.random() for _ in range(channels)],
+                                   PASSPHRASE)
+        bot.channels.check()
+        bot._trade_pool = ThreadPoolExecutor(channels, thread_name_prefix="SmartBotTrade")
+    bot.order_batcher = OrderBatcher(bot.sequences, trader, PASSPHRASE, channels=bot.channels)
+    return bot
+
+
+def run_cycle(bot: SmartBot):
+    stats = SmartBot._new_cycle_stats([])
+    for _ in range(TRANSACTIONS):
+        signal = {"pair": "XLM/USDC", "side": "SELL", "amount": 1, "price": 0.1}
+        bot._execution_stage("XLM/USDC", signal, stats)
+    bot._flush_orders(stats)
+    return stats
+
+
+def main():
+    with LocalHorizonServer(network_passphrase=PASSPHRASE) as horizon:
+        trader = Keypair.random()
+        horizon.create_account(trader.public_key, "100000")
+        bots = [(f"{f'{size} channel accounts' if size else 'trading account'}{', batched' if batched else ''}",
+                 cycle_bot(horizon, trader, size, batched))
+                for batched in (False, True) for size in (0, 1, 2, 4, 8, 16)]
+
+        horizon.submit_latency = LATENCY
+        print(f"{TRANSACTIONS} signals per cycle, {LATENCY * 1000:.0f} ms per submission")
+        for name, bot in bots:
+            submitted = len(horizon.submissions)
+            started = time.perf_counter()
+            run_cycle(bot)
+            elapsed = time.perf_counter() - started
+            print(f"{name:34s}: {elapsed:6.2f} s  {TRANSACTIONS / elapsed:7.1f} orders/s  "
+                  f"{len(horizon.submissions) - submitted:3d} transactions")
+            if bot.channels:
+                bot.channels.stop()
+                bot._trade_pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Benchmark of the indicator_kernels functions against the equivalent pandas rolling/ewm calls.
+
+Each size is run on a single series and, while it fits in memory, on a universe of 100 pairs of that
+length (pairs x time array; pandas gets the same data as a DataFrame with one column per pair).
+
+Run from the repository root:
+    python -m benchmarks.bench_indicator_kernels [rows ...]
+"""
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from src.modules.engine import indicator_kernels
+
+PAIRS = 100
+WINDOW = 14
+
+CASES = {
+    'rolling max': (lambda x: indicator_kernels.rolling_max(x, WINDOW), lambda df: df.rolling(WINDOW).max()),
+    'rolling min': (lambda x: indicator_kernels.rolling_min(x, WINDOW), lambda df: df.rolling(WINDOW).min()),
+    'rolling max+min': (
+        lambda x: (indicator_kernels.rolling_max(x, WINDOW), indicator_kernels.rolling_min(x, WINDOW)),
+        lambda df: (df.rolling(WINDOW).max(), df.rolling(WINDOW).min())),
+    'ema': (lambda x: indicator_kernels.ema(x, span=WINDOW, min_periods=WINDOW),
+            lambda df: df.ewm(span=WINDOW, min_periods=WINDOW).mean()),
+}
+
+
+def best_of(fn, repeat):
+    return min(timeit.repeat(fn, number=1, repeat=repeat)) * 1000
+
+
+def main(sizes):
+    rng = np.random.default_rng(0)
+    print(f"{'rows':>10} {'layout':>12} {'kernel':>18} {'numpy (ms)':>11} {'pandas (ms)':>12} {'speedup':>8}")
+    for rows in sizes:
+        repeat = 1 if rows >= 1_000_000 else 5
+        series = 100 + np.cumsum(rng.normal(0, 1, rows))
+        layouts = {'1 series': (series, pd.DataFrame({'close': series}))}
+        if rows * PAIRS <= 10_000_000:
+            universe = 100 + np.cumsum(rng.normal(0, 1, (PAIRS, rows)), axis=-1)
+            layouts[f'{PAIRS} pairs'] = (universe, pd.DataFrame(universe.T))
+        for layout, (array, frame) in layouts.items():
+            for name, (kernel, reference) in CASES.items():
+                numpy_ms = best_of(lambda: kernel(array), repeat)
+                pandas_ms = best_of(lambda: reference(frame), repeat)
+                print(f"{rows:>10} {layout:>12} {name:>18} {numpy_ms:>11.2f} {pandas_ms:>12.2f} "
+                      f"{pandas_ms / numpy_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1_000, 100_000, 10_000_000])
@@ -0,0 +1,41 @@
+"""
+Benchmark of the batch signal API against calling every generate_*_signal function one by one.
+
+Run from the repository root:
+    python -m benchmarks.bench_indicator_signals
+"""
+import timeit
+
+from src.modules.engine import indicator_utility
+from test.fixtures import random_ohlcv
+
+SIGNAL_SETTING = {
+    'period': 14, 'overbought_threshold': 70, 'oversold_threshold': 30,
+    'tenkan_period': 9, 'kijun_period': 26, 'senkou_a_period': 26, 'senkou_b_period': 52, 'chikou_span_period': 26,
+    'k_period': 3, 'd_period': 3, 'fast_ema_period': 12, 'slow_ema_period': 26, 'signal_ema_period': 9,
+    'bbands_period': 20, 'bbands_std_dev': 2, 'short_window': 10, 'long_window': 30,
+}
+SIGNALS = [name for name in indicator_utility.BATCH_SIGNALS if name != 'sar']
+
+
+def one_by_one(ohlcv):
+    return [getattr(indicator_utility, f'generate_{name}_signal')(SIGNAL_SETTING, ohlcv) for name in SIGNALS]
+
+
+def batched(ohlcv):
+    return indicator_utility.generate_signals(ohlcv, [dict(SIGNAL_SETTING, signal=name) for name in SIGNALS])
+
+
+def main():
+    print(f"{len(SIGNALS)} signals per call")
+    print(f"{'rows':>10} {'one by one (ms)':>16} {'batched (ms)':>14} {'speedup':>8}")
+    for rows in (500, 5_000, 50_000):
+        ohlcv = random_ohlcv(rows)
+        repeat = max(3, 20_000 // rows)
+        single = min(timeit.repeat(lambda: one_by_one(ohlcv), number=1, repeat=repeat)) * 1000
+        batch = min(timeit.repeat(lambda: batched(ohlcv), number=1, repeat=repeat)) * 1000
+        print(f"{rows:>10} {single:>16.2f} {batch:>14.2f} {single / batch:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Micro-benchmark of every generate_*_signal function, full computation against ``latest=True``.
+
+The latest calls first run on the same frame repeatedly, like the live bot re-evaluating a still-forming
+candle, so EWM based signals resume from their cached state. The sliding case then moves a fixed-size
+window over the candles, like a store that drops its oldest candle for each new one: every call sees a
+new first row, so EWM based signals take the vectorized path.
+
+Run from the repository root:
+    python -m benchmarks.bench_latest_signals [rows]
+"""
+import sys
+import timeit
+
+from benchmarks.bench_indicator_signals import SIGNAL_SETTING, SIGNALS
+from src.modules.engine import indicator_utility
+from test.fixtures import random_ohlcv
+
+
+def main(rows=10_000):
+    ohlcv = random_ohlcv(rows)
+    print(f"{rows} rows")
+    print(f"{'signal':>18} {'full (ms)':>10} {'latest (ms)':>12} {'speedup':>8}")
+    for name in SIGNALS:
+        generate = getattr(indicator_utility, f'generate_{name}_signal')
+        generate(SIGNAL_SETTING, ohlcv, latest=True)
+        full = min(timeit.repeat(lambda: generate(SIGNAL_SETTING, ohlcv), number=1, repeat=5)) * 1000
+        latest = min(timeit.repeat(lambda: generate(SIGNAL_SETTING, ohlcv, latest=True), number=1, repeat=20)) * 1000
+        print(f"{name:>18} {full:>10.3f} {latest:>12.3f} {full / latest:>7.1f}x")
+
+
+def sliding(rows=10_000, window=2_000, steps=50):
+    ohlcv = random_ohlcv(rows + steps, freq='min')
+    windows = [ohlcv.iloc[offset:offset + window] for offset in range(steps)]
+    print(f"\n{window} rows sliding over {steps} candles")
+    print(f"{'signal':>18} {'full (ms)':>10} {'latest (ms)':>12} {'speedup':>8}")
+    for name in SIGNALS:
+        generate = getattr(indicator_utility, f'generate_{name}_signal')
+        full = min(timeit.repeat(lambda: [generate(SIGNAL_SETTING, w) for w in windows], number=1, repeat=3))
+        # Start each run cold: a window is never seen twice by a live store
+        latest = min(timeit.repeat(lambda: [generate(SIGNAL_SETTING, w, latest=True) for w in windows],
+                                   setup=indicator_utility._EWM_STATE_CACHE.clear, number=1, repeat=3))
+        print(f"{name:>18} {full / steps * 1000:>10.3f} {latest / steps * 1000:>12.3f} {full / latest:>7.1f}x")
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    main(rows)
+    sliding(rows)
@@ -0,0 +1,91 @@
+"""
+Decoding 200-level Horizon order books: decode_order_book against the previous per-row parsing
+(``parse_order_data`` stringifying price_r and matching it with a regex) and the previous
+``get_order_book`` DataFrame path (two DataFrames, concat, rename, astype).
+
+Run from the repository root:
+    python -m benchmarks.bench_order_book
+"""
+import logging
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.modules.engine.order_book import decode_order_book
+
+LEVELS = 200
+ROUNDS = 500
+
+
+def order_book(seed=3):
+    rng = np.random.default_rng(seed)
+    mid = 10_000_000
+
+    def levels(sign):
+        n = mid + sign * np.cumsum(rng.integers(1, 500, LEVELS))
+        return [{"price_r": {"n": int(v), "d": 100_000_000}, "price": f"{v / 100_000_000:.7f}",
+                 "amount": f"{a:.7f}"} for v, a in zip(n, rng.uniform(1, 50_000, LEVELS))]
+
+    return {"bids": levels(-1), "asks": levels(1)}
+
+
+def legacy_extract_n_d(price_ratio_str):
+    match = re.search(r"\{'n': (\d+), 'd': (\d+)}", price_ratio_str)
+    if match:
+        return int(match[1]), int(match[2])
+    logging.warning(f"Failed to extract n and d from price ratio: {price_ratio_str}")
+    return None
+
+
+def legacy_parse_order_data(orders):
+    parsed_orders = []
+    for order in orders:
+        price = float(order.get("price", 0))
+        amount = float(order.get("amount", 0))
+        if amount <= 0 or price <= 0:
+            continue
+        n_d = legacy_extract_n_d(str(order.get("price_r", "")))
+        parsed_orders.append({"price_r": float(n_d[0] / n_d[1]) if n_d else price, "price": price, "amount": amount})
+    return parsed_orders
+
+
+def legacy_order_book_frame(book):
+    bids = pd.DataFrame(book.get("bids", []))
+    asks = pd.DataFrame(book.get("asks", []))
+    bids["side"] = "bid"
+    asks["side"] = "ask"
+    frame = pd.concat([bids, asks], axis=0, ignore_index=True)
+    frame.rename(columns={"amount": "size"}, inplace=True)
+    return frame[["price", "size", "side"]].astype({"price": float, "size": float})
+
+
+def timed(fn):
+    fn()
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        fn()
+    return (time.perf_counter() - start) / ROUNDS * 1e6
+
+
+def main():
+    book = order_book()
+    decoded = decode_order_book(book)
+    legacy = legacy_parse_order_data(book["bids"]) + legacy_parse_order_data(book["asks"])
+    assert np.allclose(decoded.price, [order["price_r"] for order in legacy])
+
+    rows = [
+        ("parse_order_data (regex), both sides", lambda: (legacy_parse_order_data(book["bids"]),
+                                                         legacy_parse_order_data(book["asks"]))),
+        ("get_order_book DataFrame path", lambda: legacy_order_book_frame(book)),
+        ("decode_order_book", lambda: decode_order_book(book)),
+        ("decode_order_book + to_frame", lambda: decode_order_book(book).to_frame()),
+    ]
+    print(f"{LEVELS} bids + {LEVELS} asks, mean of {ROUNDS} rounds")
+    for name, fn in rows:
+        print(f"{name:40s}: {timed(fn):9.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Recording trades: TradeJournal appends against the previous ``_record_trade``, which concatenated a
+one-row DataFrame onto the trade history for every trade.
+
+Run from the repository root:
+    python -m benchmarks.bench_trade_journal
+"""
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from src.modules.engine.trade_journal import COLUMNS, TradeJournal
+
+SIZES = (1_000, 5_000, 20_000)
+
+
+def legacy_record(count):
+    history = pd.DataFrame(columns=list(COLUMNS))
+    for i in range(count):
+        entry = {"pair": "XLM/USDC", "side": "BUY", "amount": i, "price": 0.1, "hash": f"h{i}", "result": "SUCCESS",
+                 "code": "op_success", "timestamp": datetime.now()}
+        history = pd.concat([history, pd.DataFrame([entry])], ignore_index=True)
+    return history
+
+
+def journal_record(count, path=None):
+    journal = TradeJournal(path, flush_interval=0.5)
+    for i in range(count):
+        journal.append("XLM/USDC", "BUY", i, 0.1, f"h{i}", "SUCCESS", "op_success")
+    frame = journal.to_frame()
+    journal.close()
+    return frame
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    print(f"{'trades':>8s}  {'pd.concat':>10s}  {'journal':>10s}  {'journal + SQLite':>17s}")
+    for count in SIZES:
+        legacy = f"{timed(legacy_record, count):9.3f}s" if count <= 5_000 else "(skipped)"  # Quadratic
+        journal = timed(journal_record, count)
+        path = os.path.join(tempfile.mkdtemp(), "trades.db")
+        persisted = timed(journal_record, count, path)
+        print(f"{count:8d}  {legacy:>10s}  {journal:9.4f}s  {persisted:16.4f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Vectorized backtesting of SmartBot strategies over stored candles.
+
+A strategy is reduced to one signal per candle (1 = buy, -1 = sell, 0 = hold), evaluated at the candle
+close. The backtest is long-only, like SmartBot on the Stellar DEX: a buy signal while flat opens a
+position, a sell signal while long closes it. Entries, exits, trade returns and the equity curve are
+computed with array operations over the whole history; no Python code runs per candle.
+"""
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.modules.engine import indicator_kernels
+from src.modules.engine.indicator_utility import generate_signal_frames, SIGNAL_STATE_COLUMNS
+
+STROOPS_PER_XLM = 10_000_000
+
+
+def macd_rsi_signals(close, rsi_window: int = 14, macd_slow: int = 26, macd_fast: int = 12,
+                     macd_sign: int = 9, oversold: float = 30, overbought: float = 70) -> np.ndarray:
+    """
+    Per-candle signals of ``SmartBot._generate_signal``: buy when MACD is above its signal line and RSI is
+    below ``oversold``, sell when MACD is below its signal line and RSI is above ``overbought``.
+    Indicators are the ones ``CandleIndicators`` streams (ta's RSI and MACD), computed in one pass.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    delta = np.diff(close, prepend=np.nan)
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    avg_gain = indicator_kernels.ema(gain, alpha=1.0 / rsi_window, adjust=False, min_periods=rsi_window)
+    avg_loss = indicator_kernels.ema(loss, alpha=1.0 / rsi_window, adjust=False, min_periods=rsi_window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = np.where(avg_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + avg_gain / avg_loss))
+    rsi[np.isnan(avg_loss)] = np.nan
+
+    macd = (indicator_kernels.ema(close, span=macd_fast, adjust=False, min_periods=macd_fast) -
+            indicator_kernels.ema(close, span=macd_slow, adjust=False, min_periods=macd_slow))
+    signal = indicator_kernels.ema(macd, span=macd_sign, adjust=False, min_periods=macd_sign)
+
+    # Comparisons with NaN are False, so candles without every indicator hold
+    return np.where((macd > signal) & (rsi < oversold), 1,
+                    np.where((macd < signal) & (rsi > overbought), -1, 0)).astype(np.int8)
+
+
+def indicator_signals(ohclv_data: pd.DataFrame, signal_setting: dict) -> np.ndarray:
+    """Per-candle signals of an ``indicator_utility`` signal, named by the setting's 'signal' key."""
+    frame = generate_signal_frames(ohclv_data, [signal_setting])[0]
+    state = frame[SIGNAL_STATE_COLUMNS[signal_setting['signal']]].to_numpy(dtype=np.float64)
+    return np.nan_to_num(state).astype(np.int8)
+
+
+class Backtester:
+    """
+    Replays candles through per-candle signals.
+
+    Parameters:
+        initial_balance: Starting equity, in units of the quote (counter) asset.
+        position_size: Fraction of equity committed on each entry (1.0 = all in).
+        slippage_bps: Price slippage in basis points; buys fill above the close, sells below it.
+        base_fee: Stellar base fee in stroops per operation.
+        operations_per_trade: Operations in each trade transaction.
+        xlm_price: Price of XLM in quote units, used to charge fees. None when the base asset is XLM,
+            in which case fees are converted at each trade's close.
+    """
+
+    def __init__(self, initial_balance: float = 1000.0, position_size: float = 1.0, slippage_bps: float = 5.0,
+                 base_fee: int = 100, operations_per_trade: int = 1, xlm_price: Optional[float] = None):
+        self.initial_balance = initial_balance
+        self.position_size = position_size
+        self.slippage_bps = slippage_bps
+        self.base_fee = base_fee
+        self.operations_per_trade = operations_per_trade
+        self.xlm_price = xlm_price
+
+    @property
+    def fee_xlm(self) -> float:
+        """Network fee of one trade transaction, in XLM."""
+        return self.base_fee * self.operations_per_trade / STROOPS_PER_XLM
+
+    def run(self, ohclv_data: pd.DataFrame, signals) -> Dict:
+        """
+        Backtest ``signals`` (one per candle of ``ohclv_data``) and return a dict with:
+        'roi' (%), 'max_drawdown' (%), 'final_equity', 'fees', 'trades' (one row per round trip, the
+        last one open when the backtest ends long) and 'equity' (equity at each candle close).
+        """
+        close = ohclv_data['close'].to_numpy(dtype=np.float64)
+        index = ohclv_data['timestamp'] if 'timestamp' in ohclv_data else ohclv_data.index
+        index = pd.Index(index)
+        signals = np.asarray(signals)
+        n = len(close)
+        if len(signals) != n:
+            raise ValueError(f"Got {len(signals)} signals for {n} candles")
+        if n == 0:
+            return self._results(np.array([]), index, pd.DataFrame(columns=self._trade_columns()), 0.0)
+
+        # Target exposure: 1 from a buy until the next sell, 0 otherwise
+        target = np.where(signals > 0, 1.0, np.where(signals < 0, 0.0, np.nan))
+        target = pd.Series(target).ffill().fillna(0.0).to_numpy()
+        change = np.diff(target, prepend=0.0)
+        entries = np.flatnonzero(change > 0)
+        exits = np.flatnonzero(change < 0)
+        is_open = len(exits) < len(entries)
+
+        slip = self.slippage_bps / 10_000
+        fee_quote = self.fee_xlm * (close if self.xlm_price is None else np.full(n, self.xlm_price))
+        buy_price = close[entries] * (1 + slip)
+        sell_price = close[exits] * (1 - slip)
+        entry_fee, exit_fee = fee_quote[entries], fee_quote[exits]
+
+        # Equity before each entry follows E[k+1] = g[k] * (E[k] - entry_fee[k]) - exit_fee[k], with g the
+        # growth of a round trip; the affine recurrence is solved with cumulative products.
+        f = self.position_size
+        growth = np.ones(len(entries))
+        growth[:len(exits)] = 1 - f + f * sell_price / buy_price[:len(exits)]
+        offset = np.zeros(len(entries))
+        offset[:len(exits)] = -growth[:len(exits)] * entry_fee[:len(exits)] - exit_fee
+        product = np.concatenate([[1.0], np.cumprod(growth)])
+        carried = self.initial_balance + np.concatenate([[0.0], np.cumsum(offset / product[1:])])
+        start_equity = product[:-1] * carried[:-1]
+        after_exit = product[1:len(exits) + 1] * carried[1:len(exits) + 1]
+
+        invested = f * (start_equity - entry_fee)
+        units = invested / buy_price
+        cash = start_equity - entry_fee - invested
+
+        # Equity per candle: cash + units * close while long, the last exit's proceeds while flat
+        trade = np.cumsum(change > 0) - 1
+        long = target > 0
+        equity = np.concatenate([[self.initial_balance], after_exit])[np.cumsum(change < 0)]
+        equity[long] = cash[trade[long]] + units[trade[long]] * close[long]
+
+        exit_price = np.full(len(entries), np.nan)
+        exit_price[:len(exits)] = sell_price
+        exit_time = pd.Series(index[exits]).reindex(range(len(entries)))
+        proceeds = np.where(np.isnan(exit_price), units * close[-1], units * exit_price)
+        fees = entry_fee + np.concatenate([exit_fee, np.zeros(int(is_open))])
+        pnl = proceeds - invested - fees
+        trades = pd.DataFrame({
+            'entry_time': index[entries],
+            'exit_time': exit_time.to_numpy(),
+            'entry_price': buy_price,
+            'exit_price': exit_price,
+            'units': units,
+            'fees': fees,
+            'pnl': pnl,
+            'return_pct': pnl / (invested + entry_fee) * 100,
+        }, columns=self._trade_columns())
+        return self._results(equity, index, trades, float(fees.sum()))
+
+    def run_macd_rsi(self, ohclv_data: pd.DataFrame, **params) -> Dict:
+        """Backtest SmartBot's MACD + RSI rule; ``params`` are passed to ``macd_rsi_signals``."""
+        return self.run(ohclv_data, macd_rsi_signals(ohclv_data['close'], **params))
+
+    def run_indicator(self, ohclv_data: pd.DataFrame, signal_setting: dict) -> Dict:
+        """Backtest an ``indicator_utility`` signal, e.g. ``{'signal': 'rsi', 'period': 14, ...}``."""
+        return self.run(ohclv_data, indicator_signals(ohclv_data, signal_setting))
+
+    @staticmethod
+    def _trade_columns():
+        return ['entry_time', 'exit_time', 'entry_price', 'exit_price', 'units', 'fees', 'pnl', 'return_pct']
+
+    def _results(self, equity: np.ndarray, index, trades: pd.DataFrame, fees: float) -> Dict:
+        final_equity = float(equity[-1]) if len(equity) else self.initial_balance
+        drawdown = 1 - equity / np.maximum.accumulate(equity) if len(equity) else np.zeros(1)
+        return {
+            'roi': (final_equity / self.initial_balance - 1) * 100,
+            'max_drawdown': float(drawdown.max()) * 100,
+            'final_equity': final_equity,
+            'fees': fees,
+            'trades': trades,
+            'equity': pd.Series(equity, index=index, name='equity'),
+        }
@@ -0,0 +1,234 @@
+"""
+Walk-forward parameter optimization of indicator settings.
+
+Every combination of a parameter grid is backtested on a series of walk-forward windows: each window is
+a training segment followed by the out-of-sample test segment right after it. Grid points are split in
+chunks that run on a process pool:
+
+- The candle columns are copied once into a shared memory block that every worker maps, instead of
+  being pickled into each task.
+- A chunk evaluates its grid points against one ``SignalIntermediates`` context, so arrays shared by
+  several grid points (a rolling mean used with different band widths or thresholds, an EMA used by
+  several signals...) are computed once per chunk. Grid points are chunked in grid order, where the
+  last parameter varies fastest, so neighbours in a chunk mostly share their windows.
+- Signals are computed once per grid point over the whole history and sliced per window, so windows
+  start with warmed-up indicators.
+
+Completed chunks are appended to a JSON lines checkpoint. A run with the same checkpoint, candles, grid
+and windows only evaluates the grid points missing from it, so an interrupted run resumes where it
+stopped.
+"""
+import hashlib
+import itertools
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.modules.classes.backtesting import Backtester, macd_rsi_signals
+from src.modules.engine.indicator_utility import BATCH_SIGNALS, SIGNAL_STATE_COLUMNS, SignalIntermediates
+
+logger = logging.getLogger(__name__)
+
+# Candles mapped by a pool worker: {'shm': SharedMemory, 'frame': DataFrame over it}
+_WORKER_CANDLES = {}
+
+
+def parameter_grid(grid: Dict[str, Iterable], base_setting: Optional[dict] = None) -> List[dict]:
+    """Every combination of the ``grid`` values, each merged over ``base_setting``; the last key varies fastest."""
+    keys = list(grid)
+    settings = [dict(base_setting or {}, **dict(zip(keys, values))) for values in itertools.product(*grid.values())]
+    # NumPy scalars become plain numbers, so settings read back from a checkpoint compare equal
+    return json.loads(json.dumps(settings, default=lambda value: value.item()))
+
+
+def walk_forward_windows(n: int, train_size: int, test_size: int, step: Optional[int] = None) -> List[Tuple]:
+    """(train_start, train_end, test_end) row bounds of rolling walk-forward windows over ``n`` candles."""
+    step = step or test_size
+    return [(start, start + train_size, start + train_size + test_size)
+            for start in range(0, n - train_size - test_size + 1, step)]
+
+
+def _setting_key(setting: dict) -> str:
+    return json.dumps(setting, sort_keys=True, default=str)
+
+
+def _signals(ctx: SignalIntermediates, strategy: str, setting: dict) -> np.ndarray:
+    if strategy == 'macd_rsi':
+        return macd_rsi_signals(ctx.get('close'), **setting)
+    frame = BATCH_SIGNALS[strategy](ctx, setting)
+    return np.nan_to_num(frame[SIGNAL_STATE_COLUMNS[strategy]].to_numpy(dtype=np.float64)).astype(np.int8)
+
+
+def _evaluate(candles: pd.DataFrame, strategy: str, settings: List[dict], windows: List[Tuple],
+              backtester_params: dict) -> List[dict]:
+    """Backtest each setting on every window; one record per (setting, window)."""
+    ctx = SignalIntermediates(candles, full=True)
+    backtester = Backtester(**backtester_params)
+    records = []
+    for setting in settings:
+        signals = _signals(ctx, strategy, setting)
+        for window, (train_start, train_end, test_end) in enumerate(windows):
+            record = {'setting': setting, 'window': window}
+            for segment, (start, end) in (('train', (train_start, train_end)), ('test', (train_end, test_end))):
+                results = backtester.run(candles.iloc[start:end], signals[start:end])
+                record[f'{segment}_roi'] = results['roi']
+                record[f'{segment}_max_drawdown'] = results['max_drawdown']
+                record[f'{segment}_trades'] = len(results['trades'])
+            records.append(record)
+    return records
+
+
+def _attach_candles(name: str, shape: Tuple[int, int], columns: List[str]):
+    """Pool initializer: map the shared candle block as a DataFrame, without copying it."""
+    shm = shared_memory.SharedMemory(name=name)
+    values = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    _WORKER_CANDLES['shm'] = shm
+    _WORKER_CANDLES['frame'] = pd.DataFrame({column: values[i] for i, column in enumerate(columns)}, copy=False)
+
+
+def _evaluate_shared(strategy, settings, windows, backtester_params):
+    return _evaluate(_WORKER_CANDLES['frame'], strategy, settings, windows, backtester_params)
+
+
+class WalkForwardOptimizer:
+    """
+    Grid search of a strategy's settings with walk-forward validation.
+
+    Parameters:
+        ohclv_data: Candles with at least a 'close' column (and whatever the signal reads).
+        strategy: An ``indicator_utility`` signal name, or 'macd_rsi' for SmartBot's own rule
+            (settings are then ``macd_rsi_signals`` arguments).
+        grid: Values to try per setting key, e.g. ``{'period': [10, 14, 20], 'oversold_threshold': [20, 30]}``.
+        base_setting: Setting keys that are not searched.
+        train_size, test_size: Candles in the training and out-of-sample segment of each window.
+        step: Candles between window starts (defaults to ``test_size``, non-overlapping test segments).
+        metric: Backtest result ranked on: 'roi' (higher is better) or 'max_drawdown' (lower is better).
+        backtester_params: Backtester arguments (slippage_bps, base_fee, position_size...).
+        max_workers: Pool size; 1 evaluates in this process.
+        chunk_size: Grid points per task.
+        checkpoint_path: JSON lines file completed chunks are appended to, for resuming.
+    """
+
+    def __init__(self, ohclv_data: pd.DataFrame, strategy: str, grid: Dict[str, Iterable], train_size: int,
+                 test_size: int, base_setting: Optional[dict] = None, step: Optional[int] = None,
+                 metric: str = 'roi', backtester_params: Optional[dict] = None, max_workers: Optional[int] = None,
+                 chunk_size: int = 8, checkpoint_path: Optional[str] = None):
+        if metric not in ('roi', 'max_drawdown'):
+            raise ValueError(f"Unsupported metric: {metric}")
+        columns = [column for column in ohclv_data.columns if pd.api.types.is_numeric_dtype(ohclv_data[column])]
+        self.candles = ohclv_data[columns].astype(np.float64).reset_index(drop=True)
+        self.strategy = strategy
+        self.settings = parameter_grid(grid, dict(base_setting or {}, **({} if strategy == 'macd_rsi'
+                                                                          else {'signal': strategy})))
+        self.grid_keys = list(grid)
+        self.windows = walk_forward_windows(len(self.candles), train_size, test_size, step)
+        if not self.windows:
+            raise ValueError(f"{len(self.candles)} candles cannot hold a {train_size} + {test_size} window")
+        self.metric = metric
+        self.backtester_params = backtester_params or {}
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.checkpoint_path = checkpoint_path
+        self.records: List[dict] = []  # One per (setting, window), from the checkpoint and the last run
+        self.evaluated = 0  # Grid points evaluated by the last run (not loaded from the checkpoint)
+
+        # Fingerprint of the candles, strategy, windows and backtest settings a checkpoint belongs to
+        digest = hashlib.sha1(np.ascontiguousarray(self.candles.to_numpy()).tobytes())
+        digest.update(json.dumps([strategy, self.windows, self.backtester_params], sort_keys=True).encode())
+        self.run_id = digest.hexdigest()
+
+    def run(self) -> pd.DataFrame:
+        """Evaluate the grid points not already in the checkpoint and return the ranked results."""
+        wanted = {_setting_key(setting) for setting in self.settings}
+        records = [record for record in self._load_checkpoint() if _setting_key(record['setting']) in wanted]
+        done = {_setting_key(record['setting']) for record in records}
+        pending = [setting for setting in self.settings if _setting_key(setting) not in done]
+        chunks = [pending[i:i + self.chunk_size] for i in range(0, len(pending), self.chunk_size)]
+        self.records, self.evaluated = records, 0
+        if chunks:
+            logger.info(f"Optimizing {len(pending)} of {len(self.settings)} settings on {len(self.windows)} windows")
+            for chunk, chunk_records in self._evaluate_chunks(chunks):
+                self._save_checkpoint(chunk_records)
+                records.extend(chunk_records)
+                self.evaluated += len(chunk)
+        return self.rank()
+
+    def _evaluate_chunks(self, chunks):
+        if self.max_workers == 1:
+            for chunk in chunks:
+                yield chunk, _evaluate(self.candles, self.strategy, chunk, self.windows, self.backtester_params)
+            return
+
+        values = self.candles.to_numpy().T
+        shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        try:
+            np.ndarray(values.shape, dtype=np.float64, buffer=shm.buf)[:] = values
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(chunks)), initializer=_attach_candles,
+                                     initargs=(shm.name, values.shape, list(self.candles.columns))) as pool:
+                futures = {pool.submit(_evaluate_shared, self.strategy, chunk, self.windows,
+                                       self.backtester_params): chunk for chunk in chunks}
+                for future in as_completed(futures):
+                    yield futures[future], future.result()
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def rank(self) -> pd.DataFrame:
+        """
+        One row per setting: the grid values, mean train/test results over the windows and the test
+        result of the worst window, best mean test metric first.
+        """
+        if not self.records:
+            return pd.DataFrame()
+        table = pd.DataFrame(self.records)
+        table['setting'] = table['setting'].map(_setting_key)
+        summary = table.groupby('setting').agg(
+            train_roi=('train_roi', 'mean'), test_roi=('test_roi', 'mean'), worst_test_roi=('test_roi', 'min'),
+            test_max_drawdown=('test_max_drawdown', 'mean'), test_trades=('test_trades', 'sum'),
+            windows=('window', 'count'))
+        params = pd.DataFrame([json.loads(key) for key in summary.index], index=summary.index)[self.grid_keys]
+        ranked = pd.concat([params, summary], axis=1)
+        ranked = ranked.sort_values(f'test_{self.metric}', ascending=self.metric == 'max_drawdown')
+        return ranked.reset_index(drop=True)
+
+    def walk_forward(self) -> pd.DataFrame:
+        """
+        Walk-forward selection after ``run``: for each window, the setting with the best training metric
+        and its out-of-sample test results.
+        """
+        table = pd.DataFrame(self.records)
+        if table.empty:
+            return table
+        ascending = self.metric == 'max_drawdown'
+        best = table.sort_values(f'train_{self.metric}', ascending=ascending, kind='stable').groupby('window').head(1)
+        return best.sort_values('window').reset_index(drop=True)
+
+    def _load_checkpoint(self) -> List[dict]:
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return []
+        records = []
+        with open(self.checkpoint_path, 'rb+') as f:
+            content = f.read()
+            if content and not content.endswith(b'\n'):
+                # Drop the line cut by an interruption, so the next chunk starts on a line of its own
+                content = content[:content.rfind(b'\n') + 1]
+                f.truncate(len(content))
+        for line in content.splitlines():
+            entry = json.loads(line)
+            if entry.get('run_id') == self.run_id:
+                records.extend(entry['records'])
+        return records
+
+    def _save_checkpoint(self, records: List[dict]):
+        if not self.checkpoint_path:
+            return
+        with open(self.checkpoint_path, 'a') as f:
+            f.write(json.dumps({'run_id': self.run_id, 'records': records}, default=float) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
@@ -0,0 +1,250 @@
+"""
+Columnar, month-partitioned candle archive with memory-mapped reads.
+
+Each (pair, resolution) series is stored as one file per UTC calendar month:
+
+    <root>/<base>_<counter>/<resolution>/<YYYY-MM>.candles
+
+A file is a fixed-size header followed by fixed-width columns: the int64 candle open times, then one
+float64 column per CANDLE_COLUMNS entry. Every column has one slot per candle the month can hold, and a
+candle's slot is ``(open_time - month_start) // resolution``, so a date range maps to a slot range
+without any search or parsing. Files are created at full size as sparse files, and reads map them with
+``np.memmap``: only the pages of the requested range are read from disk.
+
+Writes are crash-safe. A slot holds a candle only once its open time is written, and open times are
+written after the candle's values have been flushed to disk. Slots being rewritten (e.g. a revised
+forming candle) are emptied and flushed first, so after a crash every slot holds either its previous
+candle, no candle, or its new candle, never a mix. New files are written under a temporary name and
+renamed into place. Candles identical to the stored ones are not rewritten, so storing an unchanged
+page costs no disk write at all.
+"""
+import calendar
+import os
+import re
+import struct
+import threading
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from stellar_sdk import Asset
+
+from src.modules.engine.candle_store import CANDLE_COLUMNS
+
+MAGIC = b"SBCANDLE"
+VERSION = 1
+# magic, version, resolution (ms), month start (ms), slots per column
+HEADER = struct.Struct("<8sqqqq")
+HEADER_SIZE = 64
+
+_MONTH_FILE = re.compile(r"^(\d{4})-(\d{2})\.candles$")
+
+
+def asset_key(asset: Asset) -> str:
+    """The name of an asset in the archive and elsewhere: 'XLM' or 'CODE:ISSUER'."""
+    return "XLM" if asset.is_native() else f"{asset.code}:{asset.issuer}"
+
+
+def month_bounds(timestamp: int) -> Tuple[int, int]:
+    """[start, end) of the UTC calendar month holding ``timestamp``, in ms."""
+    day = datetime.fromtimestamp(timestamp / 1000, tz=timezone.utc)
+    return _month_start(day.year, day.month), _month_start(day.year + day.month // 12, day.month % 12 + 1)
+
+
+def _month_start(year: int, month: int) -> int:
+    return calendar.timegm((year, month, 1, 0, 0, 0)) * 1000
+
+
+def _slots(month_start: int, month_end: int, resolution: int) -> int:
+    return -(-(month_end - month_start) // resolution)
+
+
+class CandleArchive:
+    """
+    Candle archive rooted at a directory; see the module docstring for the file layout.
+
+    Pairs are named by ``asset_key`` such as 'XLM' or 'USDC:GA5Z...' (':' is replaced by '-' in paths).
+    Writes are serialized by a lock; reads need no lock and may run in any thread or process.
+    """
+
+    def __init__(self, root: str = "candle_archive"):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def series_dir(self, base: str, counter: str, resolution: int) -> str:
+        pair = f"{base}_{counter}".replace(":", "-")
+        return os.path.join(self.root, pair, str(int(resolution)))
+
+    def month_path(self, base: str, counter: str, resolution: int, month_start: int) -> str:
+        month = datetime.fromtimestamp(month_start / 1000, tz=timezone.utc)
+        return os.path.join(self.series_dir(base, counter, resolution), f"{month:%Y-%m}.candles")
+
+    def months(self, base: str, counter: str, resolution: int) -> List[int]:
+        """Start times (ms) of the months stored for a series, oldest first."""
+        directory = self.series_dir(base, counter, resolution)
+        if not os.path.isdir(directory):
+            return []
+        matches = (_MONTH_FILE.match(name) for name in os.listdir(directory))
+        return sorted(_month_start(int(m.group(1)), int(m.group(2))) for m in matches if m)
+
+    # ===============================================================
+    # WRITES
+    # ===============================================================
+    def write(self, base: str, counter: str, resolution: int, timestamps, values) -> int:
+        """
+        Store candles given as open times (ms) and CANDLE_COLUMNS rows. Candles already stored with the
+        same open time are replaced. Returns the number of candles written.
+        """
+        return len(self.write_changes(base, counter, resolution, timestamps, values))
+
+    def write_changes(self, base: str, counter: str, resolution: int, timestamps, values) -> np.ndarray:
+        """``write``, returning the open times of the candles that were new or differed from the stored ones."""
+        resolution = int(resolution)
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64).reshape(len(timestamps), len(CANDLE_COLUMNS))
+        if not len(timestamps):
+            return timestamps
+        # Keep the last row given for each open time
+        timestamps, last = np.unique(timestamps[::-1], return_index=True)
+        values = values[::-1][last]
+
+        changed = []
+        with self._lock:
+            start = 0
+            while start < len(timestamps):
+                month_start, month_end = month_bounds(int(timestamps[start]))
+                end = int(timestamps.searchsorted(month_end))
+                changed.append(self._write_month(base, counter, resolution, month_start, month_end,
+                                                 timestamps[start:end], values[start:end]))
+                start = end
+        return np.concatenate(changed)
+
+    def _write_month(self, base, counter, resolution, month_start, month_end, timestamps, values):
+        path = self.month_path(base, counter, resolution, month_start)
+        if not os.path.exists(path):
+            self._create(path, resolution, month_start, _slots(month_start, month_end, resolution))
+        times, columns = self._map(path, resolution, month_start, "r+")
+        slots = (timestamps - month_start) // resolution
+
+        stored = columns[:, slots].T
+        same = (stored == values) | (np.isnan(stored) & np.isnan(values))
+        unchanged = (times[slots] == timestamps) & same.all(axis=1)
+        if unchanged.any():
+            timestamps, values, slots = timestamps[~unchanged], values[~unchanged], slots[~unchanged]
+            if not len(timestamps):
+                return timestamps
+
+        replaced = times[slots] >= month_start
+        if replaced.any():
+            times[slots[replaced]] = 0
+            times.flush()
+        columns[:, slots] = values.T
+        columns.flush()
+        times[slots] = timestamps
+        times.flush()
+        return timestamps
+
+    def prune(self, resolution: int, before: int) -> int:
+        """
+        Delete the month files of every pair at a resolution whose month ended at or before ``before``
+        (ms). Whole months are dropped, so up to a month more than asked may be kept.
+        Returns the number of files deleted.
+        """
+        deleted = 0
+        if not os.path.isdir(self.root):
+            return deleted
+        with self._lock:
+            for pair in os.listdir(self.root):
+                directory = os.path.join(self.root, pair, str(int(resolution)))
+                if not os.path.isdir(directory):
+                    continue
+                for name in os.listdir(directory):
+                    match = _MONTH_FILE.match(name)
+                    if match and month_bounds(_month_start(int(match.group(1)), int(match.group(2))))[1] <= before:
+                        os.remove(os.path.join(directory, name))
+                        deleted += 1
+        return deleted
+
+    @staticmethod
+    def _create(path: str, resolution: int, month_start: int, slots: int):
+        """Create an empty month file at full size, atomically."""
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, resolution, month_start, slots).ljust(HEADER_SIZE, b"\0"))
+            f.truncate(HEADER_SIZE + slots * 8 * (1 + len(CANDLE_COLUMNS)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        if hasattr(os, "O_DIRECTORY"):
+            fd = os.open(directory, os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    # ===============================================================
+    # READS
+    # ===============================================================
+    @staticmethod
+    def _map(path: str, resolution: int, month_start: int, mode: str = "r"):
+        """Memory-map a month file as (open times, (len(CANDLE_COLUMNS), slots) values)."""
+        with open(path, "rb") as f:
+            magic, version, file_resolution, file_month, slots = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION or file_resolution != resolution or file_month != month_start:
+            raise ValueError(f"{path} is not a version {VERSION} archive of {resolution} ms candles")
+        times = np.memmap(path, dtype=np.int64, mode=mode, offset=HEADER_SIZE, shape=(slots,))
+        columns = np.memmap(path, dtype=np.float64, mode=mode, offset=HEADER_SIZE + slots * 8,
+                            shape=(len(CANDLE_COLUMNS), slots))
+        return times, columns
+
+    def read(self, base: str, counter: str, resolution: int, start_time: Optional[int] = None,
+             end_time: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Candles of a series opened in [start_time, end_time) (None for unbounded), as (open times as an
+        int64 array, (n, 6) float64 array in CANDLE_COLUMNS order), the layout of
+        ``DatabaseManager.get_candles``. Only the slots of the range are read.
+        """
+        resolution = int(resolution)
+        parts_t, parts_v = [], []
+        for month_start in self.months(base, counter, resolution):
+            month_end = month_bounds(month_start)[1]
+            if (end_time is not None and month_start >= end_time) or \
+                    (start_time is not None and month_end <= start_time):
+                continue
+            times, columns = self._map(self.month_path(base, counter, resolution, month_start),
+                                       resolution, month_start)
+            first = 0 if start_time is None else max(0, (int(start_time) - month_start) // resolution)
+            last = len(times) if end_time is None else \
+                min(len(times), _slots(month_start, max(month_start, int(end_time)), resolution))
+            window = np.array(times[first:last])
+            keep = (window >= month_start) & (window < month_end)
+            if start_time is not None:
+                keep &= window >= start_time
+            if end_time is not None:
+                keep &= window < end_time
+            parts_t.append(window[keep])
+            parts_v.append(columns[:, first:last][:, keep].T)
+        if not parts_t:
+            return np.empty(0, dtype=np.int64), np.empty((0, len(CANDLE_COLUMNS)))
+        return np.concatenate(parts_t), np.ascontiguousarray(np.concatenate(parts_v))
+
+    def frame(self, base: str, counter: str, resolution: int, start_time: Optional[int] = None,
+              end_time: Optional[int] = None) -> pd.DataFrame:
+        """``read`` as a DataFrame with the CandleBuffer.frame layout, ready for the Backtester."""
+        timestamps, values = self.read(base, counter, resolution, start_time, end_time)
+        df = pd.DataFrame(values, columns=list(CANDLE_COLUMNS), copy=False)
+        df["timestamp"] = pd.to_datetime(timestamps, unit="ms", utc=True)
+        return df
+
+    def last_timestamp(self, base: str, counter: str, resolution: int) -> Optional[int]:
+        """Open time (ms) of the newest stored candle of a series, or None."""
+        resolution = int(resolution)
+        for month_start in reversed(self.months(base, counter, resolution)):
+            times, _ = self._map(self.month_path(base, counter, resolution, month_start), resolution, month_start)
+            stored = np.flatnonzero(times >= month_start)
+            if len(stored):
+                return int(times[stored[-1]])
+        return None
@@ -0,0 +1,212 @@
+"""
+Backfill of historical candles from Horizon's trade_aggregations.
+
+A backfill of pairs over [start, end) at one resolution is split into windows of ``pages_per_window``
+pages of 200 candles. The windows of every pair are fetched concurrently by a thread pool; requests go
+through the server's client, so a RateLimitedClient keeps the whole backfill under the Horizon host's
+rate limit. A window's candles are written once all of its pages have arrived; the CandleArchive
+replaces candles with the same open time, so refetching a range is harmless.
+
+Horizon returns no candle for an interval without trades, so missing candles do not tell a quiet market
+from a range never fetched. The backfill therefore records the time ranges it fetched completely in a
+coverage file next to the archive. The gaps of a request are the parts of its range not covered: only
+they are fetched, windows that failed are refetched in further passes, and a later backfill of the same
+range makes no request. Coverage stops at the last closed candle, so the still-forming one is fetched
+again next time.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from stellar_sdk import Asset
+
+from src.modules.engine.candle_archive import CandleArchive, asset_key
+from src.modules.engine.candle_store import records_to_arrays
+
+PAGE_LIMIT = 200  # Candles per trade_aggregations page (Horizon's maximum)
+
+Interval = Tuple[int, int]
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """Sorted, non-overlapping union of [start, end) intervals; touching intervals are joined."""
+    merged: List[List[int]] = []
+    for start, end in sorted(intervals):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def missing_intervals(start: int, end: int, covered: Iterable[Interval]) -> List[Interval]:
+    """The parts of [start, end) outside the ``covered`` intervals."""
+    gaps, position = [], start
+    for covered_start, covered_end in merge_intervals(covered):
+        if covered_end <= position:
+            continue
+        if covered_start >= end:
+            break
+        if covered_start > position:
+            gaps.append((position, covered_start))
+        position = max(position, covered_end)
+    if position < end:
+        gaps.append((position, end))
+    return gaps
+
+
+def fetch_trade_aggregations(server, base: Asset, counter: Asset, resolution: int, start_time: int, end_time: int,
+                             offset: int = 0) -> List[dict]:
+    """Every trade_aggregations record of a pair opened in [start_time, end_time), page by page."""
+    records: List[dict] = []
+    while start_time < end_time:
+        page = server.trade_aggregations(base=base, counter=counter, resolution=resolution, start_time=start_time,
+                                         end_time=end_time, offset=offset).limit(PAGE_LIMIT).call()
+        page_records = page.get("_embedded", {}).get("records", [])
+        records.extend(page_records)
+        if len(page_records) < PAGE_LIMIT:
+            break
+        start_time = int(page_records[-1]["timestamp"]) + resolution
+    return records
+
+
+class CandleBackfill:
+    """
+    Concurrent, resumable download of candle history into a CandleArchive; see the module docstring.
+
+    Parameters:
+    - server (Server): stellar_sdk Server, ideally with a RateLimitedClient.
+    - archive (CandleArchive): Where candles and the coverage file are kept.
+    - store (Callable): ``store(base, counter, resolution, timestamps, values)`` writes a page of candles;
+      by default they are written to the archive. Calls are serialized.
+    - max_workers (int): Windows fetched at once.
+    - pages_per_window (int): Pages of 200 candles per window.
+    - max_passes (int): Attempts at filling the gaps of one backfill.
+    - progress (Callable): ``progress(done, total, candles)`` after each window, besides the log line.
+    """
+
+    def __init__(self, server, archive: CandleArchive, store: Optional[Callable] = None, max_workers: int = 4,
+                 pages_per_window: int = 5, max_passes: int = 3, progress: Optional[Callable] = None):
+        self.server = server
+        self.archive = archive
+        self.store = store or self._archive_store
+        self.max_workers = max_workers
+        self.pages_per_window = pages_per_window
+        self.max_passes = max_passes
+        self.progress = progress
+        self.coverage_path = os.path.join(archive.root, "backfill_coverage.json")
+        self._coverage: Dict[str, List[Interval]] = self._load_coverage()
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    # ===============================================================
+    # COVERAGE
+    # ===============================================================
+    @staticmethod
+    def series_key(base: Asset, counter: Asset, resolution: int) -> str:
+        return f"{asset_key(base)}/{asset_key(counter)}/{int(resolution)}"
+
+    def _load_coverage(self) -> Dict[str, List[Interval]]:
+        try:
+            with open(self.coverage_path) as f:
+                return {key: [tuple(interval) for interval in intervals] for key, intervals in json.load(f).items()}
+        except (OSError, ValueError):
+            return {}
+
+    def _save_coverage(self):
+        os.makedirs(self.archive.root, exist_ok=True)
+        tmp_path = f"{self.coverage_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._coverage, f)
+        os.replace(tmp_path, self.coverage_path)
+
+    def covered(self, base: Asset, counter: Asset, resolution: int) -> List[Interval]:
+        """The time ranges of a series already fetched completely."""
+        return list(self._coverage.get(self.series_key(base, counter, resolution), []))
+
+    def gaps(self, base: Asset, counter: Asset, resolution: int, start_time: int, end_time: int) -> List[Interval]:
+        """The parts of [start_time, end_time) not fetched yet, aligned on the resolution."""
+        start_time -= start_time % resolution
+        end_time += -end_time % resolution
+        return missing_intervals(start_time, end_time, self.covered(base, counter, resolution))
+
+    def _mark_covered(self, key: str, start_time: int, end_time: int):
+        with self._lock:
+            self._coverage[key] = merge_intervals(self._coverage.get(key, []) + [(start_time, end_time)])
+            self._save_coverage()
+
+    # ===============================================================
+    # BACKFILL
+    # ===============================================================
+    def windows(self, base: Asset, counter: Asset, resolution: int, start_time: int,
+                end_time: int) -> List[Interval]:
+        """The gaps of a range cut into windows of ``pages_per_window`` pages."""
+        size = self.pages_per_window * PAGE_LIMIT * resolution
+        return [(window_start, min(window_start + size, gap_end))
+                for gap_start, gap_end in self.gaps(base, counter, resolution, start_time, end_time)
+                for window_start in range(gap_start, gap_end, size)]
+
+    def backfill(self, pairs: Iterable[Tuple[Asset, Asset]], resolution: int, start_time: int,
+                 end_time: Optional[int] = None) -> dict:
+        """
+        Fetch the candles of ``pairs`` opened in [start_time, end_time) (ms, end defaults to now) that were
+        not fetched before. Returns the number of windows fetched and failed, candles written, and the
+        gaps left per pair after ``max_passes`` passes.
+        """
+        end_time = int(time.time() * 1000) if end_time is None else end_time
+        pairs = list(pairs)
+        report = {"windows": 0, "failed": 0, "candles": 0, "gaps": {}}
+        started = time.monotonic()
+        for attempt in range(self.max_passes):
+            tasks = [(base, counter, window) for base, counter in pairs
+                     for window in self.windows(base, counter, resolution, start_time, end_time)]
+            if not tasks:
+                break
+            if attempt:
+                self.logger.info(f"Refilling {len(tasks)} windows left by failures (pass {attempt + 1})")
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="Backfill") as pool:
+                futures = [pool.submit(self._fetch_window, base, counter, resolution, *window)
+                           for base, counter, window in tasks]
+                for done, future in enumerate(as_completed(futures), 1):
+                    candles = future.result()
+                    report["windows"] += 1
+                    if candles is None:
+                        report["failed"] += 1
+                    else:
+                        report["candles"] += candles
+                    self.logger.info(f"Backfill {done}/{len(tasks)} windows, {report['candles']} candles, "
+                                     f"{time.monotonic() - started:.1f}s")
+                    if self.progress:
+                        self.progress(done, len(tasks), report["candles"])
+        for base, counter in pairs:
+            gaps = self.windows(base, counter, resolution, start_time, end_time)
+            if gaps:
+                report["gaps"][self.series_key(base, counter, resolution)] = merge_intervals(gaps)
+        return report
+
+    def _fetch_window(self, base: Asset, counter: Asset, resolution: int, start_time: int,
+                      end_time: int) -> Optional[int]:
+        """Fetch and store one window; returns the candles written, or None when the window failed."""
+        try:
+            records = fetch_trade_aggregations(self.server, base, counter, resolution, start_time, end_time)
+            timestamps, values = records_to_arrays(records)
+            with self._lock:
+                if len(timestamps):
+                    self.store(base, counter, resolution, timestamps, values)
+        except Exception as e:
+            self.logger.warning(f"Backfill of {base.code}/{counter.code} [{start_time}, {end_time}) failed: {e}")
+            return None
+        now = int(time.time() * 1000)
+        closed = min(end_time, now - now % resolution)  # The forming candle stays a gap
+        if closed > start_time:
+            self._mark_covered(self.series_key(base, counter, resolution), start_time, closed)
+        return len(timestamps)
+
+    def _archive_store(self, base: Asset, counter: Asset, resolution: int, timestamps, values):
+        self.archive.write(asset_key(base), asset_key(counter), resolution, timestamps, values)
@@ -0,0 +1,133 @@
+"""
+Local rollups of 1-minute candles into every coarser TimeFrame, with retention.
+
+Rollups are built in a cascade: each resolution is aggregated from the coarsest finer resolution that
+divides it (5m from 1m, 15m from 5m, 1h from 30m, 1d from 8h, 1w from 1d...), so a new minute only
+rereads a handful of candles per resolution. Buckets are aligned on the epoch, like Horizon's
+trade_aggregations. Only the buckets touched by new candles are recomputed, including the still-forming
+one, which is rewritten as its minutes arrive; a bucket that comes out unchanged is not rewritten, and
+the coarser resolutions built from it are left alone.
+
+Retention is applied by ``compact``, which drops whole month files of the CandleArchive older than a
+resolution's retention period.
+"""
+import logging
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from src.modules.engine.candle_archive import CandleArchive
+from src.modules.engine.candle_store import CANDLE_COLUMNS
+from src.modules.engine.time_frames import TimeFrame
+
+DAY = TimeFrame.DAY.value
+
+# Retention per resolution in ms; resolutions not listed are kept forever
+DEFAULT_RETENTION = {
+    TimeFrame.ONE_MINUTE.value: 30 * DAY,
+    TimeFrame.FIVE_MINUTES.value: 90 * DAY,
+    TimeFrame.TEN_MINUTES.value: 90 * DAY,
+    TimeFrame.FIFTEEN_MINUTES.value: 180 * DAY,
+    TimeFrame.THIRTY_MINUTES.value: 180 * DAY,
+}
+
+_OPEN, _HIGH, _LOW, _CLOSE = (CANDLE_COLUMNS.index(name) for name in ("open", "high", "low", "close"))
+_VOLUMES = [CANDLE_COLUMNS.index("base_volume"), CANDLE_COLUMNS.index("counter_volume")]
+
+
+def rollup(timestamps, values, resolution: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Aggregate time-ordered candles into ``resolution`` buckets: first open, highest high, lowest low,
+    last close and summed volumes. Returns (bucket open times, CANDLE_COLUMNS rows).
+    """
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64).reshape(len(timestamps), len(CANDLE_COLUMNS))
+    if not len(timestamps):
+        return timestamps, values
+    buckets = timestamps - timestamps % resolution
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(timestamps)] - 1
+
+    out = np.empty((len(starts), len(CANDLE_COLUMNS)))
+    out[:, _OPEN] = values[starts, _OPEN]
+    out[:, _HIGH] = np.maximum.reduceat(values[:, _HIGH], starts)
+    out[:, _LOW] = np.minimum.reduceat(values[:, _LOW], starts)
+    out[:, _CLOSE] = values[ends, _CLOSE]
+    out[:, _VOLUMES] = np.add.reduceat(values[:, _VOLUMES], starts, axis=0)
+    return buckets[starts], out
+
+
+class CandleRollups:
+    """
+    Maintains rollups of a CandleArchive's base-resolution candles.
+
+    Parameters:
+        archive: Archive holding the base candles and receiving the rollups.
+        base_resolution: Resolution of the candles fed to ``update`` (1 minute by default).
+        resolutions: Resolutions to build; every TimeFrame coarser than the base by default.
+        retention: Retention in ms per resolution (None keeps it forever); DEFAULT_RETENTION by default.
+    """
+
+    def __init__(self, archive: CandleArchive, base_resolution: int = TimeFrame.ONE_MINUTE.value,
+                 resolutions: Optional[Iterable[int]] = None, retention: Optional[Dict[int, Optional[int]]] = None):
+        self.archive = archive
+        self.base_resolution = base_resolution
+        if resolutions is None:
+            resolutions = [frame.value for frame in TimeFrame]
+        self.resolutions = sorted(r for r in set(resolutions) if r > base_resolution and r % base_resolution == 0)
+        self.retention = DEFAULT_RETENTION if retention is None else retention
+        self.logger = logging.getLogger(__name__)
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}  # Per pair, held by ``update``
+        self._locks_lock = threading.Lock()
+
+        # Source of each rollup: the coarsest finer resolution that divides it
+        self.sources = {}
+        for i, resolution in enumerate(self.resolutions):
+            finer = [base_resolution] + self.resolutions[:i]
+            source = max(r for r in finer if resolution % r == 0)
+            kept = self.retention.get(source)
+            if kept is not None and kept < resolution:
+                raise ValueError(f"{source} ms candles are kept {kept} ms, less than the {resolution} ms "
+                                 f"candles built from them")
+            self.sources[resolution] = source
+
+    def derives(self, resolution: int) -> bool:
+        """True when candles of ``resolution`` are built locally."""
+        return resolution in self.sources
+
+    def update(self, base: str, counter: str, timestamps) -> int:
+        """
+        Rebuild every rollup bucket holding one of ``timestamps``, the open times of base candles just
+        written to the archive. Returns the number of rollup candles written.
+
+        Updates of the same pair are serialized: each one reads its source candles and writes its
+        buckets as a whole, so an update that read older candles (a backfill racing the live loop)
+        cannot overwrite the buckets of one that read newer candles.
+        """
+        with self._locks_lock:
+            lock = self._locks.setdefault((base, counter), threading.Lock())
+        with lock:
+            changed = {self.base_resolution: np.asarray(timestamps, dtype=np.int64)}
+            for resolution in self.resolutions:
+                timestamps = changed[self.sources[resolution]]
+                if len(timestamps):
+                    first, last = int(timestamps.min()), int(timestamps.max())
+                    start = first - first % resolution
+                    end = last - last % resolution + resolution
+                    source = self.archive.read(base, counter, self.sources[resolution], start, end)
+                    timestamps = self.archive.write_changes(base, counter, resolution, *rollup(*source, resolution))
+                changed[resolution] = timestamps
+            return sum(len(changed[resolution]) for resolution in self.resolutions)
+
+    def compact(self, now: Optional[int] = None) -> int:
+        """Drop the archived months past each resolution's retention. Returns the number of files deleted."""
+        now = int(time.time() * 1000) if now is None else now
+        deleted = 0
+        for resolution, kept in self.retention.items():
+            if kept is not None:
+                deleted += self.archive.prune(resolution, now - kept)
+        if deleted:
+            self.logger.info(f"Compacted {deleted} candle archive files")
+        return deleted
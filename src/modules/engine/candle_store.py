@@ -0,0 +1,117 @@
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Price/volume columns stored for every candle, in storage order
+CANDLE_COLUMNS = ("open", "high", "low", "close", "base_volume", "counter_volume")
+
+
+class CandleBuffer:
+    """
+    Fixed-capacity candle buffer for one (pair, resolution) series, backed by preallocated NumPy arrays.
+
+    Candles are stored contiguously in a ``2 * capacity`` row block. When the write position reaches the
+    end, the newest ``capacity`` rows are moved back to the front, so appends stay amortized O(1) and the
+    live window is always a single contiguous slice. This lets ``values``/``timestamps``/``frame`` hand
+    out zero-copy views to the indicator code.
+    """
+
+    def __init__(self, capacity: int = 2000):
+        self.capacity = capacity
+        self._timestamps = np.zeros(2 * capacity, dtype=np.int64)  # Candle open time in ms
+        self._values = np.zeros((2 * capacity, len(CANDLE_COLUMNS)), dtype=np.float64)
+        self._start = 0
+        self._end = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._end - self._start
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        """Open time (ms) of the newest candle, which may still be forming."""
+        return int(self._timestamps[self._end - 1]) if self._end > self._start else None
+
+    def timestamps(self) -> np.ndarray:
+        """Zero-copy view of the candle open times in ms."""
+        return self._timestamps[self._start:self._end]
+
+    def values(self) -> np.ndarray:
+        """Zero-copy (n, len(CANDLE_COLUMNS)) view of the candle prices and volumes."""
+        return self._values[self._start:self._end]
+
+    def column(self, name: str) -> np.ndarray:
+        """Zero-copy view of a single candle column, e.g. 'close'."""
+        return self._values[self._start:self._end, CANDLE_COLUMNS.index(name)]
+
+    def frame(self) -> pd.DataFrame:
+        """DataFrame over the buffer, sharing the price block and exposing open times as 'timestamp'."""
+        with self._lock:
+            df = pd.DataFrame(self.values(), columns=list(CANDLE_COLUMNS), copy=False)
+            df["timestamp"] = pd.to_datetime(self.timestamps(), unit="ms", utc=True)
+            return df
+
+    def upsert(self, timestamp: int, row) -> bool:
+        """
+        Store one candle. A candle with the same open time as the newest one replaces it in place (the
+        still-forming candle), a newer candle is appended and older candles are ignored.
+        Returns True when the buffer changed.
+        """
+        with self._lock:
+            last = self.last_timestamp
+            if last is not None and timestamp < last:
+                return False
+            if last is not None and timestamp == last:
+                self._values[self._end - 1] = row
+                return True
+            if self._end == len(self._timestamps):
+                keep = self.capacity - 1
+                self._timestamps[:keep] = self._timestamps[self._end - keep:self._end]
+                self._values[:keep] = self._values[self._end - keep:self._end]
+                self._start, self._end = 0, keep
+            elif self._end - self._start == self.capacity:
+                self._start += 1
+            self._timestamps[self._end] = timestamp
+            self._values[self._end] = row
+            self._end += 1
+            return True
+
+    def update_from_records(self, records: Iterable[dict]) -> int:
+        """Upsert Horizon trade_aggregations records. Returns the number of candles changed."""
+        timestamps, values = records_to_arrays(records)
+        return self.extend(timestamps, values)
+
+    def extend(self, timestamps, values) -> int:
+        """Upsert candles given as open times (ms) and CANDLE_COLUMNS rows, in time order."""
+        return sum(self.upsert(int(timestamp), row) for timestamp, row in zip(timestamps, values))
+
+
+def records_to_arrays(records: Iterable[dict]) -> Tuple[np.ndarray, np.ndarray]:
+    """Horizon trade_aggregations records as (open times in ms, CANDLE_COLUMNS rows), sorted by time."""
+    records = sorted(records, key=lambda r: int(r["timestamp"]))
+    timestamps = np.array([int(record["timestamp"]) for record in records], dtype=np.int64)
+    values = np.array([[float(record.get(column) or 0) for column in CANDLE_COLUMNS] for record in records],
+                      dtype=np.float64).reshape(len(records), len(CANDLE_COLUMNS))
+    return timestamps, values
+
+
+class CandleStore:
+    """Registry of CandleBuffers keyed by (pair, resolution)."""
+
+    def __init__(self, capacity: int = 2000):
+        self.capacity = capacity
+        self._buffers: Dict[Tuple[str, int], CandleBuffer] = {}
+        self._lock = threading.Lock()
+
+    def get(self, pair: str, resolution: int) -> CandleBuffer:
+        """Return the buffer for a pair and resolution, creating an empty one on first use."""
+        with self._lock:
+            key = (pair, resolution)
+            if key not in self._buffers:
+                self._buffers[key] = CandleBuffer(self.capacity)
+            return self._buffers[key]
+
+    def __contains__(self, key: Tuple[str, int]):
+        return key in self._buffers
@@ -0,0 +1,270 @@
+"""
+Channel accounts: parallel transaction submission from one trading account.
+
+Stellar orders the transactions of a source account by sequence number, and Horizon answers a
+submission once it is in a ledger, so one account has a single transaction in flight at a time. A
+channel is a funded account used only as the source of transactions (it pays their fees and provides
+their sequence numbers); the operations keep the trading account as their source, and the transaction
+is signed by both. With N channels, N transactions are in flight at once.
+
+Each channel has its own sequence number in the SequenceManager. A health check reads every channel's
+account, creates the missing ones and tops up those whose balance fell under ``min_balance`` with one
+transaction from the trading account; channels that keep failing are left out until a check finds them
+funded again. When no channel is healthy, or none frees up within ``timeout``, transactions are
+submitted from the trading account itself.
+"""
+import logging
+import threading
+from collections import deque
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+from stellar_sdk import Asset, Keypair, MuxedAccount, TransactionBuilder
+from stellar_sdk.exceptions import BadRequestError, NotFoundError
+
+from src.modules.engine.sequence_manager import SequenceManager, transaction_result_code
+
+ACQUIRE_TIMEOUT = 30.0  # Seconds a submission waits for an idle channel before using the trading account
+
+
+def native_balance(account: dict) -> Decimal:
+    """The lumen balance of a Horizon account record."""
+    for balance in account.get("balances", []):
+        if balance.get("asset_type") == "native":
+            return Decimal(balance["balance"])
+    return Decimal(0)
+
+
+class ChannelPool:
+    """
+    A pool of channel accounts submitting transactions for a trading account; see the module docstring.
+
+    Parameters:
+    - server (Server): stellar_sdk Server transactions are submitted to; its client's ``pool_size``
+      (10 connections by default) should be at least the number of channels.
+    - sequences (SequenceManager): Sequence numbers of the trading account and of the channels.
+    - keypair (Keypair): The trading account, source and signer of the operations; it funds the channels.
+    - channels (Iterable[Keypair]): Channel account signers.
+    - network_passphrase (str): Network the transactions are signed for.
+    - base_fee (int): Fee per operation in stroops, paid by the channel.
+    - min_balance (str): Lumens under which a channel is topped up (it must also cover the base reserve).
+    - refill_amount (str): Lumens a channel is topped up to; also the starting balance of a created one.
+    - max_failures (int): Consecutive failed submissions after which a channel is left out until the next check.
+    """
+
+    def __init__(self, server, sequences: SequenceManager, keypair: Keypair, channels: Iterable[Keypair],
+                 network_passphrase: str, base_fee: int = 100, min_balance: str = "2",
+                 refill_amount: str = "5", max_failures: int = 3):
+        self.server = server
+        self.sequences = sequences
+        self.keypair = keypair
+        self.channels: List[Keypair] = list(channels)
+        self.network_passphrase = network_passphrase
+        self.base_fee = base_fee
+        self.min_balance = Decimal(min_balance)
+        self.refill_amount = Decimal(refill_amount)
+        self.max_failures = max_failures
+        self.health: Dict[str, dict] = {channel.public_key: {"healthy": True, "failures": 0, "balance": None,
+                                                             "submitted": 0}
+                                        for channel in self.channels}
+        self._idle = deque(self.channels)
+        self._busy = set()
+        self._condition = threading.Condition()
+        self._refill_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.logger = logging.getLogger(__name__)
+
+    def __len__(self):
+        return len(self.channels)
+
+    # ===============================================================
+    # SUBMISSION
+    # ===============================================================
+    def _available(self) -> bool:
+        return bool(self._idle) or self._stop.is_set() or not any(h["healthy"] for h in self.health.values())
+
+    def acquire(self, timeout: Optional[float] = ACQUIRE_TIMEOUT) -> Keypair:
+        """
+        Take an idle healthy channel, waiting up to ``timeout`` seconds for one. Raises TimeoutError when
+        none frees up in time, when no channel is healthy, or once the pool is stopped.
+        """
+        with self._condition:
+            if not self._condition.wait_for(self._available, timeout) or not self._idle:
+                raise TimeoutError("No channel account available")
+            channel = self._idle.popleft()
+            self._busy.add(channel.public_key)
+            return channel
+
+    def release(self, channel: Keypair):
+        """Give a channel back; it becomes available again unless it was found unhealthy."""
+        with self._condition:
+            self._busy.discard(channel.public_key)
+            if self.health[channel.public_key]["healthy"]:
+                self._idle.append(channel)
+                self._condition.notify()
+
+    def submit(self, operations: list, timeout: Optional[float] = ACQUIRE_TIMEOUT) -> dict:
+        """
+        Submit operations of the trading account in a transaction sourced from an idle channel and
+        return Horizon's response. The operations' source is set to the trading account. When no channel
+        is available (see ``acquire``) the transaction is sourced from the trading account. Errors are raised.
+        """
+        trading_account = MuxedAccount.from_account(self.keypair.public_key)
+        for operation in operations:
+            operation.source = trading_account
+
+        try:
+            channel = self.acquire(timeout)
+        except TimeoutError:
+            self.logger.warning("No channel account available, submitting from the trading account")
+            return self.sequences.submit(self.keypair.public_key, self._build(operations, [self.keypair]))
+        build = self._build(operations, [channel, self.keypair])
+
+        try:
+            response = self.sequences.submit(channel.public_key, build)
+        except BadRequestError as e:
+            code = transaction_result_code(e)
+            if code == "tx_insufficient_balance":
+                self._mark(channel, failed=True)
+                try:
+                    self._read_balance(channel)
+                    self.refill([channel])
+                except Exception as refill_error:
+                    self.logger.error(f"Could not refill channel {channel.public_key}: {refill_error}")
+            elif code != "tx_failed":  # tx_failed is the operations' doing, not the channel's
+                self._mark(channel, failed=True)
+            raise
+        except Exception:
+            self._mark(channel, failed=True)
+            raise
+        finally:
+            self.release(channel)
+        self._mark(channel, failed=False)
+        return response
+
+    def _build(self, operations: list, signers: List[Keypair]):
+        def build(account):
+            builder = TransactionBuilder(account, self.network_passphrase, base_fee=self.base_fee)
+            for operation in operations:
+                builder.append_operation(operation)
+            tx = builder.set_timeout(30).build()
+            for signer in signers:
+                tx.sign(signer)
+            return tx
+        return build
+
+    def _mark(self, channel: Keypair, failed: bool):
+        with self._condition:
+            health = self.health[channel.public_key]
+            health["submitted"] += 1
+            health["failures"] = health["failures"] + 1 if failed else 0
+            if health["failures"] >= self.max_failures and health["healthy"]:
+                health["healthy"] = False
+                self.logger.warning(f"Channel {channel.public_key} failed {health['failures']} times, "
+                                    f"left out until the next health check")
+                self._condition.notify_all()  # Waiters fall back to the trading account if none is left
+
+    # ===============================================================
+    # HEALTH
+    # ===============================================================
+    def check(self) -> Dict[str, dict]:
+        """
+        Read every channel's account, fund the missing or low ones, and return the health per channel
+        (healthy, consecutive failures, lumen balance, transactions submitted).
+        """
+        low = []
+        for channel in self.channels:
+            try:
+                balance = self._read_balance(channel)
+            except Exception as e:
+                self.logger.warning(f"Health check of channel {channel.public_key} failed: {e}")
+                continue
+            if balance is None or balance < self.min_balance:
+                low.append(channel)
+            else:
+                self._set_healthy(channel, True)
+        if low:
+            self.refill(low)
+        return {account_id: dict(health) for account_id, health in self.health.items()}
+
+    def _read_balance(self, channel: Keypair) -> Optional[Decimal]:
+        """Read a channel's lumen balance from Horizon into its health; None when the account does not exist."""
+        try:
+            balance = native_balance(self.server.accounts().account_id(channel.public_key).call())
+        except NotFoundError:
+            balance = None
+        with self._condition:
+            self.health[channel.public_key]["balance"] = balance
+        return balance
+
+    def refill(self, channels: List[Keypair]) -> bool:
+        """
+        Top up channels to ``refill_amount`` lumens (creating the missing ones), from the balances last
+        read, in one transaction from the trading account. Returns whether it succeeded; the channels are
+        healthy again if so.
+        """
+        with self._refill_lock:
+            def build(account):
+                builder = TransactionBuilder(account, self.network_passphrase, base_fee=self.base_fee)
+                for channel in channels:
+                    balance = self.health[channel.public_key]["balance"]
+                    if balance is None:
+                        builder.append_create_account_op(channel.public_key, str(self.refill_amount))
+                    else:
+                        builder.append_payment_op(channel.public_key, Asset.native(),
+                                                  str(max(self.refill_amount - balance, Decimal("0.0000001"))))
+                tx = builder.set_timeout(30).build()
+                tx.sign(self.keypair)
+                return tx
+
+            try:
+                self.sequences.submit(self.keypair.public_key, build)
+            except Exception as e:
+                self.logger.error(f"Refill of {len(channels)} channel accounts failed: {e}")
+                for channel in channels:
+                    self._set_healthy(channel, False)
+                return False
+            self.logger.info(f"Refilled {len(channels)} channel accounts to {self.refill_amount} XLM")
+            for channel in channels:
+                with self._condition:
+                    self.health[channel.public_key]["balance"] = self.refill_amount
+                self._set_healthy(channel, True)
+            return True
+
+    def _set_healthy(self, channel: Keypair, healthy: bool):
+        with self._condition:
+            health = self.health[channel.public_key]
+            health["healthy"] = healthy
+            if healthy:
+                health["failures"] = 0
+                if channel.public_key not in self._busy and channel not in self._idle:
+                    self._idle.append(channel)
+                    self._condition.notify()
+            else:
+                if channel in self._idle:
+                    self._idle.remove(channel)
+                self._condition.notify_all()
+
+    def start(self, interval: float = 300.0) -> threading.Thread:
+        """Run the health check every ``interval`` seconds in a background thread."""
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.check()
+                except Exception as e:
+                    self.logger.error(f"Channel health check failed: {e}")
+
+        self._thread = threading.Thread(target=run, name="ChannelHealth", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        """Stop the health checks; submissions waiting for a channel fall back to the trading account."""
+        with self._condition:
+            self._stop.set()
+            self._condition.notify_all()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
@@ -1,46 +1,26 @@
 import logging
-import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, List, Dict, Tuple
+from urllib.parse import urlparse
 
 import pandas as pd
 import requests
-from numpy import empty
 from stellar_sdk import Asset
 
-
-def extract_n_d(price_ratio_str: str) -> Optional[Tuple[int, int]]:
-    """Extract numerator and denominator from the price ratio string."""
-    match = re.search(r"\{'n': (\d+), 'd': (\d+)}", price_ratio_str)
-    if match:
-        return int(match[1]), int(match[2])
-    logging.warning(f"Failed to extract n and d from price ratio: {price_ratio_str}")
-    return None
+from src.modules.engine.candle_backfill import fetch_trade_aggregations
+from src.modules.engine.horizon_paginator import HorizonPaginator
+from src.modules.engine.order_book import decode_order_book
+from src.modules.engine.rate_limiter import HorizonRateLimiter
+from src.modules.engine.response_cache import ResponseCache
 
 
 def parse_order_data(orders) -> List[Dict]:
-    """Parse order data and return structured bid/ask information."""
-    parsed_orders = []
-    for order in orders:
-        try:
-            price = float(order.get("price", 0))
-            amount = float(order.get("amount", 0))
-            price_r_str = str(order.get("price_r", ""))
-
-            if amount <= 0 or price <= 0:
-                continue
-
-            n_d = extract_n_d(price_r_str)
-            price_ratio = float(n_d[0] / n_d[1]) if n_d else price
-
-            parsed_orders.append({
-                "price_r": price_ratio,
-                "price": price,
-                "amount": amount,
-            })
-        except Exception as e:
-            logging.error(f"Error parsing order: {order}, Error: {e}")
-    return parsed_orders
+    """Parse one side of an order book into price_r (n/d as a float), price and amount dicts."""
+    book = decode_order_book({"bids": orders})
+    return [{"price_r": price, "price": price, "amount": amount}
+            for price, amount in zip(book.price.tolist(), book.amount.tolist())]
 
 
 def extract_accounts_values(data) -> dict:
@@ -70,6 +50,10 @@ class DataFetcher:
     the Horizon API to retrieve the information.
     """
 
+    # Per-host connection caps, shared by every DataFetcher of the process with the same limit
+    _host_semaphores: Dict[Tuple[str, int], threading.BoundedSemaphore] = {}
+    _host_semaphores_lock = threading.Lock()
+
     def __init__(self, controller=None):
         """
     Initializes the DataFetcher with a Stellar server connection and a logger.
@@ -89,9 +73,13 @@ class DataFetcher:
         self.data_df = None
         self.balances = None
         self.last_request_time = 0
-        self.max_request_frequency = 10  # Requests per minute
+        self.rate_limiter = None  # Shared HorizonRateLimiter of the Horizon host, paces and retries process_request
+        self.response_cache = ResponseCache.shared()  # Fresh GET responses, shared with the bot's Server client
         self.offset = 0
         self.orderbook_limit = 100  # Maximum number of orders to retrieve per request
+        self.max_workers = 8  # Worker threads used for concurrent market data snapshots
+        self.max_connections_per_host = 4  # Concurrent requests allowed against a single Horizon host
+        self.market_data_latency: Dict[str, float] = {}  # Last order book fetch latency per pair (ms)
 
         self.limit = 200  # Maximum number of records to retrieve per request
         self.controller = controller
@@ -123,60 +111,34 @@ class DataFetcher:
 
 
     def get_all_assets(self, cursor=None, max_page=10):
-        """Fetch and process assets from the Stellar network with pagination."""
+        """Fetch assets from the Stellar network, ``max_page`` pages of 200 after ``cursor``."""
         try:
-         # Throttling to ensure we don't exceed the request rate
-         limit = min(max_page, 200)  # Stellar API limits to 100 assets per page
-
-         # Prepare the request URL and parameters
-         self.endpoint = "/assets"
-         self.order = "asc"
-         params = {
-
-            'limit': limit,
-            'order': self.order
-        }
-
-         #https://horizon.stellar.org/assets?cursor=&limit=200&order=asc
-
-         # Send the GET request
-         response = self.process_request(self.endpoint, params)
-         self.last_request_time = time.time()  # Update the last request time
-
-         if response is None or response.status_code != 200:
-            self.logger.error(f"Error fetching assets: {response}")
+            assets_df = self.paginate("assets", {"order": "asc"}, cursor=cursor, max_pages=max_page).frame()
+            self.last_request_time = time.time()
+            # Replace NaN with empty strings for better readability
+            assets_df.fillna("", inplace=True)
+            return assets_df
+        except Exception as e:
+            self.logger.error(f"Error retrieving assets: {e}")
+            self.controller.server_msg['message'] = f"Error retrieving assets: {str(e)}"
             return pd.DataFrame()  # Return an empty DataFrame if request failed
 
-         # Parse the JSON response
-         data = response.json()
-         if isinstance(data, dict) and '_embedded' in data and'records' in data['_embedded']:
-             # Process the records and append them to the DataFrame
-             assets_df = pd.json_normalize(data['_embedded']['records'])
-
-             # Check if there is a next page (cursor)
-             next_cursor = data['_links'].get('next', {}).get('href', None)
-
-             # Recursively fetch next pages if max_page allows
-             if next_cursor and max_page > 1:
-                 next_cursor_param = next_cursor.split("cursor=")[-1]
-                 next_assets_df = self.get_all_assets(cursor=next_cursor_param, max_page=max_page - 1)
-                 assets_df = pd.concat([assets_df, next_assets_df], ignore_index=True)
-
-             # Replace NaN with empty strings for better readability
-             assets_df.fillna("", inplace=True)
-
-             return assets_df
-
-         else:
-             self.logger.error(f"Invalid response from Stellar API: {data}")
-             return pd.DataFrame()  # Return an empty DataFrame if the response is invalid
-
-
-        except Exception as e:
-         self.logger.error(f"Error retrieving assets: {e}")
-         self.controller.server_msg['message'] = f"Error retrieving assets: {str(e)}"
-         return pd.DataFrame()  # Return an empty DataFrame if request failed
+    def paginate(self, path, params=None, cursor=None, max_pages=None, checkpoint_path=None) -> HorizonPaginator:
+        """
+        Paginator over a Horizon collection, e.g. ``paginate(f"accounts/{account_id}/operations")``. Its
+        pages are fetched with ``get_url`` (rate limited and cached); stream its ``records`` or ``chunks``,
+        or build a DataFrame with ``frame``.
 
+        Parameters:
+        - path (str): The collection path relative to the Horizon URL.
+        - params (dict): Query parameters other than the cursor and limit.
+        - cursor (str): Start after this paging token.
+        - max_pages (int): Pages fetched at most; None follows the collection to its end.
+        - checkpoint_path (str): File the cursor is saved to, so that a later paginator resumes.
+        """
+        return HorizonPaginator(self.get_url, f"{self.controller.server_horizon_url.rstrip('/')}/{path.lstrip('/')}",
+                                params, cursor=cursor, limit=self.limit, max_pages=max_pages,
+                                checkpoint_path=checkpoint_path)
 
     def get_account_balance(self):
         """
@@ -384,7 +346,8 @@ class DataFetcher:
         selling (Asset): The asset being sold (e.g., USDC, BTCLN).
 
     Returns:
-        pd.DataFrame: A DataFrame containing the parsed order book with columns for price, size, and side.
+        pd.DataFrame: The order book with columns price, price_n, price_d, size, depth and side, bids
+        first (see order_book.decode_order_book).
 
     Raises:
         Exception: If there is an error during the fetching or parsing process.
@@ -397,40 +360,20 @@ class DataFetcher:
         # Fetch the order book data from the Stellar server
         order_book = self.server.orderbook(buying=buying, selling=selling).limit(200).call()
 
-        # Parse the bids and asks from the response
-        bids = pd.DataFrame(order_book.get("bids", []))  # Extract bids
-        asks = pd.DataFrame(order_book.get("asks", []))  # Extract asks
-
-        # Validate the parsed DataFrames and handle cases where data might be missing
-        if bids.empty and asks.empty:
+        # Decode the bids and asks into columns
+        book = decode_order_book(order_book)
+        if not len(book):
             self.logger.warning(f"No data found in order book for {buying.code}/{selling.code}.")
             self.controller.server_msg["message"] = f"No data found in order book for {buying.code}/{selling.code}."
             return pd.DataFrame(columns=["price", "size", "side"])  # Return an empty DataFrame
 
-        # Assign side labels to bids and asks
-        if not bids.empty:
-            bids["side"] = "bid"
-        if not asks.empty:
-            asks["side"] = "ask"
-
-        # Concatenate bids and asks into a single DataFrame
-        order_book_df = pd.concat([bids, asks], axis=0, ignore_index=True)
-
-        # Ensure all required columns are present and in the correct format
-        expected_columns = {"price", "amount", "side"}
-        if not expected_columns.issubset(order_book_df.columns):
-            raise KeyError(f"Missing expected columns in order book: {expected_columns - set(order_book_df.columns)}")
-
-        # Rename and format columns
-        order_book_df.rename(columns={"amount": "size"}, inplace=True)
-        order_book_df = order_book_df[["price", "size", "side"]]
-        order_book_df = order_book_df.astype({"price": float, "size": float})
+        order_book_df = book.to_frame().rename(columns={"amount": "size"})
 
         # Log and return the parsed order book
         self.logger.info("Order book fetched and parsed successfully.")
         self.controller.server_msg["message"] = "Order book fetched and parsed successfully."
-        self.controller.server_msg["order_book_bids"] = bids.to_dict(orient="records")
-        self.controller.server_msg["order_book_asks"] = asks.to_dict(orient="records")
+        self.controller.server_msg["order_book_bids"] = order_book_df.iloc[book.bids].to_dict(orient="records")
+        self.controller.server_msg["order_book_asks"] = order_book_df.iloc[book.asks].to_dict(orient="records")
 
         return order_book_df
 
@@ -444,15 +387,53 @@ class DataFetcher:
         self.controller.server_msg["message"] = f"Error fetching order book: {e}"
         return pd.DataFrame(columns=["price", "size", "side"])  # Return an empty DataFrame
 
-    def get_market_data(self):
-        """Fetch market data for all assets from the Stellar network."""
+    def _host_semaphore(self) -> threading.BoundedSemaphore:
+        """
+        Return the semaphore capping concurrent requests against the Horizon host in use at
+        ``max_connections_per_host``. Fetchers with another limit get a semaphore of their own.
+        """
+        key = (urlparse(getattr(self.server, "horizon_url", self.server_horizon_url)).netloc,
+               self.max_connections_per_host)
+        with DataFetcher._host_semaphores_lock:
+            semaphore = DataFetcher._host_semaphores.get(key)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.max_connections_per_host)
+                DataFetcher._host_semaphores[key] = semaphore
+            return semaphore
+
+    def _fetch_pair_order_book(self, trading_pair: Tuple[Asset, Asset]) -> Tuple[dict, float]:
+        """Fetch the order book of a single trading pair and return it with its fetch latency in ms."""
+        base_asset, counter_asset = trading_pair
+        with self._host_semaphore():
+            started = time.perf_counter()
+            try:
+                book = self.server.orderbook(buying=base_asset, selling=counter_asset).call()
+            except Exception as e:
+                self.logger.error(f"Error fetching order book for {base_asset.code}/{counter_asset.code}: {e}")
+                book = {"bids": [], "asks": []}
+            latency_ms = (time.perf_counter() - started) * 1000
+        return book, latency_ms
+
+    def get_market_data(self, concurrent: bool = True, max_workers: Optional[int] = None):
+        """
+        Fetch market data for all assets from the Stellar network.
+
+        Each trading pair's order book is fetched exactly once. When ``concurrent`` is True the
+        requests are spread over a bounded thread pool, capped per Horizon host by
+        ``max_connections_per_host``. The fetch latency of each pair is stored in
+        ``market_data_latency`` and published as ``server_msg["market_data_latency"]``.
+
+        Parameters:
+        concurrent (bool): Fetch the order books in parallel instead of one after another.
+        max_workers (int): Size of the worker pool. Defaults to ``self.max_workers``.
+        """
         self.logger.info("Fetching market data")
 
         # Fetch all assets from the Stellar network
         self.controller.server_msg["message"] = "Fetching market data"
         assets = self.assets
 
-        if  assets is None or empty(assets):
+        if not assets:
             self.logger.warning("No assets found on the Stellar network.")
             self.controller.server_msg["message"] = "No assets found on the Stellar network."
             return []
@@ -462,38 +443,42 @@ class DataFetcher:
         self.logger.info(f"Fetching market data for {trading_pairs} trading pairs.")
         self.controller.server_msg["trading_pairs"] = trading_pairs
 
-        # Fetch order book for each trading pair
-        market_data = []
-        for trading_pair in trading_pairs:
-            base_asset, counter_asset = trading_pair
-            market_data.append(self.server.orderbook(buying=base_asset, selling=counter_asset).call())
-
-
-
-        # Fetch market data for each trading pair
-        market_data = []
-        for trading_pair in trading_pairs:
-            base_asset, counter_asset = trading_pair
-            market_data.append(self.server.orderbook(buying=base_asset, selling=counter_asset).call())
+        # Fetch the order book of each trading pair once
+        if concurrent:
+            workers = max(1, min(max_workers or self.max_workers, len(trading_pairs)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="MarketData") as executor:
+                results = list(executor.map(self._fetch_pair_order_book, trading_pairs))
+        else:
+            results = [self._fetch_pair_order_book(trading_pair) for trading_pair in trading_pairs]
+
+        market_data = [decode_order_book(book) for book, _ in results]
+        self.market_data_latency = {
+            f"{base.code}/{counter.code}": latency_ms for (base, counter), (_, latency_ms) in zip(trading_pairs, results)
+        }
+        slowest = sorted(self.market_data_latency.items(), key=lambda item: item[1], reverse=True)[:5]
+        self.logger.info(f"Slowest order book fetches (ms): {slowest}")
 
         # Parse market data and create DataFrame
         market_data_df = pd.DataFrame()
         market_data_df["base_asset"] = [pair[0].code for pair in trading_pairs]
         market_data_df["counter_asset"] = [pair[1].code for pair in trading_pairs]
-        market_data_df["bids"] = [pd.DataFrame(book["bids"], columns=["price", "size"]) for book in market_data]
-        market_data_df["asks"] = [pd.DataFrame(book["asks"], columns=["price", "size"]) for book in market_data]
-        market_data_df["base_asset_price"] = [book["bids"][0][0] if book["bids"] else None for book in market_data]
-        market_data_df["counter_asset_price"] = [book["asks"][0][0] if book["asks"] else None for book in market_data]
-        market_data_df["base_asset_volume"] = [book["bids"][0][1] if book["bids"] else 0 for book in market_data]
-        market_data_df["counter_asset_volume"] = [book["asks"][0][1] if book["asks"] else 0 for book in market_data]
+        market_data_df["bids"] = [pd.DataFrame({"price": book.price[book.bids], "size": book.amount[book.bids]})
+                                  for book in market_data]
+        market_data_df["asks"] = [pd.DataFrame({"price": book.price[book.asks], "size": book.amount[book.asks]})
+                                  for book in market_data]
+        market_data_df["base_asset_price"] = [book.best_bid for book in market_data]
+        market_data_df["counter_asset_price"] = [book.best_ask for book in market_data]
+        market_data_df["base_asset_volume"] = [book.amount[0] if book.n_bids else 0 for book in market_data]
+        market_data_df["counter_asset_volume"] = [book.amount[book.n_bids] if len(book) > book.n_bids else 0
+                                                  for book in market_data]
         market_data_df["price_change_percentage"] = [
-            (book["bids"][0][0] - book["asks"][0][0]) / book["bids"][0][0] * 100 if book["bids"] and book["asks"] else None
-            for book in market_data
+            -book.spread_pct() if book.spread_pct() is not None else None for book in market_data
         ]
         # Log and return the parsed market data
         self.logger.info("Market data fetched and parsed successfully.")
         self.controller.server_msg["message"] = "Market data fetched and parsed successfully."
         self.controller.server_msg["market_data"] = market_data_df.to_dict(orient="records")
+        self.controller.server_msg["market_data_latency"] = dict(self.market_data_latency)
 
         return market_data_df
 
@@ -524,38 +509,39 @@ class DataFetcher:
             self.controller.server_msg["error"] = f"Error fetching payment history: {e}"
             return []
 
-    def get_trade_aggregations(self, base_asset, counter_asset,
-                               resolution: int = int(time.time() - 86400 * 7),  # 7 days ago
-                               start_time: int = int(time.time()) - 86400 * 1,  # 1 day ago
-                               end_time: int = int(time.time()) - 86400 * 7,  # 7 days ago
-                               limit: int = 200,  # 200 records
-                               offset: int = -5  # 0 records offset
-                               ):
+    def get_trade_aggregations(self, base_asset, counter_asset, resolution: int = 3_600_000,
+                               start_time: Optional[int] = None, end_time: Optional[int] = None,
+                               offset: int = 0) -> pd.DataFrame:
+        """
+        Candles of a pair from Horizon's trade_aggregations, every page of them.
 
+        Parameters:
+        - resolution (int): Candle length in ms (1 hour by default).
+        - start_time (int), end_time (int): Open times in ms; the last 24 hours by default.
+        - offset (int): Bucket offset in ms, for resolutions of a day or more.
+        """
+        end_time = end_time or int(time.time() * 1000)
+        start_time = start_time or end_time - 86_400_000
         try:
-            trade_aggregations = self.server.trade_aggregations(base_asset, counter_asset, resolution=resolution,
-                                                                start_time=start_time, end_time=end_time,
-                                                                offset=offset, limit=limit).order(
-                order="desc"
-            ).limit(200).call()
-            dat = pd.DataFrame(trade_aggregations)
-            dat['price'] = dat['price'].astype(float)
-            dat['base_volume'] = dat['base_volume'].astype(float)
-            dat['counter_volume'] = dat['counter_volume'].astype(float)
-            dat['open'] = dat['open'].astype(float)
-            dat['high'] = dat['high'].astype(float)
-            dat['low'] = dat['low'].astype(float)
-            dat['close'] = dat['close'].astype(float)
-            dat['time'] = pd.to_datetime(dat['time'], unit='s')
-            dat.dropna(inplace=True)
+            records = fetch_trade_aggregations(self.server, base_asset, counter_asset, resolution, start_time,
+                                               end_time, offset)
+            dat = pd.DataFrame(records)
+            if dat.empty:
+                return dat
+            columns = ["open", "high", "low", "close", "avg", "base_volume", "counter_volume"]
+            dat[columns] = dat[columns].astype(float)
+            dat['time'] = pd.to_datetime(dat['timestamp'].astype('int64'), unit='ms')
             return dat
         except Exception as e:
             self.logger.error(f"Error fetching trade aggregations: {e}")
             self.controller.server_msg["error"] = f"Error fetching trade aggregations: {e}"
-            return {}
+            return pd.DataFrame()
+
     def process_request(self, path, params):
      """
-    Performs a GET request to the Stellar Horizon API with the provided parameters.
+    Performs a GET request to the Stellar Horizon API with the provided parameters, paced by the host's
+    shared rate limiter. 429 and 5xx responses are retried with backoff before giving up. Responses of
+    cacheable endpoints are served from the shared ResponseCache while fresh.
 
     Args:
     param (str): The endpoint to make the request to.
@@ -567,8 +553,13 @@ class DataFetcher:
      Raises:
         Exception: If the request fails or returns an error status code.
         """
-     url = f"{self.controller.server_horizon_url}/{path}"
-     response = self.session.get(url, params=params)
+     return self.get_url(f"{self.controller.server_horizon_url}/{path}", params)
+
+    def get_url(self, url, params):
+     """GET an absolute Horizon URL (such as a ``_links.next`` href) like ``process_request``."""
+     limiter = self.rate_limiter or HorizonRateLimiter.for_host(url)
+     response = self.response_cache.get(
+         url, params, lambda headers: limiter.request(self.session, "GET", url, params=params, headers=headers))
      if response.status_code != 200:
         self.logger.error(f"Failed to fetch data: {response.status_code} - {response.text}")
         raise Exception(f"Failed to fetch data: {response.status_code} - {response.text}")
@@ -1,53 +1,265 @@
-import sqlite3
+import itertools
 import logging
+import queue
+import sqlite3
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from src.modules.engine.candle_store import CANDLE_COLUMNS
+
+# Connection settings: WAL lets readers run while the writer commits, NORMAL sync is durable in WAL mode
+# except for the last transactions before a power loss, and busy_timeout makes readers wait on locks
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA busy_timeout=5000",
+)
+
+# Schema version stored in PRAGMA user_version; create_tables migrates older databases up to it
+SCHEMA_VERSION = 1
+
+UPSERT_CANDLE = f'''
+    INSERT INTO candles (base, counter, resolution, open_time, {", ".join(CANDLE_COLUMNS)})
+    VALUES (?, ?, ?, ?, {", ".join("?" * len(CANDLE_COLUMNS))})
+    ON CONFLICT (base, counter, resolution, open_time) DO UPDATE SET
+    {", ".join(f"{column} = excluded.{column}" for column in CANDLE_COLUMNS)}
+'''
+
+
+class _Reader:
+    """Holds a thread's read connection in ``threading.local``, so a finalizer can tell when the thread is gone."""
+
+    __slots__ = ("db", "__weakref__")
+
+    def __init__(self, db: sqlite3.Connection):
+        self.db = db
+
+
+def _close_reader(readers: set, lock: threading.Lock, db: sqlite3.Connection):
+    with lock:
+        if db not in readers:  # Already closed by DatabaseManager.close
+            return
+        readers.discard(db)
+    db.close()
+
 
 class DatabaseManager:
     """
     DatabaseManager class handles all interactions with the SQLite database for storing assets, OHLCV data,
     and other related information. It abstracts away the database operations and provides methods
     to create, insert, query, and delete data.
+
+    Writes go through a single writer thread that owns the only write connection. They are queued in a
+    bounded queue (callers block when it is full) and applied in batches: consecutive writes of the same
+    statement are grouped into one ``executemany`` and every flush is one transaction. Write methods
+    return as soon as the write is queued; call ``flush`` to wait until everything queued so far is
+    committed. Reads use one connection per calling thread, so any thread may read; it is closed when
+    its thread exits.
     """
-    def __init__(self, db_path="stellarBot.db"):
+
+    def __init__(self, db_path="stellarBot.db", queue_size=10000, batch_size=5000):
         """
-        Initializes the DatabaseManager instance with an SQLite connection.
+        Initializes the DatabaseManager instance, creates the tables and starts the writer thread.
 
         Parameters:
         - db_path (str): Path to the SQLite database file. Defaults to 'stellarBot.db'.
+        - queue_size (int): Maximum number of pending write requests before writers block.
+        - batch_size (int): Rows after which the writer commits, even if more writes are queued.
         """
-        self.db = sqlite3.connect(db_path)
+        self.db_path = db_path
+        self.batch_size = batch_size
         self.logger = logging.getLogger(__name__)
-        self.create_tables()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._local = threading.local()
+        self._readers = set()
+        self._readers_lock = threading.Lock()
+        self._closed = False
+
+        db = self._connect()
+        try:
+            self.create_tables(db)
+        finally:
+            db.close()
+        self._writer = threading.Thread(target=self._write_loop, name="DatabaseWriter", daemon=True)
+        self._writer.start()
 
-    def create_tables(self):
+    def _connect(self):
+        db = sqlite3.connect(self.db_path, check_same_thread=False)
+        for pragma in PRAGMAS:
+            db.execute(pragma)
+        return db
+
+    @property
+    def db(self):
+        """Read connection of the calling thread."""
+        reader = getattr(self._local, "reader", None)
+        if reader is None:
+            reader = self._local.reader = _Reader(self._connect())
+            with self._readers_lock:
+                self._readers.add(reader.db)
+            # The thread-local holder dies with its thread; close the connection then, not at close()
+            weakref.finalize(reader, _close_reader, self._readers, self._readers_lock, reader.db)
+        return reader.db
+
+    def create_tables(self, db=None):
         """
-        Creates the required tables in the database if they do not exist. 
-        This includes tables for assets and OHLCV data.
+        Creates the required tables in the database if they do not exist and migrates older schemas.
+        This includes tables for assets and candles.
+
+        Candles are keyed by (base, counter, resolution, open_time) in a WITHOUT ROWID table: the primary
+        key is the table's own B-tree, so a pair's date range is one contiguous index range scan that
+        already holds every column.
         """
+        db = db or self.db
         try:
-            self.db.execute('''
+            db.execute('''
                 CREATE TABLE IF NOT EXISTS assets (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT, 
-                    asset_code TEXT NOT NULL, 
-                    asset_issuer TEXT NOT NULL
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    asset_code TEXT NOT NULL,
+                    asset_issuer TEXT NOT NULL,
+                    image TEXT DEFAULT 'default.png'
                 )
             ''')
-            self.db.execute('''
-                CREATE TABLE IF NOT EXISTS ohlcv_data (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT, 
-                    account_id TEXT NOT NULL, 
-                    open_time TEXT NOT NULL, 
-                    close_time TEXT NOT NULL, 
-                    low TEXT NOT NULL, 
-                    high TEXT NOT NULL, 
-                    close TEXT NOT NULL, 
-                    volume TEXT NOT NULL
-                )
+            db.execute('''
+                CREATE TABLE IF NOT EXISTS candles (
+                    base TEXT NOT NULL,
+                    counter TEXT NOT NULL,
+                    resolution INTEGER NOT NULL,
+                    open_time INTEGER NOT NULL,
+                    open REAL,
+                    high REAL NOT NULL,
+                    low REAL NOT NULL,
+                    close REAL NOT NULL,
+                    base_volume REAL,
+                    counter_volume REAL,
+                    PRIMARY KEY (base, counter, resolution, open_time)
+                ) WITHOUT ROWID
             ''')
-            self.db.commit()
+            if db.execute("PRAGMA user_version").fetchone()[0] < 1:
+                self._migrate_ohlcv_data(db)
+            db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            db.commit()
             self.logger.info("Tables created successfully")
         except sqlite3.Error as e:
+            db.rollback()
             self.logger.error(f"Error creating tables: {e}")
 
+    def _migrate_ohlcv_data(self, db):
+        """
+        Copy the rows of the former all-TEXT ``ohlcv_data`` table into ``candles`` and keep the old table
+        as ``ohlcv_data_legacy``.
+
+        Legacy rows only carry an account id, so it becomes the base with an empty counter. The resolution
+        is close_time - open_time. Times given as seconds, milliseconds or date strings are converted to
+        epoch milliseconds. There was no open column, so open is NULL.
+        """
+        exists = db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ohlcv_data'").fetchone()
+        if not exists:
+            return
+        legacy = pd.read_sql_query(
+            "SELECT account_id, open_time, close_time, low, high, close, volume FROM ohlcv_data", db)
+        if not legacy.empty:
+            open_time, close_time = _to_epoch_ms(legacy["open_time"]), _to_epoch_ms(legacy["close_time"])
+            prices = legacy[["high", "low", "close", "volume"]].apply(pd.to_numeric, errors="coerce")
+            rows = pd.DataFrame({
+                "base": legacy["account_id"], "counter": "", "resolution": close_time - open_time,
+                "open_time": open_time, "open": None, "high": prices["high"], "low": prices["low"],
+                "close": prices["close"], "base_volume": prices["volume"], "counter_volume": None,
+            }).dropna(subset=["open_time", "resolution", "high", "low", "close"])
+            db.executemany(UPSERT_CANDLE, [
+                (row.base, row.counter, int(row.resolution), int(row.open_time), None, row.high, row.low,
+                 row.close, None if pd.isna(row.base_volume) else row.base_volume, None)
+                for row in rows.itertuples(index=False)])
+            self.logger.info(f"Migrated {len(rows)} of {len(legacy)} legacy OHLCV rows")
+        db.execute("ALTER TABLE ohlcv_data RENAME TO ohlcv_data_legacy")
+
+    # ===============================================================
+    # WRITES
+    # ===============================================================
+    def execute_write(self, sql, rows):
+        """
+        Queue a write statement for the writer thread.
+
+        Parameters:
+        - sql (str): The statement, with ? placeholders.
+        - rows (list): Parameter tuples, one per execution of the statement.
+
+        Returns:
+        - bool: True once queued, False if the manager is closed.
+        """
+        if self._closed:
+            self.logger.error("Write after close ignored")
+            return False
+        self._queue.put((sql, list(rows)))
+        return True
+
+    def flush(self, timeout=None):
+        """
+        Block until every write queued before this call is committed.
+
+        Returns:
+        - bool: True if the writes were committed within ``timeout`` seconds.
+        """
+        if self._closed:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def _write_loop(self):
+        db = self._connect()
+        try:
+            while True:
+                item = self._queue.get()
+                batch, waiters, rows = [], [], 0
+                while True:
+                    if isinstance(item, threading.Event):
+                        waiters.append(item)
+                    elif item is not None:  # None only wakes the writer up on close
+                        batch.append(item)
+                        rows += len(item[1])
+                    if rows >= self.batch_size:
+                        break
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                try:
+                    self._commit(db, batch)
+                except Exception as e:
+                    self.logger.error(f"Write batch of {rows} rows dropped: {e}")
+                for waiter in waiters:
+                    waiter.set()
+                if self._closed and self._queue.empty():
+                    return  # Everything queued before close is committed
+        finally:
+            db.close()
+
+    def _commit(self, db, batch):
+        """Apply a batch in one transaction, one executemany per run of the same statement."""
+        if not batch:
+            return
+        groups = [(sql, [row for _, rows in group for row in rows])
+                  for sql, group in itertools.groupby(batch, key=lambda item: item[0])]
+        try:
+            with db:
+                for sql, rows in groups:
+                    db.executemany(sql, rows)
+        except Exception as e:  # sqlite3.Error, or e.g. OverflowError binding an integer too large for SQLite
+            # Replay write by write so a single bad write does not drop the rest of the batch
+            self.logger.warning(f"Batch write failed ({e}), retrying writes one by one")
+            for sql, rows in batch:
+                try:
+                    with db:
+                        db.executemany(sql, rows)
+                except Exception as error:
+                    self.logger.error(f"Error writing {len(rows)} rows with {sql.split('(')[0].strip()}: {error}")
+
     def insert_asset(self, asset_code, asset_issuer):
         """
         Inserts a new asset into the asset table.
@@ -57,47 +269,73 @@ class DatabaseManager:
         - asset_issuer (str): The issuer of the asset.
 
         Returns:
-        - bool: True if the insertion was successful, False otherwise.
+        - bool: True if the insertion was queued, False otherwise.
         """
-        try:
-            return self._extracted_from_delete_asset_13(
-                'INSERT INTO assets (asset_code, asset_issuer) VALUES (?, ?)',
-                asset_code,
-                asset_issuer,
-                'Inserted asset: ',
-            )
-        except sqlite3.Error as e:
-            self.logger.error(f"Error inserting asset: {e}")
-            return False
+        return self.insert_assets([(asset_code, asset_issuer)])
 
-    def insert_ohlcv_data(self, account_id, open_time, close_time, low, high, close, volume):
+    def insert_assets(self, assets):
         """
-        Inserts OHLCV (Open, High, Low, Close, Volume) data into the ohlcv_data table.
+        Inserts several assets in one write.
 
         Parameters:
-        - account_id (str): The account ID.
-        - open_time (str): The opening time of the candle.
-        - close_time (str): The closing time of the candle.
-        - low (str): The lowest price during the period.
-        - high (str): The highest price during the period.
-        - close (str): The closing price.
-        - Volume (str): The trading volume during the period.
+        - assets (list): (asset_code, asset_issuer) tuples.
 
         Returns:
-        - bool: True if the insertion was successful, False otherwise.
+        - bool: True if the insertion was queued, False otherwise.
         """
-        try:
-            self.db.execute('''
-                INSERT INTO ohlcv_data (account_id, open_time, close_time, low, high, close, volume)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (account_id, open_time, close_time, low, high, close, volume))
-            self.db.commit()
-            self.logger.info(f"Inserted OHLCV data for account {account_id}")
-            return True
-        except sqlite3.Error as e:
-            self.logger.error(f"Error inserting OHLCV data: {e}")
-            return False
+        return self.execute_write('INSERT INTO assets (asset_code, asset_issuer) VALUES (?, ?)', assets)
 
+    def upsert_candles(self, base, counter, resolution, timestamps, values):
+        """
+        Inserts or replaces candles of one pair and resolution in one write. A candle with an open time
+        already stored (e.g. the still-forming one) is updated in place.
+
+        Parameters:
+        - base (str), counter (str): The pair's assets, e.g. 'XLM' and 'USDC:GA5Z...'.
+        - resolution (int): Candle length in ms (a TimeFrame value).
+        - timestamps: Candle open times in ms.
+        - values: (n, 6) prices and volumes in CANDLE_COLUMNS order, as stored by CandleBuffer.
+
+        Returns:
+        - bool: True if the write was queued, False otherwise.
+        """
+        timestamps = np.asarray(timestamps, dtype=np.int64).tolist()
+        columns = np.asarray(values, dtype=np.float64).reshape(len(timestamps), len(CANDLE_COLUMNS)).T.tolist()
+        rows = zip(itertools.repeat(base), itertools.repeat(counter), itertools.repeat(int(resolution)),
+                   timestamps, *columns)
+        return self.execute_write(UPSERT_CANDLE, rows)
+
+    def delete_candles(self, resolution, before):
+        """
+        Deletes the candles of every pair at a resolution opened before a time, for retention.
+
+        Parameters:
+        - resolution (int): Candle length in ms.
+        - before (int): Open time bound in ms.
+
+        Returns:
+        - bool: True if the deletion was queued, False otherwise.
+        """
+        return self.execute_write('DELETE FROM candles WHERE resolution = ? AND open_time < ?',
+                                  [(int(resolution), int(before))])
+
+    def delete_asset(self, asset_code, asset_issuer):
+        """
+        Deletes an asset from the asset table based on asset code and issuer.
+
+        Parameters:
+        - asset_code (str): The asset code to delete (e.g., XLM, BTC).
+        - asset_issuer (str): The issuer of the asset.
+
+        Returns:
+        - bool: True if the deletion was queued, False otherwise.
+        """
+        return self.execute_write('DELETE FROM assets WHERE asset_code = ? AND asset_issuer = ?',
+                                  [(asset_code, asset_issuer)])
+
+    # ===============================================================
+    # READS
+    # ===============================================================
     def get_assets(self):
         """
         Fetches all assets from the asset table.
@@ -114,60 +352,78 @@ class DatabaseManager:
             self.logger.error(f"Error fetching assets: {e}")
             return []
 
-    def get_ohlcv_data(self, account_id):
+    def get_candles(self, base, counter, resolution, start_time=None, end_time=None):
         """
-        Fetches OHLCV data for a specific account.
+        Fetches the candles of a pair and resolution opened in [start_time, end_time).
 
         Parameters:
-        - account_id (str): The account ID for which to fetch the OHLCV data.
+        - base (str), counter (str): The pair's assets.
+        - resolution (int): Candle length in ms.
+        - start_time (int), end_time (int): Open time bounds in ms; None for unbounded.
 
         Returns:
-        - list: A list of tuples representing the OHLCV data, or an empty list in case of an error.
+        - tuple: (open times as an int64 array, (n, 6) float64 array in CANDLE_COLUMNS order). Missing
+          open or volume values are NaN. Empty arrays in case of an error.
         """
         try:
-            cursor = self.db.execute('SELECT * FROM ohlcv_data WHERE account_id = ?', (account_id,))
-            ohlcv_data = cursor.fetchall()
-            self.logger.info(f"Fetched OHLCV data for account {account_id}")
-            return ohlcv_data
+            cursor = self.db.execute(f'''
+                SELECT open_time, {", ".join(CANDLE_COLUMNS)} FROM candles
+                WHERE base = ? AND counter = ? AND resolution = ? AND open_time >= ? AND open_time < ?
+                ORDER BY open_time
+            ''', (base, counter, int(resolution), -2 ** 63 if start_time is None else int(start_time),
+                  2 ** 63 - 1 if end_time is None else int(end_time)))
+            rows = np.array(cursor.fetchall(), dtype=np.float64).reshape(-1, len(CANDLE_COLUMNS) + 1)
+            return rows[:, 0].astype(np.int64), np.ascontiguousarray(rows[:, 1:])
         except sqlite3.Error as e:
-            self.logger.error(f"Error fetching OHLCV data: {e}")
-            return []
+            self.logger.error(f"Error fetching candles: {e}")
+            return np.empty(0, dtype=np.int64), np.empty((0, len(CANDLE_COLUMNS)))
 
-    def delete_asset(self, asset_code, asset_issuer):
+    def get_candle_frame(self, base, counter, resolution, start_time=None, end_time=None):
         """
-        Deletes an asset from the asset table based on asset code and issuer.
-
-        Parameters:
-        - asset_code (str): The asset code to delete (e.g., XLM, BTC).
-        - asset_issuer (str): The issuer of the asset.
+        ``get_candles`` as a DataFrame with the CandleBuffer.frame layout: the CANDLE_COLUMNS and the
+        open time as a UTC 'timestamp' column.
+        """
+        timestamps, values = self.get_candles(base, counter, resolution, start_time, end_time)
+        df = pd.DataFrame(values, columns=list(CANDLE_COLUMNS), copy=False)
+        df["timestamp"] = pd.to_datetime(timestamps, unit="ms", utc=True)
+        return df
 
+    def last_candle_time(self, base, counter, resolution):
+        """
         Returns:
-        - bool: True if the deletion was successful, False otherwise.
+        - int: Open time in ms of the newest stored candle of a pair and resolution, or None.
         """
         try:
-            return self._extracted_from_delete_asset_13(
-                'DELETE FROM assets WHERE asset_code = ? AND asset_issuer = ?',
-                asset_code,
-                asset_issuer,
-                'Deleted asset: ',
-            )
+            return self.db.execute('''
+                SELECT MAX(open_time) FROM candles WHERE base = ? AND counter = ? AND resolution = ?
+            ''', (base, counter, int(resolution))).fetchone()[0]
         except sqlite3.Error as e:
-            self.logger.error(f"Error deleting asset: {e}")
-            return False
-
-    # TODO Rename this here and in `insert_asset` and `delete_asset`
-    def _extracted_from_delete_asset_13(self, arg0, asset_code, asset_issuer, arg3):
-        self.db.execute(arg0, (asset_code, asset_issuer))
-        self.db.commit()
-        self.logger.info(f"{arg3}{asset_code} - {asset_issuer}")
-        return True
+            self.logger.error(f"Error fetching last candle time: {e}")
+            return None
 
     def close(self):
         """
-        Closes the database connection.
+        Commits the pending writes, stops the writer thread and closes every connection.
         """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)  # Wakes up an idle writer, which stops once the queue is drained
+        self._writer.join()
         try:
-            self.db.close()
+            with self._readers_lock:
+                for db in self._readers:
+                    db.close()
+                self._readers.clear()
             self.logger.info("Database connection closed")
         except sqlite3.Error as e:
             self.logger.error(f"Error closing database: {e}")
+
+
+def _to_epoch_ms(values):
+    """Epoch milliseconds from text holding seconds, milliseconds or dates (NaN when unparsable)."""
+    numeric = pd.to_numeric(values, errors="coerce")
+    ms = numeric.where(numeric.abs() >= 1e11, numeric * 1000)
+    dates = pd.to_datetime(values[numeric.isna()], errors="coerce", utc=True)
+    ms[numeric.isna()] = (dates - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(milliseconds=1)
+    return ms
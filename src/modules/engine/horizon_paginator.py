@@ -0,0 +1,113 @@
+import json
+import os
+from typing import Callable, Iterator, List, Optional
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import pandas as pd
+
+
+def _next_cursor(page: dict, records: List[dict]) -> Optional[str]:
+    """The cursor of the page after ``page``: from its ``_links.next`` href, else its last paging_token."""
+    href = ((page.get("_links") or {}).get("next") or {}).get("href")
+    if href:
+        cursor = parse_qs(urlparse(href).query).get("cursor")
+        if cursor:
+            return cursor[-1]
+    return records[-1].get("paging_token") if records else None
+
+
+class HorizonPaginator:
+    """
+    Streams the records of a Horizon collection endpoint (assets, offers, trades, operations, effects,
+    payments...) page by page, following each page's ``_links.next`` cursor.
+
+    Records are yielded as they arrive, so a caller that streams never holds more than a page; ``frame``
+    collects them and builds the DataFrame once at the end. With a checkpoint file, the cursor of the
+    last record the caller consumed is saved after every page (or chunk), and a new paginator on the same
+    endpoint and parameters resumes after it.
+
+    Parameters:
+    - get (Callable): ``get(url, params)`` performs a GET request and returns a response with ``json()``.
+    - url (str): The collection URL, e.g. 'https://horizon.stellar.org/assets'.
+    - params (dict): Query parameters other than the cursor ('order', 'asset_code'...).
+    - cursor (str): Start after this paging token (a checkpoint takes precedence).
+    - limit (int): Records per page (Horizon allows up to 200).
+    - max_pages (int): Stop after this many pages; None follows the collection to its end.
+    - checkpoint_path (str): JSON file the cursor is saved to, for resuming.
+    """
+
+    def __init__(self, get: Callable, url: str, params: Optional[dict] = None, cursor: Optional[str] = None,
+                 limit: int = 200, max_pages: Optional[int] = None, checkpoint_path: Optional[str] = None):
+        self.get = get
+        self.url = url
+        self.params = {key: value for key, value in (params or {}).items() if key not in ("cursor", "limit")}
+        self.limit = limit
+        self.max_pages = max_pages
+        self.checkpoint_path = checkpoint_path
+        self.cursor = self._load_checkpoint() or cursor
+        self.pages = 0  # Pages fetched by this paginator
+
+    @property
+    def query_key(self) -> str:
+        """The endpoint and parameters a checkpoint belongs to."""
+        return f"{self.url}?{urlencode(sorted((k, str(v)) for k, v in self.params.items()))}"
+
+    def _load_checkpoint(self) -> Optional[str]:
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return None
+        try:
+            with open(self.checkpoint_path) as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return checkpoint.get("cursor") if checkpoint.get("query") == self.query_key else None
+
+    def commit(self, cursor: Optional[str]):
+        """Record that the records up to ``cursor`` were consumed, saving the checkpoint if there is one."""
+        if cursor is None:
+            return
+        self.cursor = cursor
+        if self.checkpoint_path:
+            tmp_path = f"{self.checkpoint_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"query": self.query_key, "cursor": cursor}, f)
+            os.replace(tmp_path, self.checkpoint_path)
+
+    def pages_after_cursor(self) -> Iterator[List[dict]]:
+        """Yield the pages of records after the cursor. The cursor is not committed."""
+        cursor = self.cursor
+        while self.max_pages is None or self.pages < self.max_pages:
+            params = dict(self.params, limit=self.limit)
+            if cursor is not None:
+                params["cursor"] = cursor
+            page = self.get(self.url, params).json()
+            records = page.get("_embedded", {}).get("records", [])
+            self.pages += 1
+            if records:
+                yield records
+            cursor = _next_cursor(page, records)
+            if len(records) < self.limit or cursor is None:
+                return
+
+    def records(self) -> Iterator[dict]:
+        """Yield the records one by one; the cursor is committed once every record of a page was consumed."""
+        for page in self.pages_after_cursor():
+            yield from page
+            self.commit(page[-1].get("paging_token"))
+
+    def chunks(self, size: int = 1000) -> Iterator[List[dict]]:
+        """Yield the records in lists of ``size`` (the last one may be shorter), committing after each."""
+        chunk: List[dict] = []
+        for page in self.pages_after_cursor():
+            chunk.extend(page)
+            while len(chunk) >= size:
+                full, chunk = chunk[:size], chunk[size:]
+                yield full
+                self.commit(full[-1].get("paging_token"))
+        if chunk:
+            yield chunk
+            self.commit(chunk[-1].get("paging_token"))
+
+    def frame(self) -> pd.DataFrame:
+        """Every remaining record as one DataFrame, built once after the last page."""
+        return pd.json_normalize(list(self.records()))
@@ -0,0 +1,238 @@
+import json
+import logging
+import socket
+import threading
+from collections import deque
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+from urllib.parse import urljoin
+
+import pandas as pd
+import requests
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
+
+
+def paging_token_key(paging_token) -> Optional[Tuple[int, ...]]:
+    """
+    Sort key of a Horizon paging token, or None when it is missing or not numeric. Tokens are integers
+    ('123') or '<operation id>-<index>' pairs (trades, effects), compared as integer tuples.
+    """
+    try:
+        return tuple(int(part) for part in str(paging_token).split("-"))
+    except ValueError:
+        return None
+
+
+class RecordTable:
+    """
+    Bounded, append-only in-memory table of Horizon records.
+
+    Records are kept in ascending paging_token order and only records newer than the last stored
+    token are appended, so replaying a page or reconnecting a stream never duplicates rows. The
+    DataFrame view is rebuilt lazily, only when new records arrived since the last call.
+    """
+
+    def __init__(self, maxlen: int = 1000):
+        self.maxlen = maxlen
+        self._records = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self._last_token: Optional[str] = None
+        self._version = 0
+        self._frame = pd.DataFrame()
+        self._frame_version = 0
+
+    @property
+    def cursor(self) -> Optional[str]:
+        """The paging_token of the newest stored record, used to resume streams and polls."""
+        return self._last_token
+
+    def append(self, record: dict) -> bool:
+        """Append a record if it is newer than the last stored one. Returns True when it was added."""
+        token = record.get("paging_token")
+        with self._lock:
+            value = paging_token_key(token)
+            last = paging_token_key(self._last_token)
+            if value is not None and last is not None and value <= last:
+                return False
+            self._records.append(record)
+            if token is not None:
+                self._last_token = token
+            self._version += 1
+            return True
+
+    def extend(self, records: Iterable[dict]) -> int:
+        """Append records in order and return how many of them were new."""
+        return sum(self.append(record) for record in records)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Return the stored records as a DataFrame, rebuilding it only if the table changed."""
+        with self._lock:
+            if self._frame_version != self._version:
+                self._frame = pd.DataFrame(list(self._records))
+                self._frame_version = self._version
+            return self._frame
+
+    def __len__(self):
+        return len(self._records)
+
+
+def _response_socket(response: requests.Response) -> Optional[socket.socket]:
+    """
+    The socket of the connection a streamed response is read from, or None when the connection has
+    already given it up (an HTTP/1.0 or ``Connection: close`` response).
+    """
+    return getattr(getattr(response.raw, "connection", None), "sock", None)
+
+
+class HorizonStreamer:
+    """
+    Keeps a RecordTable up to date from a Horizon collection endpoint.
+
+    The streamer follows the endpoint's Server-Sent Events stream starting at the table cursor. On a
+    disconnect it resumes from the last stored paging_token. After ``max_stream_failures`` consecutive
+    stream errors it falls back to cursor-based polling for one ``poll_interval`` before trying to
+    stream again. When a stream ends cleanly, it is reopened after ``reconnect_delay``. The stream is read
+    with its own connection rather than the SDK's ``stream()``, whose connection cannot be reached, so
+    that ``stop`` can shut it down and end the thread at once. Horizon streams are HTTP/1.1, so the
+    connection keeps its socket; otherwise ``stop`` only closes the response and the thread ends with
+    the next read, after ``read_timeout`` at most.
+
+    Parameters:
+    - name (str): Name used in log messages (e.g. 'transactions').
+    - builder_factory (Callable): Returns a fresh stellar_sdk call builder for the endpoint.
+    - table (RecordTable): The table receiving new records.
+    - is_running (Callable): Returns False once the streamer should stop.
+    - poll_interval (float): Seconds between polls while the stream is unavailable.
+    - max_stream_failures (int): Consecutive stream errors after which the streamer polls instead.
+    - reconnect_delay (float): Seconds before reopening an ended stream; doubled after each failure.
+    - on_update (Callable): Optional callback invoked with the streamer name after new records arrive.
+    - read_timeout (float): Seconds without data after which the stream is reopened.
+    """
+
+    def __init__(self, name: str, builder_factory: Callable, table: RecordTable, is_running: Callable[[], bool],
+                 poll_interval: float = 30.0, max_stream_failures: int = 3, reconnect_delay: float = 1.0,
+                 page_limit: int = 200, on_update: Optional[Callable[[str], None]] = None,
+                 read_timeout: float = 60.0):
+        self.name = name
+        self.builder_factory = builder_factory
+        self.table = table
+        self.is_running = is_running
+        self.poll_interval = poll_interval
+        self.max_stream_failures = max_stream_failures
+        self.reconnect_delay = reconnect_delay
+        self.page_limit = page_limit
+        self.on_update = on_update
+        self.read_timeout = read_timeout
+        self.mode = "stream"
+        self.thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._response_lock = threading.Lock()
+        self._response: Optional[requests.Response] = None
+        self._socket: Optional[socket.socket] = None
+        self.logger = logging.getLogger(__name__)
+
+    def start(self) -> threading.Thread:
+        """Run the streamer in a daemon thread."""
+        self.thread = threading.Thread(target=self.run, name=f"HorizonStream-{self.name}", daemon=True)
+        self.thread.start()
+        return self.thread
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        """Close the open stream, end the thread and wait up to ``timeout`` seconds for it."""
+        self._stopped.set()
+        with self._response_lock:
+            if self._socket is not None:
+                try:
+                    self._socket.shutdown(socket.SHUT_RDWR)  # Wakes up the blocked read
+                except OSError:
+                    pass
+            if self._response is not None:
+                self._response.close()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout)
+
+    def _running(self) -> bool:
+        return not self._stopped.is_set() and self.is_running()
+
+    def run(self):
+        failures = 0
+        while self._running():
+            if failures < self.max_stream_failures:
+                self.mode = "stream"
+                try:
+                    self._stream()
+                    failures = 0
+                    self._stopped.wait(self.reconnect_delay)  # Ended by Horizon: reopen, without hammering it
+                except Exception as e:
+                    if not self._running():
+                        return
+                    failures += 1
+                    self.logger.warning(f"{self.name} stream interrupted at cursor {self.table.cursor}: {e}")
+                    self._stopped.wait(self.reconnect_delay * 2 ** (failures - 1))
+            else:
+                self.mode = "poll"
+                self.logger.info(f"{self.name} stream unavailable, polling every {self.poll_interval}s")
+                try:
+                    self.poll_once()
+                except Exception as e:
+                    self.logger.warning(f"{self.name} poll failed: {e}")
+                self._stopped.wait(self.poll_interval)
+                failures = 0
+
+    def _stream(self):
+        """Follow the SSE stream from the table cursor until it ends or the streamer stops."""
+        builder = self.builder_factory().cursor(self.table.cursor or "now")
+        headers = dict(getattr(builder.client, "headers", None) or {}, Accept="text/event-stream")
+        response = requests.get(urljoin(builder.horizon_url, builder.endpoint), params=builder.params,
+                                headers=headers, stream=True, timeout=(10, self.read_timeout))
+        with self._response_lock:
+            self._response, self._socket = response, _response_socket(response)
+        try:
+            response.raise_for_status()
+            for record in self._records(response):
+                if not self._running():
+                    return
+                if self.table.append(record) and self.on_update:
+                    self.on_update(self.name)
+        except requests.exceptions.ConnectionError:
+            if self._running():  # A closed stream is expected once stopped
+                raise
+        finally:
+            with self._response_lock:
+                self._response = self._socket = None
+            response.close()
+
+    def _records(self, response: requests.Response) -> Iterator[dict]:
+        """The records of an SSE response; the 'hello' and 'byebye' events are skipped."""
+        buffer = b""
+        while self._running():
+            try:
+                chunk = response.raw.read1(65536)
+            except (socket.timeout, ReadTimeoutError):
+                return  # Idle for read_timeout: reopen from the cursor
+            except (OSError, ProtocolError) as e:
+                raise requests.exceptions.ConnectionError(e)
+            if not chunk:
+                return
+            buffer += chunk.replace(b"\r\n", b"\n")
+            *events, buffer = buffer.split(b"\n\n")
+            for event in events:
+                data = "\n".join(line[5:].lstrip() for line in event.decode().split("\n") if line.startswith("data:"))
+                if data and data not in ('"hello"', '"byebye"'):
+                    try:
+                        yield json.loads(data)
+                    except json.JSONDecodeError:
+                        pass
+
+    def poll_once(self) -> int:
+        """Fetch the records after the table cursor with a regular request. Returns the number added."""
+        builder = self.builder_factory()
+        if self.table.cursor:
+            builder = builder.cursor(self.table.cursor).order(desc=False)
+            records = builder.limit(self.page_limit).call()["_embedded"]["records"]
+        else:
+            records = builder.order(desc=True).limit(self.page_limit).call()["_embedded"]["records"]
+            records = list(reversed(records))
+        added = self.table.extend(records)
+        if added and self.on_update:
+            self.on_update(self.name)
+        return added
@@ -0,0 +1,139 @@
+"""
+O(n) NumPy kernels shared by the indicators.
+
+Every kernel works along the last axis, so it accepts a 1-D series or a 2-D (pairs x time) array and
+processes a whole pair universe in one call. Outputs have the input's shape, with NaN where the window
+is not full yet, matching ``pandas.Series.rolling(window)`` with the default ``min_periods``.
+
+Rolling extrema use the van Herk/Gil-Werman block scheme: the series is cut into blocks of ``window``
+elements and every window is the combination of one block suffix and one block prefix. This gives the
+O(n) bound of a monotonic deque with three vectorized passes instead of a per-element loop. The EMA is a
+linear recurrence evaluated block by block with exact carries.
+"""
+import numpy as np
+
+# Largest growth factor allowed when rescaling a block for the recurrence (bounds the rounding error)
+_MAX_BLOCK_SCALE = 1e3
+
+
+def _as_float_array(values) -> np.ndarray:
+    return np.asarray(values, dtype=np.float64)
+
+
+def _blocks(x: np.ndarray, window: int):
+    """Pad the last axis to a multiple of ``window`` and reshape it to (..., n_blocks, window)."""
+    n = x.shape[-1]
+    pad = (-n) % window
+    if pad:
+        x = np.concatenate([x, np.zeros(x.shape[:-1] + (pad,))], axis=-1)
+    return x.reshape(x.shape[:-1] + (-1, window))
+
+
+def _block_prefix_suffix(x: np.ndarray, window: int, op):
+    """Running ``op`` from each block start (prefix) and up to each block end (suffix)."""
+    blocks = _blocks(x, window)
+    prefix = op.accumulate(blocks, axis=-1).reshape(blocks.shape[:-2] + (-1,))
+    suffix = op.accumulate(blocks[..., ::-1], axis=-1)[..., ::-1].reshape(prefix.shape)
+    return prefix, suffix
+
+
+def _rolling_extreme(values, window: int, op) -> np.ndarray:
+    x = _as_float_array(values)
+    n = x.shape[-1]
+    out = np.full(x.shape, np.nan)
+    if window < 1 or window > n:
+        return out
+    prefix, suffix = _block_prefix_suffix(x, window, op)
+    out[..., window - 1:] = op(suffix[..., :n - window + 1], prefix[..., window - 1:n])
+    return out
+
+
+def rolling_max(values, window: int) -> np.ndarray:
+    """Rolling maximum over ``window`` elements (NaN inside the window propagates)."""
+    return _rolling_extreme(values, window, np.maximum)
+
+
+def rolling_min(values, window: int) -> np.ndarray:
+    """Rolling minimum over ``window`` elements (NaN inside the window propagates)."""
+    return _rolling_extreme(values, window, np.minimum)
+
+
+def _linear_recurrence(values, decay: float) -> np.ndarray:
+    """
+    Evaluate ``y[t] = decay * y[t - 1] + values[t]`` along the last axis, from ``y[-1] = 0``. NaN inputs
+    are not allowed.
+
+    Blocks are sized so that ``decay ** -block`` stays below ``_MAX_BLOCK_SCALE``. Inside a block, the
+    recurrence is a rescaled cumulative sum. The carry into each block is the sum of the previous block
+    ends weighted by ``(decay ** block) ** m``, truncated once that weight is below double precision.
+    """
+    u = _as_float_array(values)
+    n = u.shape[-1]
+    if decay == 0 or n == 0:
+        return u.copy()
+
+    block = n if decay >= 1 else int(min(n, max(1, np.log(_MAX_BLOCK_SCALE) // -np.log(decay))))
+    exponents = np.arange(block)
+    blocks = _blocks(u, block)
+    local = np.cumsum(blocks * decay ** -exponents, axis=-1) * decay ** exponents
+
+    ends = local[..., -1]
+    carry = np.zeros_like(ends)
+    block_decay = decay ** block
+    n_blocks = ends.shape[-1]
+    terms = n_blocks - 1 if block_decay >= 1 or block_decay == 0 else \
+        min(n_blocks - 1, int(np.ceil(np.log(1e-18) / np.log(block_decay))))
+    if block_decay == 0:
+        terms = min(1, n_blocks - 1)
+    weight = 1.0
+    for m in range(1, terms + 1):
+        carry[..., m:] += weight * ends[..., :-m]
+        weight *= block_decay
+
+    y = local + carry[..., None] * decay ** (exponents + 1)
+    return y.reshape(u.shape[:-1] + (-1,))[..., :n]
+
+
+def _geometric_sums(decay: float, n: int) -> np.ndarray:
+    """``1 + decay + ... + decay ** t`` for t in range(n), in closed form."""
+    if decay == 1:
+        return np.arange(1, n + 1, dtype=np.float64)
+    powers = np.zeros(n)
+    # decay ** t underflows to 0 long before t reaches n on long series: only evaluate the non-zero head
+    head = n if decay == 0 else int(min(n, np.ceil(-745.0 / np.log(decay)) + 1))
+    powers[:head] = decay ** np.arange(1, head + 1)
+    return (1.0 - powers) / (1.0 - decay)
+
+
+def ema(values, span: int = None, alpha: float = None, adjust: bool = True, min_periods: int = 0) -> np.ndarray:
+    """
+    Exponential moving average matching ``Series.ewm(span=..., alpha=..., adjust=..., min_periods=...).mean()``.
+
+    NaN inputs are skipped while the weights keep decaying, as pandas does with ``ignore_na=False``.
+    With ``adjust=False`` only leading NaNs are supported.
+    """
+    x = _as_float_array(values)
+    alpha = alpha if alpha is not None else 2.0 / (span + 1.0)
+    decay = 1.0 - alpha
+    valid = ~np.isnan(x)
+    filled = np.where(valid, x, 0.0)
+    count = np.cumsum(valid, axis=-1)
+
+    if adjust:
+        if valid.all():
+            weights = _geometric_sums(decay, x.shape[-1])
+        else:
+            weights = _linear_recurrence(valid.astype(np.float64), decay)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out = _linear_recurrence(filled, decay) / weights
+        if decay == 0 and not valid.all():
+            # The weights of earlier observations vanish: a NaN repeats the last observed value
+            last_valid = np.maximum.accumulate(np.where(valid, np.arange(x.shape[-1]), 0), axis=-1)
+            out = np.take_along_axis(filled, last_valid, axis=-1)
+    else:
+        first = count == 1
+        u = np.where(first & valid, filled, alpha * filled)
+        out = _linear_recurrence(u, decay)
+        out[count == 0] = np.nan
+    out[count < max(min_periods, 1)] = np.nan
+    return out
@@ -1,6 +1,11 @@
+import threading
+from collections import OrderedDict
+
 import numpy as np
 import pandas as pd
 
+from src.modules.engine import indicator_kernels
+
 
 def check_buy_sell_signals(df):
     """
@@ -15,7 +20,9 @@ def check_buy_sell_signals(df):
     return None
 
 
-def generate_cmf_signal(signal_setting, ohclv_data):
+def generate_cmf_signal(signal_setting, ohclv_data, latest=False):
+    if latest:
+        return _latest_signal('cmf', signal_setting, ohclv_data)
     #  CMF strategy logic
     data = ohclv_data.copy()
     data['M'] = (data['high'] + data['low'] + data['close']) / 3
@@ -28,7 +35,9 @@ def generate_cmf_signal(signal_setting, ohclv_data):
     return data[['close', 'M', 'N', 'CMF', 'CMF_Signal', 'Position']].tail(1).to_dict(orient='records')[0]
 
 
-def generate_willr_signal(signal_setting, ohclv_data):
+def generate_willr_signal(signal_setting, ohclv_data, latest=False):
+    if latest:
+        return _latest_signal('willr', signal_setting, ohclv_data)
     #  WILLR strategy logic
     data = ohclv_data.copy()
     data['TR'] = np.maximum(np.maximum(data['high'] - data['low'], abs(data['high'] - data['close'].shift(1))),
@@ -47,11 +56,13 @@ def generate_willr_signal(signal_setting, ohclv_data):
         orient='records')[0]
 
 
-def generate_stoch_signal(signal_setting, ohclv_data):
+def generate_stoch_signal(signal_setting, ohclv_data, latest=False):
+    if latest:
+        return _latest_signal('stoch', signal_setting, ohclv_data)
     #  Stochastic strategy logic
     data = ohclv_data.copy()
-    data['K'] = ((data['high'] - data['close']) / (
-                data['high'] - data['low'].rolling(window=signal_setting['period']).min())) * 100
+    lowest_low = indicator_kernels.rolling_min(data['low'], signal_setting['period'])
+    data['K'] = ((data['high'] - data['close']) / (data['high'] - lowest_low)) * 100
     data['D'] = data['K'].rolling(window=signal_setting['period']).mean()
     data['Stochastic_Signal'] = np.where(data['D'] < signal_setting['oversold_threshold'], 1,
                                          np.where(data['D'] > signal_setting['overbought_threshold'], -1, 0))
@@ -59,7 +70,9 @@ def generate_stoch_signal(signal_setting, ohclv_data):
     return data[['close', 'K', 'D', 'Stochastic_Signal', 'Position']].tail(1).to_dict(orient='records')[0]
 
 
-def generate_sar_signal(signal_setting, ohclv_data):
+def generate_sar_signal(signal_setting, ohclv_data, latest=False):
+    if latest:
+        return _latest_signal('sar', signal_setting, ohclv_data)
     #  SAR strategy logic
     data = ohclv_data.copy()
     data['High_Low_P'] = (data['high'] + data['low']) / 2
@@ -69,7 +82,9 @@ def generate_sar_signal(signal_setting, ohclv_data):
     return data[['close', 'High_Low_P', 'High_Low_R', 'SAR', 'Position']].tail(1).to_dict(orient='records')[0]
 
 
-def generate_custom_indicator_signal(signal_setting, ohclv_data_):
+def generate_custom_indicator_signal(signal_setting, ohclv_data_, latest=False):
+    if latest:
+        return _latest_signal('custom_indicator', signal_setting, ohclv_data_)
     #  Custom indicator strategy logic
     data = ohclv_data_.copy()
     # Add custom indicator data to the dataframe here
@@ -82,7 +97,9 @@ def generate_custom_indicator_signal(signal_setting, ohclv_data_):
         0]
 
 
-def generate_atr_signal(signal_setting, ohclv_data):
+def generate_atr_signal(signal_setting, ohclv_data, latest=False):
+    if latest:
+        return _latest_signal('atr', signal_setting, ohclv_data)
     #  Average True Range strategy logic
     data = ohclv_data.copy()
     data['H-L'] = data['high'] - data['low']
@@ -104,7 +121,9 @@ def calculate_asset_volatility(ohclv_data: pd.DataFrame) -> pd.Series:
     return asset_volatility
 
 
-def generate_dmi_signal(signal_setting, ohclv_data):
+def generate_dmi_signal(signal_setting, ohclv_data, latest=False):
+    if latest:
+        return _latest_signal('dmi', signal_setting, ohclv_data)
     #  DMI strategy logic
     data = ohclv_data.copy()
     data['+DM'] = np.maximum(data['high'] - data['high'].shift(1), 0)
@@ -121,15 +140,18 @@ def generate_dmi_signal(signal_setting, ohclv_data):
     return data[['close', 'ADX', 'ADX_Signal', 'Position']].tail(1).to_dict(orient='records')[0]
 
 
-def generate_ichimoku_signal(signal_setting, ohclv_data):
+def generate_ichimoku_signal(signal_setting, ohclv_data, latest=False):
+    if latest:
+        return _latest_signal('ichimoku', signal_setting, ohclv_data)
     #  Ichimoku strategy logic
     data = ohclv_data.copy()
-    data['Tenkan_Span'] = (data['high'].rolling(window=signal_setting['tenkan_period']).max() + data['low'].rolling(
-        window=signal_setting['tenkan_period']).min()) / 2
+    data['Tenkan_Span'] = (indicator_kernels.rolling_max(data['high'], signal_setting['tenkan_period']) +
+                           indicator_kernels.rolling_min(data['low'], signal_setting['tenkan_period'])) / 2
     data['Kijun_Span'] = data['Tenkan_Span'].rolling(window=signal_setting['kijun_period']).mean()
     data['Senkou_A'] = ((data['Tenkan_Span'] + data['Kijun_Span']) / 2).shift(signal_setting['senkou_a_period'])
-    data['Senkou_B'] = ((data['high'].rolling(window=signal_setting['senkou_b_period']).max() + data['low'].rolling(
-        window=signal_setting['senkou_b_period']).min()) / 2).shift(signal_setting['senkou_b_period'])
+    data['Senkou_B'] = ((indicator_kernels.rolling_max(data['high'], signal_setting['senkou_b_period']) +
+                         indicator_kernels.rolling_min(data['low'], signal_setting['senkou_b_period'])) / 2)
+    data['Senkou_B'] = data['Senkou_B'].shift(signal_setting['senkou_b_period'])
     data['Chikou_Span'] = data['close'].shift(-signal_setting['chikou_span_period'])
     data['Conversion_Line'] = (data['Senkou_A'] + data['Senkou_B']) / 2
     data['Base_Line'] = (data['Tenkan_Span'] + data['Kijun_Span']) / 2
@@ -142,21 +164,24 @@ def generate_ichimoku_signal(signal_setting, ohclv_data):
          'Signal_Line', 'Ichimoku_Signal', 'Position']].tail(1).to_dict(orient='records')[0]
 
 
-def generate_aroon_signal(signal_setting, ohclv_data):
+def generate_aroon_signal(signal_setting, ohclv_data, latest=False):
+    if latest:
+        return _latest_signal('aroon', signal_setting, ohclv_data)
     #  Aroon strategy logic
     data = ohclv_data.copy()
-    data['Aroon_Up'] = 100 - (100 / (data['high'].rolling(window=signal_setting['period']).max() - data['low'].rolling(
-        window=signal_setting['period']).min()).rolling(window=signal_setting['period']).mean())
-    data['Aroon_Down'] = 100 - (100 / (
-                data['high'].rolling(window=signal_setting['period']).max() - data['low'].rolling(
-            window=signal_setting['period']).min()).rolling(window=signal_setting['period']).mean())
+    price_range = pd.Series(indicator_kernels.rolling_max(data['high'], signal_setting['period']) -
+                            indicator_kernels.rolling_min(data['low'], signal_setting['period']), index=data.index)
+    data['Aroon_Up'] = 100 - (100 / price_range.rolling(window=signal_setting['period']).mean())
+    data['Aroon_Down'] = data['Aroon_Up']
     data['Aroon_Signal'] = np.where(data['Aroon_Up'] > data['Aroon_Down'], 1,
                                     np.where(data['Aroon_Up'] < data['Aroon_Down'], -1, 0))
     data['Position'] = data['Aroon_Signal'].diff()
     return data[['close', 'Aroon_Up', 'Aroon_Down', 'Aroon_Signal', 'Position']].tail(1).to_dict(orient='records')[0]
 
 
-def generate_uo_signal(signal_setting, ohclv_data):
+def generate_uo_signal(signal_setting, ohclv_data, latest=False):
+    if latest:
+        return _latest_signal('uo', signal_setting, ohclv_data)
     #  UO strategy logic
     data = ohclv_data.copy()
     data['UO'] = ((data['high'] + data['low'] + data['close']) / 3) - data['close'].shift(signal_setting['period'])
@@ -166,12 +191,14 @@ def generate_uo_signal(signal_setting, ohclv_data):
     return data[['close', 'UO', 'UO_Signal', 'Position']].tail(1).to_dict(orient='records')[0]
 
 
-def generate_kdj_signal(signal_setting, ohclv_data):
+def generate_kdj_signal(signal_setting, ohclv_data, latest=False):
+    if latest:
+        return _latest_signal('kdj', signal_setting, ohclv_data)
     #  KDJ strategy logic
     data = ohclv_data.copy()
-    data['RSV'] = (data['close'] - data['low'].rolling(window=signal_setting['period']).min()) / (
-                data['high'].rolling(window=signal_setting['period']).max() - data['low'].rolling(
-            window=signal_setting['period']).min()) * 100
+    lowest_low = indicator_kernels.rolling_min(data['low'], signal_setting['period'])
+    highest_high = indicator_kernels.rolling_max(data['high'], signal_setting['period'])
+    data['RSV'] = (data['close'] - lowest_low) / (highest_high - lowest_low) * 100
     data['K'] = data['RSV'].ewm(span=signal_setting['k_period'], min_periods=signal_setting['k_period']).mean()
     data['D'] = data['K'].ewm(span=signal_setting['d_period'], min_periods=signal_setting['d_period']).mean()
     data['J'] = 3 * data['K'] - 2 * data['D']
@@ -181,7 +208,9 @@ def generate_kdj_signal(signal_setting, ohclv_data):
     return data[['close', 'RSV', 'K', 'D', 'J', 'KDJ_Signal', 'Position']].tail(1).to_dict(orient='records')[0]
 
 
-def generate_ppo_signal(signal_setting, ohclv_data):
+def generate_ppo_signal(signal_setting, ohclv_data, latest=False):
+    if latest:
+        return _latest_signal('ppo', signal_setting, ohclv_data)
     #  PPO strategy logic
     data = ohclv_data.copy()
     data['SMA_fast'] = data['close'].rolling(window=signal_setting['fast_ema_period']).mean()
@@ -193,7 +222,9 @@ def generate_ppo_signal(signal_setting, ohclv_data):
     return data[['close', 'SMA_fast', 'SMA_slow', 'PPO', 'PPO_Signal', 'Position']].tail(1).to_dict(orient='records')[0]
 
 
-def generate_trix_signal(signal_setting, ohclv_data_):
+def generate_trix_signal(signal_setting, ohclv_data_, latest=False):
+    if latest:
+        return _latest_signal('trix', signal_setting, ohclv_data_)
     #  TRIX strategy logic
     data = ohclv_data_.copy()
     data['TR'] = np.maximum(np.maximum(data['high'] - data['low'], abs(data['high'] - data['close'].shift(1))),
@@ -206,7 +237,9 @@ def generate_trix_signal(signal_setting, ohclv_data_):
     return data[['close', 'TR', 'TR14', 'trix', 'Trix_Signal', 'Position']].tail(1).to_dict(orient='records')[0]
 
 
-def generate_bbands_signal(signal_setting, ohclv_data__):
+def generate_bbands_signal(signal_setting, ohclv_data__, latest=False):
+    if latest:
+        return _latest_signal('bbands', signal_setting, ohclv_data__)
 
     data = ohclv_data__.copy()
     data['Middle_Band'] = data['close'].rolling(window=signal_setting['bbands_period']).mean()
@@ -222,7 +255,9 @@ def generate_bbands_signal(signal_setting, ohclv_data__):
         orient='records')[0]
 
 
-def generate_ema_signal(signal_setting, ohclv_data):
+def generate_ema_signal(signal_setting, ohclv_data, latest=False):
+    if latest:
+        return _latest_signal('ema', signal_setting, ohclv_data)
     #  EMA strategy logic
     data = ohclv_data.copy()
     data['EMA'] = data['close'].ewm(span=signal_setting['period'], min_periods=signal_setting['period']).mean()
@@ -231,7 +266,9 @@ def generate_ema_signal(signal_setting, ohclv_data):
     return data[['close', 'EMA', 'EMA_Signal', 'Position']].tail(1).to_dict(orient='records')[0]
 
 
-def generate_adx_signal(signal_setting, ohclv_data):
+def generate_adx_signal(signal_setting, ohclv_data, latest=False):
+    if latest:
+        return _latest_signal('adx', signal_setting, ohclv_data)
     #  ADX strategy logic
     data = ohclv_data.copy()
     data['true_range'] = np.abs(data['high'] - data['low'])
@@ -246,7 +283,9 @@ def generate_adx_signal(signal_setting, ohclv_data):
         orient='records')[0]
 
 
-def generate_rsi_signal(signal_setting, ohclv_data):
+def generate_rsi_signal(signal_setting, ohclv_data, latest=False):
+    if latest:
+        return _latest_signal('rsi', signal_setting, ohclv_data)
     #  RSI strategy logic
     data = ohclv_data.copy()
     data['delta'] = data['close'].diff()
@@ -263,7 +302,9 @@ def generate_rsi_signal(signal_setting, ohclv_data):
         orient='records')[0]
 
 
-def generate_macd_signal(signal_setting, ohclv_data):
+def generate_macd_signal(signal_setting, ohclv_data, latest=False):
+    if latest:
+        return _latest_signal('macd', signal_setting, ohclv_data)
     #  MACD strategy logic
     data = ohclv_data.copy()
     data['EMA_fast'] = data['close'].ewm(span=signal_setting['fast_ema_period'],
@@ -280,7 +321,9 @@ def generate_macd_signal(signal_setting, ohclv_data):
         orient='records')[0]
 
 
-def generate_bollinger_bands_signal(signal_settings, ohclv_data):
+def generate_bollinger_bands_signal(signal_settings, ohclv_data, latest=False):
+    if latest:
+        return _latest_signal('bollinger_bands', signal_settings, ohclv_data)
     #  Bollinger Bands strategy logic
     data = ohclv_data.copy()
     data['Middle_Band'] = data['close'].rolling(window=signal_settings['bbands_period']).mean()
@@ -296,7 +339,9 @@ def generate_bollinger_bands_signal(signal_settings, ohclv_data):
         orient='records')[0]
 
 
-def generate_sma_crossover_signal(params2, ohclv_data):
+def generate_sma_crossover_signal(params2, ohclv_data, latest=False):
+    if latest:
+        return _latest_signal('sma_crossover', params2, ohclv_data)
     #  SMA Crossover strategy logic
     data = ohclv_data.copy()
     data['SMA_short'] = data['close'].rolling(window=params2['short_window']).mean()
@@ -304,3 +349,637 @@ def generate_sma_crossover_signal(params2, ohclv_data):
     data['Signal'] = np.where(data['SMA_short'] > data['SMA_long'], 1, 0)
     data['Position'] = data['Signal'].diff()
     return data[['close', 'SMA_short', 'SMA_long', 'Signal', 'Position']].tail(1).to_dict(orient='records')[0]
+
+
+class SignalIntermediates:
+    """
+    Shared intermediates of one OHLCV frame for the batch signal API.
+
+    Every derived array (true range, typical price, rolling windows, EMAs, shifts...) is computed at most
+    once, as a NumPy array, and reused by every signal that needs it. The OHLCV frame is never copied.
+
+    With ``full=True`` the signals return every row as a DataFrame instead of the terminal row.
+    """
+
+    def __init__(self, ohclv_data: pd.DataFrame, full: bool = False):
+        self.data = ohclv_data
+        self.full = full
+        self._cache = {}
+
+    def row(self, columns):
+        """The signal's output: its terminal row, or all rows as a DataFrame in ``full`` mode."""
+        if self.full:
+            return pd.DataFrame(columns, index=self.data.index)
+        return _terminal_row(columns)
+
+    def position(self, signal):
+        """``signal.diff()``, or only its last value unless in ``full`` mode."""
+        if self.full:
+            return np.concatenate([[np.nan], np.diff(signal).astype(np.float64)])
+        return _position(signal)
+
+    def get(self, key):
+        """Return a cached array, or the float64 values of the OHLCV column with that name."""
+        if key not in self._cache:
+            self._cache[key] = self.data[key].to_numpy(dtype=np.float64)
+        return self._cache[key]
+
+    def derive(self, key, fn):
+        """Return the array cached under ``key``, computing it with ``fn`` on first use."""
+        if key not in self._cache:
+            self._cache[key] = fn()
+        return self._cache[key]
+
+    def shift(self, key, periods=1):
+        return self.derive(f"{key}.shift({periods})",
+                           lambda: pd.Series(self.get(key)).shift(periods).to_numpy())
+
+    def diff(self, key):
+        return self.derive(f"{key}.diff()", lambda: self.get(key) - self.shift(key))
+
+    def rolling(self, key, window, how):
+        """Rolling ``how`` ('mean', 'sum', 'max', 'min', 'std') of an array over ``window`` rows."""
+        if how in ('max', 'min'):
+            # O(n) whatever the window and bit-identical to pandas
+            kernel = indicator_kernels.rolling_max if how == 'max' else indicator_kernels.rolling_min
+            return self.derive(f"{key}.rolling({window}).{how}()", lambda: kernel(self.get(key), window))
+        return self.derive(f"{key}.rolling({window}).{how}()",
+                           lambda: getattr(pd.Series(self.get(key)).rolling(window=window), how)().to_numpy())
+
+    def ewm(self, key, span):
+        """``ewm(span=span, min_periods=span).mean()`` of an array."""
+        return self.derive(f"{key}.ewm({span})",
+                           lambda: pd.Series(self.get(key)).ewm(span=span, min_periods=span).mean().to_numpy())
+
+    def typical_price(self):
+        return self.derive("typical_price", lambda: (self.get('high') + self.get('low') + self.get('close')) / 3)
+
+    def true_range(self):
+        """True range as computed by the WILLR/TRIX signals (NaN on the first row)."""
+        return self.derive("true_range", lambda: np.maximum(
+            np.maximum(self.get('high') - self.get('low'), np.abs(self.get('high') - self.shift('close'))),
+            np.abs(self.get('low') - self.shift('close'))))
+
+    def true_range_components(self):
+        """H-L, H-PC and L-PC columns and their row max ignoring NaN, as computed by the ATR signal."""
+        def compute():
+            h_l = self.get('high') - self.get('low')
+            h_pc = np.abs(self.get('high') - self.shift('close'))
+            l_pc = np.abs(self.get('low') - self.shift('close'))
+            return h_l, h_pc, l_pc, np.fmax(np.fmax(h_l, h_pc), l_pc)
+        return self.derive("true_range_components", compute)
+
+    def plus_dm(self):
+        return self.derive("+DM", lambda: np.maximum(self.get('high') - self.shift('high'), 0))
+
+    def minus_dm(self):
+        return self.derive("-DM", lambda: np.maximum(self.shift('low') - self.get('low'), 0))
+
+
+def _three_way(condition_up, condition_down):
+    return np.where(condition_up, 1, np.where(condition_down, -1, 0))
+
+
+def _terminal_row(columns):
+    """Last row of the given columns as the dict ``DataFrame.tail(1).to_dict(orient='records')[0]`` returns."""
+    row = {}
+    for name, values in columns.items():
+        value = values[-1]
+        row[name] = int(value) if np.issubdtype(np.asarray(values).dtype, np.integer) else float(value)
+    return row
+
+
+def _position(signal):
+    """Last value of ``signal.diff()``."""
+    return np.array([signal[-1] - signal[-2] if len(signal) > 1 else np.nan], dtype=np.float64)
+
+
+def _batch_cmf(ctx, s):
+    m = ctx.typical_price()
+    n = ctx.shift("typical_price", s['period'])
+    cmf = (n - m) / ctx.rolling("typical_price", s['period'], 'mean') * 100
+    signal = _three_way(cmf < -s['overbought_threshold'], cmf > s['oversold_threshold'])
+    return ctx.row({'close': ctx.get('close'), 'M': m, 'N': n, 'CMF': cmf, 'CMF_Signal': signal,
+                     'Position': ctx.position(signal)})
+
+
+def _batch_willr(ctx, s):
+    p = s['period']
+    tr = ctx.true_range()
+    atr = ctx.rolling("true_range", p, 'mean')
+    plus_dm, minus_dm = ctx.plus_dm(), ctx.minus_dm()
+    plus_di = ctx.rolling("+DM", p, 'sum') / atr
+    minus_di = ctx.rolling("-DM", p, 'sum') / atr
+    willr = 100 - (100 * plus_di / (plus_di + minus_di))
+    signal = _three_way(willr < -s['overbought_threshold'], willr > s['oversold_threshold'])
+    return ctx.row({'close': ctx.get('close'), 'TR': tr, 'ATR': atr, '+DM': plus_dm,
+                     '-DM': minus_dm, '+DI': plus_di, '-DI': minus_di, 'WillR': willr,
+                     'WillR_Signal': signal, 'Position': ctx.position(signal)})
+
+
+def _batch_stoch(ctx, s):
+    p = s['period']
+    k = ctx.derive(f"stoch_K({p})", lambda: ((ctx.get('high') - ctx.get('close')) / (
+            ctx.get('high') - ctx.rolling('low', p, 'min'))) * 100)
+    d = ctx.rolling(f"stoch_K({p})", p, 'mean')
+    signal = _three_way(d < s['oversold_threshold'], d > s['overbought_threshold'])
+    return ctx.row({'close': ctx.get('close'), 'K': k, 'D': d, 'Stochastic_Signal': signal,
+                     'Position': ctx.position(signal)})
+
+
+def _batch_sar(ctx, s):
+    high_low_p = ctx.derive("median_price", lambda: (ctx.get('high') + ctx.get('low')) / 2)
+    high_low_r = ctx.rolling("median_price", s['period'], 'max')
+    sar = high_low_r - (s['acceleration'] * (high_low_r - ctx.get('Low')))
+    close = ctx.get('close')
+    position = _three_way(close > sar, close < sar)
+    return ctx.row({'close': close, 'High_Low_P': high_low_p, 'High_Low_R': high_low_r, 'SAR': sar,
+                     'Position': position})
+
+
+def _batch_custom_indicator(ctx, s):
+    custom = ctx.derive("close-open", lambda: ctx.get('close') - ctx.get('open'))
+    signal = _three_way(custom > 0, custom < 0)
+    return ctx.row({'close': ctx.get('close'), 'Custom_Indicator': custom,
+                     'Custom_Indicator_Signal': signal, 'Position': ctx.position(signal)})
+
+
+def _batch_atr(ctx, s):
+    h_l, h_pc, l_pc, tr = ctx.true_range_components()
+    ctx.derive("true_range_skipna", lambda: tr)
+    atr = ctx.rolling("true_range_skipna", s['period'], 'mean')
+    close, prev_close = ctx.get('close'), ctx.shift('close')
+    signal = _three_way(close > prev_close + atr, close < prev_close - atr)
+    return ctx.row({'close': close, 'H-L': h_l, 'H-PC': h_pc, 'L-PC': l_pc, 'TR': tr, 'ATR': atr,
+                     'ATR_Signal': signal, 'Position': ctx.position(signal)})
+
+
+def _batch_dmi(ctx, s):
+    p = s['period']
+    ctx.plus_dm()
+    ctx.minus_dm()
+    plus_di = ctx.rolling("+DM", p, 'sum') / ctx.rolling(f"+DM.rolling({p}).sum()", p, 'mean')
+    minus_di = ctx.rolling("-DM", p, 'sum') / ctx.rolling(f"-DM.rolling({p}).sum()", p, 'mean')
+    ctx.derive(f"DX({p})", lambda: 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di))
+    adx = ctx.rolling(f"DX({p})", p, 'mean')
+    signal = _three_way(adx < s['oversold_threshold'], adx > s['overbought_threshold'])
+    return ctx.row({'close': ctx.get('close'), 'ADX': adx, 'ADX_Signal': signal, 'Position': ctx.position(signal)})
+
+
+def _midpoint(ctx, window):
+    """(highest high + lowest low) / 2 over ``window`` rows, cached as 'midpoint(window)'."""
+    key = f"midpoint({window})"
+    ctx.derive(key, lambda: (ctx.rolling('high', window, 'max') + ctx.rolling('low', window, 'min')) / 2)
+    return key
+
+
+def _batch_ichimoku(ctx, s):
+    tenkan_key = _midpoint(ctx, s['tenkan_period'])
+    tenkan = ctx.get(tenkan_key)
+    kijun = ctx.rolling(tenkan_key, s['kijun_period'], 'mean')
+    base_key = f"{tenkan_key}.base({s['kijun_period']})"
+    base_line = ctx.derive(base_key, lambda: (tenkan + kijun) / 2)
+    senkou_a = ctx.shift(base_key, s['senkou_a_period'])
+    senkou_b = ctx.shift(_midpoint(ctx, s['senkou_b_period']), s['senkou_b_period'])
+    chikou = ctx.shift('close', -s['chikou_span_period'])
+    conversion_line = (senkou_a + senkou_b) / 2
+    signal_line = (conversion_line + base_line) / 2
+    signal = _three_way(conversion_line > signal_line, conversion_line < signal_line)
+    return ctx.row({'close': ctx.get('close'), 'Tenkan_Span': tenkan, 'Kijun_Span': kijun,
+                     'Senkou_A': senkou_a, 'Senkou_B': senkou_b, 'Chikou_Span': chikou,
+                     'Conversion_Line': conversion_line, 'Base_Line': base_line, 'Signal_Line': signal_line,
+                     'Ichimoku_Signal': signal, 'Position': ctx.position(signal)})
+
+
+def _batch_aroon(ctx, s):
+    p = s['period']
+    ctx.derive(f"range({p})", lambda: ctx.rolling('high', p, 'max') - ctx.rolling('low', p, 'min'))
+    aroon = 100 - (100 / ctx.rolling(f"range({p})", p, 'mean'))
+    signal = _three_way(aroon > aroon, aroon < aroon)
+    return ctx.row({'close': ctx.get('close'), 'Aroon_Up': aroon, 'Aroon_Down': aroon,
+                     'Aroon_Signal': signal, 'Position': ctx.position(signal)})
+
+
+def _batch_uo(ctx, s):
+    uo = ctx.typical_price() - ctx.shift('close', s['period'])
+    signal = _three_way(uo > s['overbought_threshold'], uo < s['oversold_threshold'])
+    return ctx.row({'close': ctx.get('close'), 'UO': uo, 'UO_Signal': signal, 'Position': ctx.position(signal)})
+
+
+def _batch_kdj(ctx, s):
+    p = s['period']
+    rsv_key = f"RSV({p})"
+    rsv = ctx.derive(rsv_key, lambda: (ctx.get('close') - ctx.rolling('low', p, 'min')) / (
+            ctx.rolling('high', p, 'max') - ctx.rolling('low', p, 'min')) * 100)
+    k = ctx.ewm(rsv_key, s['k_period'])
+    d = ctx.ewm(f"{rsv_key}.ewm({s['k_period']})", s['d_period'])
+    j = 3 * k - 2 * d
+    signal = _three_way(j < s['overbought_threshold'], j > s['oversold_threshold'])
+    return ctx.row({'close': ctx.get('close'), 'RSV': rsv, 'K': k, 'D': d, 'J': j, 'KDJ_Signal': signal,
+                     'Position': ctx.position(signal)})
+
+
+def _batch_ppo(ctx, s):
+    fast = ctx.rolling('close', s['fast_ema_period'], 'mean')
+    slow = ctx.rolling('close', s['slow_ema_period'], 'mean')
+    ppo = ((fast - slow) / slow) * 100
+    signal = _three_way(ppo < -s['overbought_threshold'], ppo > s['oversold_threshold'])
+    return ctx.row({'close': ctx.get('close'), 'SMA_fast': fast, 'SMA_slow': slow, 'PPO': ppo,
+                     'PPO_Signal': signal, 'Position': ctx.position(signal)})
+
+
+def _batch_trix(ctx, s):
+    p = s['period']
+    tr = ctx.true_range()
+    tr_mean = ctx.rolling("true_range", p, 'mean')
+    trix = (ctx.shift(f"true_range.rolling({p}).mean()", p - 1) / tr_mean) * -100
+    signal = _three_way(trix < -s['overbought_threshold'], trix > s['oversold_threshold'])
+    return ctx.row({'close': ctx.get('close'), 'TR': tr, 'TR14': tr_mean, 'trix': trix, 'Trix_Signal': signal,
+                     'Position': ctx.position(signal)})
+
+
+def _batch_bbands(ctx, s):
+    p = s['bbands_period']
+    middle = ctx.rolling('close', p, 'mean')
+    std = ctx.rolling('close', p, 'std')
+    upper = middle + (s['bbands_std_dev'] * std)
+    lower = middle - (s['bbands_std_dev'] * std)
+    close = ctx.get('close')
+    signal = _three_way(close < lower, close > upper)
+    return ctx.row({'close': close, 'Middle_Band': middle, 'Upper_Band': upper, 'Lower_Band': lower,
+                     'Bollinger_Band_Signal': signal, 'Position': ctx.position(signal)})
+
+
+def _batch_ema(ctx, s):
+    close = ctx.get('close')
+    ema = ctx.ewm('close', s['period'])
+    signal = _three_way(close > ema, close < ema)
+    return ctx.row({'close': close, 'EMA': ema, 'EMA_Signal': signal, 'Position': ctx.position(signal)})
+
+
+def _batch_adx(ctx, s):
+    def directional_movement():
+        high_diff, low_diff = ctx.diff('high'), ctx.diff('low')
+        true_range = np.abs(ctx.get('high') - ctx.get('low'))
+        plus_dm = np.where(high_diff > low_diff, ctx.get('high') - ctx.shift('high'), 0)
+        minus_dm = np.where(low_diff > high_diff, 0, ctx.get('low') - ctx.shift('low'))
+        dx = 100 * (np.abs(plus_dm) + np.abs(minus_dm)) / true_range
+        return true_range, plus_dm, minus_dm, dx
+
+    true_range, plus_dm, minus_dm, dx = ctx.derive("adx_directional_movement", directional_movement)
+    ctx.derive("adx_dx", lambda: dx)
+    adx = ctx.ewm("adx_dx", s['period'])
+    signal = _three_way(adx < s['overbought_threshold'], adx > s['oversold_threshold'])
+    return ctx.row({'close': ctx.get('close'), 'true_range': true_range, 'plus_dm': plus_dm,
+                     'minus_dm': minus_dm, 'dx': dx, 'adx': adx, 'ADX_Signal': signal,
+                     'Position': ctx.position(signal)})
+
+
+def _batch_rsi(ctx, s):
+    delta = ctx.diff('close')
+    gain = ctx.derive("gain", lambda: np.where(delta > 0, delta, 0))
+    loss = ctx.derive("loss", lambda: np.where(delta < 0, np.abs(delta), 0))
+    avg_gain = ctx.ewm("gain", s['period'])
+    avg_loss = ctx.ewm("loss", s['period'])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 - (100 / (1 + (avg_gain / avg_loss)))
+    signal = _three_way(rsi < s['overbought_threshold'], rsi > s['oversold_threshold'])
+    return ctx.row({'close': ctx.get('close'), 'delta': delta, 'gain': gain, 'loss': loss,
+                     'avg_gain': avg_gain, 'avg_loss': avg_loss, 'rsi': rsi, 'RSI_Signal': signal,
+                     'Position': ctx.position(signal)})
+
+
+def _batch_macd(ctx, s):
+    fast = ctx.ewm('close', s['fast_ema_period'])
+    slow = ctx.ewm('close', s['slow_ema_period'])
+    macd_key = f"MACD({s['fast_ema_period']},{s['slow_ema_period']})"
+    macd = ctx.derive(macd_key, lambda: fast - slow)
+    signal_line = ctx.ewm(macd_key, s['signal_ema_period'])
+    signal = _three_way(macd > signal_line, macd < signal_line)
+    return ctx.row({'close': ctx.get('close'), 'EMA_fast': fast, 'EMA_slow': slow, 'MACD': macd,
+                     'Signal': signal_line, 'MACD_Signal': signal, 'Position': ctx.position(signal)})
+
+
+def _batch_sma_crossover(ctx, s):
+    short = ctx.rolling('close', s['short_window'], 'mean')
+    long = ctx.rolling('close', s['long_window'], 'mean')
+    signal = np.where(short > long, 1, 0)
+    return ctx.row({'close': ctx.get('close'), 'SMA_short': short, 'SMA_long': long, 'Signal': signal,
+                     'Position': ctx.position(signal)})
+
+
+# Batch implementations, keyed by the name used in the 'signal' entry of a signal setting
+BATCH_SIGNALS = {
+    'cmf': _batch_cmf,
+    'willr': _batch_willr,
+    'stoch': _batch_stoch,
+    'sar': _batch_sar,
+    'custom_indicator': _batch_custom_indicator,
+    'atr': _batch_atr,
+    'dmi': _batch_dmi,
+    'ichimoku': _batch_ichimoku,
+    'aroon': _batch_aroon,
+    'uo': _batch_uo,
+    'kdj': _batch_kdj,
+    'ppo': _batch_ppo,
+    'trix': _batch_trix,
+    'bbands': _batch_bbands,
+    'ema': _batch_ema,
+    'adx': _batch_adx,
+    'rsi': _batch_rsi,
+    'macd': _batch_macd,
+    'bollinger_bands': _batch_bbands,
+    'sma_crossover': _batch_sma_crossover,
+}
+
+# Column holding each signal's 1 (buy) / -1 (sell) / 0 state; SAR keeps it in 'Position'
+SIGNAL_STATE_COLUMNS = {
+    'cmf': 'CMF_Signal',
+    'willr': 'WillR_Signal',
+    'stoch': 'Stochastic_Signal',
+    'sar': 'Position',
+    'custom_indicator': 'Custom_Indicator_Signal',
+    'atr': 'ATR_Signal',
+    'dmi': 'ADX_Signal',
+    'ichimoku': 'Ichimoku_Signal',
+    'aroon': 'Aroon_Signal',
+    'uo': 'UO_Signal',
+    'kdj': 'KDJ_Signal',
+    'ppo': 'PPO_Signal',
+    'trix': 'Trix_Signal',
+    'bbands': 'Bollinger_Band_Signal',
+    'ema': 'EMA_Signal',
+    'adx': 'ADX_Signal',
+    'rsi': 'RSI_Signal',
+    'macd': 'MACD_Signal',
+    'bollinger_bands': 'Bollinger_Band_Signal',
+    'sma_crossover': 'Signal',
+}
+
+
+def generate_signals(ohclv_data, signal_settings, latest=False):
+    """
+    Compute several signals over one OHLCV frame in a single pass.
+
+    Each setting is the dict the matching ``generate_<name>_signal`` function takes, plus a ``'signal'``
+    key naming it (e.g. ``{'signal': 'rsi', 'period': 14, ...}``). Intermediates shared between the
+    requested signals are computed once. Returns the same dicts as the individual functions, in the
+    order of ``signal_settings``.
+
+    With ``latest=True`` the rolling-window signals share one context over only the last rows they need
+    and the EWM based signals resume from cached state, as in the functions' own ``latest`` mode.
+    """
+    if not latest:
+        ctx = SignalIntermediates(ohclv_data)
+        return [BATCH_SIGNALS[setting['signal']](ctx, setting) for setting in signal_settings]
+
+    windowed = [_lookback(s['signal'], s) for s in signal_settings if s['signal'] not in _RECURSIVE_SIGNALS]
+    ctx = SignalIntermediates(ohclv_data.iloc[-max(windowed):]) if windowed else None
+    return [_latest_recursive(s['signal'], s, ohclv_data) if s['signal'] in _RECURSIVE_SIGNALS
+            else BATCH_SIGNALS[s['signal']](ctx, s) for s in signal_settings]
+
+
+def generate_signal_frames(ohclv_data, signal_settings):
+    """
+    Like ``generate_signals``, but returns every row of each signal as a DataFrame indexed like
+    ``ohclv_data`` (the columns of ``generate_<name>_signal``, over the whole history). Used for
+    backtesting, where the signal of each candle is needed.
+    """
+    ctx = SignalIntermediates(ohclv_data, full=True)
+    return [BATCH_SIGNALS[setting['signal']](ctx, setting) for setting in signal_settings]
+
+
+# ---------------------------------------------------------------------------
+# "latest" mode: terminal row only
+# ---------------------------------------------------------------------------
+
+def _lookback(name, s):
+    """Rows needed for the last two rows of a rolling-window signal to match the full computation."""
+    if name in ('cmf', 'willr', 'atr', 'uo'):
+        return s['period'] + 2
+    if name in ('stoch', 'aroon'):
+        return 2 * s['period']
+    if name == 'dmi':
+        return 3 * s['period']
+    if name == 'trix':
+        return 2 * s['period'] + 1
+    if name == 'sar':
+        return s['period'] + 1
+    if name == 'custom_indicator':
+        return 2
+    if name == 'ichimoku':
+        return max(s['tenkan_period'] + s['kijun_period'] - 1 + s['senkou_a_period'],
+                   2 * s['senkou_b_period']) + 1
+    if name == 'ppo':
+        return max(s['fast_ema_period'], s['slow_ema_period']) + 1
+    if name in ('bbands', 'bollinger_bands'):
+        return s['bbands_period'] + 1
+    if name == 'sma_crossover':
+        return max(s['short_window'], s['long_window']) + 1
+    raise KeyError(name)
+
+
+class _EwmState:
+    """One step of ``Series.ewm(span=span, min_periods=span).mean()`` (adjust=True, ignore_na=False)."""
+
+    __slots__ = ('factor', 'min_periods', 'weighted', 'old_wt', 'nobs')
+
+    def __init__(self, span):
+        self.factor = 1.0 - 2.0 / (span + 1.0)
+        self.min_periods = max(span, 1)
+        self.weighted = np.nan
+        self.old_wt = 1.0
+        self.nobs = 0
+
+    def update(self, x):
+        is_observation = x == x
+        self.nobs += is_observation
+        if self.weighted == self.weighted:
+            self.old_wt *= self.factor
+            if is_observation:
+                if self.weighted != x:
+                    self.weighted = ((self.old_wt * self.weighted) + x) / (self.old_wt + 1.0)
+                self.old_wt += 1.0
+        elif is_observation:
+            self.weighted = x
+        return self.weighted if self.nobs >= self.min_periods else np.nan
+
+    def copy(self):
+        state = _EwmState.__new__(_EwmState)
+        for slot in _EwmState.__slots__:
+            setattr(state, slot, getattr(self, slot))
+        return state
+
+
+def _scalar_signal(value_up, value_down):
+    return 1 if value_up else (-1 if value_down else 0)
+
+
+def _ema_step(s, arrays, states, i):
+    close = arrays['close'][i]
+    ema = states[0].update(close)
+    return {'close': close, 'EMA': ema, 'EMA_Signal': _scalar_signal(close > ema, close < ema)}
+
+
+def _rsi_step(s, arrays, states, i):
+    close = arrays['close']
+    delta = close[i] - close[i - 1] if i > 0 else np.nan
+    gain = delta if delta > 0 else 0.0
+    loss = abs(delta) if delta < 0 else 0.0
+    avg_gain, avg_loss = states[0].update(gain), states[1].update(loss)
+    rsi = 100 - (100 / (1 + (np.float64(avg_gain) / np.float64(avg_loss))))
+    return {'close': close[i], 'delta': delta, 'gain': gain, 'loss': loss, 'avg_gain': avg_gain,
+            'avg_loss': avg_loss, 'rsi': rsi,
+            'RSI_Signal': _scalar_signal(rsi < s['overbought_threshold'], rsi > s['oversold_threshold'])}
+
+
+def _macd_step(s, arrays, states, i):
+    close = arrays['close'][i]
+    fast, slow = states[0].update(close), states[1].update(close)
+    macd = fast - slow
+    signal = states[2].update(macd)
+    return {'close': close, 'EMA_fast': fast, 'EMA_slow': slow, 'MACD': macd, 'Signal': signal,
+            'MACD_Signal': _scalar_signal(macd > signal, macd < signal)}
+
+
+def _kdj_step(s, arrays, states, i):
+    p = s['period']
+    close = arrays['close'][i]
+    if i >= p - 1:
+        lowest, highest = arrays['low'][i - p + 1:i + 1].min(), arrays['high'][i - p + 1:i + 1].max()
+        rsv = (close - lowest) / np.float64(highest - lowest) * 100
+    else:
+        rsv = np.nan
+    k = states[0].update(rsv)
+    d = states[1].update(k)
+    j = 3 * k - 2 * d
+    return {'close': close, 'RSV': rsv, 'K': k, 'D': d, 'J': j,
+            'KDJ_Signal': _scalar_signal(j < s['overbought_threshold'], j > s['oversold_threshold'])}
+
+
+def _adx_step(s, arrays, states, i):
+    high, low = arrays['high'], arrays['low']
+    high_diff = high[i] - high[i - 1] if i > 0 else np.nan
+    low_diff = low[i] - low[i - 1] if i > 0 else np.nan
+    true_range = abs(high[i] - low[i])
+    plus_dm = high_diff if high_diff > low_diff else 0.0
+    minus_dm = 0.0 if low_diff > high_diff else low_diff
+    dx = 100 * (abs(plus_dm) + abs(minus_dm)) / np.float64(true_range)
+    adx = states[0].update(dx)
+    return {'close': arrays['close'][i], 'true_range': true_range, 'plus_dm': plus_dm, 'minus_dm': minus_dm,
+            'dx': dx, 'adx': adx,
+            'ADX_Signal': _scalar_signal(adx < s['overbought_threshold'], adx > s['oversold_threshold'])}
+
+
+# Recursive (EWM based) signals: (row step, EWMs as (span, input column, output column) of the full-mode frame,
+# signal column, OHLCV columns read)
+_RECURSIVE_SIGNALS = {
+    'ema': (_ema_step, lambda s: [(s['period'], 'close', 'EMA')], 'EMA_Signal', ('close',)),
+    'rsi': (_rsi_step, lambda s: [(s['period'], 'gain', 'avg_gain'), (s['period'], 'loss', 'avg_loss')],
+            'RSI_Signal', ('close',)),
+    'macd': (_macd_step, lambda s: [(s['fast_ema_period'], 'close', 'EMA_fast'),
+                                    (s['slow_ema_period'], 'close', 'EMA_slow'),
+                                    (s['signal_ema_period'], 'MACD', 'Signal')], 'MACD_Signal', ('close',)),
+    'kdj': (_kdj_step, lambda s: [(s['k_period'], 'RSV', 'K'), (s['d_period'], 'K', 'D')], 'KDJ_Signal',
+            ('close', 'high', 'low')),
+    'adx': (_adx_step, lambda s: [(s['period'], 'dx', 'adx')], 'ADX_Signal', ('close', 'high', 'low')),
+}
+
+# Cached EWM states, keyed by signal, settings and the first row of the frame they were computed on. An
+# entry is reused only when the row before its checkpoint (label and values) is unchanged.
+_EWM_STATE_CACHE = OrderedDict()
+_EWM_STATE_CACHE_SIZE = 512
+_EWM_STATE_CACHE_LOCK = threading.Lock()
+
+
+def _row_identity(ohclv_data, arrays, i):
+    """Label of row ``i`` (its 'timestamp' if the frame has one, else its index label) and its OHLCV values."""
+    label = ohclv_data['timestamp'].iloc[i] if 'timestamp' in ohclv_data.columns else ohclv_data.index[i]
+    return label, np.array([arrays[column][i] for column in sorted(arrays)])
+
+
+def _same_row(identity, other):
+    return identity[0] == other[0] and np.array_equal(identity[1], other[1], equal_nan=True)
+
+
+def _seeded_state(span, inputs, output):
+    """
+    The ``_EwmState`` reached after updating with every value of ``inputs``, given ``output``, the last
+    value of their ``ewm(span=span, min_periods=span).mean()``.
+    """
+    state = _EwmState(span)
+    observed = inputs == inputs
+    state.nobs = int(observed.sum())
+    if not state.nobs:
+        return state
+    # Below min_periods the output is masked, but the running average is not
+    state.weighted = output if output == output else pd.Series(inputs).ewm(span=span).mean().iloc[-1]
+    # The weight of each observation decays by ``factor`` per row since it was seen
+    ages = len(inputs) - 1 - np.flatnonzero(observed)
+    state.old_wt = float(np.sum(state.factor ** ages))
+    return state
+
+
+def _latest_recursive(name, s, ohclv_data):
+    """
+    Terminal row of an EWM based signal, resuming the EWM recursion from the state cached by the previous
+    call on the same series. The state is checkpointed before the last row, so a revised still-forming
+    candle is recomputed, and only rows added since the last call are processed.
+
+    Rows before the checkpoint are assumed final, like closed candles: the state is reused when the
+    series starts on the same row and the row before the checkpoint is unchanged. Any other frame (another
+    series, a sliding window) is computed with the vectorized full path, which seeds the state for the
+    next call.
+    """
+    step, ewms, signal_column, columns = _RECURSIVE_SIGNALS[name]
+    arrays = {column: ohclv_data[column].to_numpy(dtype=np.float64) for column in columns}
+    n = len(ohclv_data)
+    if n < 2:
+        return BATCH_SIGNALS[name](SignalIntermediates(ohclv_data), s)
+    first = _row_identity(ohclv_data, arrays, 0)
+    key = (name, tuple(sorted(s.items())), first[0], first[1].tobytes())
+
+    with _EWM_STATE_CACHE_LOCK:
+        entry = _EWM_STATE_CACHE.get(key)
+        if entry and entry['start'] <= n - 1 and \
+                _same_row(entry['check'], _row_identity(ohclv_data, arrays, entry['start'] - 1)):
+            _EWM_STATE_CACHE.move_to_end(key)
+            start, states, previous = entry['start'], [state.copy() for state in entry['states']], entry['row']
+        else:
+            entry = None
+
+    if entry is None:
+        frame = BATCH_SIGNALS[name](SignalIntermediates(ohclv_data, full=True), s)
+        states = [_seeded_state(span, frame[inputs].to_numpy(dtype=np.float64)[:n - 1],
+                                frame[output].iloc[n - 2]) for span, inputs, output in ewms(s)]
+        _store_checkpoint(key, ohclv_data, arrays, n - 1, states, {signal_column: frame[signal_column].iloc[n - 2]})
+        return _terminal_row({column: frame[column].to_numpy() for column in frame.columns})
+
+    last = previous
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for i in range(start, n):
+            if i == n - 1 and i != start:
+                _store_checkpoint(key, ohclv_data, arrays, i, states, last)
+            previous, last = last, step(s, arrays, states, i)
+
+    last['Position'] = float(last[signal_column] - previous[signal_column])
+    return {column: value if isinstance(value, int) else float(value) for column, value in last.items()}
+
+
+def _store_checkpoint(key, ohclv_data, arrays, start, states, row):
+    """Cache the EWM states reached after rows [0, start), with ``row``, the step output of row start - 1."""
+    entry = {'start': start, 'check': _row_identity(ohclv_data, arrays, start - 1),
+             'states': [state.copy() for state in states], 'row': row}
+    with _EWM_STATE_CACHE_LOCK:
+        _EWM_STATE_CACHE[key] = entry
+        _EWM_STATE_CACHE.move_to_end(key)
+        if len(_EWM_STATE_CACHE) > _EWM_STATE_CACHE_SIZE:
+            _EWM_STATE_CACHE.popitem(last=False)
+
+
+def _latest_signal(name, signal_setting, ohclv_data):
+    """Terminal row of a signal, computed from the last rows only (or cached EWM state)."""
+    if name in _RECURSIVE_SIGNALS:
+        return _latest_recursive(name, signal_setting, ohclv_data)
+    tail = ohclv_data.iloc[-_lookback(name, signal_setting):]
+    return BATCH_SIGNALS[name](SignalIntermediates(tail), signal_setting)
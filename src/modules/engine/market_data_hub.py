@@ -0,0 +1,193 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from stellar_sdk import Asset
+
+from src.modules.engine.candle_archive import asset_key
+from src.modules.engine.horizon_stream import HorizonStreamer
+from src.modules.engine.order_book import decode_order_book
+from src.modules.engine.trade_aggregator import TradeAggregator
+
+
+class MarketResource:
+    """
+    One Horizon resource shared by every consumer: the latest fetched value, its age, and the
+    subscribers notified after each fetch.
+
+    Fetches are serialized by a lock. A consumer that waited on the lock while another one fetched uses
+    that result instead of fetching again, so concurrent requests for a resource coalesce into one call.
+    """
+
+    def __init__(self, name: str, fetch: Callable[[], Any], interval: float):
+        self.name = name
+        self.fetch = fetch
+        self.interval = interval
+        self.value: Any = None
+        self.updated_at: Optional[float] = None  # time.monotonic() of the last successful fetch
+        self.error: Optional[Exception] = None
+        self.fetch_count = 0
+        self.subscribers: List[Callable] = []
+        self.thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def age(self) -> float:
+        """Seconds since the last successful fetch (infinite before the first one)."""
+        return float("inf") if self.updated_at is None else time.monotonic() - self.updated_at
+
+    def refresh(self, max_age: float = 0.0) -> Any:
+        """Fetch the resource unless a fetch finished less than ``max_age`` seconds ago; return the value."""
+        requested = time.monotonic()
+        with self._lock:
+            if self.updated_at is not None and (self.updated_at >= requested or self.age() < max_age):
+                return self.value
+            try:
+                self.value = self.fetch()
+                self.updated_at = time.monotonic()
+                self.error = None
+                self.fetch_count += 1
+            except Exception as e:
+                self.error = e
+                self.logger.warning(f"Fetching {self.name} failed: {e}")
+                raise
+        for callback in list(self.subscribers):
+            try:
+                callback(self.name, self.value)
+            except Exception as e:
+                self.logger.error(f"{self.name} subscriber {callback} failed: {e}")
+        return self.value
+
+
+class MarketDataHub:
+    """
+    Central, in-process source of Horizon market and account data for the bot and the UI frames.
+
+    Each resource (an account, its offers, an order book...) is registered once under a name with the
+    call that fetches it and a refresh interval. Consumers either read it with ``latest``, which only
+    goes to Horizon when the cached value is older than the interval, or ``subscribe`` with a callback,
+    which keeps the resource polled by a thread of its own. However many consumers a resource has, it is
+    fetched at most once per interval.
+
+    Pollers only run while ``is_running()`` is true. Resources subscribed while it is false (a frame opened
+    before the bot started) are polled from the next ``start``, which (re)starts the poller of every
+    resource with subscribers.
+
+    Callbacks run on the poller thread. Qt frames subscribe to keep a resource polled and read it with
+    ``cached`` from their own timers: ``cached`` never goes to Horizon, so the GUI thread never waits on
+    the rate limiter behind the bot's requests.
+
+    Parameters:
+    - server (Server): The stellar_sdk Server the built-in resources (order books, trades) are read from.
+    - is_running (Callable): Returns False once the pollers should stop.
+    """
+
+    def __init__(self, server=None, is_running: Callable[[], bool] = lambda: True):
+        self.server = server
+        self.is_running = is_running
+        self.resources: Dict[str, MarketResource] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self.logger = logging.getLogger(__name__)
+
+    def register(self, name: str, fetch: Callable[[], Any], interval: float = 30.0) -> MarketResource:
+        """Register a resource, or return the one already registered under ``name``."""
+        with self._lock:
+            if name not in self.resources:
+                self.resources[name] = MarketResource(name, fetch, interval)
+            return self.resources[name]
+
+    def latest(self, name: str, max_age: Optional[float] = None) -> Any:
+        """
+        The resource's value, fetched only when older than ``max_age`` seconds (the resource interval by
+        default). Raises the fetch error when there is no value to fall back on.
+        """
+        resource = self.resources[name]
+        try:
+            return resource.refresh(resource.interval if max_age is None else max_age)
+        except Exception:
+            if resource.updated_at is None:
+                raise
+            return resource.value
+
+    def cached(self, name: str) -> Any:
+        """The resource's last fetched value, without fetching (None before the first fetch)."""
+        return self.resources[name].value
+
+    def subscribe(self, name: str, callback: Callable[[str, Any], None]):
+        """Call ``callback(name, value)`` after every fetch of a resource, and keep it polled while running."""
+        resource = self.resources[name]
+        with self._lock:
+            if callback not in resource.subscribers:
+                resource.subscribers.append(callback)
+            if self.is_running() and not self._stopped.is_set():
+                self._start_poller(resource)
+
+    def start(self):
+        """(Re)start the poller of every resource with subscribers; call once ``is_running()`` is true."""
+        with self._lock:
+            self._stopped.clear()
+            for resource in self.resources.values():
+                if resource.subscribers:
+                    self._start_poller(resource)
+
+    def _start_poller(self, resource: MarketResource):
+        if resource.thread is None or not resource.thread.is_alive():
+            resource.thread = threading.Thread(target=self._poll, args=(resource,),
+                                               name=f"MarketData-{resource.name}", daemon=True)
+            resource.thread.start()
+
+    def unsubscribe(self, name: str, callback: Callable):
+        """Stop notifying ``callback``; the poller stops once a resource has no subscriber left."""
+        resource = self.resources[name]
+        with self._lock:
+            if callback in resource.subscribers:
+                resource.subscribers.remove(callback)
+
+    def stop(self):
+        """Stop every poller."""
+        self._stopped.set()
+
+    def _poll(self, resource: MarketResource):
+        while self.is_running() and not self._stopped.is_set() and resource.subscribers:
+            try:
+                resource.refresh(resource.interval)
+                delay = resource.interval - resource.age()
+            except Exception:
+                delay = resource.interval  # Logged by the resource; retried at the next interval
+            self._stopped.wait(max(0.0, delay))
+
+    # ===============================================================
+    # BUILT-IN RESOURCES
+    # ===============================================================
+    @staticmethod
+    def pair_name(base: Asset, counter: Asset) -> str:
+        return f"{asset_key(base)}/{asset_key(counter)}"
+
+    def orderbook(self, selling: Asset, buying: Asset, limit: int = 20, interval: float = 15.0) -> str:
+        """Register the order book of a pair, decoded into an OrderBook once per fetch; returns the resource name."""
+        name = f"orderbook:{self.pair_name(selling, buying)}"
+        self.register(name, lambda: decode_order_book(
+            self.server.orderbook(selling=selling, buying=buying).limit(limit).call()), interval)
+        return name
+
+    def trades(self, base: Asset, counter: Asset, interval: float = 30.0) -> str:
+        """
+        Register a pair's trades; the resource value is a TradeAggregator holding bars built from every
+        trade seen so far, shared by all consumers. Returns the resource name.
+        """
+        name = f"trades:{self.pair_name(base, counter)}"
+        if name not in self.resources:
+            aggregator = TradeAggregator()
+            feed = HorizonStreamer(name, lambda: self.server.trades().for_asset_pair(base, counter), aggregator,
+                                   lambda: False)
+
+            def fetch():
+                # Page through the trades after the cursor; the first call only gets the latest page
+                while feed.poll_once() == feed.page_limit:
+                    pass
+                return aggregator
+
+            self.register(name, fetch, interval)
+        return name
@@ -0,0 +1,148 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from stellar_sdk import Keypair, TransactionBuilder, xdr
+from stellar_sdk.exceptions import BadRequestError
+
+from src.modules.engine.sequence_manager import SequenceManager, transaction_result_code
+
+MAX_OPERATIONS = 100  # Operations allowed in one Stellar transaction
+
+
+def operation_result_codes(error: Exception) -> List[str]:
+    """The per-operation result codes of a rejected submission (Horizon's extras.result_codes.operations)."""
+    extras = getattr(error, "extras", None) or {}
+    return list((extras.get("result_codes") or {}).get("operations") or [])
+
+
+def offer_ids(result_xdr: Optional[str]) -> List[Optional[int]]:
+    """The offer id each operation of a successful transaction created or updated, None where there is none."""
+    if not result_xdr:
+        return []
+    ids = []
+    for result in xdr.TransactionResult.from_xdr(result_xdr).result.results or []:
+        offer_id = None
+        tr = result.tr
+        offer_result = tr and (tr.manage_sell_offer_result or tr.manage_buy_offer_result)
+        if offer_result is not None and offer_result.success is not None and offer_result.success.offer.offer:
+            offer_id = offer_result.success.offer.offer.offer_id.int64
+        ids.append(offer_id)
+    return ids
+
+
+class OrderBatcher:
+    """
+    Collects the offer operations of an evaluation cycle and submits them in as few transactions as
+    possible (up to 100 operations each, every one paying the base fee).
+
+    A Stellar transaction is atomic: when one of its operations fails, Horizon answers tx_failed with a
+    result code per operation and none of them is applied. The operations that did not fail are then
+    submitted again once without the failed ones, so one bad order does not cancel the others.
+
+    With a ChannelPool, the transactions of a flush are submitted concurrently, each from a channel
+    account, instead of one after the other from the trading account.
+
+    ``flush`` returns one result per queued order, in queue order: the order, the transaction hash
+    (None when not applied), 'SUCCESS' or 'FAILED', the operation result code ('op_success',
+    'op_underfunded'... or the transaction code when the whole transaction was rejected) and the offer id.
+
+    Parameters:
+    - sequences (SequenceManager): Reserves the source account's sequence numbers.
+    - keypair (Keypair): Source account signer.
+    - network_passphrase (str): Network the transactions are signed for.
+    - base_fee (int): Fee per operation in stroops.
+    - max_operations (int): Operations per transaction at most.
+    - channels (ChannelPool): Channel accounts to submit through, or None.
+    """
+
+    def __init__(self, sequences: SequenceManager, keypair: Keypair, network_passphrase: str, base_fee: int = 100,
+                 max_operations: int = MAX_OPERATIONS, channels=None):
+        self.sequences = sequences
+        self.keypair = keypair
+        self.network_passphrase = network_passphrase
+        self.base_fee = base_fee
+        self.max_operations = max_operations
+        self.channels = channels
+        self.pending: List[tuple] = []  # (order, operation)
+        self.transactions = 0  # Transactions submitted, for monitoring
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def __len__(self):
+        return len(self.pending)
+
+    def add(self, order: dict, operation):
+        """Queue an operation with the order (signal) it comes from."""
+        self.pending.append((order, operation))
+
+    def flush(self) -> List[dict]:
+        """Submit every queued operation and return their results; the queue is emptied."""
+        pending, self.pending = self.pending, []
+        results: List[Optional[dict]] = [None] * len(pending)
+        batches = [list(range(start, min(start + self.max_operations, len(pending))))
+                   for start in range(0, len(pending), self.max_operations)]
+        if self.channels and len(batches) > 1:
+            with ThreadPoolExecutor(max_workers=min(len(self.channels), len(batches)),
+                                    thread_name_prefix="OrderBatch") as pool:
+                list(pool.map(lambda indexes: self._submit(pending, indexes, results, retry_failed=True), batches))
+        else:
+            for indexes in batches:
+                self._submit(pending, indexes, results, retry_failed=True)
+        return results
+
+    def _build(self, operations):
+        def build(account):
+            builder = TransactionBuilder(account, self.network_passphrase, base_fee=self.base_fee)
+            for operation in operations:
+                builder.append_operation(operation)
+            tx = builder.set_timeout(30).build()
+            tx.sign(self.keypair)
+            return tx
+        return build
+
+    def _submit(self, pending, indexes: List[int], results: List[Optional[dict]], retry_failed: bool):
+        with self._lock:
+            self.transactions += 1
+        operations = [pending[i][1] for i in indexes]
+        try:
+            if self.channels:
+                response = self.channels.submit(operations)
+            else:
+                response = self.sequences.submit(self.keypair.public_key, self._build(operations))
+        except BadRequestError as e:
+            codes = operation_result_codes(e)
+            transaction_code = transaction_result_code(e) or "tx_rejected"
+            if transaction_code == "tx_failed" and len(codes) == len(indexes):
+                survivors = [i for i, code in zip(indexes, codes) if code == "op_success"]
+                for i, code in zip(indexes, codes):
+                    if code != "op_success" or not retry_failed:
+                        results[i] = self._result(pending[i][0], None, "FAILED",
+                                                  transaction_code if code == "op_success" else code)
+                if survivors and retry_failed:
+                    self.logger.info(f"Resubmitting {len(survivors)} of {len(indexes)} operations without the failed ones")
+                    self._submit(pending, survivors, results, retry_failed=False)
+                return
+            for i in indexes:
+                results[i] = self._result(pending[i][0], None, "FAILED", transaction_code)
+            self.logger.error(f"Batch of {len(indexes)} operations rejected: {transaction_code}")
+            return
+        except Exception as e:
+            for i in indexes:
+                results[i] = self._result(pending[i][0], None, "FAILED", str(e))
+            self.logger.error(f"Batch of {len(indexes)} operations failed: {e}")
+            return
+
+        try:
+            ids = offer_ids(response.get("result_xdr"))
+        except (ValueError, AttributeError) as e:
+            self.logger.warning(f"Could not read the offer ids of {response.get('hash')}: {e}")
+            ids = []
+        for position, i in enumerate(indexes):
+            offer_id = ids[position] if position < len(ids) else None
+            results[i] = self._result(pending[i][0], response.get("hash"), "SUCCESS", "op_success", offer_id)
+
+    @staticmethod
+    def _result(order: dict, tx_hash: Optional[str], result: str, code: str, offer_id: Optional[int] = None) -> dict:
+        return {"order": order, "hash": tx_hash, "result": result, "code": code, "offer_id": offer_id}
@@ -0,0 +1,93 @@
+"""
+Columnar decoding of Horizon order books.
+
+``decode_order_book`` reads the ``bids`` and ``asks`` of a ``/order_book`` response straight into NumPy
+columns: the price as a float and as the exact rational ``price_r`` (n/d), the amount, the cumulative
+depth from the top of each side, and the side (+1 bid, -1 ask). Bids come first, best price first, then
+asks. Levels without a positive price and amount are dropped. The market-data hub decodes each fetched
+book once and every consumer (bot, order book table, chart heatmap) reads the same arrays.
+"""
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+BID, ASK = 1, -1
+
+
+def _decode_levels(levels):
+    """(price, n, d, amount) columns of one side of a book; price_r is used when present, else price."""
+    count = len(levels)
+    amount = np.array([level["amount"] for level in levels], dtype=np.float64)
+    if count and all("price_r" in level for level in levels):
+        n = np.fromiter((level["price_r"]["n"] for level in levels), dtype=np.int64, count=count)
+        d = np.fromiter((level["price_r"]["d"] for level in levels), dtype=np.int64, count=count)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            price = n / d
+    else:
+        price = np.array([level["price"] for level in levels], dtype=np.float64)
+        n = np.zeros(count, dtype=np.int64)
+        d = np.zeros(count, dtype=np.int64)
+    valid = (price > 0) & (amount > 0) & np.isfinite(price)
+    if not valid.all():
+        price, n, d, amount = price[valid], n[valid], d[valid], amount[valid]
+    return price, n, d, amount
+
+
+class OrderBook:
+    """
+    One order book as columns, bids first then asks; ``bids`` and ``asks`` give the rows of one side.
+
+    Attributes:
+    - price (float64), price_n / price_d (int64, 0 when the book had no price_r), amount (float64)
+    - depth (float64): Cumulative amount from the best level of the row's side.
+    - side (int8): BID (+1) or ASK (-1).
+    - n_bids (int): Number of bid rows.
+    """
+
+    __slots__ = ("price", "price_n", "price_d", "amount", "depth", "side", "n_bids")
+
+    def __init__(self, price, price_n, price_d, amount, depth, side, n_bids: int):
+        self.price, self.price_n, self.price_d = price, price_n, price_d
+        self.amount, self.depth, self.side, self.n_bids = amount, depth, side, n_bids
+
+    def __len__(self):
+        return len(self.price)
+
+    @property
+    def bids(self) -> slice:
+        return slice(0, self.n_bids)
+
+    @property
+    def asks(self) -> slice:
+        return slice(self.n_bids, len(self.price))
+
+    @property
+    def best_bid(self) -> Optional[float]:
+        return float(self.price[0]) if self.n_bids else None
+
+    @property
+    def best_ask(self) -> Optional[float]:
+        return float(self.price[self.n_bids]) if len(self.price) > self.n_bids else None
+
+    def spread_pct(self) -> Optional[float]:
+        """(best ask - best bid) / best bid in percent, or None when a side is empty."""
+        bid, ask = self.best_bid, self.best_ask
+        return None if bid is None or ask is None else (ask - bid) / bid * 100
+
+    def to_frame(self) -> pd.DataFrame:
+        """The book as a DataFrame: price, price_n, price_d, amount, depth and side ('bid' or 'ask')."""
+        return pd.DataFrame({"price": self.price, "price_n": self.price_n, "price_d": self.price_d,
+                             "amount": self.amount, "depth": self.depth,
+                             "side": np.where(self.side == BID, "bid", "ask")})
+
+
+def decode_order_book(book: dict) -> OrderBook:
+    """Decode the bids and asks of a Horizon order book response into an OrderBook."""
+    bids = _decode_levels(book.get("bids") or [])
+    asks = _decode_levels(book.get("asks") or [])
+    n_bids = len(bids[0])
+    side = np.full(n_bids + len(asks[0]), ASK, dtype=np.int8)
+    side[:n_bids] = BID
+    return OrderBook(*(np.concatenate(columns) for columns in zip(bids, asks)),
+                     depth=np.concatenate([np.cumsum(bids[3]), np.cumsum(asks[3])]), side=side, n_bids=n_bids)
@@ -0,0 +1,298 @@
+"""
+Shared rate limiting and retries for Horizon requests.
+
+Every request to a Horizon host, whether made with a raw ``requests.Session`` or through a
+``stellar_sdk.Server``, goes through that host's HorizonRateLimiter:
+
+- A token bucket paces requests to Horizon's limit (3600 requests per hour per client by default, with
+  bursts of up to ``capacity``). The X-Ratelimit-Remaining/-Reset headers of each response tighten it,
+  so the bucket stays in step with the server's own count.
+- 429 and 5xx responses and connection errors are retried with jittered exponential backoff, or after
+  the Retry-After delay when the server sends one. A 429 also pauses the bucket for every caller.
+- Retries come out of a retry budget that every new request adds ``retry_ratio`` to, so during an
+  outage retries add at most that fraction of extra load instead of multiplying it.
+- A request may be given a deadline: it fails with RateLimitTimeout instead of waiting for a token or a
+  retry delay beyond it, so a caller that cannot block (e.g. a UI thread) never waits out a backlog.
+- Latency, errors, retries and throttling are counted per endpoint (the URL path with account ids,
+  hashes and numbers replaced by '{id}').
+"""
+import email.utils
+import logging
+import random
+import re
+import threading
+import time
+from typing import Callable, Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from stellar_sdk.client.requests_client import RequestsClient
+from stellar_sdk.client.response import Response
+from stellar_sdk.exceptions import ConnectionError as StellarConnectionError
+
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+
+
+class RateLimitTimeout(TimeoutError):
+    """A request could not be sent, or retried, before its deadline."""
+
+
+_ID_SEGMENT = re.compile(r"^(?:[GMC][A-Z2-7]{55}|[0-9a-f]{64}|\d+(?:-\d+)?)$")
+
+
+def endpoint_name(url: str) -> str:
+    """The path of a Horizon URL with ids replaced by '{id}', e.g. '/accounts/{id}/transactions'."""
+    segments = urlparse(url).path.rstrip("/").split("/")
+    return "/".join("{id}" if _ID_SEGMENT.match(segment) else segment for segment in segments) or "/"
+
+
+def _header(headers, name: str) -> Optional[str]:
+    if not headers:
+        return None
+    value = headers.get(name)
+    if value is None:
+        lowered = name.lower()
+        value = next((v for k, v in headers.items() if k.lower() == lowered), None)
+    return value
+
+
+def retry_after_seconds(headers) -> Optional[float]:
+    """The Retry-After delay of a response in seconds (given as seconds or an HTTP date), or None."""
+    value = _header(headers, "Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        date = email.utils.parsedate_to_datetime(value)
+        return max(0.0, date.timestamp() - time.time()) if date else None
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: ``rate`` tokens per second, holding at most ``capacity``.
+    ``acquire`` blocks until a token is available; ``pause`` empties the bucket for a while.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        if now > self._updated:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Take a token, waiting up to ``timeout`` seconds (forever when None). Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._paused_until - now
+                if wait <= 0:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return True
+                    wait = (1 - self._tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Hand out no token for ``seconds`` and restart from an empty bucket."""
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = 0.0
+            self._updated = max(now, self._paused_until)
+
+    def limit_to(self, remaining: float):
+        """Cap the available tokens, e.g. to the server's count of remaining requests."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, remaining)
+
+
+class HorizonRateLimiter:
+    """
+    Paces and retries the requests of one Horizon host; see the module docstring.
+
+    Parameters:
+    - rate (float): Requests per second allowed on average.
+    - capacity (int): Burst size of the token bucket.
+    - max_retries (int): Retries of one request at most.
+    - base_delay (float), max_delay (float): Backoff bounds in seconds; attempt n waits a random time
+      up to min(max_delay, base_delay * 2 ** n).
+    - retry_ratio (float): Retry budget added by each new request.
+    - min_retry_budget (float): Retry budget available from the start, and its cap.
+    """
+
+    _hosts: Dict[str, "HorizonRateLimiter"] = {}
+    _hosts_lock = threading.Lock()
+
+    def __init__(self, rate: float = 1.0, capacity: int = 60, max_retries: int = 4, base_delay: float = 0.5,
+                 max_delay: float = 60.0, retry_ratio: float = 0.1, min_retry_budget: float = 10.0):
+        self.bucket = TokenBucket(rate, capacity)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_ratio = retry_ratio
+        self.min_retry_budget = min_retry_budget
+        self._budget = min_retry_budget
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def for_host(cls, url: str) -> "HorizonRateLimiter":
+        """The limiter shared by every client of the host of ``url``."""
+        host = urlparse(url).netloc
+        with cls._hosts_lock:
+            if host not in cls._hosts:
+                cls._hosts[host] = cls()
+            return cls._hosts[host]
+
+    def execute(self, endpoint: str, send: Callable, deadline: Optional[float] = None):
+        """
+        Send a request through the bucket and retry it when it fails with a retryable status or a
+        connection error. ``send`` returns a response with ``status_code`` and ``headers``. Returns the
+        last response; raises the connection error when the last attempt had no response.
+
+        With a ``deadline`` (a ``time.monotonic()`` value), raises RateLimitTimeout when no token is
+        available before it; a retry whose delay would pass it is not made.
+        """
+        with self._lock:
+            self._budget = min(self.min_retry_budget, self._budget + self.retry_ratio)
+        attempt = 0
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not self.bucket.acquire(timeout):
+                raise RateLimitTimeout(f"{endpoint}: no request slot before the deadline")
+            started = time.perf_counter()
+            response, error = None, None
+            try:
+                response = send()
+            except (requests.RequestException, StellarConnectionError) as e:
+                error = e
+            status = getattr(response, "status_code", None)
+            self._record(endpoint, (time.perf_counter() - started) * 1000, status, error)
+            if response is not None:
+                self._observe(response.headers)
+            if error is None and status not in RETRY_STATUSES:
+                return response
+            retry_after = retry_after_seconds(getattr(response, "headers", None))
+            delay = retry_after if retry_after is not None else \
+                random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+            past_deadline = deadline is not None and time.monotonic() + delay > deadline
+            if attempt >= self.max_retries or past_deadline or not self._spend_retry():
+                if status == 429 and past_deadline:
+                    self.bucket.pause(delay)  # Still hold back the callers that can wait
+                if error is not None:
+                    raise error
+                return response
+
+            if status == 429:
+                self.bucket.pause(delay)
+            self.logger.warning(f"{endpoint} failed ({status or error}), retry {attempt + 1} in {delay:.2f}s")
+            with self._lock:
+                self._stats[endpoint]["retries"] += 1
+            attempt += 1
+            time.sleep(delay)
+
+    def request(self, session: requests.Session, method: str, url: str, **kwargs) -> requests.Response:
+        """``session.request`` through the limiter."""
+        return self.execute(endpoint_name(url), lambda: session.request(method, url, **kwargs))
+
+    def _spend_retry(self) -> bool:
+        with self._lock:
+            if self._budget < 1:
+                return False
+            self._budget -= 1
+            return True
+
+    def _observe(self, headers):
+        """Follow the server's own rate-limit count."""
+        remaining, reset = _header(headers, "X-Ratelimit-Remaining"), _header(headers, "X-Ratelimit-Reset")
+        try:
+            if remaining is not None:
+                self.bucket.limit_to(float(remaining))
+                if float(remaining) <= 0 and reset is not None:
+                    self.bucket.pause(float(reset))
+        except ValueError:
+            pass
+
+    def _record(self, endpoint: str, latency_ms: float, status: Optional[int], error: Optional[Exception]):
+        with self._lock:
+            stats = self._stats.setdefault(endpoint, {"requests": 0, "errors": 0, "retries": 0, "throttled": 0,
+                                                      "latency_ms_total": 0.0, "latency_ms_max": 0.0})
+            stats["requests"] += 1
+            stats["latency_ms_total"] += latency_ms
+            stats["latency_ms_max"] = max(stats["latency_ms_max"], latency_ms)
+            if error is not None or (status is not None and status >= 400):
+                stats["errors"] += 1
+            if status == 429:
+                stats["throttled"] += 1
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Counters per endpoint: requests, errors, retries, throttled (429s), mean and max latency in ms."""
+        with self._lock:
+            return {endpoint: dict(stats, latency_ms_mean=stats["latency_ms_total"] / stats["requests"])
+                    for endpoint, stats in self._stats.items()}
+
+
+class RateLimitedClient(RequestsClient):
+    """
+    stellar_sdk HTTP client whose GET and POST requests go through the HorizonRateLimiter of their host
+    (or the one given). The client's own urllib3 retries are disabled; the limiter retries instead.
+    Streams are not limited: a stream is one long-lived request.
+
+    With a ``cache`` (a ResponseCache), GET requests are answered from it while fresh, and expired
+    entries are revalidated with their ETag. With ``max_wait``, a request spends at most that many
+    seconds waiting on the limiter (for a token or a retry) and otherwise fails with RateLimitTimeout.
+    """
+
+    def __init__(self, limiter: Optional[HorizonRateLimiter] = None, cache=None, max_wait: Optional[float] = None,
+                 **kwargs):
+        kwargs.setdefault("num_retries", 0)
+        super().__init__(**kwargs)
+        self.limiter = limiter
+        self.cache = cache
+        self.max_wait = max_wait
+
+    def _limiter(self, url: str) -> HorizonRateLimiter:
+        return self.limiter or HorizonRateLimiter.for_host(url)
+
+    def _deadline(self) -> Optional[float]:
+        return None if self.max_wait is None else time.monotonic() + self.max_wait
+
+    def get(self, url, params=None, max_content_size=None):
+        if self.cache is None:
+            return self._get(url, params, max_content_size, None)
+        return self.cache.get(url, params, lambda headers: self._get(url, params, max_content_size, headers))
+
+    def _get(self, url, params, max_content_size, headers):
+        if not headers:
+            send = lambda: super(RateLimitedClient, self).get(url, params, max_content_size)
+        else:
+            send = lambda: self._conditional_get(url, params, headers)
+        return self._limiter(url).execute(endpoint_name(url), send, self._deadline())
+
+    def _conditional_get(self, url, params, headers) -> Response:
+        """GET with extra headers (If-None-Match), which the stellar_sdk client cannot send."""
+        try:
+            resp = self._session.get(url, params=params, headers=headers, timeout=self.request_timeout)
+        except requests.RequestException as err:
+            raise StellarConnectionError(err) from err
+        return Response(status_code=resp.status_code, text=resp.text, headers=dict(resp.headers), url=resp.url)
+
+    def post(self, url, data=None, json_data=None):
+        return self._limiter(url).execute(endpoint_name(url),
+                                          lambda: super(RateLimitedClient, self).post(url, data, json_data),
+                                          self._deadline())
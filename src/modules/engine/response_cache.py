@@ -0,0 +1,174 @@
+"""
+In-memory cache of Horizon GET responses, shared by DataFetcher and the stellar_sdk servers.
+
+Responses are keyed on the URL path and query parameters and kept for a TTL chosen per endpoint
+(assets change rarely, order books within seconds); endpoints without a TTL are not cached. When a
+response carried an ETag, the expired entry is revalidated with If-None-Match, and a 304 reply renews it
+without downloading the body again. Identical requests issued while one is in flight wait for it and
+share its response. Memory is bounded by entry count and total body size, evicting the least recently
+used entries first.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+from urllib.parse import urlencode, urlparse, parse_qsl
+
+from src.modules.engine.rate_limiter import endpoint_name
+
+# Seconds a response stays fresh, per endpoint (see rate_limiter.endpoint_name). Accounts are left out:
+# their sequence number must be current when a transaction is built.
+DEFAULT_TTLS = {
+    "/assets": 300,
+    "/fee_stats": 10,
+    "/order_book": 2,
+    "/offers": 5,
+    "/accounts/{id}/offers": 5,
+    "/accounts/{id}/payments": 5,
+    "/accounts/{id}/trades": 5,
+    "/accounts/{id}/operations": 5,
+    "/ledgers": 5,
+    "/trade_aggregations": 10,
+}
+
+
+class _Entry:
+    __slots__ = ("response", "expires", "etag", "size")
+
+    def __init__(self, response, expires: float, etag: Optional[str], size: int):
+        self.response = response
+        self.expires = expires
+        self.etag = etag
+        self.size = size
+
+
+class _Flight:
+    __slots__ = ("done", "response", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+def _etag(response) -> Optional[str]:
+    headers = getattr(response, "headers", None) or {}
+    return next((value for key, value in headers.items() if key.lower() == "etag"), None)
+
+
+class ResponseCache:
+    """
+    LRU cache of GET responses with per-endpoint TTLs, ETag revalidation and request coalescing.
+
+    Parameters:
+    - ttls (dict): Seconds of freshness per endpoint; DEFAULT_TTLS by default.
+    - max_entries (int): Responses kept at most.
+    - max_bytes (int): Total response body size kept at most.
+    """
+
+    _shared: Optional["ResponseCache"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, max_entries: int = 512,
+                 max_bytes: int = 16 * 1024 * 1024):
+        self.ttls = DEFAULT_TTLS if ttls is None else ttls
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[tuple, _Entry]" = OrderedDict()
+        self._flights: Dict[tuple, _Flight] = {}
+        self._bytes = 0
+        self._counts = {"hits": 0, "misses": 0, "coalesced": 0, "revalidated": 0, "evictions": 0}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> "ResponseCache":
+        """The process-wide cache used by DataFetcher and RateLimitedClient."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    @staticmethod
+    def key(url: str, params=None) -> tuple:
+        parsed = urlparse(url)
+        query = parse_qsl(parsed.query) + [(k, str(v)) for k, v in (params or {}).items() if v is not None]
+        return parsed.netloc, parsed.path.rstrip("/"), urlencode(sorted(query))
+
+    def get(self, url: str, params, fetch: Callable[[dict], object]):
+        """
+        Return the response of a GET request, from the cache when fresh. ``fetch(headers)`` performs
+        the request with the extra ``headers`` (If-None-Match when revalidating) and returns a response
+        with ``status_code``, ``headers`` and ``text``.
+        """
+        ttl = self.ttls.get(endpoint_name(url), 0)
+        if ttl <= 0:
+            return fetch({})
+        key = self.key(url, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires > time.monotonic():
+                self._entries.move_to_end(key)
+                self._counts["hits"] += 1
+                return entry.response
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self._counts["misses"] += 1
+            else:
+                self._counts["coalesced"] += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.response
+
+        try:
+            response = fetch({"If-None-Match": entry.etag} if entry is not None and entry.etag else {})
+            if response.status_code == 304 and entry is not None:
+                response = entry.response
+                with self._lock:
+                    self._counts["revalidated"] += 1
+            if response.status_code == 200:
+                self._store(key, response, ttl)
+            flight.response = response
+            return response
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _store(self, key: tuple, response, ttl: float):
+        size = len(getattr(response, "text", "") or "")
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._entries[key] = _Entry(response, time.monotonic() + ttl, _etag(response), size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self._counts["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Counters: hits (fresh entries), misses (requests sent), coalesced (requests that waited for an
+        identical one in flight), revalidated (misses answered 304), evictions; the hit rate of
+        lookups answered without a request; entries and bytes held.
+        """
+        with self._lock:
+            lookups = self._counts["hits"] + self._counts["misses"] + self._counts["coalesced"]
+            served = self._counts["hits"] + self._counts["coalesced"]
+            return dict(self._counts, entries=len(self._entries), bytes=self._bytes,
+                        hit_rate=served / lookups if lookups else 0.0)
@@ -0,0 +1,118 @@
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+from stellar_sdk import Account
+from stellar_sdk.exceptions import BadRequestError
+
+# Submission results that reject a transaction before it is applied: its sequence number is not consumed.
+# ('tx_failed' transactions are applied, and consume theirs.)
+_UNCONSUMED_RESULTS = frozenset({"tx_bad_seq", "tx_bad_auth", "tx_bad_auth_extra", "tx_insufficient_balance",
+                                 "tx_insufficient_fee", "tx_too_early", "tx_too_late", "tx_missing_operation",
+                                 "tx_no_source_account", "tx_malformed", "tx_bad_min_seq_age_or_gap"})
+
+
+def transaction_result_code(error: Exception) -> Optional[str]:
+    """The transaction result code of a rejected submission, e.g. 'tx_bad_seq', or None."""
+    extras = getattr(error, "extras", None) or {}
+    return (extras.get("result_codes") or {}).get("transaction")
+
+
+class SequenceManager:
+    """
+    Local copy of the sequence numbers of the accounts the bot submits from.
+
+    An account is loaded from Horizon once; after that every transaction reserves the next sequence
+    number locally, so building a transaction costs no round trip. Reservations are made under a lock,
+    so concurrent submitters get distinct numbers. The account is loaded again only when Horizon
+    rejects a transaction with tx_bad_seq (the account was used elsewhere, or an earlier reservation
+    was never submitted); concurrent rejections share one reload.
+
+    Parameters:
+    - server (Server): The stellar_sdk Server accounts are loaded from and transactions submitted to.
+    """
+
+    def __init__(self, server):
+        self.server = server
+        self._sequences: Dict[str, int] = {}  # Last sequence number reserved per account
+        self._generations: Dict[str, int] = {}  # Number of loads per account
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self.loads = 0  # load_account calls made, for monitoring
+        self.logger = logging.getLogger(__name__)
+
+    def prime(self, account: Account):
+        """Start from an Account already loaded (e.g. at start-up) instead of loading it again."""
+        account_id = account.account.account_id
+        with self._lock:
+            self._sequences[account_id] = account.sequence
+            self._generations[account_id] = self._generations.get(account_id, 0) + 1
+
+    def _load(self, account_id: str, generation: Optional[int]):
+        """Load the account, unless another thread reloaded it since ``generation`` was read."""
+        with self._lock:
+            load_lock = self._load_locks.setdefault(account_id, threading.Lock())
+        with load_lock:
+            with self._lock:
+                if account_id in self._sequences and self._generations.get(account_id) != generation:
+                    return
+            account = self.server.load_account(account_id)
+            with self._lock:
+                self.loads += 1
+                self._sequences[account_id] = account.sequence
+                self._generations[account_id] = self._generations.get(account_id, 0) + 1
+
+    def reserve(self, account_id: str) -> Account:
+        """
+        An Account for building the next transaction: a TransactionBuilder gives its transaction the
+        reserved sequence number (``account.sequence + 1``).
+        """
+        while True:
+            with self._lock:
+                if account_id in self._sequences:
+                    sequence = self._sequences[account_id]
+                    self._sequences[account_id] = sequence + 1
+                    return Account(account_id, sequence)
+            self._load(account_id, None)
+
+    def release(self, account_id: str, sequence: int):
+        """
+        Give back a reservation that was not submitted (``sequence`` is the Account's sequence as
+        reserved, before a TransactionBuilder incremented it), if no later one was made.
+        """
+        with self._lock:
+            if self._sequences.get(account_id) == sequence + 1:
+                self._sequences[account_id] = sequence
+
+    def resync(self, account_id: str):
+        """Reload an account's sequence number from Horizon."""
+        with self._lock:
+            generation = self._generations.get(account_id)
+        self._load(account_id, generation)
+
+    def submit(self, account_id: str, build: Callable[[Account], object], retries: int = 1):
+        """
+        Build a transaction on a reserved sequence number and submit it. ``build(account)`` returns the
+        signed transaction envelope. On tx_bad_seq the account is resynced and the transaction rebuilt,
+        up to ``retries`` times; other errors are raised.
+        """
+        for attempt in range(retries + 1):
+            account = self.reserve(account_id)
+            sequence = account.sequence
+            with self._lock:
+                generation = self._generations.get(account_id)
+            try:
+                envelope = build(account)
+            except Exception:
+                self.release(account_id, sequence)
+                raise
+            try:
+                return self.server.submit_transaction(envelope)
+            except BadRequestError as e:
+                code = transaction_result_code(e)
+                if code in _UNCONSUMED_RESULTS:
+                    self.release(account_id, sequence)
+                if code != "tx_bad_seq" or attempt == retries:
+                    raise
+                self.logger.warning(f"tx_bad_seq for {account_id} at sequence {sequence + 1}, resyncing")
+                self._load(account_id, generation)  # Skipped if another submitter already reloaded it
@@ -1,11 +1,30 @@
 from __future__ import annotations
-import logging, threading, time
+import json, logging, os, threading, time
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
 from typing import List, Dict, Tuple, Optional, Callable
+import numpy as np
 import pandas as pd
 from stellar_sdk import Server, Asset, Keypair, TransactionBuilder, Network, ManageSellOffer
-from ta.momentum import RSIIndicator
-from ta.trend import MACD
+
+from src.modules.classes.backtesting import Backtester
+from src.modules.engine.candle_archive import CandleArchive, asset_key
+from src.modules.engine.candle_backfill import CandleBackfill
+from src.modules.engine.candle_rollups import CandleRollups
+from src.modules.engine.candle_store import CandleBuffer, CandleStore, records_to_arrays
+from src.modules.engine.channel_pool import ChannelPool
+from src.modules.engine.horizon_stream import RecordTable, HorizonStreamer
+from src.modules.engine.market_data_hub import MarketDataHub
+from src.modules.engine.order_batcher import OrderBatcher
+from src.modules.engine.order_book import OrderBook
+from src.modules.engine.rate_limiter import RateLimitedClient
+from src.modules.engine.response_cache import ResponseCache
+from src.modules.engine.sequence_manager import SequenceManager
+from src.modules.engine.streaming_indicators import CandleIndicators
+from src.modules.engine.trade_journal import TradeJournal
+
+# Format of indicator_state.json. Version 2 keys pairs by issuer-qualified names; older files are ignored.
+INDICATOR_STATE_VERSION = 2
 
 
 # ===============================================================
@@ -33,20 +52,32 @@ class EventListener:
 class SmartBot:
     """💡 Advanced Stellar Trading Bot — stable, threaded, and UI-ready."""
 
-    def __init__(self, controller):
+    def __init__(self, controller, test_mode: bool = False):
         self.controller = controller
         self.logger = self._setup_logger()
         self.running = False
-        self.test_mode = False
+        self.test_mode = test_mode
         self.interval_seconds = 60
+        self.evaluation_mode = "pipelined"  # "pipelined" (concurrent fetches, then indicators) or "serial"
+        self.fetch_workers = 8  # Concurrent candle fetches in pipelined mode
+        self.cycle_stats: dict = {}  # Timings of the last evaluation cycle, also published as "cycle_stats"
         self.resolution = 3600000  # 1h
+        self.update_mode = "stream"  # "stream" (Horizon SSE with polling fallback) or "poll"
+        self.table_size = 1000  # Max records kept per streamed table
 
         # --- Stellar Setup ---
-        self.server = Server("https://horizon.stellar.org")
+        self.server = Server("https://horizon.stellar.org", client=RateLimitedClient(cache=ResponseCache.shared()))
         self.account_id = controller.account_id
         self.secret_key = controller.secret_key
         self.keypair = Keypair.from_secret(self.secret_key)
         self.account = self.server.load_account(self.account_id)
+        self.sequences = SequenceManager(self.server)
+        self.sequences.prime(self.account)
+        self.batch_orders = True  # Submit the orders of a cycle together, up to 100 operations per transaction
+        self.order_batcher = OrderBatcher(self.sequences, self.keypair, Network.PUBLIC_NETWORK_PASSPHRASE)
+        self.channels: Optional[ChannelPool] = None  # Channel accounts, see enable_channels
+        self._trade_pool: Optional[ThreadPoolExecutor] = None  # Submits unbatched trades through the channels
+        self._pending_trades = []  # Futures of the trades submitted by the current cycle
 
         # --- Default pair ---
         self.selling = Asset.native()
@@ -55,27 +86,39 @@ class SmartBot:
         # --- State & Lock ---
         self._lock = threading.Lock()
         self.thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()  # Replaced on each start, so threads of an earlier run never resume
+        self._threads: List[threading.Thread] = []  # Background updaters of the current run
 
         # --- DataFrames ---
         self.assets_df = pd.DataFrame()
         self.accounts_df = pd.DataFrame()
-        self.transactions_df = pd.DataFrame()
-        self.effects_df = pd.DataFrame()
         self.offers_df = pd.DataFrame()
         self.orderbook_df = pd.DataFrame()
         self.payments_df = pd.DataFrame()
         self.trades_df = pd.DataFrame()
         self.fees_stats_df = pd.DataFrame()
         self.operations_df = pd.DataFrame()
-        self.ledger_df = pd.DataFrame()
-        self.trade_history = pd.DataFrame(columns=[
-            "pair", "side", "amount", "price", "hash", "result", "timestamp"
-        ])
+        self.transactions_table = RecordTable(self.table_size)
+        self.effects_table = RecordTable(self.table_size)
+        self.ledger_table = RecordTable(self.table_size)
+        self.streamers: List[HorizonStreamer] = []
+        self.candles = CandleStore(capacity=2000)
+        self.candle_archive = CandleArchive("candle_archive")
+        self.candle_rollups = CandleRollups(self.candle_archive)
+        self.candle_backfill = CandleBackfill(self.server, self.candle_archive, store=self._store_candles)
+        self.indicator_state_path = "indicator_state.json"
+        self.indicators: Dict[str, CandleIndicators] = {}
+        self.load_indicator_state()
+        self.trade_journal = TradeJournal("trade_journal.db")  # Trade history, kept across restarts
 
         # --- Events ---
         self.events = EventListener()
         self.events.subscribe("market_update", self._on_market_update)
 
+        # --- Shared market data (also read by the UI frames) ---
+        self.market_data = MarketDataHub(self.server, lambda: self.running)
+        self._register_market_data()
+
         # --- Initialization ---
         self._initialize_account()
         self.logger.info("✅ SmartBot initialized successfully.")
@@ -98,20 +141,44 @@ class SmartBot:
     def _initialize_account(self):
         try:
             self.account = self.server.load_account(self.account_id)
+            self.sequences.prime(self.account)
             self.assets_df = pd.DataFrame(self.server.assets().call())
-            self.accounts_df = pd.DataFrame([self.server.accounts().account_id(self.account_id).call()])
-            self.transactions_df = pd.DataFrame([self.server.transactions().for_account(self.account_id).call()])
-            self.effects_df = pd.DataFrame([self.server.effects().for_account(self.account_id).call()])
-            self.offers_df = pd.DataFrame([self.server.offers().call()])
-            self.orderbook_df = pd.DataFrame([self.server.orderbook(self.selling,self.buying).call()])
-            self.payments_df = pd.DataFrame([self.server.payments().for_account(self.account_id).call()])
-            self.trades_df = pd.DataFrame([self.server.trades().for_account(self.account_id).call()])
-            self.fees_stats_df = pd.DataFrame([self.server.fee_stats().call()])
-            self.operations_df = pd.DataFrame([self.server.operations().for_account(self.account_id).call()])
-            self.ledger_df = pd.DataFrame([self.server.ledgers().order(desc=True).limit(50).call()])
+            self.transactions_table.extend(reversed(
+                self.server.transactions().for_account(self.account_id).order(desc=True).limit(100).call()["_embedded"]["records"]))
+            self.effects_table.extend(reversed(
+                self.server.effects().for_account(self.account_id).order(desc=True).limit(100).call()["_embedded"]["records"]))
+            for name in self._market_frames:
+                self._on_market_data(name, self.market_data.latest(name))
+            self.ledger_table.extend(reversed(
+                self.server.ledgers().order(desc=True).limit(50).call()["_embedded"]["records"]))
         except Exception as e:
             self.logger.error(f"Initialization failed: {e}")
 
+    def _register_market_data(self):
+        """Register the account and market resources the bot keeps as DataFrames, with their refresh intervals."""
+        hub, account_id = self.market_data, self.account_id
+        hub.register("account", lambda: self.server.accounts().account_id(account_id).call(), 30)
+        hub.register("offers", lambda: self.server.offers().call(), 30)
+        hub.register("payments", lambda: self.server.payments().for_account(account_id).call(), 30)
+        hub.register("account_trades", lambda: self.server.trades().for_account(account_id).call(), 60)
+        hub.register("fee_stats", lambda: self.server.fee_stats().call(), 60)
+        hub.register("operations", lambda: self.server.operations().for_account(account_id).call(), 60)
+        self._market_frames = {
+            "account": "accounts_df",
+            "offers": "offers_df",
+            hub.orderbook(self.selling, self.buying): "orderbook_df",
+            "payments": "payments_df",
+            "account_trades": "trades_df",
+            "fee_stats": "fees_stats_df",
+            "operations": "operations_df",
+        }
+        for name in self._market_frames:  # Polled from start(), with the resources the UI frames subscribed
+            hub.subscribe(name, self._on_market_data)
+
+    def _on_market_data(self, name: str, value):
+        frame = value.to_frame() if isinstance(value, OrderBook) else pd.DataFrame([value])
+        setattr(self, self._market_frames[name], frame)
+
     # ===============================================================
     # START/STOP
     # ===============================================================
@@ -121,61 +188,185 @@ class SmartBot:
             self.logger.warning("Bot already running.")
             return
         self.running = True
-        self.thread = threading.Thread(target=self._run_loop, name="SmartBotMain", daemon=True)
+        self._stopped = stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run_loop, args=(stopped,), name="SmartBotMain", daemon=True)
         self.thread.start()
-        self._start_background_updaters()
+        self._start_background_updaters(stopped)
         self.logger.info("🚀 SmartBot started.")
 
     def stop(self):
         """Stop trading and background updates."""
         self.running = False
         self.logger.info("🛑 Stopping SmartBot...")
-        if self.thread and self.thread.is_alive():
-            self.thread.join(timeout=5)
+        self._stopped.set()
+        for streamer in self.streamers:
+            streamer.stop()
+        for thread in [self.thread, *self._threads]:
+            if thread and thread.is_alive() and thread is not threading.current_thread():
+                thread.join(timeout=5)
+        self.streamers, self._threads = [], []
+        if self.channels:
+            self.channels.stop()
+        self.trade_journal.flush()
+        self.save_indicator_state()
         self.logger.info("✅ SmartBot stopped.")
 
     # ===============================================================
     # MAIN LOOP
     # ===============================================================
-    def _run_loop(self):
-        """Main trading strategy loop."""
+    def _run_loop(self, stopped: threading.Event):
+        """Main trading strategy loop: one evaluation cycle of every pair per ``interval_seconds`` until ``stopped``."""
+        fetch_pool = None
         try:
             pairs = self._create_trading_pairs()
             if not pairs:
                 self.logger.warning("⚠️ No trading pairs found.")
                 return
 
-            while self.running:
+            if self.evaluation_mode == "pipelined":
+                fetch_pool = ThreadPoolExecutor(self.fetch_workers, thread_name_prefix="SmartBotFetch")
+            while not stopped.is_set():
                 start_time = time.time()
-                for base, quote in pairs:
-                    df = self._fetch_ohlcv(base, quote)
-                    if df is None or df.empty:
-                        continue
-                    self._apply_indicators(df)
-                    signal = self._generate_signal(df, f"{base.code}/{quote.code}")
-                    if signal:
-                        self.execute_trade(signal)
-
-                    # Notify UI
-                    self.events.notify("market_update", {
-                        "timestamp": datetime.now(),
-                        "pair": f"{base.code}/{quote.code}",
-                        "status": "RUNNING"
-                    })
-
-                time.sleep(max(0, self.interval_seconds - (time.time() - start_time)))
+                if fetch_pool is None:
+                    stats = self._run_cycle_serial(pairs)
+                else:
+                    stats = self._run_cycle_pipelined(pairs, fetch_pool)
+                stats["cycle_ms"] = (time.time() - start_time) * 1000
+                stats["overrun"] = stats["cycle_ms"] > self.interval_seconds * 1000
+                self.cycle_stats = stats
+                self.events.notify("cycle_stats", stats)
+                if stats["overrun"]:
+                    self.logger.warning(f"Cycle took {stats['cycle_ms']:.0f} ms, over the {self.interval_seconds}s interval")
+
+                stopped.wait(max(0, self.interval_seconds - (time.time() - start_time)))
 
         except Exception as e:
             self.logger.exception(f"Fatal bot error: {e}")
         finally:
-            self.running = False
+            if not stopped.is_set():  # Ended on its own: stop the updaters of this run too
+                self.running = False
+                stopped.set()
+            if fetch_pool is not None:
+                fetch_pool.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _new_cycle_stats(pairs) -> dict:
+        """
+        Counters of a cycle and the time spent per stage in ms, summed over pairs, with the slowest pair
+        for fetches and indicators. ``_run_loop`` adds the wall-clock ``cycle_ms`` and ``overrun``.
+        """
+        return {"timestamp": datetime.now(), "pairs": len(pairs), "evaluated": 0, "signals": 0,
+                "fetch_ms": 0.0, "fetch_max_ms": 0.0, "indicators_ms": 0.0, "indicators_max_ms": 0.0,
+                "execution_ms": 0.0, "transactions": 0}
+
+    def _fetch_stage(self, base: Asset, quote: Asset):
+        started = time.perf_counter()
+        df = self._fetch_ohlcv(base, quote)
+        return df is not None and not df.empty, (time.perf_counter() - started) * 1000
+
+    @staticmethod
+    def _pair_key(base: Asset, quote: Asset) -> str:
+        """Issuer-qualified name of a pair, for its candle buffer; ``CODE/CODE`` labels are for logs and the UI."""
+        return f"{asset_key(base)}/{asset_key(quote)}"
+
+    def _indicator_stage(self, key: str, pair: str):
+        started = time.perf_counter()
+        signal = self._generate_signal(self._apply_indicators(key), pair)
+        return signal, (time.perf_counter() - started) * 1000
+
+    def _execution_stage(self, pair: str, signal: Optional[dict], stats: dict):
+        started = time.perf_counter()
+        stats["evaluated"] += 1
+        if signal:
+            stats["signals"] += 1
+            if self.batch_orders and not self.test_mode:
+                self.logger.info(f"🔹 {signal['side']} {signal['amount']} {pair} @ {signal['price']} (queued)")
+                self.order_batcher.add(signal, self._offer_operation(signal))
+            elif self.channels and not self.test_mode:
+                # One channel per trade: the cycle's trades are in flight together, awaited by _flush_orders
+                self._pending_trades.append(self._trade_pool.submit(self.execute_trade, signal))
+            else:
+                self.execute_trade(signal)
+
+        # Notify UI
+        self.events.notify("market_update", {
+            "timestamp": datetime.now(),
+            "pair": pair,
+            "status": "RUNNING"
+        })
+        stats["execution_ms"] += (time.perf_counter() - started) * 1000
+
+    @staticmethod
+    def _add_timing(stats: dict, stage: str, ms: float):
+        stats[f"{stage}_ms"] += ms
+        stats[f"{stage}_max_ms"] = max(stats[f"{stage}_max_ms"], ms)
+
+    def _run_cycle_serial(self, pairs) -> dict:
+        """Fetch, evaluate and trade the pairs one after another."""
+        stats = self._new_cycle_stats(pairs)
+        for base, quote in pairs:
+            pair = f"{base.code}/{quote.code}"
+            try:
+                fetched, ms = self._fetch_stage(base, quote)
+                self._add_timing(stats, "fetch", ms)
+                if not fetched:
+                    continue
+                signal, ms = self._indicator_stage(self._pair_key(base, quote), pair)
+            except Exception as e:
+                self.logger.warning(f"Evaluation of {pair} failed: {e}")
+                continue
+            self._add_timing(stats, "indicators", ms)
+            self._execution_stage(pair, signal, stats)
+        self._flush_orders(stats)
+        return stats
+
+    def _run_cycle_pipelined(self, pairs, fetch_pool: ThreadPoolExecutor) -> dict:
+        """
+        Fetch every pair concurrently on ``fetch_pool``; as soon as a pair's candles arrive its indicators
+        and signal are computed on the same thread. Signals are executed on this thread one at a time,
+        in pair order, so a slow pair only delays the trades of the pairs after it, not their fetches.
+
+        Indicators run inline rather than on a pool of their own: a pair's streaming update is a few
+        candles of Python holding the GIL, so extra threads add hand-offs without parallelism, and a
+        process pool would ship every pair's indicator state to the worker and back each cycle.
+        """
+        stats = self._new_cycle_stats(pairs)
+
+        def fetch_then_evaluate(base, quote, pair):
+            fetched, fetch_ms = self._fetch_stage(base, quote)
+            if not fetched:
+                return fetch_ms, None
+            try:
+                return fetch_ms, self._indicator_stage(self._pair_key(base, quote), pair)
+            except Exception as e:  # Raised on the cycle thread, after the fetch is timed
+                return fetch_ms, e
+
+        evaluations = []
+        for base, quote in pairs:
+            pair = f"{base.code}/{quote.code}"
+            evaluations.append((pair, fetch_pool.submit(fetch_then_evaluate, base, quote, pair)))
+        for pair, future in evaluations:
+            try:
+                fetch_ms, evaluation = future.result()
+                self._add_timing(stats, "fetch", fetch_ms)
+                if evaluation is None:
+                    continue
+                if isinstance(evaluation, Exception):
+                    raise evaluation
+                signal, ms = evaluation
+            except Exception as e:
+                self.logger.warning(f"Evaluation of {pair} failed: {e}")
+                continue
+            self._add_timing(stats, "indicators", ms)
+            self._execution_stage(pair, signal, stats)
+        self._flush_orders(stats)
+        return stats
 
     # ===============================================================
     # STRATEGY
     # ===============================================================
-    def _generate_signal(self, df: pd.DataFrame, pair: str) -> Optional[dict]:
-        """Generate trading signal using MACD + RSI."""
-        last = df.iloc[-1]
+    def _generate_signal(self, last: Dict[str, float], pair: str) -> Optional[dict]:
+        """Generate trading signal using MACD + RSI from the latest close and indicator values."""
         macd, signal, rsi = last.get("MACD"), last.get("Signal"), last.get("RSI")
         if pd.isna(macd) or pd.isna(signal) or pd.isna(rsi):
             return None
@@ -190,34 +381,221 @@ class SmartBot:
     # MARKET DATA
     # ===============================================================
     def _fetch_ohlcv(self, base: Asset, quote: Asset, start_time=None, end_time=None) -> Optional[pd.DataFrame]:
+        """
+        Refresh the pair's candle buffer and return a DataFrame view over it.
+
+        Only candles from the newest stored open time onward are requested, so the still-forming
+        candle is replaced in place and closed candles are never downloaded twice. The first call for
+        a pair backfills the last 24h. Resolutions built by ``candle_rollups`` are refreshed from
+        1-minute candles, which keeps every rolled-up resolution of the pair current with one request:
+        the missing minutes are downloaded once, and the rollups read back from the archive.
+        """
         try:
+            buffer = self.candles.get(self._pair_key(base, quote), self.resolution)
             end_time = end_time or int(datetime.now().timestamp() * 1000)
-            start_time = start_time or end_time - 24 * 3600 * 1000
-            data = self.server.trade_aggregations(
-                base=base, counter=quote, start_time=start_time, end_time=end_time, resolution=self.resolution
-            ).call()
-            recs = data.get("_embedded", {}).get("records", [])
-            if not recs:
+            if start_time is None:
+                start_time = buffer.last_timestamp or end_time - 24 * 3600 * 1000
+            candles = None
+            if self.candle_rollups.derives(self.resolution):
+                minute = self.candle_rollups.base_resolution
+                last = self._last_archived(base, quote, minute)
+                bucket_start = start_time - start_time % self.resolution
+                self._download_candles(base, quote, minute, bucket_start if last is None else max(last, bucket_start),
+                                       end_time)
+                if self._last_archived(base, quote, minute) is not None:
+                    candles = self._stored_candles(base, quote, self.resolution, start_time, end_time)
+            if candles is None:  # Not rolled up locally, or no minute could be archived
+                candles = self._download_candles(base, quote, self.resolution, start_time, end_time, use_rollups=False)
+            buffer.extend(*candles)
+            if not len(buffer):
                 return pd.DataFrame()
-            df = pd.DataFrame(recs)
-            for c in ["open", "high", "low", "close"]:
-                df[c] = pd.to_numeric(df[c], errors="coerce")
-            df["timestamp"] = pd.to_datetime(df["timestamp"].astype(float) / 1000, unit="s", utc=True)
-            return df
+            return buffer.frame()
         except Exception as e:
             self.logger.warning(f"Fetch error: {e}")
             return None
 
+    def _load_history(self, base: Asset, quote: Asset, start_time: int, end_time: int,
+                      resolution: Optional[int] = None) -> CandleBuffer:
+        """
+        Load every candle of a pair between two times (ms) into a buffer of its own, at the bot's
+        resolution unless another is given. Stored candles are read from the candle archive, or from the
+        database when the archive has none for the range; only the ones after the newest stored candle
+        (which may have been stored while still forming) are downloaded, and then stored.
+        """
+        resolution = resolution or self.resolution
+        buffer = CandleBuffer(capacity=max(1, (end_time - start_time) // resolution + 1))
+        timestamps, values = self._stored_candles(base, quote, resolution, start_time, end_time)
+        if len(timestamps) and timestamps[0] > start_time:
+            # Candles older than the stored ones are requested directly; rollups only cover archived minutes
+            buffer.extend(*self._download_candles(base, quote, resolution, start_time, int(timestamps[0]),
+                                                  use_rollups=False))
+        buffer.extend(timestamps, values)
+        buffer.extend(*self._download_candles(base, quote, resolution, buffer.last_timestamp or start_time, end_time))
+        return buffer
+
+    def backfill_history(self, days: int, pairs: Optional[List[Tuple[Asset, Asset]]] = None,
+                         resolution: Optional[int] = None) -> dict:
+        """
+        Download the last ``days`` of candles of ``pairs`` (the bot's pair by default) into the candle
+        archive and database, fetching windows concurrently and skipping ranges fetched before. Progress
+        is logged; returns the CandleBackfill report.
+        """
+        resolution = resolution or self.resolution
+        if self.candle_rollups.derives(resolution):
+            resolution = self.candle_rollups.base_resolution  # Rolled up locally from the minutes
+        end_time = int(datetime.now().timestamp() * 1000)
+        report = self.candle_backfill.backfill(pairs or [(self.selling, self.buying)], resolution,
+                                               end_time - days * 24 * 3600 * 1000, end_time)
+        self.logger.info(f"Backfill done: {report['candles']} candles in {report['windows']} windows, "
+                         f"{report['failed']} failed")
+        return report
+
+    def _download_candles(self, base: Asset, quote: Asset, resolution: int, start_time: int, end_time: int,
+                          use_rollups: bool = True):
+        """
+        Download and store the candles opened in [start_time, end_time), page by page.
+
+        A resolution built by ``candle_rollups`` is not requested when the pair's 1-minute candles are
+        archived up to ``start_time``: the missing minutes are downloaded instead and the rollups read
+        back from the archive.
+        """
+        if use_rollups and self.candle_rollups.derives(resolution):
+            minute = self.candle_rollups.base_resolution
+            last = self._last_archived(base, quote, minute)
+            if last is not None and last >= start_time:
+                self._download_candles(base, quote, minute, last, end_time)
+                return self._stored_candles(base, quote, resolution, start_time, end_time)
+
+        parts = [records_to_arrays([])]
+        while start_time < end_time:
+            records = self.server.trade_aggregations(
+                base=base, counter=quote, start_time=start_time, end_time=end_time, resolution=resolution
+            ).limit(200).call().get("_embedded", {}).get("records", [])
+            timestamps, values = records_to_arrays(records)
+            self._store_candles(base, quote, resolution, timestamps, values)
+            parts.append((timestamps, values))
+            if len(records) < 200:
+                break
+            start_time = int(timestamps[-1]) + resolution
+        return np.concatenate([t for t, _ in parts]), np.concatenate([v for _, v in parts])
+
+    def _stored_candles(self, base: Asset, quote: Asset, resolution: int, start_time: int, end_time: int):
+        key = (asset_key(base), asset_key(quote), resolution, start_time, end_time)
+        try:
+            timestamps, values = self.candle_archive.read(*key)
+            if len(timestamps):
+                return timestamps, values
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Could not read the candle archive: {e}")
+        db = self._candle_db()
+        return db.get_candles(*key) if db is not None else records_to_arrays([])
+
+    def _last_archived(self, base: Asset, quote: Asset, resolution: int) -> Optional[int]:
+        try:
+            return self.candle_archive.last_timestamp(asset_key(base), asset_key(quote), resolution)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Could not read the candle archive: {e}")
+            return None
+
+    def _candle_db(self):
+        """The controller's DatabaseManager, when one is ready."""
+        db = getattr(self.controller, "db", None)
+        return db if hasattr(db, "upsert_candles") else None
+
+    def _store_candles(self, base: Asset, quote: Asset, resolution: int, timestamps, values):
+        if not len(timestamps):
+            return
+        key = (asset_key(base), asset_key(quote), resolution)
+        try:
+            changed = self.candle_archive.write_changes(*key, timestamps, values)
+            if resolution == self.candle_rollups.base_resolution:
+                self.candle_rollups.update(key[0], key[1], changed)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Could not archive candles: {e}")
+        db = self._candle_db()
+        if db is not None:
+            db.upsert_candles(*key, timestamps, values)
+
     # ===============================================================
-    # INDICATORS
+    # BACKTESTING
     # ===============================================================
-    def _apply_indicators(self, df: pd.DataFrame):
+    def backtest(self, base: Asset, quote: Asset, days: int = 5, signal_setting: Optional[dict] = None,
+                 **params) -> dict:
+        """
+        Backtest a strategy on the last ``days`` of the pair's candles at the bot's resolution.
+
+        Without ``signal_setting`` the bot's own MACD + RSI rule is replayed; otherwise the named
+        ``indicator_utility`` signal is. ``params`` configure the Backtester (initial_balance,
+        position_size, slippage_bps, ...). Fees are charged at the Horizon base fee unless given.
+        """
+        end_time = int(datetime.now().timestamp() * 1000)
+        buffer = self._load_history(base, quote, end_time - days * 24 * 3600 * 1000, end_time)
+        if not len(buffer):
+            raise ValueError(f"No candles for {base.code}/{quote.code} in the last {days} days")
+        if "base_fee" not in params:
+            params["base_fee"] = self._base_fee()
+        if "xlm_price" not in params and not base.is_native():
+            self.logger.warning("Base asset is not XLM and no xlm_price was given: fees are charged at the pair's close")
+        backtester = Backtester(**params)
+        candles = buffer.frame()
+        if signal_setting is None:
+            return backtester.run_macd_rsi(candles)
+        return backtester.run_indicator(candles, signal_setting)
+
+    def _base_fee(self) -> int:
         try:
-            df["RSI"] = RSIIndicator(df["close"], window=14).rsi()
-            macd = MACD(df["close"])
-            df["MACD"], df["Signal"] = macd.macd(), macd.macd_signal()
+            return int(self.server.fetch_base_fee())
         except Exception as e:
-            self.logger.warning(f"Indicator error: {e}")
+            self.logger.warning(f"Base fee lookup failed, using 100 stroops: {e}")
+            return 100
+
+    # ===============================================================
+    # INDICATORS
+    # ===============================================================
+    def _apply_indicators(self, key: str) -> Dict[str, float]:
+        """
+        Feed the new candles of the pair named ``key`` (see ``_pair_key``) to its streaming RSI/MACD and
+        return the latest values.
+
+        Only candles at or after the last one seen are processed, so each loop costs O(new candles)
+        instead of recomputing the indicators over the whole history.
+        """
+        indicators = self.indicators.setdefault(key, CandleIndicators())
+        buffer = self.candles.get(key, self.resolution)
+        timestamps, closes = buffer.timestamps(), buffer.column("close")
+        start = 0
+        if indicators.last_timestamp is not None:
+            start = int(timestamps.searchsorted(indicators.last_timestamp))
+        for timestamp, close in zip(timestamps[start:].tolist(), closes[start:].tolist()):
+            indicators.update(timestamp, close)
+        return indicators.latest()
+
+    def save_indicator_state(self):
+        """
+        Persist the streaming indicator state so a restart resumes without a warm-up period. Pairs are
+        saved under the issuer-qualified names ``_apply_indicators`` keys them by.
+        """
+        try:
+            state = {key: indicators.to_dict() for key, indicators in self.indicators.items()}
+            with open(self.indicator_state_path, "w") as f:
+                json.dump({"version": INDICATOR_STATE_VERSION, "resolution": self.resolution, "pairs": state}, f)
+        except (OSError, TypeError) as e:
+            self.logger.warning(f"Could not save indicator state: {e}")
+
+    def load_indicator_state(self):
+        """
+        Restore indicator state saved by ``save_indicator_state`` for the current resolution. State saved
+        in an older format (keyed by asset codes only) is ignored: the indicators warm up again.
+        """
+        if not os.path.exists(self.indicator_state_path):
+            return
+        try:
+            with open(self.indicator_state_path) as f:
+                state = json.load(f)
+            if state.get("version") == INDICATOR_STATE_VERSION and state.get("resolution") == self.resolution:
+                self.indicators = {key: CandleIndicators.from_dict(data) for key, data in state["pairs"].items()}
+        except (OSError, ValueError, KeyError) as e:
+            self.logger.warning(f"Could not load indicator state: {e}")
 
     # ===============================================================
     # EXECUTION
@@ -230,60 +608,171 @@ class SmartBot:
             self._record_trade(pair, side, amount, price, "TEST", "OK")
             return
 
-        try:
-            account = self.server.load_account(self.keypair.public_key)
+        def build(account):
             txb = TransactionBuilder(account, Network.PUBLIC_NETWORK_PASSPHRASE, base_fee=100)
-            offer = ManageSellOffer(
-                selling=self.selling, buying=self.buying, amount=str(amount), price=str(price), offer_id=0
-            )
-            tx = txb.append_operation(offer).set_timeout(30).build()
+            tx = txb.append_operation(self._offer_operation(signal)).set_timeout(30).build()
             tx.sign(self.keypair)
-            resp = self.server.submit_transaction(tx)
+            return tx
+
+        try:
+            if self.channels:
+                resp = self.channels.submit([self._offer_operation(signal)])
+            else:
+                # The sequence number is reserved locally: no load_account round trip per order
+                resp = self.sequences.submit(self.keypair.public_key, build)
             self._record_trade(pair, side, amount, price, resp.get("hash"), "SUCCESS")
         except Exception as e:
             self._record_trade(pair, side, amount, price, "N/A", "FAILED")
             self.logger.error(f"Trade failed: {e}")
 
-    def _record_trade(self, pair, side, amount, price, tx_hash, result):
-        with self._lock:
-            entry = {"pair": pair, "side": side, "amount": amount, "price": price,
-                     "hash": tx_hash, "result": result, "timestamp": datetime.now()}
-            self.trade_history = pd.concat([self.trade_history, pd.DataFrame([entry])], ignore_index=True)
+    def enable_channels(self, secrets: List[str], check_interval: float = 300.0) -> dict:
+        """
+        Submit transactions through channel accounts, so several are in flight at once: the batches of a
+        flush, or with ``batch_orders`` off, the trades of a cycle, one per channel. The channels
+        are checked (created or topped up from the trading account as needed) now and every
+        ``check_interval`` seconds. Returns the health of each channel.
+
+        Parameters:
+        - secrets (List[str]): Secret keys of the channel accounts.
+        - check_interval (float): Seconds between health checks.
+        """
+        if self.channels:
+            self.channels.stop()
+        self.channels = ChannelPool(self.server, self.sequences, self.keypair,
+                                    [Keypair.from_secret(secret) for secret in secrets],
+                                    Network.PUBLIC_NETWORK_PASSPHRASE)
+        health = self.channels.check()
+        self.channels.start(check_interval)
+        self.order_batcher.channels = self.channels
+        if self._trade_pool:
+            self._trade_pool.shutdown(wait=True)
+        self._trade_pool = ThreadPoolExecutor(len(self.channels), thread_name_prefix="SmartBotTrade")
+        self.logger.info(f"Submitting through {len(self.channels)} channel accounts")
+        return health
+
+    def _offer_operation(self, signal: dict) -> ManageSellOffer:
+        return ManageSellOffer(
+            selling=self.selling, buying=self.buying, amount=str(signal["amount"]), price=str(signal["price"]),
+            offer_id=0
+        )
+
+    def _flush_orders(self, stats: dict):
+        """
+        Wait for the trades this cycle submitted through the channels, then submit the orders it queued in
+        as few transactions as possible and record each result.
+        """
+        started = time.perf_counter()
+        trades, self._pending_trades = self._pending_trades, []
+        wait(trades)
+        if not len(self.order_batcher):
+            stats["execution_ms"] += (time.perf_counter() - started) * 1000
+            return
+        transactions = self.order_batcher.transactions
+        for result in self.order_batcher.flush():
+            order = result["order"]
+            self._record_trade(order["pair"], order["side"], order["amount"], order["price"], result["hash"] or "N/A",
+                               result["result"], result["code"])
+        stats["transactions"] = self.order_batcher.transactions - transactions
+        stats["execution_ms"] += (time.perf_counter() - started) * 1000
+
+    def _record_trade(self, pair, side, amount, price, tx_hash, result, code=None):
+        self.trade_journal.append(pair, side, amount, price, tx_hash, result, code)
+
+    @property
+    def trade_history(self) -> pd.DataFrame:
+        """The recorded trades (pair, side, amount, price, hash, result, code, timestamp)."""
+        return self.trade_journal.to_frame()
 
     # ===============================================================
     # BACKGROUND UPDATERS
     # ===============================================================
-    def _start_background_updaters(self):
-        """Start async loops to refresh all dataframes."""
-        for fn in [self._update_transactions, self._update_effects, self._update_ledger]:
-            threading.Thread(target=fn, daemon=True).start()
-
-    def _update_transactions(self):
-        while self.running:
+    @property
+    def transactions_df(self) -> pd.DataFrame:
+        return self.transactions_table.to_frame()
+
+    @property
+    def effects_df(self) -> pd.DataFrame:
+        return self.effects_table.to_frame()
+
+    @property
+    def ledger_df(self) -> pd.DataFrame:
+        return self.ledger_table.to_frame()
+
+    def _start_background_updaters(self, stopped: threading.Event):
+        """Start async loops to refresh all dataframes, until ``stopped``."""
+        self._threads = [threading.Thread(target=self._compact_candles, args=(stopped,), name="CandleCompaction",
+                                          daemon=True)]
+        self.market_data.start()
+        if self.update_mode == "stream":
+            self.streamers = [
+                HorizonStreamer("transactions", lambda: self.server.transactions().for_account(self.account_id),
+                                self.transactions_table, lambda: not stopped.is_set(), poll_interval=300,
+                                on_update=self._on_table_update),
+                HorizonStreamer("effects", lambda: self.server.effects().for_account(self.account_id),
+                                self.effects_table, lambda: not stopped.is_set(), poll_interval=600,
+                                on_update=self._on_table_update),
+                HorizonStreamer("ledgers", lambda: self.server.ledgers(),
+                                self.ledger_table, lambda: not stopped.is_set(), poll_interval=900,
+                                on_update=self._on_table_update),
+            ]
+            for streamer in self.streamers:
+                streamer.start()
+        else:
+            self._threads += [threading.Thread(target=fn, args=(stopped,), daemon=True)
+                              for fn in [self._update_transactions, self._update_effects, self._update_ledger]]
+        for thread in self._threads:
+            thread.start()
+
+    def _on_table_update(self, name: str):
+        self.events.notify(f"{name}_update", {"timestamp": datetime.now()})
+
+    def _poll_table(self, table: RecordTable, builder, limit: int):
+        """Append the records newer than the table cursor, or the latest page if the table is empty."""
+        if table.cursor:
+            res = builder.cursor(table.cursor).order(desc=False).limit(200).call()
+            table.extend(res["_embedded"]["records"])
+        else:
+            res = builder.order(desc=True).limit(limit).call()
+            table.extend(reversed(res["_embedded"]["records"]))
+
+    def _update_transactions(self, stopped: threading.Event):
+        while not stopped.is_set():
             try:
-                res = self.server.transactions().for_account(self.account_id).order(desc=True).limit(100).call()
-                self.transactions_df = pd.DataFrame(res["_embedded"]["records"])
+                self._poll_table(self.transactions_table, self.server.transactions().for_account(self.account_id), 100)
             except Exception as e:
                 self.logger.warning(f"Transaction update failed: {e}")
-            time.sleep(300)
+            stopped.wait(300)
 
-    def _update_effects(self):
-        while self.running:
+    def _update_effects(self, stopped: threading.Event):
+        while not stopped.is_set():
             try:
-                res = self.server.effects().for_account(self.account_id).order(desc=True).limit(100).call()
-                self.effects_df = pd.DataFrame(res["_embedded"]["records"])
+                self._poll_table(self.effects_table, self.server.effects().for_account(self.account_id), 100)
             except Exception as e:
                 self.logger.warning(f"Effects update failed: {e}")
-            time.sleep(600)
+            stopped.wait(600)
+
+    def _compact_candles(self, stopped: threading.Event):
+        """Apply the candle retention rules to the archive and the database, hourly."""
+        while not stopped.is_set():
+            try:
+                self.candle_rollups.compact()
+                db = self._candle_db()
+                if db is not None:
+                    now = int(time.time() * 1000)
+                    for resolution, kept in self.candle_rollups.retention.items():
+                        if kept is not None:
+                            db.delete_candles(resolution, now - kept)
+            except Exception as e:
+                self.logger.warning(f"Candle compaction failed: {e}")
+            stopped.wait(3600)
 
-    def _update_ledger(self):
-        while self.running:
+    def _update_ledger(self, stopped: threading.Event):
+        while not stopped.is_set():
             try:
-                res = self.server.ledgers().order(desc=True).limit(50).call()
-                self.ledger_df = pd.DataFrame(res["_embedded"]["records"])
+                self._poll_table(self.ledger_table, self.server.ledgers(), 50)
             except Exception as e:
                 self.logger.warning(f"Ledger update failed: {e}")
-            time.sleep(900)
+            stopped.wait(900)
 
     # ===============================================================
     # HELPERS
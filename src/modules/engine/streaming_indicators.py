@@ -0,0 +1,233 @@
+import math
+from typing import Dict, Optional
+
+NAN = float("nan")
+
+
+class StreamingIndicator:
+    """
+    Base class for indicators updated in constant time per candle.
+
+    ``update(..., revise=False)`` consumes a new candle. ``update(..., revise=True)`` replaces the value of
+    the last candle (the still-forming one): the state captured before that candle is restored and the
+    new value applied, so revisions never drift. State is made of plain floats and ints, which keeps
+    ``to_dict``/``from_dict`` JSON friendly for warm restarts.
+    """
+
+    _params = ()  # Constructor arguments, in order
+    _fields = ()  # Scalar state attributes
+    _children = ()  # Nested StreamingIndicator attributes
+
+    def __init__(self):
+        self._snapshot = None
+
+    def update(self, *values, revise: bool = False):
+        if revise and self._snapshot is not None:
+            self._restore(self._snapshot)
+        else:
+            self._snapshot = self._capture()
+        return self._step(*values)
+
+    def _step(self, *values):
+        raise NotImplementedError
+
+    def _capture(self) -> dict:
+        state = {field: getattr(self, field) for field in self._fields}
+        for child in self._children:
+            state[child] = getattr(self, child)._capture()
+        return state
+
+    def _restore(self, state: dict):
+        for field in self._fields:
+            setattr(self, field, state[field])
+        for child in self._children:
+            getattr(self, child)._restore(state[child])
+
+    def to_dict(self) -> dict:
+        """Serialize the indicator parameters and state."""
+        return {
+            "params": [getattr(self, param) for param in self._params],
+            "state": self._capture(),
+            "snapshot": self._snapshot,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        """Rebuild an indicator from ``to_dict`` output."""
+        indicator = cls(*data["params"])
+        indicator._restore(data["state"])
+        indicator._snapshot = data["snapshot"]
+        return indicator
+
+
+class StreamingEMA(StreamingIndicator):
+    """
+    Exponential moving average, equal to ``Series.ewm(span=window, adjust=False, min_periods=window)``
+    (or ``alpha=1/window`` when ``wilder`` is set). Leading NaN inputs are skipped like pandas does.
+    """
+
+    _params = ("window", "wilder")
+    _fields = ("value", "count")
+
+    def __init__(self, window: int, wilder: bool = False):
+        super().__init__()
+        self.window = window
+        self.wilder = wilder
+        self.alpha = 1.0 / window if wilder else 2.0 / (window + 1)
+        self.value = NAN
+        self.count = 0
+
+    def _step(self, x: float) -> float:
+        if math.isnan(x):
+            return self.current
+        self.value = x if self.count == 0 else self.value + self.alpha * (x - self.value)
+        self.count += 1
+        return self.current
+
+    @property
+    def current(self) -> float:
+        return self.value if self.count >= self.window else NAN
+
+
+class StreamingRSI(StreamingIndicator):
+    """Wilder RSI, equal to ``ta.momentum.RSIIndicator(close, window).rsi()``."""
+
+    _params = ("window",)
+    _fields = ("prev_close",)
+    _children = ("avg_gain", "avg_loss")
+
+    def __init__(self, window: int = 14):
+        super().__init__()
+        self.window = window
+        self.prev_close = NAN
+        self.avg_gain = StreamingEMA(window, wilder=True)
+        self.avg_loss = StreamingEMA(window, wilder=True)
+
+    def _step(self, close: float) -> float:
+        diff = close - self.prev_close
+        self.prev_close = close
+        self.avg_gain._step(diff if diff > 0 else 0.0)
+        self.avg_loss._step(-diff if diff < 0 else 0.0)
+        return self.current
+
+    @property
+    def current(self) -> float:
+        gain, loss = self.avg_gain.current, self.avg_loss.current
+        if math.isnan(loss):
+            return NAN
+        if loss == 0:
+            return 100.0
+        return 100.0 - 100.0 / (1.0 + gain / loss)
+
+
+class StreamingMACD(StreamingIndicator):
+    """MACD line, signal line and histogram, equal to ``ta.trend.MACD(close, slow, fast, sign)``."""
+
+    _params = ("window_slow", "window_fast", "window_sign")
+    _children = ("ema_fast", "ema_slow", "ema_signal")
+
+    def __init__(self, window_slow: int = 26, window_fast: int = 12, window_sign: int = 9):
+        super().__init__()
+        self.window_slow = window_slow
+        self.window_fast = window_fast
+        self.window_sign = window_sign
+        self.ema_fast = StreamingEMA(window_fast)
+        self.ema_slow = StreamingEMA(window_slow)
+        self.ema_signal = StreamingEMA(window_sign)
+
+    def _step(self, close: float):
+        self.ema_fast._step(close)
+        self.ema_slow._step(close)
+        self.ema_signal._step(self.macd)
+        return self.macd, self.signal
+
+    @property
+    def macd(self) -> float:
+        return self.ema_fast.current - self.ema_slow.current
+
+    @property
+    def signal(self) -> float:
+        return self.ema_signal.current
+
+    @property
+    def histogram(self) -> float:
+        return self.macd - self.signal
+
+
+class StreamingATR(StreamingIndicator):
+    """
+    Wilder average true range, equal to ``ta.volatility.AverageTrueRange(high, low, close, window)``:
+    0 until ``window`` candles are seen, then seeded with their mean true range.
+    """
+
+    _params = ("window",)
+    _fields = ("prev_close", "tr_sum", "value", "count")
+
+    def __init__(self, window: int = 14):
+        super().__init__()
+        self.window = window
+        self.prev_close = NAN
+        self.tr_sum = 0.0
+        self.value = 0.0
+        self.count = 0
+
+    def _step(self, high: float, low: float, close: float) -> float:
+        true_range = high - low
+        if not math.isnan(self.prev_close):
+            true_range = max(true_range, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+        self.count += 1
+        if self.count < self.window:
+            self.tr_sum += true_range
+        elif self.count == self.window:
+            self.value = (self.tr_sum + true_range) / self.window
+        else:
+            self.value = (self.value * (self.window - 1) + true_range) / self.window
+        return self.value
+
+    @property
+    def current(self) -> float:
+        return self.value
+
+
+class CandleIndicators:
+    """
+    The streaming indicators SmartBot's strategy needs for one pair, fed from its candle buffer.
+
+    ``update`` is called with each candle in time order; a candle with the same open time as the last
+    one is treated as a revision of the still-forming candle and older candles are ignored.
+    """
+
+    def __init__(self, rsi_window: int = 14, macd_slow: int = 26, macd_fast: int = 12, macd_sign: int = 9):
+        self.rsi = StreamingRSI(rsi_window)
+        self.macd = StreamingMACD(macd_slow, macd_fast, macd_sign)
+        self.last_timestamp: Optional[int] = None
+        self.close = NAN
+
+    def update(self, timestamp: int, close: float) -> bool:
+        """Feed one candle. Returns False when the candle is older than the last one seen."""
+        if self.last_timestamp is not None and timestamp < self.last_timestamp:
+            return False
+        revise = timestamp == self.last_timestamp
+        self.rsi.update(close, revise=revise)
+        self.macd.update(close, revise=revise)
+        self.last_timestamp = timestamp
+        self.close = close
+        return True
+
+    def latest(self) -> Dict[str, float]:
+        """Latest values under the column names used by ``SmartBot._generate_signal``."""
+        return {"close": self.close, "RSI": self.rsi.current, "MACD": self.macd.macd, "Signal": self.macd.signal}
+
+    def to_dict(self) -> dict:
+        return {"rsi": self.rsi.to_dict(), "macd": self.macd.to_dict(),
+                "last_timestamp": self.last_timestamp, "close": self.close}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CandleIndicators":
+        indicators = cls()
+        indicators.rsi = StreamingRSI.from_dict(data["rsi"])
+        indicators.macd = StreamingMACD.from_dict(data["macd"])
+        indicators.last_timestamp = data["last_timestamp"]
+        indicators.close = data["close"]
+        return indicators
@@ -0,0 +1,109 @@
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.modules.engine.candle_store import CANDLE_COLUMNS, CandleBuffer
+from src.modules.engine.horizon_stream import paging_token_key
+from src.modules.engine.time_frames import TimeFrame
+
+_OPEN, _HIGH, _LOW, _CLOSE = (CANDLE_COLUMNS.index(name) for name in ("open", "high", "low", "close"))
+_VOLUMES = [CANDLE_COLUMNS.index("base_volume"), CANDLE_COLUMNS.index("counter_volume")]
+
+
+def trades_to_arrays(records) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Horizon trade records as (close times in ms, prices, base amounts, counter amounts)."""
+    times = pd.to_datetime([record["ledger_close_time"] for record in records], utc=True)
+    times = np.asarray((times - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(milliseconds=1), dtype=np.int64)
+    base = np.array([float(record["base_amount"]) for record in records], dtype=np.float64)
+    counter = np.array([float(record["counter_amount"]) for record in records], dtype=np.float64)
+    prices = np.array([float(record["price"]["n"]) / float(record["price"]["d"]) if record.get("price")
+                       else float(record["counter_amount"]) / float(record["base_amount"]) for record in records],
+                      dtype=np.float64)
+    return times, prices, base, counter
+
+
+class TradeAggregator:
+    """
+    Builds OHLCV bars of several resolutions at once from a pair's trade stream.
+
+    Trades are consumed incrementally by paging_token: like a RecordTable, the aggregator exposes
+    ``cursor``, ``append`` and ``extend``, skips trades at or before its cursor, and can be fed by a
+    HorizonStreamer. Each batch of trades is reduced to bars per resolution with array operations and
+    merged into the forming bar, so the cost of a refresh is proportional to the new trades, not to the
+    history. Bars are kept in one CandleBuffer per resolution; prices are base/counter trade prices and
+    volumes are the summed base and counter amounts.
+
+    Parameters:
+    - resolutions (Iterable[int]): Bar lengths in ms.
+    - capacity (int): Bars kept per resolution.
+    """
+
+    def __init__(self, resolutions: Iterable[int] = (TimeFrame.ONE_MINUTE.value, TimeFrame.FIVE_MINUTES.value,
+                                                     TimeFrame.FIFTEEN_MINUTES.value, TimeFrame.HOUR.value),
+                 capacity: int = 2000):
+        self.buffers: Dict[int, CandleBuffer] = {int(r): CandleBuffer(capacity) for r in resolutions}
+        self._last_token: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def cursor(self) -> Optional[str]:
+        """The paging_token of the newest trade aggregated, used to resume streams and polls."""
+        return self._last_token
+
+    def append(self, record: dict) -> bool:
+        """Aggregate one trade if it is newer than the cursor. Returns True when it was used."""
+        return self.extend([record]) == 1
+
+    def extend(self, records: Iterable[dict]) -> int:
+        """Aggregate the trades newer than the cursor, in any order. Returns how many were used."""
+        with self._lock:
+            last = paging_token_key(self._last_token) if self._last_token is not None else None
+            keyed = [(paging_token_key(record.get("paging_token")), record) for record in records]
+            new = sorted((item for item in keyed if item[0] is not None and (last is None or item[0] > last)),
+                         key=lambda item: item[0])
+            if not new:
+                return 0
+            self._last_token = new[-1][1]["paging_token"]
+            self.add_trades(*trades_to_arrays([record for _, record in new]))
+            return len(new)
+
+    def add_trades(self, times, prices, base_amounts, counter_amounts):
+        """Aggregate trades given as arrays, in time order. Trades before a resolution's forming bar are ignored."""
+        times = np.asarray(times, dtype=np.int64)
+        prices = np.asarray(prices, dtype=np.float64)
+        volumes = np.column_stack([np.asarray(base_amounts, dtype=np.float64),
+                                   np.asarray(counter_amounts, dtype=np.float64)])
+        for resolution, buffer in self.buffers.items():
+            buckets = times - times % resolution
+            last = buffer.last_timestamp
+            keep = slice(None) if last is None else buckets >= last
+            bucket_times, bars = self._bars(buckets[keep], prices[keep], volumes[keep])
+            if not len(bars):
+                continue
+            if bucket_times[0] == last:
+                forming = buffer.values()[-1]
+                bars[0, _OPEN] = forming[_OPEN]
+                bars[0, _HIGH] = max(bars[0, _HIGH], forming[_HIGH])
+                bars[0, _LOW] = min(bars[0, _LOW], forming[_LOW])
+                bars[0, _VOLUMES] += forming[_VOLUMES]
+            buffer.extend(bucket_times, bars)
+
+    @staticmethod
+    def _bars(buckets, prices, volumes):
+        if not len(buckets):
+            return buckets, np.empty((0, len(CANDLE_COLUMNS)))
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        ends = np.r_[starts[1:], len(buckets)] - 1
+        bars = np.empty((len(starts), len(CANDLE_COLUMNS)))
+        bars[:, _OPEN] = prices[starts]
+        bars[:, _HIGH] = np.maximum.reduceat(prices, starts)
+        bars[:, _LOW] = np.minimum.reduceat(prices, starts)
+        bars[:, _CLOSE] = prices[ends]
+        bars[:, _VOLUMES] = np.add.reduceat(volumes, starts, axis=0)
+        return buckets[starts], bars
+
+    def frame(self, resolution: int) -> pd.DataFrame:
+        """The bars of a resolution, in the CandleBuffer.frame layout."""
+        return self.buffers[int(resolution)].frame()
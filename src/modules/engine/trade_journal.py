@@ -0,0 +1,166 @@
+"""
+Append-only journal of the bot's trades, kept in growable columns and persisted to SQLite.
+
+Each field is a preallocated NumPy column (float64 amounts and prices, datetime64 timestamps, object
+arrays for the strings). An append writes one slot per column; when the columns are full their capacity
+doubles, so appends are amortized O(1) instead of the O(n) copy of concatenating DataFrames. The
+DataFrame view is built from the filled slices only when trades were added since the last call.
+
+A background thread writes the trades appended since the last flush to a SQLite file every
+``flush_interval`` seconds, in one transaction; the journal is read back from it when reopened, so the
+trade history survives restarts.
+"""
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.modules.engine.db_manager import PRAGMAS
+
+TEXT_COLUMNS = ("pair", "side", "hash", "result", "code")
+# Columns of the DataFrame view, in order
+COLUMNS = ("pair", "side", "amount", "price", "hash", "result", "code", "timestamp")
+
+
+class TradeJournal:
+    """
+    Trade history of the bot; see the module docstring.
+
+    Parameters:
+    - path (str): SQLite file the journal is persisted to, or None to keep it in memory only.
+    - capacity (int): Initial number of rows allocated.
+    - flush_interval (float): Seconds between background flushes.
+    """
+
+    def __init__(self, path: Optional[str] = "trade_journal.db", capacity: int = 1024, flush_interval: float = 5.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.logger = logging.getLogger(__name__)
+        self._columns = self._allocate(max(capacity, 1))
+        self._size = 0
+        self._flushed = 0  # Rows already in the database
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._version = 0
+        self._frame = pd.DataFrame(columns=list(COLUMNS))
+        self._frame_version = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if path:
+            self._load()
+            self._thread = threading.Thread(target=self._flush_loop, name="TradeJournal", daemon=True)
+            self._thread.start()
+
+    def __len__(self):
+        return self._size
+
+    @staticmethod
+    def _allocate(capacity: int) -> dict:
+        columns = {name: np.empty(capacity, dtype=object) for name in TEXT_COLUMNS}
+        columns["amount"] = np.zeros(capacity, dtype=np.float64)
+        columns["price"] = np.zeros(capacity, dtype=np.float64)
+        columns["timestamp"] = np.zeros(capacity, dtype="datetime64[ns]")
+        return columns
+
+    def _grow(self, capacity: int):
+        columns = self._allocate(capacity)
+        for name, column in self._columns.items():
+            columns[name][:self._size] = column[:self._size]
+        self._columns = columns
+
+    def append(self, pair, side, amount, price, tx_hash, result, code=None, timestamp: Optional[datetime] = None) -> int:
+        """Record a trade and return its row number."""
+        timestamp = np.datetime64(timestamp or datetime.now(), "ns")
+        with self._lock:
+            if self._size == len(self._columns["amount"]):
+                self._grow(2 * self._size)
+            row = self._size
+            values = {"pair": pair, "side": side, "amount": float(amount), "price": float(price), "hash": tx_hash,
+                      "result": result, "code": code, "timestamp": timestamp}
+            for name, value in values.items():
+                self._columns[name][row] = value
+            self._size += 1
+            self._version += 1
+            return row
+
+    def to_frame(self) -> pd.DataFrame:
+        """The trades as a DataFrame, rebuilt only when trades were added since the last call."""
+        with self._lock:
+            if self._frame_version != self._version:
+                self._frame = pd.DataFrame({name: self._columns[name][:self._size] for name in COLUMNS})
+                self._frame_version = self._version
+            return self._frame
+
+    # ===============================================================
+    # PERSISTENCE
+    # ===============================================================
+    def _connect(self):
+        db = sqlite3.connect(self.path)
+        for pragma in PRAGMAS:
+            db.execute(pragma)
+        db.execute('''
+            CREATE TABLE IF NOT EXISTS trades (
+                id INTEGER PRIMARY KEY,
+                pair TEXT, side TEXT, amount REAL, price REAL, hash TEXT, result TEXT, code TEXT,
+                timestamp INTEGER NOT NULL
+            )
+        ''')
+        return db
+
+    def _load(self):
+        db = self._connect()
+        try:
+            rows = db.execute(f"SELECT {', '.join(COLUMNS)} FROM trades ORDER BY id").fetchall()
+        finally:
+            db.close()
+        if not rows:
+            return
+        if len(rows) > len(self._columns["amount"]):
+            self._grow(2 * len(rows))
+        for name, values in zip(COLUMNS, zip(*rows)):
+            if name == "timestamp":
+                self._columns[name][:len(rows)] = np.array(values, dtype=np.int64).view("datetime64[ns]")
+            else:
+                self._columns[name][:len(rows)] = values
+        self._size = self._flushed = len(rows)
+        self._version += 1
+
+    def flush(self) -> int:
+        """Write the trades appended since the last flush to the database; returns how many were written."""
+        if not self.path:
+            return 0
+        with self._flush_lock:
+            with self._lock:
+                start, end = self._flushed, self._size
+                columns = {name: column[start:end].copy() for name, column in self._columns.items()}
+            if end == start:
+                return 0
+            columns["timestamp"] = columns["timestamp"].view(np.int64)
+            rows = list(zip(range(start, end), *(columns[name].tolist() for name in COLUMNS)))
+            db = self._connect()
+            try:
+                with db:
+                    db.executemany(f"INSERT OR REPLACE INTO trades (id, {', '.join(COLUMNS)}) "
+                                   f"VALUES ({', '.join('?' * (len(COLUMNS) + 1))})", rows)
+            finally:
+                db.close()
+            self._flushed = end
+            return end - start
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                self.logger.error(f"Could not write the trade journal: {e}")
+
+    def close(self):
+        """Stop the background flushes and write what is left."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self.flush()
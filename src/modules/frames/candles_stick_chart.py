@@ -8,6 +8,10 @@ from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 from stellar_sdk import Server, Asset, TransactionBuilder, Network
 
+from src.modules.engine.market_data_hub import MarketDataHub
+from src.modules.engine.rate_limiter import RateLimitedClient
+from src.modules.engine.time_frames import TimeFrame
+
 
 class DexTradingChart(QFrame):
     """📈 Stellar DEX chart with EMA/SMA, order-book heatmap & Buy/Sell buttons."""
@@ -16,12 +20,17 @@ class DexTradingChart(QFrame):
         super().__init__(parent)
         self.controller = controller
         self.bot = getattr(controller, "bot", None)
-        self.server = getattr(self.bot, "server", Server("https://horizon.stellar.org"))
+        self.server = getattr(self.bot, "server", None) or Server("https://horizon.stellar.org",
+                                                                           client=RateLimitedClient())
 
         # Assets
         self.base_asset = Asset.native()  # XLM
         self.counter_asset = Asset("USDC", "GDMTVHLWJTHSUDMZVVMXXH6VJHA2ZV3HNG5LYNAZ6RTWB7GISM6PGTUV")
 
+        # Trades and order book come from the bot's shared market-data hub; bars are built incrementally
+        # from the pair's trades, from the last paging_token seen
+        self.market_data = getattr(self.bot, "market_data", None) or MarketDataHub(self.server)
+        self.resolution = TimeFrame.FIVE_MINUTES.value
 
         # Chart setup
         self.df = pd.DataFrame()
@@ -30,6 +39,13 @@ class DexTradingChart(QFrame):
         self.ax = self.fig.add_subplot(1, 1, 1)
         self.fig.subplots_adjust(bottom=0.2)
 
+        # The hub polls both resources off the GUI thread; the frame only reads its cache
+        self._trades_resource = self.market_data.trades(self.base_asset, self.counter_asset)
+        self._orderbook_resource = self.market_data.orderbook(self.base_asset, self.counter_asset)
+        for name in (self._trades_resource, self._orderbook_resource):
+            self.market_data.subscribe(name, self._on_market_fetched)
+        self._plotted_version = None
+
         # UI
         self._init_ui()
         self._refresh_data()
@@ -84,37 +100,32 @@ class DexTradingChart(QFrame):
     def _setup_timer(self):
         self.timer = QTimer(self)
         self.timer.timeout.connect(self._refresh_data)
-        self.timer.start(30000)  # 30s
+        self.timer.start(2000)  # Reads the hub's cache; the hub fetches trades every 30s
 
     # ------------------------------------------------------------------
     # 📊 Fetch Trades + Orderbook
     # ------------------------------------------------------------------
+    def _on_market_fetched(self, name, value):
+        # Runs on the hub's poller thread: the chart is redrawn by the refresh timer
+        pass
+
     def _refresh_data(self):
         try:
-            self.status_label.setText("Fetching market data...")
-            trades_call = (
-                self.server.trades()
-                .for_asset_pair(self.base_asset, self.counter_asset)
-                .order(desc=True)
-                .limit(200)
-                .call()
-            )
-            records = trades_call.get("_embedded", {}).get("records", [])
-            if not records:
+            version = tuple(self.market_data.resources[name].fetch_count
+                            for name in (self._trades_resource, self._orderbook_resource))
+            if version == self._plotted_version:
+                return
+            aggregator = self.market_data.cached(self._trades_resource)
+            if aggregator is None:
+                self.status_label.setText("Fetching market data...")
+                return
+            self._plotted_version = version
+            bars = aggregator.frame(self.resolution)
+            if bars.empty:
                 self.status_label.setText("⚠️ No trades available.")
                 return
-            data = []
-            for r in records:
-                ts = pd.to_datetime(r["ledger_close_time"])
-                price = float(r["price"]["n"]) / float(r["price"]["d"])
-                amount = float(r["base_amount"])
-                data.append([ts, price, amount])
-
-            df = pd.DataFrame(data, columns=["Date", "Price", "Volume"])
-            df = df.set_index("Date").sort_index()
-            ohlc = df["Price"].resample("5T").ohlc()
-            ohlc["Volume"] = df["Volume"].resample("5T").sum()
-            ohlc.dropna(inplace=True)
+            ohlc = bars.set_index("timestamp")[["open", "high", "low", "close", "base_volume"]]
+            ohlc = ohlc.rename(columns={"base_volume": "Volume"})
 
             # Indicators
             ohlc["EMA20"] = ohlc["close"].ewm(span=20).mean()
@@ -148,20 +159,14 @@ class DexTradingChart(QFrame):
 
         # Add order-book heatmap
         try:
-            book = self.server.orderbook(self.base_asset, self.counter_asset).call()
-            bids = pd.DataFrame(book.get("bids", []))
-            asks = pd.DataFrame(book.get("asks", []))
-            if not bids.empty:
-                bids["price"] = bids["price"].astype(float)
-                bids["amount"] = bids["amount"].astype(float)
+            book = self.market_data.cached(self._orderbook_resource)
+            if book is not None and book.n_bids:
                 self.ax.fill_between(
-                    bids["price"], 0, bids["amount"], color="green", alpha=0.15, label="Bids"
+                    book.price[book.bids], 0, book.amount[book.bids], color="green", alpha=0.15, label="Bids"
                 )
-            if not asks.empty:
-                asks["price"] = asks["price"].astype(float)
-                asks["amount"] = asks["amount"].astype(float)
+            if book is not None and len(book) > book.n_bids:
                 self.ax.fill_between(
-                    asks["price"], 0, asks["amount"], color="red", alpha=0.15, label="Asks"
+                    book.price[book.asks], 0, book.amount[book.asks], color="red", alpha=0.15, label="Asks"
                 )
         except Exception as e:
             print(f"[OrderBook] Error: {e}")
@@ -187,33 +192,35 @@ class DexTradingChart(QFrame):
             amount = str(amount)
             price = str(price)
 
-            account = self.server.load_account(self.bot.keypair.public_key)
-            tx_builder = (
-                TransactionBuilder(
-                    source_account=account,
-                    network_passphrase=Network.PUBLIC_NETWORK_PASSPHRASE,
-                    base_fee=100
-                )
-            )
-
-            if side == "buy":
-                tx_builder.append_manage_buy_offer_op(
-                    selling=self.counter_asset,  # buy XLM using USDC
-                    buying=self.base_asset,
-                    amount=amount,
-                    price=price,
-                )
-            else:
-                tx_builder.append_manage_sell_offer_op(
-                    selling=self.base_asset,  # sell XLM for USDC
-                    buying=self.counter_asset,
-                    amount=amount,
-                    price=price,
+            def build(account):
+                tx_builder = (
+                    TransactionBuilder(
+                        source_account=account,
+                        network_passphrase=Network.PUBLIC_NETWORK_PASSPHRASE,
+                        base_fee=100
+                    )
                 )
 
-            tx = tx_builder.set_timeout(30).build()
-            tx.sign(self.bot.keypair)
-            resp = self.server.submit_transaction(tx)
+                if side == "buy":
+                    tx_builder.append_manage_buy_offer_op(
+                        selling=self.counter_asset,  # buy XLM using USDC
+                        buying=self.base_asset,
+                        amount=amount,
+                        price=price,
+                    )
+                else:
+                    tx_builder.append_manage_sell_offer_op(
+                        selling=self.base_asset,  # sell XLM for USDC
+                        buying=self.counter_asset,
+                        amount=amount,
+                        price=price,
+                    )
+
+                tx = tx_builder.set_timeout(30).build()
+                tx.sign(self.bot.keypair)
+                return tx
+
+            resp = self.bot.sequences.submit(self.bot.keypair.public_key, build)
 
             QMessageBox.information(self, "Success", f"✅ Trade submitted.\nHash: {resp.get('hash')}")
             self._refresh_data()
@@ -64,15 +64,14 @@ class EffectsFrame(QFrame):
     # 🧮 POPULATE TABLE
     # ------------------------------------------------------------------
     def _populate_effects_table(self):
-        """Fill the table with data from bot.effects_df or Horizon API."""
+        """Fill the table with data from bot.effects_df."""
         try:
             # Load data
+            # Kept current by the bot's effects stream; no request of its own
             df = getattr(self.bot, "effects_df", None)
-            if df is None or df.empty:
-                # Fallback: fetch directly
-                res = self.server.effects().for_account(self.bot.account_id).order(desc=True).limit(50).call()
-                df = pd.DataFrame(res.get("_embedded", {}).get("records", []))
-                self.effects_df = df
+            if df is None:
+                df = pd.DataFrame()
+            self.effects_df = df
 
             self.effects_table.setRowCount(0)
 
@@ -141,23 +141,27 @@ class MarketAssetsFrame(QFrame):
     def _toggle_trustline(self, code: str, issuer: str, trusted: bool):
         """Add or remove a trustline for an asset."""
         try:
-            account = self.server.load_account(self.keypair.public_key)
             asset = Asset(code, issuer)
-            builder = TransactionBuilder(
-                source_account=account,
-                network_passphrase=Network.PUBLIC_NETWORK_PASSPHRASE,
-                base_fee=100,
-            )
             if trusted:
                 self._set_status(f"🧹 Removing trustline for {code}...")
-                builder.append_change_trust_op(asset=asset, limit="0")
             else:
                 self._set_status(f"🤝 Trusting asset {code}...")
-                builder.append_change_trust_op(asset=asset)
 
-            tx = builder.set_timeout(30).build()
-            tx.sign(self.keypair)
-            resp = self.server.submit_transaction(tx)
+            def build(account):
+                builder = TransactionBuilder(
+                    source_account=account,
+                    network_passphrase=Network.PUBLIC_NETWORK_PASSPHRASE,
+                    base_fee=100,
+                )
+                if trusted:
+                    builder.append_change_trust_op(asset=asset, limit="0")
+                else:
+                    builder.append_change_trust_op(asset=asset)
+                tx = builder.set_timeout(30).build()
+                tx.sign(self.keypair)
+                return tx
+
+            resp = self.bot.sequences.submit(self.keypair.public_key, build)
             hash_ = resp.get("hash", "N/A")
 
             QMessageBox.information(self, "Trustline Updated", f"✅ Success!\nTX Hash: {hash_}")
@@ -17,12 +17,13 @@ class OrderBookFrame(QFrame):
         self.controller = controller
         self.bot = getattr(controller, "bot", None)
         self.server = getattr(self.bot, "server", None)
+        self.market_data = getattr(self.bot, "market_data", None)
 
         # Default pair: XLM/USDC
         self.selling_asset = Asset.native()
         self.buying_asset = Asset("USDC", "GDMTVHLWJTHSUDMZVVMXXH6VJHA2ZV3HNG5LYNAZ6RTWB7GISM6PGTUV")
 
-        self.orderbook_data = {}
+        self.orderbook_data = None
         self._init_ui()
         self._load_pairs()
         self._fetch_orderbook()
@@ -108,30 +109,48 @@ class OrderBookFrame(QFrame):
             self.buying_asset = (
                 Asset.native() if quote == "XLM" else Asset(quote, "GDMTVHLWJTHSUDMZVVMXXH6VJHA2ZV3HNG5LYNAZ6RTWB7GISM6PGTUV")
             )
+            self._watch_orderbook()
             self._fetch_orderbook()
         except Exception as e:
             self._set_status(f"Error selecting pair: {e}")
 
+    def _watch_orderbook(self):
+        """Keep the selected pair's orderbook polled by the hub, off the GUI thread."""
+        if getattr(self, "_orderbook_resource", None):
+            self.market_data.unsubscribe(self._orderbook_resource, self._on_orderbook_fetched)
+        self._orderbook_resource = self.market_data.orderbook(self.selling_asset, self.buying_asset)
+        self.market_data.subscribe(self._orderbook_resource, self._on_orderbook_fetched)
+
+    def _on_orderbook_fetched(self, name, book):
+        # Runs on the hub's poller thread: the tables are updated by the refresh timer
+        pass
+
     # ------------------------------------------------------------------
     # 🧾 FETCH ORDERBOOK
     # ------------------------------------------------------------------
     def _fetch_orderbook(self):
-        """Fetch orderbook from Horizon and update tables."""
+        """
+        Show the orderbook last fetched by the shared market-data hub (polled every 15s) in the tables.
+        Only reads the hub's cache, so it is cheap to call often; the tables are redrawn on a new fetch.
+        """
         try:
-            self._set_status("⏳ Fetching orderbook...")
-            data = self.server.orderbook(selling=self.selling_asset, buying=self.buying_asset).limit(20).call()
-            self.orderbook_data = data
-
-            bids = data.get("bids", [])
-            asks = data.get("asks", [])
-            self._populate_table(self.bids_table, bids, is_bid=True)
-            self._populate_table(self.asks_table, asks, is_bid=False)
-
-            if bids and asks:
-                best_bid = float(bids[0]["price"])
-                best_ask = float(asks[0]["price"])
-                spread = ((best_ask - best_bid) / best_bid) * 100
-                self.spread_label.setText(f"Spread: {spread:.2f}% | Best Bid: {best_bid:.5f} | Best Ask: {best_ask:.5f}")
+            if not getattr(self, "_orderbook_resource", None):
+                self._watch_orderbook()
+            book = self.market_data.cached(self._orderbook_resource)
+            if book is None:
+                self._set_status("⏳ Fetching orderbook...")
+                return
+            if book is self.orderbook_data:
+                return
+            self.orderbook_data = book
+
+            self._populate_table(self.bids_table, book, book.bids, is_bid=True)
+            self._populate_table(self.asks_table, book, book.asks, is_bid=False)
+
+            spread = book.spread_pct()
+            if spread is not None:
+                self.spread_label.setText(
+                    f"Spread: {spread:.2f}% | Best Bid: {book.best_bid:.5f} | Best Ask: {book.best_ask:.5f}")
             else:
                 self.spread_label.setText("Spread: --")
 
@@ -142,24 +161,15 @@ class OrderBookFrame(QFrame):
     # ------------------------------------------------------------------
     # 🪶 POPULATE TABLE
     # ------------------------------------------------------------------
-    def _populate_table(self, table, entries, is_bid=False):
-        table.setRowCount(len(entries))
-        total_accum = 0
-        for i, e in enumerate(entries):
-            try:
-                price = float(e["price"])
-                amount = float(e["amount"])
-                total_accum += amount
-                table.setItem(i, 0, QTableWidgetItem(f"{price:.5f}"))
-                table.setItem(i, 1, QTableWidgetItem(f"{amount:,.2f}"))
-                table.setItem(i, 2, QTableWidgetItem(f"{total_accum:,.2f}"))
-
-                # Color styling
-                color = QColor("#4CAF50") if is_bid else QColor("#F44336")
-                for c in range(3):
-                    table.item(i, c).setForeground(QBrush(color))
-            except Exception as err:
-                print(f"[OrderBookFrame] Row error: {err}")
+    def _populate_table(self, table, book, rows: slice, is_bid=False):
+        prices, amounts, depths = book.price[rows], book.amount[rows], book.depth[rows]
+        table.setRowCount(len(prices))
+        color = QColor("#4CAF50") if is_bid else QColor("#F44336")
+        for i, (price, amount, depth) in enumerate(zip(prices.tolist(), amounts.tolist(), depths.tolist())):
+            for c, text in enumerate((f"{price:.5f}", f"{amount:,.2f}", f"{depth:,.2f}")):
+                item = QTableWidgetItem(text)
+                item.setForeground(QBrush(color))
+                table.setItem(i, c, item)
 
     # ------------------------------------------------------------------
     # 🔁 AUTO REFRESH
@@ -167,7 +177,7 @@ class OrderBookFrame(QFrame):
     def _start_auto_refresh(self):
         self.refresh_timer = QTimer(self)
         self.refresh_timer.timeout.connect(self._fetch_orderbook)
-        self.refresh_timer.start(15000)  # refresh every 15 seconds
+        self.refresh_timer.start(1000)  # Reads the hub's cache; the hub fetches every 15 seconds
 
     # ------------------------------------------------------------------
     # 📜 DETAILS DIALOG
@@ -157,21 +157,23 @@ class Transactions(QFrame):
             if not self.bot or not self.keypair:
                 raise ValueError("Bot or keypair not initialized.")
 
-            account = self.bot.server.load_account(self.keypair.public_key)
             asset = Asset.native() if asset_code == "XLM" else Asset(asset_code, self.keypair.public_key)
 
-            tx = (
-                TransactionBuilder(
-                    source_account=account,
-                    network_passphrase=Network.PUBLIC_NETWORK_PASSPHRASE,
-                    base_fee=100
+            def build(account):
+                tx = (
+                    TransactionBuilder(
+                        source_account=account,
+                        network_passphrase=Network.PUBLIC_NETWORK_PASSPHRASE,
+                        base_fee=100
+                    )
+                    .append_payment_op(destination=dest, asset=asset, amount=str(amount))
+                    .set_timeout(30)
+                    .build()
                 )
-                .append_payment_op(destination=dest, asset=asset, amount=str(amount))
-                .set_timeout(30)
-                .build()
-            )
-            tx.sign(self.keypair)
-            resp = self.bot.server.submit_transaction(tx)
+                tx.sign(self.keypair)
+                return tx
+
+            resp = self.bot.sequences.submit(self.keypair.public_key, build)
             tx_hash = resp.get("hash", "unknown")
 
             QtCore.QMetaObject.invokeMethod(
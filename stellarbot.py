@@ -14,6 +14,7 @@ from PySide6.QtWidgets import (
 
 # --- Local imports ---
 from src.modules.engine.db_manager import DatabaseManager
+from src.modules.engine.response_cache import ResponseCache
 from src.modules.engine.settings_manager import SettingsManager
 from src.modules.engine.smart_bot import SmartBot
 from src.modules.frames import about, help, home, login, preferences
@@ -61,29 +62,7 @@ class Worker(QtCore.QObject):
 def setup_database():
     """Initialize the local database and tables."""
     try:
-        dbm = DatabaseManager("StellarBot.db")
-        db = dbm.db
-        db.executescript("""
-                         CREATE TABLE IF NOT EXISTS assets (
-                                                               id INTEGER PRIMARY KEY AUTOINCREMENT,
-                                                               asset_code TEXT NOT NULL,
-                                                               asset_issuer TEXT NOT NULL,
-                                                               image TEXT DEFAULT 'default.png'
-                         );
-
-                         CREATE TABLE IF NOT EXISTS ohlcv_data (
-                                                                   id INTEGER PRIMARY KEY AUTOINCREMENT,
-                                                                   account_id TEXT NOT NULL,
-                                                                   open_time TEXT NOT NULL,
-                                                                   close_time TEXT NOT NULL,
-                                                                   low TEXT NOT NULL,
-                                                                   high TEXT NOT NULL,
-                                                                   close TEXT NOT NULL,
-                                                                   volume TEXT NOT NULL
-                         );
-                         """)
-        db.commit()
-        return db
+        return DatabaseManager("StellarBot.db")
     except Exception as e:
         logging.error("Database setup failed", exc_info=True)
         return None
@@ -145,7 +124,7 @@ class StellarBot(QMainWindow):
         self._init_tray_icon()
         self._init_async_db()
         self._init_console_panel()
-
+        self._init_status_bar()
 
 
 # ============================================================
@@ -213,6 +192,24 @@ class StellarBot(QMainWindow):
 
         self.setCentralWidget(console_widget)
 
+    # ============================================================
+    # Status Bar
+    # ============================================================
+    def _init_status_bar(self):
+        self.cache_label = QLabel()
+        self.statusBar().addPermanentWidget(self.cache_label)
+        self.cache_timer = QtCore.QTimer(self)
+        self.cache_timer.timeout.connect(self._update_cache_stats)
+        self.cache_timer.start(5000)
+        self._update_cache_stats()
+
+    def _update_cache_stats(self):
+        stats = ResponseCache.shared().stats()
+        self.cache_label.setText(
+            f"Horizon cache: {stats['hit_rate']:.0%} hits ({stats['hits']} hits, {stats['misses']} misses, "
+            f"{stats['coalesced']} coalesced, {stats['revalidated']} revalidated) · "
+            f"{stats['entries']} entries, {stats['bytes'] / 1024:.0f} KiB")
+
     @QtCore.Slot(str)
     def _log_to_console(self, message: str):
         timestamp = QtCore.QDateTime.currentDateTime().toString("hh:mm:ss")
@@ -256,7 +253,10 @@ class StellarBot(QMainWindow):
         try:
             self.bot = self.bot or SmartBot(self, test_mode=True)
             results = self.bot.backtest(self.bot.selling, self.bot.buying, days=5)
-            self.log_signal.emit(f"🧠 Backtest Results: {results}")
+            self.backtest_results = results["trades"]
+            self.log_signal.emit(
+                f"🧠 Backtest Results: ROI {results['roi']:.2f}%, max drawdown {results['max_drawdown']:.2f}%, "
+                f"{len(results['trades'])} trades, fees {results['fees']:.7f}")
             self.notify(f"Backtest completed. ROI: {results['roi']:.2f}%")
         except Exception as e:
             self.show_error(f"Backtest failed: {e}")
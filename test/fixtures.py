@@ -0,0 +1,56 @@
+"""
+Candle data shared by the tests and the benchmarks.
+
+Two layouts are used across the code base: OHLCV DataFrames (what the indicators, the Backtester and the
+optimizer take) and (open times in ms, CANDLE_COLUMNS rows) arrays (what the CandleBuffer, the
+CandleArchive and the DatabaseManager store).
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.modules.engine.candle_store import CANDLE_COLUMNS
+
+MINUTE = 60_000
+
+
+def random_ohlcv(n: int = 500, seed: int = 1, price: float = 100.0, volatility: float = 0.01,
+                 freq: Optional[str] = None) -> pd.DataFrame:
+    """
+    Random OHLCV candles: a geometric random walk from ``price`` with ``volatility`` per candle, with
+    consistent highs and lows. With ``freq`` (e.g. 'min', 'h') a UTC 'timestamp' column from 2024-01-01
+    is added.
+    """
+    rng = np.random.default_rng(seed)
+    close = price * np.exp(np.cumsum(rng.normal(0, volatility, n)))
+    open_ = close * (1 + rng.normal(0, volatility / 3, n))
+    spread = rng.uniform(0, volatility, (2, n))
+    candles = pd.DataFrame({
+        'open': open_,
+        'high': np.maximum(open_, close) * (1 + spread[0]),
+        'low': np.minimum(open_, close) * (1 - spread[1]),
+        'close': close,
+        'volume': rng.uniform(1, 10, n),
+    })
+    if freq:
+        candles.insert(0, 'timestamp', pd.date_range('2024-01-01', periods=n, freq=freq, tz='UTC'))
+    return candles
+
+
+def random_candles(n: int, start: int = 0, step: int = MINUTE, **kwargs) -> Tuple[np.ndarray, np.ndarray]:
+    """``random_ohlcv`` candles opened every ``step`` ms from ``start``, as (open times, CANDLE_COLUMNS rows)."""
+    ohlcv = random_ohlcv(n, **kwargs)
+    timestamps = start + step * np.arange(n, dtype=np.int64)
+    ohlcv['base_volume'], ohlcv['counter_volume'] = ohlcv['volume'], ohlcv['volume'] * ohlcv['close']
+    return timestamps, ohlcv[list(CANDLE_COLUMNS)].to_numpy()
+
+
+def candles(n: int, start: int = 0, step: int = MINUTE, price: float = 1.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Predictable candles opened every ``step`` ms from ``start``, as (open times, CANDLE_COLUMNS rows): the
+    i-th closes at ``price + i``, with a high one above and a low one below.
+    """
+    timestamps = start + step * np.arange(n, dtype=np.int64)
+    close = price + np.arange(n, dtype=np.float64)
+    return timestamps, np.column_stack([close, close + 1, close - 1, close, np.full(n, 10.0), np.full(n, 20.0)])
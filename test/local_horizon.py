@@ -0,0 +1,326 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+from urllib.parse import urlparse, parse_qs
+
+from stellar_sdk import CreateAccount, Keypair, Network, Payment, TransactionEnvelope
+from stellar_sdk.exceptions import BadSignatureError
+
+STROOPS = 10 ** 7
+
+
+def _stroops(amount) -> int:
+    return int(Decimal(str(amount)) * STROOPS)
+
+
+def _problem(status: int, transaction_code: str, operation_codes=None) -> Tuple[int, dict]:
+    result_codes = {"transaction": transaction_code}
+    if operation_codes is not None:
+        result_codes["operations"] = operation_codes
+    return status, {"status": status, "title": "Transaction Failed", "extras": {"result_codes": result_codes}}
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    request_queue_size = 64  # Many concurrent submitters connect at once
+    daemon_threads = True
+
+
+class LocalHorizonServer:
+    """
+    Minimal in-process stand-in for a Horizon server, used to exercise the bot offline.
+
+    Records are published per collection (the last path segment, e.g. 'transactions' for
+    '/accounts/<id>/transactions'). Plain GET requests return a Horizon style page honoring
+    ``cursor``, ``order`` and ``limit``. Requests sent with ``Accept: text/event-stream`` receive the
+    records after the cursor as Server-Sent Events, then stay open for ``stream_timeout`` seconds
+    waiting for new records before closing, which makes clients reconnect with their last cursor.
+    ``start_time``/``end_time`` select records by their ``timestamp``, as for trade_aggregations.
+    Pages carry an ETag and are answered 304 Not Modified when requested with a matching If-None-Match.
+    ``throttle`` makes the next requests fail with 429, like a rate-limited Horizon.
+
+    Accounts made with ``create_account`` are served at ``/accounts/<id>``, and ``POST /transactions``
+    applies transactions to them the way stellar-core would, as far as the bot is concerned: the source
+    sequence number must be the next one, every source account must have signed, the fee is charged, and
+    CreateAccount/Payment of lumens move balances (other operations succeed without effect). A failing
+    operation fails the whole transaction with tx_failed and a result code per operation. Each accepted
+    transaction takes ``submit_latency`` seconds, the stand-in for waiting on a ledger close, and the
+    transactions of one source account are applied one at a time, in the order they arrive.
+
+    Usage:
+        with LocalHorizonServer() as horizon:
+            server = Server(horizon.url)
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, stream_timeout: float = 2.0,
+                 network_passphrase: str = Network.TESTNET_NETWORK_PASSPHRASE):
+        self.stream_timeout = stream_timeout
+        self.network_passphrase = network_passphrase
+        self.accounts: Dict[str, dict] = {}  # account_id -> {"sequence": int, "balance": stroops}
+        self.submit_latency = 0.0  # Seconds each submission takes
+        self.submissions: List[dict] = []  # Source account, operation count and result code of each submission
+        self._source_locks: Dict[str, threading.Lock] = {}
+        self._ledger = 1
+        self.records: Dict[str, List[dict]] = {}
+        self.request_log: List[str] = []
+        self.throttled_requests = 0  # Upcoming requests answered with 429 Too Many Requests
+        self.retry_after = None  # Retry-After header sent with those 429 responses
+        self._condition = threading.Condition()
+        self._next_token = 1
+        self.logger = logging.getLogger(__name__)
+        self._httpd = _HTTPServer((host, port), self._make_handler())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="LocalHorizon", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._condition:
+            self._condition.notify_all()
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def throttle(self, count: int, retry_after=None):
+        """Answer the next ``count`` requests with 429 Too Many Requests, with an optional Retry-After."""
+        self.throttled_requests, self.retry_after = count, retry_after
+
+    def publish(self, collection: str, record: dict) -> dict:
+        """Add a record to a collection, assigning it the next paging_token, and wake up open streams."""
+        with self._condition:
+            record = dict(record)
+            record.setdefault("paging_token", str(self._next_token))
+            record.setdefault("id", record["paging_token"])
+            self._next_token += 1
+            self.records.setdefault(collection, []).append(record)
+            self._condition.notify_all()
+            return record
+
+    def create_account(self, account_id: str, balance="100", sequence: int = 0) -> dict:
+        """Create (or reset) an account holding ``balance`` lumens."""
+        with self._condition:
+            account = self.accounts[account_id] = {"sequence": sequence, "balance": _stroops(balance)}
+            return account
+
+    def account_record(self, account_id: str) -> dict:
+        """The /accounts/<id> record of an account, as Horizon returns it."""
+        account = self.accounts[account_id]
+        return {"id": account_id, "account_id": account_id, "sequence": str(account["sequence"]),
+                "balances": [{"asset_type": "native", "balance": f"{account['balance'] / STROOPS:.7f}"}],
+                "thresholds": {"low_threshold": 0, "med_threshold": 0, "high_threshold": 0},
+                "signers": [{"key": account_id, "weight": 1, "type": "ed25519_public_key"}], "data": {}}
+
+    def submit(self, envelope_xdr: str) -> Tuple[int, dict]:
+        """Apply a transaction envelope; returns the HTTP status and body of Horizon's answer."""
+        envelope = TransactionEnvelope.from_xdr(envelope_xdr, self.network_passphrase)
+        tx = envelope.transaction
+        source = tx.source.account_id
+        with self._condition:
+            source_lock = self._source_locks.setdefault(source, threading.Lock())
+        with source_lock:
+            time.sleep(self.submit_latency)
+            with self._condition:
+                status, body = self._apply(envelope)
+                self.submissions.append({"source": source, "operations": len(tx.operations),
+                                         "code": body.get("extras", {}).get("result_codes", {}).get("transaction",
+                                                                                                 "tx_success")})
+                return status, body
+
+    def _apply(self, envelope: TransactionEnvelope) -> Tuple[int, dict]:
+        tx = envelope.transaction
+        source = tx.source.account_id
+        account = self.accounts.get(source)
+        if account is None:
+            return _problem(400, "tx_no_source_account")
+        if tx.sequence != account["sequence"] + 1:
+            return _problem(400, "tx_bad_seq")
+        sources = {source} | {op.source.account_id for op in tx.operations if op.source is not None}
+        if any(not self._signed_by(envelope, account_id) for account_id in sources):
+            return _problem(400, "tx_bad_auth")
+        if account["balance"] < tx.fee:
+            return _problem(400, "tx_insufficient_balance")
+        account["sequence"] += 1
+        account["balance"] -= tx.fee
+
+        balances = {account_id: entry["balance"] for account_id, entry in self.accounts.items()}
+        codes = []
+        for op in tx.operations:
+            op_source = op.source.account_id if op.source is not None else source
+            code = "op_success"
+            if isinstance(op, CreateAccount):
+                amount = _stroops(op.starting_balance)
+                if op.destination in balances:
+                    code = "op_already_exists"
+                elif balances.get(op_source, 0) < amount:
+                    code = "op_underfunded"
+                else:
+                    balances[op_source] -= amount
+                    balances[op.destination] = amount
+            elif isinstance(op, Payment) and op.asset.is_native():
+                amount, destination = _stroops(op.amount), op.destination.account_id
+                if destination not in balances:
+                    code = "op_no_destination"
+                elif balances.get(op_source, 0) < amount:
+                    code = "op_underfunded"
+                else:
+                    balances[op_source] -= amount
+                    balances[destination] += amount
+            codes.append(code)
+        if any(code != "op_success" for code in codes):
+            return _problem(400, "tx_failed", codes)
+        for account_id, balance in balances.items():
+            self.accounts.setdefault(account_id, {"sequence": self._ledger << 32, "balance": 0})["balance"] = balance
+        self._ledger += 1
+        return 200, {"hash": envelope.hash_hex(), "ledger": self._ledger, "successful": True,
+                     "envelope_xdr": envelope.to_xdr(), "fee_charged": str(tx.fee)}
+
+    def _signed_by(self, envelope: TransactionEnvelope, account_id: str) -> bool:
+        keypair = Keypair.from_public_key(account_id)
+        for signature in envelope.signatures:
+            try:
+                keypair.verify(envelope.hash(), signature.signature)
+                return True
+            except BadSignatureError:
+                continue
+        return False
+
+    def records_after(self, collection: str, cursor) -> List[dict]:
+        """Return the records of a collection whose paging_token is greater than the cursor."""
+        records = self.records.get(collection, [])
+        if cursor == "now":
+            return []
+        if not cursor:
+            return list(records)
+        return [record for record in records if int(record["paging_token"]) > int(cursor)]
+
+    def _make_handler(self):
+        horizon = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                horizon.logger.debug(format % args)
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                params = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+                collection = parsed.path.rstrip("/").split("/")[-1]
+                horizon.request_log.append(self.path)
+                parts = parsed.path.strip("/").split("/")
+                if horizon.throttled_requests > 0:
+                    horizon.throttled_requests -= 1
+                    self._throttled()
+                elif len(parts) == 2 and parts[0] == "accounts":
+                    if parts[1] in horizon.accounts:
+                        self._json(200, horizon.account_record(parts[1]))
+                    else:
+                        self._json(404, {"status": 404, "title": "Resource Missing"})
+                elif "text/event-stream" in self.headers.get("Accept", ""):
+                    self._stream(collection, params.get("cursor") or self.headers.get("Last-Event-ID"))
+                else:
+                    self._page(collection, params)
+
+            def do_POST(self):
+                horizon.request_log.append(f"POST {self.path}")
+                length = int(self.headers.get("Content-Length", 0))
+                form = {key: values[-1] for key, values in parse_qs(self.rfile.read(length).decode()).items()}
+                if horizon.throttled_requests > 0:
+                    horizon.throttled_requests -= 1
+                    self._throttled()
+                elif urlparse(self.path).path.rstrip("/") != "/transactions" or "tx" not in form:
+                    self._json(404, {"status": 404, "title": "Resource Missing"})
+                else:
+                    try:
+                        self._json(*horizon.submit(form["tx"]))
+                    except ValueError:
+                        self._json(*_problem(400, "tx_malformed"))
+
+            def _json(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/hal+json" if status == 200 else "application/problem+json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _throttled(self):
+                body = b'{"status": 429, "title": "Rate Limit Exceeded"}'
+                self.send_response(429)
+                if horizon.retry_after is not None:
+                    self.send_header("Retry-After", str(horizon.retry_after))
+                self.send_header("Content-Type", "application/problem+json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _page(self, collection, params):
+                with horizon._condition:
+                    if params.get("order") == "desc":
+                        records = list(reversed(horizon.records.get(collection, [])))
+                        if params.get("cursor"):
+                            records = [r for r in records if int(r["paging_token"]) < int(params["cursor"])]
+                    else:
+                        records = horizon.records_after(collection, params.get("cursor"))
+                if "start_time" in params or "end_time" in params:
+                    start, end = int(params.get("start_time", 0)), int(params.get("end_time", 2 ** 63 - 1))
+                    records = [r for r in records if start <= int(r["timestamp"]) < end]
+                records = records[:int(params.get("limit", 10))]
+                body = json.dumps({"_links": {}, "_embedded": {"records": records}}).encode()
+                etag = f'"{hashlib.sha1(body).hexdigest()}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/hal+json")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _stream(self, collection, cursor):
+                # Chunked HTTP/1.1 like Horizon's streams, so the client keeps its connection (and socket) open
+                self.protocol_version = "HTTP/1.1"
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                self.close_connection = True
+                try:
+                    self._chunk(b'retry: 100\nevent: open\ndata: "hello"\n\n')
+                    with horizon._condition:
+                        if cursor == "now":
+                            records = horizon.records.get(collection, [])
+                            cursor = records[-1]["paging_token"] if records else None
+                        pending = horizon.records_after(collection, cursor)
+                        if not pending:
+                            horizon._condition.wait(horizon.stream_timeout)
+                            pending = horizon.records_after(collection, cursor)
+                    for record in pending:
+                        self._chunk(f"id: {record['paging_token']}\ndata: {json.dumps(record)}\n\n".encode())
+                    self._chunk(b"")  # End of the stream
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def _chunk(self, data: bytes):
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
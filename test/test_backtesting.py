@@ -0,0 +1,73 @@
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from src.modules.classes.backtesting import Backtester, macd_rsi_signals, indicator_signals
+from src.modules.engine.streaming_indicators import CandleIndicators
+from test.fixtures import random_ohlcv
+
+
+def simulate(backtester, close, signals):
+    """Candle by candle reference of the backtest rules."""
+    slip = backtester.slippage_bps / 10_000
+    cash, units, equity = backtester.initial_balance, 0.0, []
+    for price, signal in zip(close, signals):
+        fee = backtester.fee_xlm * (price if backtester.xlm_price is None else backtester.xlm_price)
+        if signal == 1 and units == 0:
+            cash -= fee
+            invested = backtester.position_size * cash
+            units, cash = invested / (price * (1 + slip)), cash - invested
+        elif signal == -1 and units > 0:
+            cash, units = cash + units * price * (1 - slip) - fee, 0.0
+        equity.append(cash + units * price)
+    return np.array(equity)
+
+
+class TestBacktesting(TestCase):
+    def setUp(self):
+        self.candles = random_ohlcv(3000, seed=5, price=0.1, freq='h')
+        self.close = self.candles['close'].to_numpy()
+
+    def test_macd_rsi_signals_match_smart_bot_rule(self):
+        indicators, expected = CandleIndicators(), []
+        for ts, close in enumerate(self.close):
+            indicators.update(ts, close)
+            last = indicators.latest()
+            if pd.isna(last['MACD']) or pd.isna(last['Signal']) or pd.isna(last['RSI']):
+                expected.append(0)
+            elif last['MACD'] > last['Signal'] and last['RSI'] < 30:
+                expected.append(1)
+            elif last['MACD'] < last['Signal'] and last['RSI'] > 70:
+                expected.append(-1)
+            else:
+                expected.append(0)
+        np.testing.assert_array_equal(macd_rsi_signals(self.close), expected)
+
+    def test_equity_matches_candle_by_candle_simulation(self):
+        signals = indicator_signals(self.candles, {'signal': 'rsi', 'period': 14, 'overbought_threshold': 70,
+                                                   'oversold_threshold': 30})
+        for backtester in (Backtester(), Backtester(position_size=0.5, slippage_bps=25, base_fee=50_000,
+                                                    operations_per_trade=2, xlm_price=0.3)):
+            results = backtester.run(self.candles, signals)
+            np.testing.assert_allclose(results['equity'].to_numpy(), simulate(backtester, self.close, signals),
+                                       rtol=1e-10)
+            self.assertAlmostEqual(results['roi'], (results['equity'].iloc[-1] / 1000 - 1) * 100)
+            self.assertAlmostEqual(results['trades']['pnl'].sum(), results['final_equity'] - 1000, places=6)
+
+    def test_trades_drawdown_and_fees(self):
+        candles = pd.DataFrame({'close': [1.0, 2.0, 1.0, 1.0, 1.0, 4.0]})
+        results = Backtester(slippage_bps=0, base_fee=100).run(candles, [1, 0, 0, -1, 1, 0])
+        trades = results['trades']
+        self.assertEqual(list(trades['entry_time']), [0, 4])
+        self.assertEqual(trades['exit_time'].iloc[0], 3)
+        self.assertTrue(np.isnan(trades['exit_price'].iloc[1]))  # Still open at the end
+        self.assertAlmostEqual(results['fees'], 3e-5)
+        self.assertAlmostEqual(results['max_drawdown'], 50.0, places=4)
+        self.assertAlmostEqual(results['roi'], 300.0, places=2)
+
+    def test_no_trades(self):
+        results = Backtester().run(self.candles, np.zeros(len(self.candles)))
+        self.assertEqual(results['roi'], 0.0)
+        self.assertEqual(results['max_drawdown'], 0.0)
+        self.assertTrue(results['trades'].empty)
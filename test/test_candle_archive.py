@@ -0,0 +1,63 @@
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from src.modules.engine.candle_archive import CandleArchive, month_bounds
+from test.fixtures import MINUTE, candles
+
+JAN_30 = 1706572800000  # 2024-01-30 00:00 UTC
+
+
+class TestCandleArchive(TestCase):
+    def setUp(self):
+        self.archive = CandleArchive(tempfile.mkdtemp())
+        self.key = ("XLM", "USDC:GA5Z", MINUTE)
+
+    def test_round_trip_across_month_files(self):
+        timestamps, values = candles(4 * 24 * 60, JAN_30)  # Jan 30 - Feb 2
+        self.assertEqual(self.archive.write(*self.key, timestamps, values), len(timestamps))
+        self.assertEqual(len(self.archive.months(*self.key)), 2)
+
+        got_times, got_values = self.archive.read(*self.key)
+        self.assertEqual(got_times.dtype, np.int64)
+        np.testing.assert_array_equal(got_times, timestamps)
+        np.testing.assert_array_equal(got_values, values)
+
+        start, end = timestamps[2000], timestamps[4000]  # Spans the month boundary
+        got_times, got_values = self.archive.read(*self.key, start, end)
+        np.testing.assert_array_equal(got_times, timestamps[2000:4000])
+        np.testing.assert_array_equal(got_values, values[2000:4000])
+        self.assertEqual(self.archive.last_timestamp(*self.key), timestamps[-1])
+        self.assertEqual(list(self.archive.frame(*self.key, start, start + 2 * MINUTE)["close"]), [2001.0, 2002.0])
+
+    def test_gaps_and_revisions(self):
+        timestamps, values = candles(100, JAN_30)
+        self.archive.write(*self.key, timestamps[::2], values[::2])
+        self.archive.write(*self.key, timestamps[-2:], values[-2:] * 2)  # Forming candle revised
+        got_times, got_values = self.archive.read(*self.key)
+        np.testing.assert_array_equal(got_times, np.r_[timestamps[:98:2], timestamps[-2:]])
+        np.testing.assert_array_equal(got_values[-1], values[-1] * 2)
+        self.assertEqual(len(self.archive.read("XLM", "OTHER", MINUTE)[0]), 0)
+
+    def test_candle_without_open_time_is_not_visible(self):
+        """A crash after the values were flushed but before the open times were written loses only those candles."""
+        timestamps, values = candles(10, JAN_30)
+        self.archive.write(*self.key, timestamps[:5], values[:5])
+        month_start = month_bounds(int(timestamps[0]))[0]
+        times, columns = self.archive._map(self.archive.month_path(*self.key, month_start), MINUTE, month_start, "r+")
+        slots = (timestamps[5:] - month_start) // MINUTE
+        columns[:, slots] = values[5:].T
+        columns.flush()
+        del times, columns
+        np.testing.assert_array_equal(self.archive.read(*self.key)[0], timestamps[:5])
+
+    def test_rejects_files_of_another_resolution(self):
+        self.archive.write(*self.key, *candles(10, JAN_30))
+        month_start = month_bounds(JAN_30)[0]
+        path = self.archive.month_path(*self.key, month_start)
+        os.makedirs(self.archive.series_dir("XLM", "USDC:GA5Z", 5 * MINUTE))
+        os.link(path, self.archive.month_path("XLM", "USDC:GA5Z", 5 * MINUTE, month_start))
+        with self.assertRaises(ValueError):
+            self.archive.read("XLM", "USDC:GA5Z", 5 * MINUTE)
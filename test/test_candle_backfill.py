@@ -0,0 +1,55 @@
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+from stellar_sdk import Asset, Server
+
+from src.modules.engine.candle_archive import CandleArchive
+from src.modules.engine.candle_backfill import CandleBackfill, merge_intervals, missing_intervals
+from src.modules.engine.rate_limiter import HorizonRateLimiter, RateLimitedClient
+from test.local_horizon import LocalHorizonServer
+
+MINUTE = 60_000
+START = 1706572800000  # 2024-01-30 00:00 UTC
+USDC = Asset("USDC", "GA5ZSEJYB37JRC5AVCIA5MOP4RHTM335X2KGX3IHOJAPP5RE34K4KZVN")
+
+
+class TestCandleBackfill(TestCase):
+    def test_interval_arithmetic(self):
+        self.assertEqual(merge_intervals([(5, 8), (0, 2), (2, 4), (7, 9), (10, 10)]), [(0, 4), (5, 9)])
+        self.assertEqual(missing_intervals(0, 20, [(3, 5), (4, 8), (15, 30)]), [(0, 3), (8, 15)])
+        self.assertEqual(missing_intervals(0, 10, []), [(0, 10)])
+
+    def test_backfills_windows_concurrently_and_refills_failures(self):
+        with LocalHorizonServer() as horizon:
+            timestamps = START + MINUTE * np.arange(3000, dtype=np.int64)
+            quiet = (timestamps >= START + 1000 * MINUTE) & (timestamps < START + 1100 * MINUTE)  # No trades
+            for i, timestamp in enumerate(timestamps[~quiet].tolist()):
+                horizon.publish("trade_aggregations", {"timestamp": str(timestamp), "open": "1", "high": "2",
+                                                       "low": "0.5", "close": str(1 + i / 1e4), "base_volume": "10",
+                                                       "counter_volume": "11"})
+            # No retries: the throttled requests fail their windows, which a second pass refills
+            limiter = HorizonRateLimiter(rate=1000, capacity=100, max_retries=0)
+            server = Server(horizon.url, client=RateLimitedClient(limiter))
+            archive = CandleArchive(tempfile.mkdtemp())
+            progress = []
+            backfill = CandleBackfill(server, archive, max_workers=3, pages_per_window=2,
+                                      progress=lambda done, total, candles: progress.append((done, total)))
+            horizon.throttle(2)
+            report = backfill.backfill([(Asset.native(), USDC)], MINUTE, START, START + 3000 * MINUTE)
+
+            self.assertEqual(report["failed"], 2)
+            self.assertEqual(report["windows"], 8 + 2)  # 3000 minutes in windows of 400, then the 2 failed ones
+            self.assertEqual(report["gaps"], {})
+            self.assertEqual(progress[-1], (2, 2))
+            stored, values = archive.read("XLM", f"USDC:{USDC.issuer}", MINUTE)
+            np.testing.assert_array_equal(stored, timestamps[~quiet])
+            self.assertEqual(report["candles"], len(stored))
+            self.assertEqual(backfill.covered(Asset.native(), USDC, MINUTE), [(START, START + 3000 * MINUTE)])
+
+            # Everything is covered, including the quiet hours: nothing is requested again
+            requests = len(horizon.request_log)
+            reopened = CandleBackfill(server, archive)
+            self.assertEqual(reopened.backfill([(Asset.native(), USDC)], MINUTE, START + 500 * MINUTE,
+                                               START + 2500 * MINUTE)["windows"], 0)
+            self.assertEqual(len(horizon.request_log), requests)
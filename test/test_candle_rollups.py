@@ -0,0 +1,109 @@
+import os
+import tempfile
+import threading
+import time
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from src.modules.engine.candle_archive import CandleArchive
+from src.modules.engine.candle_rollups import CandleRollups, rollup
+from src.modules.engine.candle_store import CANDLE_COLUMNS
+from src.modules.engine.time_frames import TimeFrame
+from test.fixtures import random_candles
+
+MINUTE = TimeFrame.ONE_MINUTE.value
+HOUR = TimeFrame.HOUR.value
+DAY = TimeFrame.DAY.value
+JAN_30 = 1706572800000  # 2024-01-30 00:00 UTC
+
+
+class TestCandleRollups(TestCase):
+    def setUp(self):
+        self.archive = CandleArchive(tempfile.mkdtemp())
+
+    def test_rollup_matches_pandas_resample(self):
+        timestamps, values = random_candles(1000, JAN_30, seed=2)
+        keep = np.ones(len(timestamps), dtype=bool)
+        keep[100:200] = False  # A gap of minutes without trades
+        timestamps, values = timestamps[keep], values[keep]
+        frame = pd.DataFrame(values, columns=list(CANDLE_COLUMNS), index=pd.to_datetime(timestamps, unit='ms'))
+        expected = frame.resample('15min').agg({'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last',
+                                                'base_volume': 'sum', 'counter_volume': 'sum'}).dropna()
+
+        got_times, got_values = rollup(timestamps, values, 15 * MINUTE)
+        np.testing.assert_array_equal(pd.to_datetime(got_times, unit='ms'), expected.index)
+        np.testing.assert_allclose(got_values, expected.to_numpy(), rtol=1e-12)
+
+    def test_incremental_cascade_matches_full_rollup(self):
+        rollups = CandleRollups(self.archive)
+        # Crosses a month boundary and ends mid-bucket
+        timestamps, values = random_candles(3 * 24 * 60 + 17, JAN_30, seed=2)
+        for start in range(0, len(timestamps), 500):
+            batch = slice(max(0, start - 1), start + 500)  # Each batch rewrites the last minute of the previous one
+            self.archive.write('XLM', 'USDC', MINUTE, timestamps[batch], values[batch])
+            rollups.update('XLM', 'USDC', timestamps[batch])
+
+        self.assertIn(TimeFrame.WEEK.value, rollups.sources)
+        self.assertEqual(rollups.sources[TimeFrame.HOUR.value], TimeFrame.THIRTY_MINUTES.value)
+        for resolution in (5 * MINUTE, HOUR, 4 * HOUR, DAY, TimeFrame.WEEK.value):
+            got_times, got_values = self.archive.read('XLM', 'USDC', resolution)
+            expected_times, expected_values = rollup(timestamps, values, resolution)
+            np.testing.assert_array_equal(got_times, expected_times)
+            np.testing.assert_allclose(got_values, expected_values, rtol=1e-12)
+
+    def test_unchanged_buckets_are_not_rewritten(self):
+        rollups = CandleRollups(self.archive)
+        timestamps, values = random_candles(100, JAN_30, seed=2)
+        self.archive.write('XLM', 'USDC', MINUTE, timestamps, values)
+        rollups.update('XLM', 'USDC', timestamps)
+
+        self.assertEqual(len(self.archive.write_changes('XLM', 'USDC', MINUTE, timestamps[-5:], values[-5:])), 0)
+        self.assertEqual(rollups.update('XLM', 'USDC', timestamps[-5:]), 0)
+        values[-1, CANDLE_COLUMNS.index('close')] *= 1.01  # The forming minute is revised
+        changed = self.archive.write_changes('XLM', 'USDC', MINUTE, timestamps[-5:], values[-5:])
+        np.testing.assert_array_equal(changed, timestamps[-1:])
+        self.assertEqual(rollups.update('XLM', 'USDC', changed), len(rollups.resolutions))  # One bucket each
+
+    def test_concurrent_updates_of_a_pair_keep_the_newest_candles(self):
+        rollups = CandleRollups(self.archive, resolutions=[5 * MINUTE])
+        timestamps, values = random_candles(10, JAN_30, seed=2)
+        self.archive.write('XLM', 'USDC', MINUTE, timestamps, values)
+        reading = threading.Event()
+        read = self.archive.read
+
+        def slow_read(*args):
+            result = read(*args)
+            if not reading.is_set():  # The backfill read its candles; the live loop writes newer ones meanwhile
+                reading.set()
+                time.sleep(0.2)
+            return result
+
+        self.archive.read = slow_read
+        backfill = threading.Thread(target=rollups.update, args=('XLM', 'USDC', timestamps))
+        backfill.start()
+        reading.wait(5)
+        values[-1, CANDLE_COLUMNS.index('close')] *= 1.01
+        self.archive.write('XLM', 'USDC', MINUTE, timestamps[-1:], values[-1:])
+        rollups.update('XLM', 'USDC', timestamps[-1:])
+        backfill.join()
+
+        np.testing.assert_array_equal(self.archive.read('XLM', 'USDC', 5 * MINUTE)[1],
+                                      rollup(timestamps, values, 5 * MINUTE)[1])
+
+    def test_retention_must_cover_the_rollups_built_from_it(self):
+        with self.assertRaises(ValueError):
+            CandleRollups(self.archive, retention={MINUTE: 2 * MINUTE})
+
+    def test_compact_drops_months_past_retention(self):
+        rollups = CandleRollups(self.archive, resolutions=[HOUR], retention={MINUTE: 30 * DAY})
+        timestamps, values = random_candles(3 * 24 * 60, JAN_30, seed=2)
+        self.archive.write('XLM', 'USDC', MINUTE, timestamps, values)
+        rollups.update('XLM', 'USDC', timestamps)
+
+        self.assertEqual(rollups.compact(now=JAN_30 + 20 * DAY), 0)
+        self.assertEqual(rollups.compact(now=JAN_30 + 40 * DAY), 1)  # January's minutes are past 30 days
+        self.assertEqual(self.archive.read('XLM', 'USDC', MINUTE)[0].min(), 1706745600000)  # 2024-02-01
+        self.assertEqual(len(self.archive.read('XLM', 'USDC', HOUR)[0]), 72)
+        self.assertFalse(any(name.endswith('.tmp') for _, _, files in os.walk(self.archive.root) for name in files))
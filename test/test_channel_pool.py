@@ -0,0 +1,115 @@
+import threading
+import time
+from unittest import TestCase
+
+from stellar_sdk import Asset, Keypair, ManageSellOffer, Network, Server
+from stellar_sdk.exceptions import BadRequestError
+
+from src.modules.engine.channel_pool import ChannelPool
+from src.modules.engine.order_batcher import OrderBatcher
+from src.modules.engine.sequence_manager import SequenceManager
+from test.local_horizon import LocalHorizonServer
+
+USDC = Asset("USDC", "GA5ZSEJYB37JRC5AVCIA5MOP4RHTM335X2KGX3IHOJAPP5RE34K4KZVN")
+
+
+def offer(amount="1"):
+    return ManageSellOffer(selling=Asset.native(), buying=USDC, amount=amount, price="0.1")
+
+
+class TestChannelPool(TestCase):
+    def setUp(self):
+        self.horizon = LocalHorizonServer().start()
+        self.addCleanup(self.horizon.stop)
+        self.trader = Keypair.random()
+        self.horizon.create_account(self.trader.public_key, "1000", sequence=50)
+        self.channels = [Keypair.random() for _ in range(4)]
+        self.server = Server(self.horizon.url)
+        self.sequences = SequenceManager(self.server)
+        self.pool = ChannelPool(self.server, self.sequences, self.trader, self.channels,
+                                Network.TESTNET_NETWORK_PASSPHRASE)
+
+    def test_check_creates_and_tops_up_channels(self):
+        self.horizon.create_account(self.channels[0].public_key, "10")
+        self.horizon.create_account(self.channels[1].public_key, "0.5")
+        health = self.pool.check()
+
+        self.assertTrue(all(h["healthy"] for h in health.values()))
+        balances = [self.horizon.account_record(c.public_key)["balances"][0]["balance"] for c in self.channels]
+        self.assertEqual(balances, ["10.0000000", "5.0000000", "5.0000000", "5.0000000"])
+        self.assertEqual([s["operations"] for s in self.horizon.submissions], [3])  # One refill transaction
+
+    def test_transactions_are_in_flight_on_every_channel(self):
+        self.pool.check()
+        self.horizon.submit_latency = 0.2
+        started = time.monotonic()
+        responses = []
+        threads = [threading.Thread(target=lambda: responses.append(self.pool.submit([offer()]))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertLess(time.monotonic() - started, 0.2 * 8 / 2)  # Serial from one account would take 1.6s
+        self.assertEqual(len(responses), 8)
+        submissions = self.horizon.submissions[1:]
+        self.assertEqual({s["source"] for s in submissions}, {c.public_key for c in self.channels})
+        self.assertTrue(all(s["code"] == "tx_success" for s in submissions))
+        self.assertEqual(self.horizon.accounts[self.trader.public_key]["sequence"], 51)  # Only the refill
+
+    def test_channel_out_of_fees_is_refilled(self):
+        channel = self.channels[0]
+        pool = ChannelPool(self.server, self.sequences, self.trader, [channel], Network.TESTNET_NETWORK_PASSPHRASE)
+        pool.check()
+        self.horizon.accounts[channel.public_key]["balance"] = 0
+        with self.assertRaises(BadRequestError):
+            pool.submit([offer()])
+        self.assertEqual(self.horizon.account_record(channel.public_key)["balances"][0]["balance"], "5.0000000")
+        self.assertTrue(pool.health[channel.public_key]["healthy"])
+        pool.submit([offer()])
+
+    def test_falls_back_to_the_trading_account_when_no_channel_is_healthy(self):
+        self.horizon.create_account(self.trader.public_key, "1", sequence=50)  # Cannot fund the channels
+        health = self.pool.check()
+        self.assertFalse(any(h["healthy"] for h in health.values()))
+
+        started = time.monotonic()
+        self.pool.submit([offer()])
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(self.horizon.submissions[-1]["source"], self.trader.public_key)
+        self.assertEqual(self.horizon.submissions[-1]["code"], "tx_success")
+
+    def test_stop_wakes_submissions_waiting_for_a_channel(self):
+        self.pool.check()
+        busy = [self.pool.acquire() for _ in self.channels]
+        errors = []
+        waiter = threading.Thread(target=lambda: errors.append(self._acquire_error()))
+        waiter.start()
+        time.sleep(0.1)
+        self.pool.stop()
+        waiter.join(timeout=1)
+        self.assertFalse(waiter.is_alive())
+        self.assertIsInstance(errors[0], TimeoutError)
+        self.pool.submit([offer()])  # From the trading account
+        self.assertEqual(self.horizon.submissions[-1]["source"], self.trader.public_key)
+        for channel in busy:
+            self.pool.release(channel)
+
+    def _acquire_error(self):
+        try:
+            self.pool.acquire(timeout=None)
+        except TimeoutError as e:
+            return e
+
+    def test_order_batcher_submits_batches_concurrently(self):
+        self.pool.check()
+        self.horizon.submit_latency = 0.5
+        batcher = OrderBatcher(self.sequences, self.trader, Network.TESTNET_NETWORK_PASSPHRASE, channels=self.pool)
+        for i in range(400):
+            batcher.add({"amount": i}, offer(str(i + 1)))
+        started = time.monotonic()
+        results = batcher.flush()
+
+        self.assertLess(time.monotonic() - started, 0.5 * 4 / 2)  # Serial from one account would take 2s
+        self.assertTrue(all(r["result"] == "SUCCESS" for r in results))
+        self.assertEqual(sorted(s["operations"] for s in self.horizon.submissions[1:]), [100, 100, 100, 100])
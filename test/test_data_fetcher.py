@@ -0,0 +1,97 @@
+import threading
+import time
+from types import SimpleNamespace
+from unittest import TestCase
+
+import pandas as pd
+from stellar_sdk import Asset
+
+from src.modules.engine.data_fetcher import DataFetcher
+
+ISSUER = "GA5ZSEJYB37JRC5AVCIA5MOP4RHTM335X2KGX3IHOJAPP5RE34K4KZVN"
+ASSETS = [Asset(code, ISSUER) for code in ("AAA", "BBB", "CCC", "DDD", "EEE", "FFF")]
+
+
+class OrderBookServer:
+    """Answers order book requests after a delay per base asset, counting the requests in flight."""
+
+    def __init__(self, horizon_url, delays, failing=()):
+        self.horizon_url = horizon_url
+        self.delays = delays
+        self.failing = failing
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def orderbook(self, buying, selling):
+        return SimpleNamespace(call=lambda: self._book(buying, selling))
+
+    def _book(self, base, counter):
+        with self._lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            time.sleep(self.delays[base.code])
+            if (base.code, counter.code) in self.failing:
+                raise ConnectionError("connection reset")
+            bid = ASSETS.index(base) + 1  # Best bid n/10 identifies the pair's base asset
+            return {"bids": [{"price_r": {"n": bid, "d": 10}, "price": str(bid / 10), "amount": "5"}],
+                    "asks": [{"price_r": {"n": bid + 1, "d": 10}, "price": str((bid + 1) / 10), "amount": "7"}]}
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+class TestConcurrentMarketData(TestCase):
+    def _fetcher(self, server):
+        controller = SimpleNamespace(account_id="GACCOUNT", server=server, assets=[], server_msg={},
+                                     server_horizon_url=server.horizon_url)
+        fetcher = DataFetcher(controller)
+        fetcher.assets = ASSETS
+        return fetcher
+
+    def test_books_keep_pair_order_and_hosts_are_capped(self):
+        # The first pairs answer last, so completion order differs from pair order
+        delays = {asset.code: 0.02 * (len(ASSETS) - i) for i, asset in enumerate(ASSETS)}
+        server = OrderBookServer("https://capped.test", delays, failing={("CCC", "XLM")})
+        fetcher = self._fetcher(server)
+        fetcher.max_connections_per_host = 2
+        market_data = fetcher.get_market_data(concurrent=True, max_workers=8)
+
+        self.assertEqual(server.peak, 2)
+        pairs = [(asset.code, "XLM") for asset in ASSETS] + [(asset.code, asset.code) for asset in ASSETS]
+        self.assertEqual(list(zip(market_data["base_asset"], market_data["counter_asset"])), pairs)
+        for (base, counter), price, bids in zip(pairs, market_data["base_asset_price"], market_data["bids"]):
+            if (base, counter) == ("CCC", "XLM"):  # Failed: an empty book, the others are unaffected
+                self.assertTrue(pd.isna(price))
+                self.assertTrue(bids.empty)
+            else:
+                self.assertAlmostEqual(price, (ASSETS.index(Asset(base, ISSUER)) + 1) / 10)
+
+        self.assertEqual(list(fetcher.market_data_latency), [f"{base}/{counter}" for base, counter in pairs])
+        for (base, _), latency in zip(pairs, fetcher.market_data_latency.values()):
+            self.assertGreaterEqual(latency, delays[base] * 1000)
+        self.assertEqual(fetcher.controller.server_msg["market_data_latency"], fetcher.market_data_latency)
+
+    def test_concurrent_and_serial_fetches_agree(self):
+        server = OrderBookServer("https://agree.test", {asset.code: 0.01 for asset in ASSETS})
+        fetcher = self._fetcher(server)
+        concurrent = fetcher.get_market_data(concurrent=True)
+        self.assertGreater(server.peak, 1)
+        serial = fetcher.get_market_data(concurrent=False)
+        self.assertEqual(list(concurrent["base_asset_price"]), list(serial["base_asset_price"]))
+        self.assertEqual(list(concurrent["counter_asset_price"]), list(serial["counter_asset_price"]))
+
+    def test_each_connection_limit_caps_its_own_fetchers(self):
+        # A fetcher created first with a limit of 1 must not cap a later one allowing 3
+        server = OrderBookServer("https://limits.test", {asset.code: 0.02 for asset in ASSETS})
+        narrow, wide = self._fetcher(server), self._fetcher(server)
+        narrow.max_connections_per_host, wide.max_connections_per_host = 1, 3
+        narrow.get_market_data(concurrent=True, max_workers=8)
+        self.assertEqual(server.peak, 1)
+        server.peak = 0
+        wide.get_market_data(concurrent=True, max_workers=8)
+        self.assertEqual(server.peak, 3)
+        shared = self._fetcher(server)
+        shared.max_connections_per_host = 1
+        self.assertIs(shared._host_semaphore(), narrow._host_semaphore())  # Same host and limit: one cap
@@ -0,0 +1,146 @@
+import os
+import sqlite3
+import tempfile
+import threading
+from unittest import TestCase
+
+import numpy as np
+
+from src.modules.engine.db_manager import DatabaseManager
+from test.fixtures import MINUTE, candles
+
+
+class TestDatabaseManager(TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "test.db")
+        self.dbm = DatabaseManager(self.path)
+
+    def tearDown(self):
+        self.dbm.close()
+
+    def test_wal_mode_and_writes_visible_after_flush(self):
+        self.assertEqual(self.dbm.db.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.dbm.insert_asset("USDC", "GISSUER")
+        self.dbm.upsert_candles("XLM", "USDC", MINUTE, *candles(1000))
+        self.assertTrue(self.dbm.flush(timeout=10))
+        self.assertEqual(self.dbm.get_assets(), [("USDC", "GISSUER")])
+        self.assertEqual(len(self.dbm.get_candles("XLM", "USDC", MINUTE)[0]), 1000)
+
+    def test_range_query_returns_arrays_and_upserts_replace(self):
+        timestamps, values = candles(100)
+        self.dbm.upsert_candles("XLM", "USDC", MINUTE, timestamps, values)
+        self.dbm.upsert_candles("XLM", "USDC", 5 * MINUTE, timestamps[::5], values[::5])
+        self.dbm.upsert_candles("XLM", "USDC", MINUTE, timestamps[-1:], values[-1:] * 2)  # Forming candle revised
+        self.dbm.flush(timeout=10)
+
+        got_times, got_values = self.dbm.get_candles("XLM", "USDC", MINUTE, 10 * MINUTE, 20 * MINUTE)
+        self.assertEqual(got_times.dtype, np.int64)
+        np.testing.assert_array_equal(got_times, timestamps[10:20])
+        np.testing.assert_array_equal(got_values, values[10:20])
+        np.testing.assert_array_equal(self.dbm.get_candles("XLM", "USDC", MINUTE)[1][-1], values[-1] * 2)
+        self.assertEqual(len(self.dbm.get_candles("XLM", "USDC", 5 * MINUTE)[0]), 20)
+        self.assertEqual(self.dbm.last_candle_time("XLM", "USDC", MINUTE), timestamps[-1])
+        self.assertEqual(list(self.dbm.get_candle_frame("XLM", "USDC", MINUTE, 0, 2 * MINUTE)["close"]), [1.0, 2.0])
+
+        plan = self.dbm.db.execute("EXPLAIN QUERY PLAN SELECT close FROM candles WHERE base = 'XLM' AND "
+                                   "counter = 'USDC' AND resolution = 60000 AND open_time >= 0").fetchall()
+        self.assertIn("USING PRIMARY KEY", plan[0][-1])
+
+    def test_concurrent_writers_and_readers(self):
+        def write(pair):
+            for i in range(20):
+                self.dbm.upsert_candles("XLM", pair, MINUTE, *candles(1, start=i * MINUTE))
+
+        threads = [threading.Thread(target=write, args=(f"P{i}",)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.dbm.flush(timeout=10)
+
+        counts = {}
+
+        def read(pair):
+            counts[pair] = len(self.dbm.get_candles("XLM", pair, MINUTE)[0])
+
+        readers = [threading.Thread(target=read, args=(f"P{i}",)) for i in range(8)]
+        for reader in readers:
+            reader.start()
+        for reader in readers:
+            reader.join()
+        self.assertEqual(counts, {f"P{i}": 20 for i in range(8)})
+
+    def test_failed_statement_does_not_drop_the_rest_of_the_batch(self):
+        self.dbm.insert_asset("USDC", "GISSUER")
+        self.dbm.execute_write("INSERT INTO missing_table VALUES (?)", [(1,)])
+        self.dbm.delete_asset("USDC", "GISSUER")
+        self.dbm.insert_asset("AQUA", "GISSUER")
+        self.dbm.flush(timeout=10)
+        self.assertEqual(self.dbm.get_assets(), [("AQUA", "GISSUER")])
+
+    def test_writer_survives_values_sqlite_cannot_bind(self):
+        self.dbm.execute_write("INSERT INTO assets (asset_code, asset_issuer) VALUES (?, ?)", [(2 ** 70, "GISSUER")])
+        self.dbm.insert_asset("AQUA", "GISSUER")
+        self.assertTrue(self.dbm.flush(timeout=10))
+        self.assertTrue(self.dbm._writer.is_alive())
+        self.dbm.insert_asset("USDC", "GISSUER")
+        self.assertTrue(self.dbm.flush(timeout=10))
+        self.assertEqual(sorted(self.dbm.get_assets()), [("AQUA", "GISSUER"), ("USDC", "GISSUER")])
+
+    def test_close_with_a_full_queue(self):
+        dbm = DatabaseManager(os.path.join(tempfile.mkdtemp(), "full.db"), queue_size=2, batch_size=1)
+        for i in range(20):
+            dbm.insert_asset(f"A{i}", "GISSUER")
+        closer = threading.Thread(target=dbm.close)
+        closer.start()
+        closer.join(timeout=10)
+        self.assertFalse(closer.is_alive())
+        with sqlite3.connect(dbm.db_path) as db:
+            self.assertEqual(db.execute("SELECT COUNT(*) FROM assets").fetchone()[0], 20)
+
+    def test_reader_connections_close_with_their_thread(self):
+        connections = []
+        readers = [threading.Thread(target=lambda: connections.append(self.dbm.db) or self.dbm.get_assets())
+                   for _ in range(8)]
+        for thread in readers:
+            thread.start()
+            thread.join()
+        self.assertEqual(len(self.dbm._readers), 0)
+        for db in connections:
+            with self.assertRaises(sqlite3.ProgrammingError):  # Closed
+                db.execute("SELECT 1")
+        self.dbm.get_assets()
+        self.assertEqual(len(self.dbm._readers), 1)  # The test thread's, still alive
+
+    def test_close_commits_pending_writes(self):
+        self.dbm.upsert_candles("XLM", "USDC", MINUTE, *candles(5000))
+        self.dbm.close()
+        self.assertFalse(self.dbm.insert_asset("USDC", "GISSUER"))
+        with sqlite3.connect(self.path) as db:
+            self.assertEqual(db.execute("SELECT COUNT(*) FROM candles").fetchone()[0], 5000)
+
+    def test_migrates_legacy_text_table(self):
+        path = os.path.join(tempfile.mkdtemp(), "legacy.db")
+        with sqlite3.connect(path) as db:
+            db.execute("CREATE TABLE ohlcv_data (id INTEGER PRIMARY KEY AUTOINCREMENT, account_id TEXT NOT NULL, "
+                       "open_time TEXT NOT NULL, close_time TEXT NOT NULL, low TEXT NOT NULL, high TEXT NOT NULL, "
+                       "close TEXT NOT NULL, volume TEXT NOT NULL)")
+            db.executemany("INSERT INTO ohlcv_data (account_id, open_time, close_time, low, high, close, volume) "
+                           "VALUES (?, ?, ?, ?, ?, ?, ?)", [
+                               ("GA", "1700000000000", "1700000060000", "0.9", "1.1", "1.0", "5"),
+                               ("GA", "1700000060", "1700000120", "1.0", "1.2", "1.1", "6"),
+                               ("GA", "2023-11-14T22:15:00Z", "2023-11-14T22:16:00Z", "1.1", "1.3", "1.2", "7"),
+                               ("GA", "not a time", "1700000240000", "1", "1", "1", "1"),
+                           ])
+        migrated = DatabaseManager(path)
+        try:
+            timestamps, values = migrated.get_candles("GA", "", MINUTE)
+            np.testing.assert_array_equal(timestamps, [1700000000000, 1700000060000, 1700000100000])
+            np.testing.assert_array_equal(values[:, 3], [1.0, 1.1, 1.2])  # close
+            self.assertTrue(np.isnan(values[:, 0]).all())  # No open column in the legacy table
+            tables = {row[0] for row in migrated.db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            self.assertIn("ohlcv_data_legacy", tables)
+            self.assertNotIn("ohlcv_data", tables)
+        finally:
+            migrated.close()
+        DatabaseManager(path).close()  # Already migrated: nothing to do
@@ -0,0 +1,66 @@
+import os
+import tempfile
+from types import SimpleNamespace
+from unittest import TestCase
+
+import requests
+
+from src.modules.engine.data_fetcher import DataFetcher
+from src.modules.engine.horizon_paginator import HorizonPaginator
+from test.local_horizon import LocalHorizonServer
+
+
+def get(url, params):
+    return requests.get(url, params=params)
+
+
+class TestHorizonPaginator(TestCase):
+    def setUp(self):
+        self.horizon = LocalHorizonServer().start()
+        for i in range(23):
+            self.horizon.publish("assets", {"asset_code": f"A{i:02d}", "num_accounts": i})
+
+    def tearDown(self):
+        self.horizon.stop()
+
+    def test_streams_chunks_and_resumes_from_checkpoint(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            checkpoint = os.path.join(tmp, "assets.json")
+            paginator = HorizonPaginator(get, f"{self.horizon.url}/assets", {"order": "asc"}, limit=5,
+                                         checkpoint_path=checkpoint)
+            chunks = paginator.chunks(size=7)
+            self.assertEqual([r["asset_code"] for r in next(chunks)], [f"A{i:02d}" for i in range(7)])
+            self.assertEqual([r["asset_code"] for r in next(chunks)][0], "A07")
+            chunks.close()  # Stop after two chunks: the second one was not acknowledged
+
+            resumed = HorizonPaginator(get, f"{self.horizon.url}/assets", {"order": "asc"}, limit=5,
+                                       checkpoint_path=checkpoint)
+            self.assertEqual(resumed.cursor, "7")
+            self.assertEqual([r["asset_code"] for r in resumed.records()], [f"A{i:02d}" for i in range(7, 23)])
+            self.assertEqual(resumed.pages, 4)  # The last page is short, so no empty page is requested
+            # A different query does not pick up the checkpoint
+            self.assertIsNone(HorizonPaginator(get, f"{self.horizon.url}/assets", {"order": "desc"},
+                                               checkpoint_path=checkpoint).cursor)
+
+    def test_follows_next_links(self):
+        pages = {None: {"_embedded": {"records": [{"paging_token": "1"}, {"paging_token": "2"}]},
+                        "_links": {"next": {"href": "https://h.org/offers?cursor=abc&limit=2"}}},
+                 "abc": {"_embedded": {"records": [{"paging_token": "3"}]}, "_links": {}}}
+        requested = []
+
+        def page(url, params):
+            requested.append(params.get("cursor"))
+            return SimpleNamespace(json=lambda: pages[params.get("cursor")])
+
+        frame = HorizonPaginator(page, "https://h.org/offers", limit=2).frame()
+        self.assertEqual(frame["paging_token"].tolist(), ["1", "2", "3"])
+        self.assertEqual(requested, [None, "abc"])
+
+    def test_get_all_assets_pages_after_the_cursor(self):
+        controller = SimpleNamespace(account_id="", server=None, assets=[], server_msg={},
+                                     server_horizon_url=self.horizon.url)
+        fetcher = DataFetcher(controller)
+        fetcher.limit = 10
+        assets = fetcher.get_all_assets(cursor="5", max_page=1)
+        self.assertEqual(assets["asset_code"].tolist(), [f"A{i:02d}" for i in range(5, 15)])
+        self.assertEqual(len(fetcher.get_all_assets()), 23)
@@ -0,0 +1,148 @@
+import time
+from unittest import TestCase
+
+from stellar_sdk import Server
+
+from src.modules.engine.horizon_stream import RecordTable, HorizonStreamer
+from test.local_horizon import LocalHorizonServer
+
+ACCOUNT_ID = "GALWHPINY5E3NEUQAZMNSXJXDAD3ZDEJYK4CZRVLATBNHFGKZRLOZBBK"
+
+
+def wait_for(predicate, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+class TestHorizonStream(TestCase):
+    def setUp(self):
+        self.horizon = LocalHorizonServer(stream_timeout=0.5).start()
+        self.server = Server(self.horizon.url)
+        self.running = True
+
+    def tearDown(self):
+        self.running = False
+        self.horizon.stop()
+
+    def _streamer(self, table, **kwargs):
+        return HorizonStreamer("transactions", lambda: self.server.transactions().for_account(ACCOUNT_ID),
+                               table, lambda: self.running, **kwargs)
+
+    def test_record_table_skips_replayed_records(self):
+        table = RecordTable(maxlen=3)
+        self.assertEqual(table.extend({"paging_token": str(i)} for i in range(1, 5)), 4)
+        self.assertEqual(table.extend([{"paging_token": "3"}, {"paging_token": "4"}]), 0)
+        self.assertEqual(len(table), 3)
+        self.assertEqual(table.cursor, "4")
+        self.assertEqual(list(table.to_frame()["paging_token"]), ["2", "3", "4"])
+
+    def test_record_table_skips_replayed_effects(self):
+        # Effect tokens are '<operation id>-<index>'
+        table = RecordTable()
+        page = [{"paging_token": "214738293101768705-1"}, {"paging_token": "214738293101768705-2"},
+                {"paging_token": "214738293101768706-1"}]
+        self.assertEqual(table.extend(page), 3)
+        self.assertEqual(table.extend(page), 0)
+        self.assertEqual(table.extend([{"paging_token": "214738293101768706-2"}]), 1)
+        self.assertEqual(len(table), 4)
+
+    def test_stream_appends_new_records_and_resumes_after_disconnect(self):
+        for i in range(3):
+            self.horizon.publish("transactions", {"hash": f"tx{i}"})
+        table = RecordTable()
+        table.extend(self.server.transactions().for_account(ACCOUNT_ID).limit(200).call()["_embedded"]["records"])
+        self._streamer(table).start()
+
+        # Each stand-in stream closes after 0.5s, so these arrive over several reconnections
+        for i in range(3, 6):
+            time.sleep(0.6)
+            self.horizon.publish("transactions", {"hash": f"tx{i}"})
+
+        self.assertTrue(wait_for(lambda: len(table) == 6))
+        self.assertEqual(list(table.to_frame()["hash"]), [f"tx{i}" for i in range(6)])
+        streams = [path for path in self.horizon.request_log if "cursor=" in path]
+        self.assertTrue(any("cursor=3" in path for path in streams))
+
+    def test_waits_reconnect_delay_after_the_stream_ends(self):
+        self.horizon.stream_timeout = 0.05
+        streamer = self._streamer(RecordTable(), reconnect_delay=0.5)
+        streamer.start()
+        time.sleep(1.2)
+        streamer.stop()
+        streams = [path for path in self.horizon.request_log if "cursor=" in path]
+        self.assertIn(len(streams), (2, 3))  # Not one per 0.05s stream
+
+    def test_poll_once_fetches_only_records_after_cursor(self):
+        for i in range(4):
+            self.horizon.publish("transactions", {"hash": f"tx{i}"})
+        table = RecordTable()
+        streamer = self._streamer(table)
+        self.assertEqual(streamer.poll_once(), 4)
+        self.horizon.publish("transactions", {"hash": "tx4"})
+        self.assertEqual(streamer.poll_once(), 1)
+        self.assertEqual(table.cursor, "5")
+
+    def test_falls_back_to_polling_when_stream_fails(self):
+        self.horizon.publish("transactions", {"hash": "tx0"})
+
+        class NoStream:
+            horizon_url = "http://127.0.0.1:1/"  # Streams are sent here, where nothing listens
+            client = None
+
+            def __init__(self, builder):
+                self.builder = builder
+
+            def cursor(self, cursor):
+                self.builder = self.builder.cursor(cursor)
+                return self
+
+            def order(self, desc=True):
+                self.builder = self.builder.order(desc=desc)
+                return self
+
+            def limit(self, limit):
+                self.builder = self.builder.limit(limit)
+                return self
+
+            def call(self):
+                return self.builder.call()
+
+            @property
+            def endpoint(self):
+                return self.builder.endpoint
+
+            @property
+            def params(self):
+                return self.builder.params
+
+        table = RecordTable()
+        streamer = HorizonStreamer("transactions",
+                                   lambda: NoStream(self.server.transactions().for_account(ACCOUNT_ID)),
+                                   table, lambda: self.running, poll_interval=0.1,
+                                   max_stream_failures=1, reconnect_delay=0.01)
+        streamer.start()
+        self.assertTrue(wait_for(lambda: len(table) == 1))
+        self.horizon.publish("transactions", {"hash": "tx1"})
+        self.assertTrue(wait_for(lambda: len(table) == 2))
+
+    def test_stop_closes_an_idle_stream(self):
+        self.horizon.stream_timeout = 30
+        table = RecordTable()
+        streamer = self._streamer(table)
+        thread = streamer.start()
+        self.assertTrue(wait_for(lambda: any("cursor=now" in path for path in self.horizon.request_log)))
+        time.sleep(0.1)
+        self.horizon.publish("transactions", {"hash": "tx0"})
+        self.assertTrue(wait_for(lambda: len(table) == 1))
+
+        started = time.monotonic()
+        streamer.stop()
+        self.assertFalse(thread.is_alive())
+        self.assertLess(time.monotonic() - started, 1)
+        self.horizon.publish("transactions", {"hash": "tx1"})
+        time.sleep(0.2)
+        self.assertEqual(len(table), 1)
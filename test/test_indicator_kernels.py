@@ -0,0 +1,46 @@
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from src.modules.engine import indicator_kernels
+
+
+class TestIndicatorKernels(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.close = 100 + np.cumsum(rng.normal(0, 1, 1003))
+        self.series = pd.Series(self.close)
+
+    def assert_matches(self, actual, expected, rtol=0.0):
+        np.testing.assert_allclose(actual, np.asarray(expected), rtol=rtol, equal_nan=True)
+
+    def test_rolling_extrema_are_identical_to_pandas(self):
+        for window in (1, 3, 14, 52, 1003):
+            self.assert_matches(indicator_kernels.rolling_max(self.close, window), self.series.rolling(window).max())
+            self.assert_matches(indicator_kernels.rolling_min(self.close, window), self.series.rolling(window).min())
+
+    def test_nan_only_invalidates_the_windows_holding_it(self):
+        values = self.close.copy()
+        values[[0, 1, 500]] = np.nan
+        series = pd.Series(values)
+        for how in ('max', 'min'):
+            self.assert_matches(getattr(indicator_kernels, f'rolling_{how}')(values, 14),
+                                getattr(series.rolling(14), how)())
+
+    def test_universe_rows_match_single_series(self):
+        universe = np.vstack([self.close, 2 * self.close - 50, self.close[::-1]])
+        for kernel in (indicator_kernels.rolling_max, lambda x, span: indicator_kernels.ema(x, span=span)):
+            out = kernel(universe, 14)
+            for row, expected in zip(universe, out):
+                self.assert_matches(expected, kernel(row, 14))
+
+    def test_ema_matches_pandas(self):
+        values = self.close.copy()
+        values[[0, 1, 200]] = np.nan
+        series = pd.Series(values)
+        for span in (1, 9, 26):
+            self.assert_matches(indicator_kernels.ema(values, span=span, min_periods=span),
+                                series.ewm(span=span, min_periods=span).mean(), rtol=1e-9)
+            self.assert_matches(indicator_kernels.ema(self.close, span=span, adjust=False),
+                                self.series.ewm(span=span, adjust=False).mean(), rtol=1e-9)
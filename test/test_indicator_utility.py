@@ -0,0 +1,89 @@
+import math
+from unittest import TestCase
+
+from src.modules.engine import indicator_utility
+from test.fixtures import random_ohlcv
+
+SIGNAL_SETTING = {
+    'period': 14, 'overbought_threshold': 70, 'oversold_threshold': 30, 'acceleration': 0.02,
+    'tenkan_period': 9, 'kijun_period': 26, 'senkou_a_period': 26, 'senkou_b_period': 52, 'chikou_span_period': 26,
+    'k_period': 3, 'd_period': 3, 'fast_ema_period': 12, 'slow_ema_period': 26, 'signal_ema_period': 9,
+    'bbands_period': 20, 'bbands_std_dev': 2, 'short_window': 10, 'long_window': 30,
+}
+
+# generate_sar_signal reads a 'Low' column that OHLCV frames do not have, so it is not compared
+SIGNALS = [name for name in indicator_utility.BATCH_SIGNALS if name != 'sar']
+
+
+class TestIndicatorUtility(TestCase):
+    def setUp(self):
+        self.ohlcv = random_ohlcv()
+
+    def assert_same_row(self, name, expected, actual, rel_tol=0.0):
+        self.assertEqual(list(expected), list(actual), name)
+        for key, value in expected.items():
+            self.assertIs(type(actual[key]), type(value), f"{name}.{key}")
+            if isinstance(value, float) and math.isnan(value):
+                self.assertTrue(math.isnan(actual[key]), f"{name}.{key}")
+            elif rel_tol:
+                self.assertTrue(math.isclose(actual[key], value, rel_tol=rel_tol), f"{name}.{key}")
+            else:
+                self.assertEqual(actual[key], value, f"{name}.{key}")
+
+    def test_generate_signals_matches_individual_functions(self):
+        settings = [dict(SIGNAL_SETTING, signal=name) for name in SIGNALS]
+        for name, row in zip(SIGNALS, indicator_utility.generate_signals(self.ohlcv, settings)):
+            expected = getattr(indicator_utility, f'generate_{name}_signal')(SIGNAL_SETTING, self.ohlcv)
+            self.assert_same_row(name, expected, row)
+
+    def test_latest_mode_matches_full_computation(self):
+        # Rolling sums restart at the window instead of carrying the whole history: allow last-bit differences
+        for name in SIGNALS:
+            generate = getattr(indicator_utility, f'generate_{name}_signal')
+            for rows in (300, 420, 421, 500):
+                ohlcv = self.ohlcv.iloc[:rows]
+                self.assert_same_row(f"{name}[{rows}]", generate(SIGNAL_SETTING, ohlcv),
+                                     generate(SIGNAL_SETTING, ohlcv, latest=True), rel_tol=1e-9)
+
+    def test_latest_mode_handles_revised_last_candle(self):
+        # The first call seeds the EWM state from the vectorized path: allow last-bit differences
+        for name in indicator_utility._RECURSIVE_SIGNALS:
+            generate = getattr(indicator_utility, f'generate_{name}_signal')
+            generate(SIGNAL_SETTING, self.ohlcv, latest=True)
+            revised = self.ohlcv.copy()
+            revised.loc[revised.index[-1], ['close', 'high']] += 2.5
+            self.assert_same_row(name, generate(SIGNAL_SETTING, revised),
+                                 generate(SIGNAL_SETTING, revised, latest=True), rel_tol=1e-9)
+
+    def test_latest_mode_resumes_on_appended_candles(self):
+        for name in indicator_utility._RECURSIVE_SIGNALS:
+            generate = getattr(indicator_utility, f'generate_{name}_signal')
+            for rows in (300, 301, 320, 500):
+                ohlcv = self.ohlcv.iloc[:rows]
+                self.assert_same_row(f"{name}[{rows}]", generate(SIGNAL_SETTING, ohlcv),
+                                     generate(SIGNAL_SETTING, ohlcv, latest=True), rel_tol=1e-9)
+
+    def test_latest_mode_does_not_resume_from_another_series(self):
+        # Same first row, different rows from the checkpoint on
+        other = self.ohlcv.copy()
+        other.iloc[1:, :] = random_ohlcv(seed=2).iloc[1:].to_numpy()
+        for name in indicator_utility._RECURSIVE_SIGNALS:
+            generate = getattr(indicator_utility, f'generate_{name}_signal')
+            generate(SIGNAL_SETTING, self.ohlcv, latest=True)
+            self.assert_same_row(name, generate(SIGNAL_SETTING, other),
+                                 generate(SIGNAL_SETTING, other, latest=True), rel_tol=1e-9)
+
+    def test_latest_mode_on_a_sliding_window(self):
+        ohlcv = random_ohlcv(600, freq='min')
+        for name in indicator_utility._RECURSIVE_SIGNALS:
+            generate = getattr(indicator_utility, f'generate_{name}_signal')
+            for offset in (0, 1, 2, 50):
+                window = ohlcv.iloc[offset:offset + 500]
+                self.assert_same_row(f"{name}[{offset}:]", generate(SIGNAL_SETTING, window),
+                                     generate(SIGNAL_SETTING, window, latest=True), rel_tol=1e-9)
+
+    def test_generate_signals_latest_mode(self):
+        settings = [dict(SIGNAL_SETTING, signal=name) for name in SIGNALS]
+        expected = indicator_utility.generate_signals(self.ohlcv, settings)
+        for name, full, row in zip(SIGNALS, expected, indicator_utility.generate_signals(self.ohlcv, settings, latest=True)):
+            self.assert_same_row(name, full, row, rel_tol=1e-9)
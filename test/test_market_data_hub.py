@@ -0,0 +1,84 @@
+import threading
+import time
+from unittest import TestCase
+
+from stellar_sdk import Asset, Server
+
+from src.modules.engine.market_data_hub import MarketDataHub
+from test.local_horizon import LocalHorizonServer
+
+USDC = Asset("USDC", "GA5ZSEJYB37JRC5AVCIA5MOP4RHTM335X2KGX3IHOJAPP5RE34K4KZVN")
+
+
+class TestMarketDataHub(TestCase):
+    def setUp(self):
+        self.horizon = LocalHorizonServer().start()
+        self.hub = MarketDataHub(Server(self.horizon.url))
+
+    def tearDown(self):
+        self.hub.stop()
+        self.horizon.stop()
+
+    def requests(self, collection):
+        return sum(collection in path for path in self.horizon.request_log)
+
+    def test_consumers_share_one_fetch_per_interval(self):
+        name = self.hub.orderbook(Asset.native(), USDC, interval=60)
+        self.assertEqual(self.hub.orderbook(Asset.native(), USDC), name)
+        threads = [threading.Thread(target=self.hub.latest, args=(name,)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for _ in range(5):
+            self.hub.latest(name)
+        self.assertEqual(self.requests("order_book"), 1)
+        self.hub.latest(name, max_age=0)
+        self.assertEqual(self.requests("order_book"), 2)
+
+    def test_subscribers_are_pushed_each_fetch(self):
+        self.hub.register("fee_stats", lambda: self.hub.server.fee_stats().call(), interval=0.2)
+        received = []
+        self.hub.subscribe("fee_stats", lambda name, value: received.append(name))
+        self.hub.subscribe("fee_stats", lambda name, value: received.append(name.upper()))
+        deadline = time.time() + 5
+        while len(received) < 4 and time.time() < deadline:
+            time.sleep(0.05)
+        self.assertGreaterEqual(received.count("fee_stats"), 2)
+        self.assertEqual(received.count("fee_stats"), received.count("FEE_STATS"))
+        self.assertEqual(self.hub.resources["fee_stats"].fetch_count, self.requests("fee_stats"))
+
+    def test_cached_never_fetches(self):
+        name = self.hub.orderbook(Asset.native(), USDC, interval=0.1)
+        self.assertIsNone(self.hub.cached(name))
+        self.assertEqual(self.requests("order_book"), 0)
+        book = self.hub.latest(name)
+        time.sleep(0.2)
+        self.assertIs(self.hub.cached(name), book)
+        self.assertEqual(self.requests("order_book"), 1)
+
+    def test_trades_resource_shares_one_aggregator(self):
+        for i in range(30):
+            self.horizon.publish("trades", {"ledger_close_time": f"2024-01-20T05:{i:02d}:10Z", "base_amount": "10",
+                                            "counter_amount": "1", "price": {"n": "1", "d": "10"}})
+        name = self.hub.trades(Asset.native(), USDC)
+        aggregator = self.hub.latest(name)
+        self.assertIs(self.hub.latest(self.hub.trades(Asset.native(), USDC)), aggregator)
+        self.assertEqual(len(aggregator.frame(300_000)), 6)
+        self.assertEqual(self.requests("trades"), 1)
+
+    def test_resources_subscribed_before_start_are_polled_once_running(self):
+        running = threading.Event()
+        self.hub.is_running = running.is_set
+        self.hub.register("fee_stats", lambda: self.hub.server.fee_stats().call(), interval=0.1)
+        received = []
+        self.hub.subscribe("fee_stats", lambda name, value: received.append(name))
+        time.sleep(0.2)
+        self.assertEqual(received, [])
+
+        running.set()
+        self.hub.start()
+        deadline = time.time() + 5
+        while len(received) < 2 and time.time() < deadline:
+            time.sleep(0.05)
+        self.assertGreaterEqual(len(received), 2)
@@ -0,0 +1,78 @@
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from src.modules.classes.backtesting import Backtester, indicator_signals
+from src.modules.classes.optimizer import WalkForwardOptimizer, parameter_grid, walk_forward_windows
+from test.fixtures import random_ohlcv
+
+GRID = {'bbands_period': [10, 20], 'bbands_std_dev': [1.5, 2, 2.5]}
+
+
+class TestOptimizer(TestCase):
+    def setUp(self):
+        self.candles = random_ohlcv(4000, seed=11, price=0.1)
+        self.checkpoint = os.path.join(tempfile.mkdtemp(), 'optimizer.jsonl')
+
+    def tearDown(self):
+        if os.path.exists(self.checkpoint):
+            os.remove(self.checkpoint)
+
+    def optimizer(self, **kwargs):
+        return WalkForwardOptimizer(self.candles, 'bbands', GRID, train_size=1000, test_size=500, **kwargs)
+
+    def test_grid_and_windows(self):
+        self.assertEqual(parameter_grid({'a': [1, 2], 'b': np.array([3, 4])}, {'c': 0}),
+                         [{'c': 0, 'a': 1, 'b': 3}, {'c': 0, 'a': 1, 'b': 4}, {'c': 0, 'a': 2, 'b': 3},
+                          {'c': 0, 'a': 2, 'b': 4}])
+        self.assertEqual(walk_forward_windows(2600, 1000, 500), [(0, 1000, 1500), (500, 1500, 2000),
+                                                                  (1000, 2000, 2500)])
+
+    def test_results_match_direct_backtests(self):
+        optimizer = self.optimizer(max_workers=1)
+        ranked = optimizer.run()
+        self.assertEqual(len(ranked), 6)
+        self.assertTrue(ranked['test_roi'].is_monotonic_decreasing)
+
+        setting = {'signal': 'bbands', 'bbands_period': 20, 'bbands_std_dev': 2}
+        signals = indicator_signals(self.candles, setting)
+        expected = np.mean([Backtester().run(self.candles.iloc[end:stop], signals[end:stop])['roi']
+                            for _, end, stop in optimizer.windows])
+        row = ranked[(ranked['bbands_period'] == 20) & (ranked['bbands_std_dev'] == 2)]
+        self.assertAlmostEqual(row['test_roi'].iloc[0], expected)
+        self.assertEqual(len(optimizer.walk_forward()), len(optimizer.windows))
+
+    def test_process_pool_matches_serial_run(self):
+        serial = self.optimizer(max_workers=1, chunk_size=2).run()
+        pooled = self.optimizer(max_workers=2, chunk_size=2).run()
+        pd.testing.assert_frame_equal(serial, pooled)
+
+    def test_interrupted_run_resumes_from_checkpoint(self):
+        full = self.optimizer(max_workers=1, chunk_size=2, checkpoint_path=self.checkpoint).run()
+
+        # Keep the first chunk and half of the second line, as if the run was killed while writing it
+        with open(self.checkpoint) as f:
+            lines = f.readlines()
+        with open(self.checkpoint, 'w') as f:
+            f.write(lines[0] + lines[1][:len(lines[1]) // 2])
+
+        resumed = self.optimizer(max_workers=1, chunk_size=2, checkpoint_path=self.checkpoint)
+        pd.testing.assert_frame_equal(resumed.run(), full)
+        self.assertEqual(resumed.evaluated, 4)
+
+        again = self.optimizer(max_workers=1, chunk_size=2, checkpoint_path=self.checkpoint)
+        pd.testing.assert_frame_equal(again.run(), full)
+        self.assertEqual(again.evaluated, 0)
+
+    def test_checkpoint_of_other_candles_is_ignored(self):
+        self.optimizer(max_workers=1, checkpoint_path=self.checkpoint).run()
+        self.candles = random_ohlcv(4000, seed=12, price=0.1)
+        optimizer = self.optimizer(max_workers=1, checkpoint_path=self.checkpoint)
+        optimizer.run()
+        self.assertEqual(optimizer.evaluated, 6)
+        with open(self.checkpoint) as f:
+            self.assertEqual(len({json.loads(line)['run_id'] for line in f}), 2)
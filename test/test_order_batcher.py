@@ -0,0 +1,70 @@
+import json
+from unittest import TestCase
+
+from stellar_sdk import Account, Asset, Keypair, ManageSellOffer, Network
+from stellar_sdk.client.response import Response
+from stellar_sdk.exceptions import BadRequestError
+
+from src.modules.engine.order_batcher import OrderBatcher
+from src.modules.engine.sequence_manager import SequenceManager
+
+KEYPAIR = Keypair.random()
+USDC = Asset("USDC", "GA5ZSEJYB37JRC5AVCIA5MOP4RHTM335X2KGX3IHOJAPP5RE34K4KZVN")
+
+
+class FakeServer:
+    """Applies transactions all or nothing: one underfunded offer fails the whole transaction, like stellar-core."""
+
+    def __init__(self, sequence=100):
+        self.sequence = sequence
+        self.submitted = []  # Operation count of each submitted transaction
+        self.underfunded = set()  # Offer amounts that fail
+
+    def load_account(self, account_id):
+        return Account(account_id, self.sequence)
+
+    def submit_transaction(self, envelope):
+        operations = envelope.transaction.operations
+        self.submitted.append(len(operations))
+        self.sequence += 1  # tx_failed transactions consume their sequence number too
+        codes = ["op_underfunded" if operation.amount in self.underfunded else "op_success"
+                 for operation in operations]
+        if "op_underfunded" in codes:
+            body = json.dumps({"status": 400, "extras": {"result_codes": {"transaction": "tx_failed",
+                                                                           "operations": codes}}})
+            raise BadRequestError(Response(400, body, {}, "http://h/transactions"))
+        return {"hash": envelope.hash_hex()}
+
+
+def queue(batcher, amounts):
+    for amount in amounts:
+        order = {"pair": "XLM/USDC", "side": "SELL", "amount": amount, "price": 0.1}
+        batcher.add(order, ManageSellOffer(selling=Asset.native(), buying=USDC, amount=amount, price="0.1"))
+
+
+class TestOrderBatcher(TestCase):
+    def test_packs_operations_into_full_transactions(self):
+        server = FakeServer()
+        batcher = OrderBatcher(SequenceManager(server), KEYPAIR, Network.TESTNET_NETWORK_PASSPHRASE)
+        queue(batcher, [str(i + 1) for i in range(250)])
+        results = batcher.flush()
+
+        self.assertEqual(server.submitted, [100, 100, 50])
+        self.assertEqual(len(batcher), 0)
+        self.assertEqual([r["order"]["amount"] for r in results], [str(i + 1) for i in range(250)])
+        self.assertTrue(all(r["result"] == "SUCCESS" and r["code"] == "op_success" for r in results))
+        self.assertEqual(len({r["hash"] for r in results}), 3)
+
+    def test_failed_operations_are_dropped_and_the_rest_resubmitted(self):
+        server = FakeServer()
+        server.underfunded = {"2", "4"}
+        batcher = OrderBatcher(SequenceManager(server), KEYPAIR, Network.TESTNET_NETWORK_PASSPHRASE)
+        queue(batcher, ["1", "2", "3", "4", "5"])
+        results = batcher.flush()
+
+        self.assertEqual(server.submitted, [5, 3])
+        self.assertEqual([r["code"] for r in results],
+                         ["op_success", "op_underfunded", "op_success", "op_underfunded", "op_success"])
+        self.assertEqual([r["result"] for r in results], ["SUCCESS", "FAILED", "SUCCESS", "FAILED", "SUCCESS"])
+        self.assertIsNone(results[1]["hash"])
+        self.assertEqual(server.sequence, 102)
@@ -0,0 +1,38 @@
+from unittest import TestCase
+
+import numpy as np
+
+from src.modules.engine.data_fetcher import parse_order_data
+from src.modules.engine.order_book import ASK, BID, decode_order_book
+
+BOOK = {
+    "bids": [{"price_r": {"n": 1, "d": 8}, "price": "0.1250000", "amount": "100.0000000"},
+             {"price_r": {"n": 3, "d": 25}, "price": "0.1200000", "amount": "50.5000000"},
+             {"price_r": {"n": 1, "d": 10}, "price": "0.1000000", "amount": "0.0000000"}],
+    "asks": [{"price_r": {"n": 2, "d": 15}, "price": "0.1333333", "amount": "10.0000000"},
+             {"price_r": {"n": 7, "d": 50}, "price": "0.1400000", "amount": "20.0000000"}],
+}
+
+
+class TestOrderBook(TestCase):
+    def test_decodes_sides_into_columns(self):
+        book = decode_order_book(BOOK)
+        self.assertEqual((len(book), book.n_bids), (4, 2))  # The empty bid level is dropped
+        np.testing.assert_array_equal(book.price_n, [1, 3, 2, 7])
+        np.testing.assert_array_equal(book.price_d, [8, 25, 15, 50])
+        np.testing.assert_allclose(book.price, [0.125, 0.12, 2 / 15, 0.14])
+        np.testing.assert_allclose(book.depth, [100, 150.5, 10, 30])
+        np.testing.assert_array_equal(book.side, [BID, BID, ASK, ASK])
+        np.testing.assert_allclose(book.amount[book.asks], [10, 20])
+        self.assertAlmostEqual(book.spread_pct(), (2 / 15 - 0.125) / 0.125 * 100)
+        self.assertEqual(book.to_frame()["side"].tolist(), ["bid", "bid", "ask", "ask"])
+
+    def test_falls_back_to_price_strings_and_handles_empty_sides(self):
+        book = decode_order_book({"bids": [{"price": "0.5", "amount": "2"}], "asks": []})
+        self.assertEqual((book.best_bid, book.best_ask, book.spread_pct()), (0.5, None, None))
+        self.assertEqual(book.price_d.tolist(), [0])
+        self.assertEqual(len(decode_order_book({})), 0)
+
+    def test_parse_order_data_uses_the_decoder(self):
+        self.assertEqual(parse_order_data(BOOK["bids"]), [{"price_r": 0.125, "price": 0.125, "amount": 100.0},
+                                                          {"price_r": 0.12, "price": 0.12, "amount": 50.5}])
@@ -0,0 +1,82 @@
+import threading
+import time
+from unittest import TestCase
+
+import requests
+from stellar_sdk import Server
+
+from src.modules.engine.rate_limiter import (HorizonRateLimiter, RateLimitedClient, RateLimitTimeout, TokenBucket,
+                                             endpoint_name)
+from test.local_horizon import LocalHorizonServer
+
+ACCOUNT_ID = "GALWHPINY5E3NEUQAZMNSXJXDAD3ZDEJYK4CZRVLATBNHFGKZRLOZBBK"
+
+
+class Reply:
+    def __init__(self, status_code, headers=None):
+        self.status_code, self.headers = status_code, headers or {}
+
+
+class TestRateLimiter(TestCase):
+    def test_token_bucket_paces_concurrent_callers(self):
+        bucket = TokenBucket(rate=50, capacity=5)
+        started = time.monotonic()
+        threads = [threading.Thread(target=lambda: [bucket.acquire() for _ in range(5)]) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertGreaterEqual(time.monotonic() - started, 10 / 50 * 0.9)  # 5 from the burst, 10 at 50/s
+        self.assertFalse(TokenBucket(rate=1, capacity=0).acquire(timeout=0.1))
+
+    def test_endpoint_names_hide_ids(self):
+        self.assertEqual(endpoint_name(f"https://h.org/accounts/{ACCOUNT_ID}/transactions?limit=10"),
+                         "/accounts/{id}/transactions")
+        self.assertEqual(endpoint_name("https://h.org/operations/214738293101768706"), "/operations/{id}")
+
+    def test_retries_honor_retry_after_and_the_budget(self):
+        limiter = HorizonRateLimiter(rate=1000, capacity=10, base_delay=0.01, min_retry_budget=2, retry_ratio=0)
+        replies = iter([Reply(429, {"retry-after": "0.2"}), Reply(503), Reply(200)])
+        started = time.monotonic()
+        self.assertEqual(limiter.execute("/x", lambda: next(replies)).status_code, 200)
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+        stats = limiter.stats()["/x"]
+        self.assertEqual((stats["requests"], stats["errors"], stats["retries"], stats["throttled"]), (3, 2, 2, 1))
+
+        # The budget is spent: the next failure is returned without retrying
+        self.assertEqual(limiter.execute("/x", lambda: Reply(503)).status_code, 503)
+        with self.assertRaises(requests.ConnectionError):
+            limiter.execute("/y", lambda: (_ for _ in ()).throw(requests.ConnectionError("down")))
+
+    def test_deadline_bounds_the_wait_for_tokens_and_retries(self):
+        limiter = HorizonRateLimiter(rate=1, capacity=1, base_delay=0.01)
+        limiter.execute("/x", lambda: Reply(200))
+        started = time.monotonic()
+        with self.assertRaises(RateLimitTimeout):
+            limiter.execute("/x", lambda: Reply(200), deadline=time.monotonic() + 0.1)
+        self.assertLess(time.monotonic() - started, 0.5)
+
+        limiter = HorizonRateLimiter(rate=1000, capacity=10)
+        started = time.monotonic()
+        reply = limiter.execute("/x", lambda: Reply(429, {"retry-after": "30"}), deadline=time.monotonic() + 1)
+        self.assertEqual(reply.status_code, 429)  # Not retried: the Retry-After delay ends after the deadline
+        self.assertLess(time.monotonic() - started, 0.5)
+
+    def test_rate_limit_headers_pause_the_bucket(self):
+        limiter = HorizonRateLimiter(rate=1000, capacity=10)
+        limiter.execute("/x", lambda: Reply(200, {"X-Ratelimit-Remaining": "0", "X-Ratelimit-Reset": "0.2"}))
+        started = time.monotonic()
+        limiter.execute("/x", lambda: Reply(200))
+        self.assertGreaterEqual(time.monotonic() - started, 0.19)
+
+    def test_sdk_and_session_requests_retry_429(self):
+        with LocalHorizonServer() as horizon:
+            limiter = HorizonRateLimiter(rate=1000, capacity=10)
+            server = Server(horizon.url, client=RateLimitedClient(limiter))
+            horizon.throttle(2, retry_after=0)
+            server.transactions().for_account(ACCOUNT_ID).call()
+            horizon.throttle(1, retry_after=0)
+            response = limiter.request(requests.Session(), "GET", f"{horizon.url}/ledgers", params={"limit": 1})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(horizon.request_log), 5)
+            self.assertEqual(limiter.stats()["/accounts/{id}/transactions"]["throttled"], 2)
@@ -0,0 +1,80 @@
+import threading
+import time
+from unittest import TestCase
+
+from stellar_sdk import Asset, Server
+
+from src.modules.engine.rate_limiter import HorizonRateLimiter, RateLimitedClient
+from src.modules.engine.response_cache import ResponseCache
+from test.local_horizon import LocalHorizonServer
+
+USDC = Asset("USDC", "GA5ZSEJYB37JRC5AVCIA5MOP4RHTM335X2KGX3IHOJAPP5RE34K4KZVN")
+
+
+class Reply:
+    def __init__(self, text, status_code=200, headers=None):
+        self.text, self.status_code, self.headers = text, status_code, headers or {}
+
+
+class TestResponseCache(TestCase):
+    def setUp(self):
+        self.horizon = LocalHorizonServer().start()
+        self.horizon.publish("order_book", {"bids": [], "asks": []})
+
+    def tearDown(self):
+        self.horizon.stop()
+
+    def server(self, cache):
+        return Server(self.horizon.url, client=RateLimitedClient(HorizonRateLimiter(rate=100), cache=cache))
+
+    def requests(self, collection):
+        return sum(collection in path for path in self.horizon.request_log)
+
+    def test_fresh_responses_are_served_from_cache_per_endpoint_and_params(self):
+        server = self.server(ResponseCache(ttls={"/order_book": 60}))
+        for _ in range(3):
+            server.orderbook(Asset.native(), USDC).call()
+        server.orderbook(USDC, Asset.native()).call()
+        server.fee_stats().call()
+        server.fee_stats().call()
+        self.assertEqual(self.requests("order_book"), 2)
+        self.assertEqual(self.requests("fee_stats"), 2)  # No TTL: not cached
+        stats = server._client.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (2, 2, 2))
+
+    def test_expired_entries_are_revalidated_with_etag(self):
+        cache = ResponseCache(ttls={"/order_book": 0.05})
+        server = self.server(cache)
+        first = server.orderbook(Asset.native(), USDC).call()
+        time.sleep(0.1)
+        self.assertEqual(server.orderbook(Asset.native(), USDC).call(), first)
+        self.assertEqual(self.requests("order_book"), 2)
+        self.assertEqual(cache.stats()["revalidated"], 1)
+
+        self.horizon.publish("order_book", {"bids": [{"price": "1"}], "asks": []})
+        time.sleep(0.1)
+        self.assertEqual(len(server.orderbook(Asset.native(), USDC).call()["_embedded"]["records"]), 2)
+        self.assertEqual(cache.stats()["revalidated"], 1)
+
+    def test_concurrent_identical_requests_coalesce_and_memory_is_bounded(self):
+        cache = ResponseCache(ttls={"/assets": 60}, max_entries=2)
+        calls = []
+
+        def fetch(headers):
+            calls.append(headers)
+            time.sleep(0.2)
+            return Reply("x" * 10)
+
+        threads = [threading.Thread(target=cache.get, args=("http://h/assets", {"limit": 5}, fetch))
+                   for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.stats()["coalesced"], 5)
+
+        for code in ("A", "B", "C"):
+            cache.get("http://h/assets", {"asset_code": code}, lambda headers: Reply("y" * 10))
+        stats = cache.stats()
+        self.assertEqual((stats["entries"], stats["bytes"], stats["evictions"]), (2, 20, 2))
@@ -0,0 +1,90 @@
+import json
+import threading
+from unittest import TestCase
+
+from stellar_sdk import Account, Keypair, Network, TransactionBuilder
+from stellar_sdk.client.response import Response
+from stellar_sdk.exceptions import BadRequestError
+
+from src.modules.engine.sequence_manager import SequenceManager
+
+KEYPAIR = Keypair.random()
+
+
+def rejection(code):
+    body = json.dumps({"status": 400, "extras": {"result_codes": {"transaction": code}}})
+    return BadRequestError(Response(400, body, {}, "http://h/transactions"))
+
+
+class FakeServer:
+    """Accepts transactions whose sequence number follows the account's, like stellar-core."""
+
+    def __init__(self, sequence=100):
+        self.sequence = sequence
+        self.loads = 0
+        self.rejections = []  # Result codes the next submissions are rejected with
+        self.lock = threading.Lock()
+
+    def load_account(self, account_id):
+        with self.lock:
+            self.loads += 1
+            return Account(account_id, self.sequence)
+
+    def submit_transaction(self, envelope):
+        with self.lock:
+            if self.rejections:
+                raise rejection(self.rejections.pop(0))
+            if envelope.transaction.sequence != self.sequence + 1:
+                raise rejection("tx_bad_seq")
+            self.sequence += 1
+            return {"hash": envelope.hash_hex()}
+
+
+def build(account):
+    tx = (TransactionBuilder(account, Network.TESTNET_NETWORK_PASSPHRASE, base_fee=100)
+          .append_bump_sequence_op(0).set_timeout(30).build())
+    tx.sign(KEYPAIR)
+    return tx
+
+
+class TestSequenceManager(TestCase):
+    def test_concurrent_reservations_are_distinct_and_need_one_load(self):
+        server = FakeServer()
+        sequences = SequenceManager(server)
+        reserved = []
+        threads = [threading.Thread(target=lambda: reserved.extend(sequences.reserve(KEYPAIR.public_key).sequence
+                                                                     for _ in range(50))) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(reserved), list(range(100, 300)))
+        self.assertEqual(server.loads, 1)
+
+    def test_submits_without_loading_and_resyncs_on_bad_seq(self):
+        server = FakeServer()
+        sequences = SequenceManager(server)
+        sequences.prime(Account(KEYPAIR.public_key, 100))
+        for _ in range(3):
+            sequences.submit(KEYPAIR.public_key, build)
+        self.assertEqual((server.sequence, server.loads), (103, 0))
+
+        server.sequence = 110  # The account submitted elsewhere
+        sequences.submit(KEYPAIR.public_key, build)
+        self.assertEqual((server.sequence, server.loads), (111, 1))
+
+    def test_unsubmitted_reservations_are_released(self):
+        server = FakeServer()
+        sequences = SequenceManager(server)
+
+        def broken(account):
+            raise ValueError("bad amount")
+
+        with self.assertRaises(ValueError):
+            sequences.submit(KEYPAIR.public_key, broken)
+
+        server.rejections = ["tx_insufficient_fee"]
+        with self.assertRaises(BadRequestError):
+            sequences.submit(KEYPAIR.public_key, build)
+        sequences.submit(KEYPAIR.public_key, build)
+        self.assertEqual((server.sequence, server.loads), (101, 1))
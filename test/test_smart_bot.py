@@ -0,0 +1,210 @@
+import json
+import logging
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+
+import pandas as pd
+import numpy as np
+from stellar_sdk import Asset, Keypair, Network
+
+from src.modules.engine.candle_archive import CandleArchive
+from src.modules.engine.candle_rollups import CandleRollups, rollup
+from src.modules.engine.candle_store import CANDLE_COLUMNS, CandleStore
+from src.modules.engine.order_batcher import OrderBatcher
+from src.modules.engine.sequence_manager import SequenceManager
+from src.modules.engine.smart_bot import EventListener, SmartBot
+from test.fixtures import MINUTE, candles
+
+ISSUER = "GA5ZSEJYB37JRC5AVCIA5MOP4RHTM335X2KGX3IHOJAPP5RE34K4KZVN"
+PAIRS = [(Asset.native(), Asset(code, ISSUER)) for code in ("AAA", "BBB", "CCC", "DDD")]
+BUY = {"MACD": 1.0, "Signal": 0.0, "RSI": 20.0, "close": 0.1}  # _generate_signal's BUY condition
+NOW = 1706745600000 + 3600 * 1000  # 2024-02-01 01:00 UTC
+
+
+class CandleServer:
+    """Serves trade_aggregations pages of 1-minute candles and records every request."""
+
+    def __init__(self, timestamps, values):
+        self.timestamps, self.values = timestamps, values
+        self.requests = []  # (resolution, start_time, end_time)
+
+    def trade_aggregations(self, base, counter, start_time, end_time, resolution):
+        self.requests.append((resolution, start_time, end_time))
+        keep = (self.timestamps >= start_time) & (self.timestamps < end_time) if resolution == MINUTE else []
+        records = [dict(zip(("timestamp",) + CANDLE_COLUMNS, (int(t), *v)))
+                   for t, v in zip(self.timestamps[keep], self.values[keep])]
+        page = {"_embedded": {"records": records}}
+        return type("Call", (), {"limit": lambda call, n: call, "call": lambda call: page})()
+
+
+def bot_with_stubs(fetch_delays=None, failing=()):
+    """A SmartBot without its Stellar setup: candles, indicators and trades are stubbed per pair code."""
+    bot = SmartBot.__new__(SmartBot)
+    bot.logger = logging.getLogger(__name__)
+    bot.test_mode = True
+    bot.batch_orders = False
+    bot.running = False
+    bot.interval_seconds = 60
+    bot.fetch_workers = 4
+    bot.events = EventListener()
+    bot.order_batcher = OrderBatcher(SequenceManager(None), Keypair.random(), Network.TESTNET_NETWORK_PASSPHRASE)
+    bot.channels, bot._trade_pool, bot._pending_trades = None, None, []
+    bot.executed = []
+
+    def fetch(base, quote):
+        if quote.code in failing:
+            raise ConnectionError(f"{quote.code} unavailable")
+        time.sleep((fetch_delays or {}).get(quote.code, 0))
+        return pd.DataFrame({"close": [0.1]})
+
+    bot._fetch_ohlcv = fetch
+    bot._apply_indicators = lambda key: BUY
+    bot.execute_trade = bot.executed.append
+    return bot
+
+
+class TestSmartBotCycles(TestCase):
+    def setUp(self):
+        self.fetch_pool = ThreadPoolExecutor(4)
+        self.addCleanup(self.fetch_pool.shutdown)
+
+    def _pipelined(self, bot):
+        return bot._run_cycle_pipelined(PAIRS, self.fetch_pool)
+
+    def test_pipelined_signals_execute_in_pair_order(self):
+        # The first pair arrives last, yet is traded first
+        bot = bot_with_stubs(fetch_delays={"AAA": 0.2, "BBB": 0.1, "CCC": 0.05})
+        started = time.monotonic()
+        stats = self._pipelined(bot)
+        self.assertLess(time.monotonic() - started, 0.2 + 0.1 + 0.05)  # Fetched concurrently
+        self.assertEqual([signal["pair"] for signal in bot.executed], ["XLM/AAA", "XLM/BBB", "XLM/CCC", "XLM/DDD"])
+        self.assertEqual((stats["pairs"], stats["evaluated"], stats["signals"]), (4, 4, 4))
+        self.assertGreaterEqual(stats["fetch_max_ms"], 200)
+        self.assertGreaterEqual(stats["fetch_ms"], stats["fetch_max_ms"])
+
+    def test_failing_pair_does_not_stop_the_others(self):
+        for run in ("serial", "pipelined"):
+            with self.subTest(run):
+                bot = bot_with_stubs(failing={"BBB"})
+                stats = bot._run_cycle_serial(PAIRS) if run == "serial" else self._pipelined(bot)
+                self.assertEqual([signal["pair"] for signal in bot.executed], ["XLM/AAA", "XLM/CCC", "XLM/DDD"])
+                self.assertEqual((stats["evaluated"], stats["signals"]), (3, 3))
+
+    def test_failing_indicators_do_not_stop_the_others(self):
+        bot = bot_with_stubs()
+
+        def indicators(key):
+            if key == f"XLM/CCC:{ISSUER}":
+                raise ValueError("not enough candles")
+            return BUY
+
+        bot._apply_indicators = indicators
+        for stats in (bot._run_cycle_serial(PAIRS), self._pipelined(bot)):
+            self.assertEqual(stats["evaluated"], 3)
+        self.assertEqual([signal["pair"] for signal in bot.executed],
+                         ["XLM/AAA", "XLM/BBB", "XLM/DDD"] * 2)
+
+    def test_trades_through_channels_are_in_flight_together(self):
+        bot = bot_with_stubs()
+        bot.test_mode = False
+        bot.channels = ["channel"] * 4
+        bot._trade_pool = self.fetch_pool
+        bot.execute_trade = lambda signal: (time.sleep(0.2), bot.executed.append(signal))
+        started = time.monotonic()
+        stats = bot._run_cycle_serial(PAIRS)
+
+        self.assertLess(time.monotonic() - started, 0.2 * 4 / 2)  # One after the other would take 0.8s
+        self.assertEqual(len(bot.executed), 4)  # Every trade is done when the cycle ends
+        self.assertGreaterEqual(stats["execution_ms"], 200)
+
+    def test_run_loop_publishes_cycle_stats_with_overrun(self):
+        for mode, interval, overrun in (("serial", 60, False), ("pipelined", 0.05, True)):
+            with self.subTest(mode):
+                bot = bot_with_stubs(fetch_delays={"AAA": 0.1})
+                bot.evaluation_mode = mode
+                bot.interval_seconds = interval
+                bot._create_trading_pairs = lambda: PAIRS
+                stopped = threading.Event()
+                published = []
+                bot.events.subscribe("cycle_stats", lambda name, stats: (published.append(stats), stopped.set()))
+
+                loop = threading.Thread(target=bot._run_loop, args=(stopped,))
+                loop.start()
+                loop.join(timeout=5)
+                self.assertFalse(loop.is_alive())
+                stats = published[0]
+                self.assertIs(bot.cycle_stats, stats)
+                for field in ("timestamp", "pairs", "evaluated", "signals", "fetch_ms", "fetch_max_ms",
+                              "indicators_ms", "indicators_max_ms", "execution_ms", "transactions", "cycle_ms"):
+                    self.assertIn(field, stats)
+                self.assertGreaterEqual(stats["cycle_ms"], 100)
+                self.assertEqual(stats["overrun"], overrun)
+
+
+class TestSmartBotCandles(TestCase):
+    def test_fetch_requests_the_missing_minutes_once(self):
+        timestamps, values = candles(60, start=NOW - 60 * MINUTE)
+        server = CandleServer(timestamps, values)
+        bot = bot_with_stubs()
+        bot.server, bot.controller = server, None
+        bot.candles = CandleStore()
+        bot.candle_archive = CandleArchive(tempfile.mkdtemp())
+        bot.candle_rollups = CandleRollups(bot.candle_archive)
+        bot.resolution = 5 * MINUTE
+        base, quote = PAIRS[0]
+
+        SmartBot._fetch_ohlcv(bot, base, quote, end_time=NOW)
+        self.assertEqual(server.requests, [(MINUTE, NOW - 24 * 3600 * 1000, NOW)])
+
+        # A new minute: only the minutes from the newest archived one are requested
+        server.timestamps = np.append(timestamps, NOW)
+        server.values = np.vstack([values, values[-1] * 1.1])
+        server.requests.clear()
+        frame = SmartBot._fetch_ohlcv(bot, base, quote, end_time=NOW + MINUTE)
+        self.assertEqual(server.requests, [(MINUTE, NOW - MINUTE, NOW + MINUTE)])
+        expected_times, expected_values = rollup(server.timestamps, server.values, 5 * MINUTE)
+        self.assertEqual(len(frame), len(expected_times))
+        np.testing.assert_allclose(frame[list(CANDLE_COLUMNS)].to_numpy(), expected_values)
+
+    def test_pairs_with_the_same_codes_keep_separate_candles(self):
+        timestamps, values = candles(60, start=NOW - 60 * MINUTE)
+        bot = bot_with_stubs()
+        bot.server, bot.controller = CandleServer(timestamps, values), None
+        bot.candles = CandleStore()
+        bot.candle_archive = CandleArchive(tempfile.mkdtemp())
+        bot.candle_rollups = CandleRollups(bot.candle_archive)
+        bot.resolution = MINUTE
+        other = Asset("AAA", Keypair.random().public_key)
+
+        SmartBot._fetch_ohlcv(bot, Asset.native(), Asset("AAA", ISSUER), end_time=NOW)
+        self.assertIn((f"XLM/AAA:{ISSUER}", MINUTE), bot.candles)
+        self.assertNotIn((f"XLM/AAA:{other.issuer}", MINUTE), bot.candles)
+        SmartBot._fetch_ohlcv(bot, Asset.native(), other, end_time=NOW)
+        self.assertIn((f"XLM/AAA:{other.issuer}", MINUTE), bot.candles)
+
+    def test_indicator_state_is_saved_per_issuer(self):
+        path = f"{tempfile.mkdtemp()}/indicator_state.json"
+        keys = [f"XLM/AAA:{ISSUER}", f"XLM/AAA:{Keypair.random().public_key}"]
+        bot = bot_with_stubs()
+        bot.candles, bot.resolution, bot.indicators, bot.indicator_state_path = CandleStore(), MINUTE, {}, path
+        for price, key in enumerate(keys, start=1):
+            bot.candles.get(key, MINUTE).extend(*candles(60, start=NOW, price=price))
+            SmartBot._apply_indicators(bot, key)
+        bot.save_indicator_state()
+
+        restored = bot_with_stubs()
+        restored.resolution, restored.indicators, restored.indicator_state_path = MINUTE, {}, path
+        restored.load_indicator_state()
+        self.assertEqual(sorted(restored.indicators), sorted(keys))
+        for key in keys:
+            self.assertEqual(restored.indicators[key].latest(), bot.indicators[key].latest())
+
+        # State saved before pairs were issuer-qualified is not mixed in
+        with open(path, "w") as f:
+            json.dump({"resolution": MINUTE, "pairs": {"XLM/AAA": bot.indicators[keys[0]].to_dict()}}, f)
+        restored.indicators = {}
+        restored.load_indicator_state()
+        self.assertEqual(restored.indicators, {})
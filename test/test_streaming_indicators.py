@@ -0,0 +1,71 @@
+import json
+from unittest import TestCase
+
+import numpy as np
+from ta.momentum import RSIIndicator
+from ta.trend import MACD
+from ta.volatility import AverageTrueRange
+
+from src.modules.engine.streaming_indicators import (
+    StreamingEMA, StreamingRSI, StreamingMACD, StreamingATR, CandleIndicators
+)
+from test.fixtures import random_ohlcv
+
+
+class TestStreamingIndicators(TestCase):
+    def setUp(self):
+        self.df = random_ohlcv(seed=7)
+
+    def assert_series_equal(self, streamed, expected):
+        np.testing.assert_allclose(np.array(streamed), expected.to_numpy(), rtol=1e-9, atol=1e-9, equal_nan=True)
+
+    def test_ema_matches_pandas(self):
+        ema = StreamingEMA(20)
+        streamed = [ema.update(x) for x in self.df["close"]]
+        self.assert_series_equal(streamed, self.df["close"].ewm(span=20, min_periods=20, adjust=False).mean())
+
+    def test_rsi_matches_ta(self):
+        rsi = StreamingRSI(14)
+        streamed = [rsi.update(x) for x in self.df["close"]]
+        self.assert_series_equal(streamed, RSIIndicator(self.df["close"], window=14).rsi())
+
+    def test_macd_matches_ta(self):
+        macd = StreamingMACD()
+        lines, signals = zip(*(macd.update(x) for x in self.df["close"]))
+        expected = MACD(self.df["close"])
+        self.assert_series_equal(lines, expected.macd())
+        self.assert_series_equal(signals, expected.macd_signal())
+
+    def test_atr_matches_ta(self):
+        atr = StreamingATR(14)
+        streamed = [atr.update(h, l, c) for h, l, c in self.df[["high", "low", "close"]].itertuples(index=False)]
+        expected = AverageTrueRange(self.df["high"], self.df["low"], self.df["close"], window=14).average_true_range()
+        self.assert_series_equal(streamed, expected)
+
+    def test_revisions_of_forming_candle_do_not_drift(self):
+        rsi, macd = StreamingRSI(14), StreamingMACD()
+        for x in self.df["close"]:
+            for tick in (x * 1.01, x * 0.98, x):
+                revise = tick != x * 1.01
+                rsi.update(tick, revise=revise)
+                macd.update(tick, revise=revise)
+        self.assertAlmostEqual(rsi.current, RSIIndicator(self.df["close"], window=14).rsi().iloc[-1], places=9)
+        self.assertAlmostEqual(macd.signal, MACD(self.df["close"]).macd_signal().iloc[-1], places=9)
+
+    def test_candle_indicators_survive_serialization(self):
+        first, second = self.df.iloc[:300], self.df.iloc[300:]
+        indicators = CandleIndicators()
+        for ts, close in enumerate(first["close"]):
+            indicators.update(ts, close)
+        restored = CandleIndicators.from_dict(json.loads(json.dumps(indicators.to_dict())))
+
+        # Replaying already seen candles is ignored, the last one is treated as a revision
+        self.assertFalse(restored.update(10, 1.0))
+        for ts, close in enumerate(second["close"], start=300):
+            restored.update(ts, close)
+
+        latest = restored.latest()
+        expected = MACD(self.df["close"])
+        self.assertAlmostEqual(latest["RSI"], RSIIndicator(self.df["close"], window=14).rsi().iloc[-1], places=9)
+        self.assertAlmostEqual(latest["MACD"], expected.macd().iloc[-1], places=9)
+        self.assertAlmostEqual(latest["Signal"], expected.macd_signal().iloc[-1], places=9)
@@ -0,0 +1,66 @@
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+from stellar_sdk import Asset, Server
+
+from src.modules.engine.horizon_stream import HorizonStreamer
+from src.modules.engine.trade_aggregator import TradeAggregator
+from test.local_horizon import LocalHorizonServer
+
+MINUTE = 60_000
+USDC = Asset("USDC", "GA5ZSEJYB37JRC5AVCIA5MOP4RHTM335X2KGX3IHOJAPP5RE34K4KZVN")
+
+
+def trade_records(n, seed=4, start="2024-01-20T05:00:00Z"):
+    rng = np.random.default_rng(seed)
+    times = pd.Timestamp(start) + pd.to_timedelta(np.cumsum(rng.integers(1, 40, n)), unit="s")
+    prices = np.round(0.1 * np.exp(np.cumsum(rng.normal(0, 0.002, n))), 7)
+    amounts = np.round(rng.uniform(1, 100, n), 7)
+    return [{"paging_token": f"{1000 + i}-0", "ledger_close_time": time.strftime("%Y-%m-%dT%H:%M:%SZ"),
+             "base_amount": str(amount), "counter_amount": str(round(amount * price, 7)),
+             "price": {"n": str(int(price * 10_000_000)), "d": "10000000"}}
+            for i, (time, price, amount) in enumerate(zip(times, prices, amounts))]
+
+
+def resampled(records, rule):
+    frame = pd.DataFrame({"price": [int(r["price"]["n"]) / int(r["price"]["d"]) for r in records],
+                          "volume": [float(r["base_amount"]) for r in records]},
+                         index=pd.to_datetime([r["ledger_close_time"] for r in records], utc=True))
+    ohlc = frame["price"].resample(rule).ohlc()
+    ohlc["base_volume"] = frame["volume"].resample(rule).sum()
+    return ohlc.dropna()
+
+
+class TestTradeAggregator(TestCase):
+    def test_incremental_batches_match_resampling_every_trade(self):
+        records = trade_records(2000)
+        aggregator = TradeAggregator(resolutions=(MINUTE, 5 * MINUTE))
+        for start in range(0, len(records), 150):
+            batch = records[max(0, start - 20):start + 150]  # Overlapping pages are replayed
+            aggregator.extend(reversed(batch))
+        self.assertEqual(aggregator.cursor, records[-1]["paging_token"])
+        self.assertEqual(aggregator.extend(records[-5:]), 0)
+
+        for resolution, rule in ((MINUTE, "1min"), (5 * MINUTE, "5min")):
+            bars = aggregator.frame(resolution).set_index("timestamp")
+            expected = resampled(records, rule)
+            self.assertTrue(bars.index.equals(expected.index))
+            np.testing.assert_allclose(bars[["open", "high", "low", "close", "base_volume"]].to_numpy(),
+                                       expected.to_numpy(), rtol=1e-12)
+
+    def test_feeds_from_horizon_streamer_polls(self):
+        records = trade_records(300)
+        with LocalHorizonServer() as horizon:
+            for i, record in enumerate(records[:250]):
+                horizon.publish("trades", dict(record, paging_token=str(i + 1)))
+            aggregator = TradeAggregator(resolutions=(MINUTE,))
+            feed = HorizonStreamer("trades", lambda: Server(horizon.url).trades().for_asset_pair(Asset.native(), USDC),
+                                   aggregator, lambda: False)
+            self.assertEqual(feed.poll_once(), 200)  # Latest page first
+            for i, record in enumerate(records[250:]):
+                horizon.publish("trades", dict(record, paging_token=str(251 + i)))
+            self.assertEqual(feed.poll_once(), 50)
+            self.assertEqual(aggregator.cursor, "300")
+            expected = resampled(records[50:], "1min")
+            self.assertEqual(aggregator.frame(MINUTE)["close"].tolist(), expected["close"].tolist())
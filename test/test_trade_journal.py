@@ -0,0 +1,45 @@
+import os
+import tempfile
+from datetime import datetime
+from unittest import TestCase
+
+import numpy as np
+
+from src.modules.engine.trade_journal import COLUMNS, TradeJournal
+
+
+class TestTradeJournal(TestCase):
+    def test_appends_grow_the_columns_and_the_frame_is_cached(self):
+        journal = TradeJournal(path=None, capacity=4)
+        for i in range(10):
+            journal.append("XLM/USDC", "BUY" if i % 2 else "SELL", i, 0.1 * i, f"h{i}", "SUCCESS", "op_success")
+
+        frame = journal.to_frame()
+        self.assertEqual(list(frame.columns), list(COLUMNS))
+        self.assertEqual(len(frame), 10)
+        np.testing.assert_array_equal(frame["amount"], np.arange(10.0))
+        self.assertEqual(frame["hash"].iloc[-1], "h9")
+        self.assertIs(journal.to_frame(), frame)
+        journal.append("XLM/USDC", "BUY", 1, 1, "h10", "FAILED")
+        self.assertEqual(len(journal.to_frame()), 11)
+        self.assertEqual(len(frame), 10)
+
+    def test_survives_a_restart(self):
+        path = os.path.join(tempfile.mkdtemp(), "trades.db")
+        journal = TradeJournal(path, capacity=2, flush_interval=60)
+        journal.append("XLM/USDC", "BUY", 10, 0.12, "a", "SUCCESS", "op_success", timestamp=datetime(2024, 1, 30, 12))
+        journal.append("XLM/USDC", "SELL", 5, 0.13, "N/A", "FAILED", "op_underfunded")
+        self.assertEqual(journal.flush(), 2)
+        journal.append("XLM/EURC", "BUY", 1, 2.5, "b", "SUCCESS")
+        journal.close()
+
+        reopened = TradeJournal(path, capacity=2)
+        self.addCleanup(reopened.close)
+        frame = reopened.to_frame()
+        self.assertEqual(frame["pair"].tolist(), ["XLM/USDC", "XLM/USDC", "XLM/EURC"])
+        self.assertEqual(frame["code"].tolist()[:2], ["op_success", "op_underfunded"])
+        self.assertTrue(frame["code"].isna().iloc[2])
+        self.assertEqual(frame["timestamp"].iloc[0], datetime(2024, 1, 30, 12))
+        self.assertEqual(reopened.flush(), 0)
+        reopened.append("XLM/USDC", "BUY", 1, 1, "c", "SUCCESS")
+        self.assertEqual(reopened.flush(), 1)